@@ -0,0 +1,93 @@
+"""Benchmark runner.
+
+Usage (from the 'src' directory):
+    python -m benchmarks [--sizes 1000 10000] [--suite sql]
+                         [--baseline baseline.json] [--threshold 0.2]
+                         [--save-baseline baseline.json]
+"""
+
+
+import argparse
+import sys
+
+from benchmarks import (
+    bench_product_usecase,
+    bench_product_validation,
+    bench_record_codec,
+    bench_sql_service,
+    bench_table_io,
+)
+from benchmarks.harness import (
+    compare_to_baseline,
+    format_results,
+    load_baseline,
+    run_suite,
+    save_baseline,
+)
+
+
+# available suites
+SUITES = {
+    "codec": bench_record_codec.CASES,
+    "sql": bench_sql_service.CASES,
+    "usecase": bench_product_usecase.CASES,
+    "validation": bench_product_validation.CASES,
+    "table_io": bench_table_io.CASES,
+}
+
+# default table sizes
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the selected suites and compare them with a baseline.
+
+    Args:
+        argv (list[str] | None): Command line arguments.
+
+    Returns:
+        int: Exit code, 1 if a regression was found else 0.
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--suite", choices=sorted(SUITES), action="append", default=None
+    )
+    parser.add_argument("--iterations", type=int, default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--save-baseline", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    # run selected suites
+    results = []
+    for name in args.suite or sorted(SUITES):
+        results.extend(run_suite(SUITES[name], args.sizes, args.iterations))
+
+    print(format_results(results))
+
+    # store new baseline
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+
+    # compare with stored baseline
+    if args.baseline:
+        regressions = compare_to_baseline(
+            results, load_baseline(args.baseline), args.threshold
+        )
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression.key}: "
+                f"{regression.baseline_ops_per_sec:.1f} -> "
+                f"{regression.current_ops_per_sec:.1f} ops/sec "
+                f"({regression.change:+.1%})"
+            )
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
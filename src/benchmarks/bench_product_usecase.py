@@ -0,0 +1,168 @@
+"""Benchmark suite for ProductCrudUsecase wrappers and Product validation."""
+
+
+from benchmarks.bench_sql_service import (
+    create_reset,
+    delete_reset,
+    fill_database,
+    make_record,
+    target_id,
+    teardown,
+)
+from benchmarks.harness import BenchmarkCase
+from core.services.cache_service.ttl_cache import TTLCache
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.materialized_view import ViewRegistry
+from core.services.sql_service.mysql_service import MySQLService
+from features.product.models.product import Product
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+from features.product.views.product_views import (
+    CATALOGUE_TOTALS,
+    PRODUCTS_PER_PRICE_BUCKET,
+    price_bucket,
+    product_views,
+)
+
+
+class UsecaseState:
+    """State shared by the ProductCrudUsecase cases."""
+
+    def __init__(self, size: int) -> None:
+        fill_database(size)
+        self.size = size
+        self.usecase = ProductCrudUsecase(MySQLService[Product]())
+
+
+def setup(size: int) -> UsecaseState:
+    return UsecaseState(size)
+
+
+def setup_views(size: int) -> UsecaseState:
+    state = UsecaseState(size)
+    feed = ChangeFeed(name="products")
+    service = MySQLService[Product](change_feed=feed)
+    views = ViewRegistry(service, feed)
+    for view in product_views():
+        views.register(view)
+    state.usecase = ProductCrudUsecase(service, views)
+    return state
+
+
+def setup_cached(size: int) -> UsecaseState:
+    state = UsecaseState(size)
+    state.usecase = ProductCrudUsecase(
+        MySQLService[Product](), cache=TTLCache(name="products")
+    )
+    return state
+
+
+def validate(state: UsecaseState, i: int) -> None:
+    Product.model_validate(make_record(state.size + i + 1))
+
+
+def create_product(state: UsecaseState, i: int) -> None:
+    state.usecase.create_product(make_record(state.size + i + 1))
+
+
+def get_product(state: UsecaseState, i: int) -> None:
+    state.usecase.get_product({"id": target_id(state.size, i)})
+
+
+def get_product_hot(state: UsecaseState, i: int) -> None:
+    # 10 products read repeatedly
+    state.usecase.get_product({"id": target_id(state.size, i % 10)})
+
+
+def get_product_missing(state: UsecaseState, i: int) -> None:
+    # 10 missing products read repeatedly
+    state.usecase.get_product({"id": state.size + i % 10 + 1})
+
+
+def get_products(state: UsecaseState, i: int) -> None:
+    state.usecase.get_products({"price": float(i % 100) + 0.99})
+
+
+def get_view(state: UsecaseState, i: int) -> None:
+    state.usecase.get_view(PRODUCTS_PER_PRICE_BUCKET, (i % 10) * 10)
+    state.usecase.get_view(CATALOGUE_TOTALS)
+
+
+def get_view_recomputed(state: UsecaseState, i: int) -> None:
+    # same aggregates as get_view() recomputed from a full read
+    products = state.usecase.get_products({})
+    bucket = (i % 10) * 10
+    sum(price_bucket({"price": p.price}) == bucket for p in products)
+    sum(product.price for product in products) / len(products)
+
+
+def update_product(state: UsecaseState, i: int) -> None:
+    record = make_record(target_id(state.size, i))
+    record["price"] += 1.0
+    state.usecase.update_product(Product(**record))
+
+
+def delete_product(state: UsecaseState, i: int) -> None:
+    state.usecase.delete_product({"id": target_id(state.size, i)})
+
+
+# cases of the suite
+CASES: list[BenchmarkCase] = [
+    BenchmarkCase("product.validate", setup, validate, None, teardown),
+    BenchmarkCase(
+        "usecase.create_product", setup, create_product, create_reset, teardown
+    ),
+    BenchmarkCase("usecase.get_product", setup, get_product, None, teardown),
+    BenchmarkCase(
+        "usecase.get_product_hot", setup, get_product_hot, None, teardown
+    ),
+    BenchmarkCase(
+        "usecase.get_product_hot_cached",
+        setup_cached,
+        get_product_hot,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "usecase.get_product_missing",
+        setup,
+        get_product_missing,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "usecase.get_product_missing_cached",
+        setup_cached,
+        get_product_missing,
+        None,
+        teardown,
+    ),
+    BenchmarkCase("usecase.get_products", setup, get_products, None, teardown),
+    BenchmarkCase("usecase.get_view", setup_views, get_view, None, teardown),
+    BenchmarkCase(
+        "usecase.get_view_recomputed",
+        setup,
+        get_view_recomputed,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "usecase.update_product", setup, update_product, None, teardown
+    ),
+    BenchmarkCase(
+        "usecase.update_product_cached",
+        setup_cached,
+        update_product,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "usecase.update_product_views",
+        setup_views,
+        update_product,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "usecase.delete_product", setup, delete_product, delete_reset, teardown
+    ),
+]
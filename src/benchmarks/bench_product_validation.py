@@ -0,0 +1,45 @@
+"""Benchmark suite comparing single record and bulk Product validation.
+
+The table size of these cases is the number of records validated per call.
+"""
+
+
+from benchmarks.bench_sql_service import make_record
+from benchmarks.harness import BenchmarkCase
+from features.product.models.product import Product
+from features.product.models.product_batch import (
+    validate_product_columns,
+    validate_products,
+)
+
+
+def setup_records(size: int) -> list[dict]:
+    return [make_record(record_id) for record_id in range(1, size + 1)]
+
+
+def setup_columns(size: int) -> dict:
+    records = setup_records(size)
+    return {key: [record[key] for record in records] for key in records[0]}
+
+
+def model_validate(records: list[dict], _: int) -> None:
+    for record in records:
+        Product.model_validate(record)
+
+
+def bulk_records(records: list[dict], _: int) -> None:
+    validate_products(records)
+
+
+def bulk_columns(columns: dict, _: int) -> None:
+    validate_product_columns(columns)
+
+
+# cases of the suite
+CASES: list[BenchmarkCase] = [
+    BenchmarkCase("validation.model_validate", setup_records, model_validate),
+    BenchmarkCase("validation.validate_products", setup_records, bulk_records),
+    BenchmarkCase(
+        "validation.validate_product_columns", setup_columns, bulk_columns
+    ),
+]
@@ -0,0 +1,100 @@
+"""Benchmark suite comparing the Product binary codec with JSON and pickle.
+
+The table size of these cases is the number of products per batch, MB/s
+is computed on the size of each encoding.
+"""
+
+
+import pickle
+from pydantic import TypeAdapter
+from benchmarks.bench_sql_service import make_record
+from benchmarks.harness import BenchmarkCase
+from features.product.models.product import Product
+from features.product.models.product_codec import PRODUCT_CODEC
+
+
+# bulk JSON serializer and validator
+ADAPTER = TypeAdapter(list[Product])
+
+
+class CodecState:
+    """Products and their encodings."""
+
+    def __init__(self, size: int) -> None:
+        self.products = [
+            Product(**make_record(record_id))
+            for record_id in range(1, size + 1)
+        ]
+        self.binary = PRODUCT_CODEC.encode(self.products)
+        self.json = ADAPTER.dump_json(self.products)
+        self.pickle = pickle.dumps(self.products)
+
+
+def setup(size: int) -> CodecState:
+    return CodecState(size)
+
+
+def binary_encode(state: CodecState, _: int) -> None:
+    PRODUCT_CODEC.encode(state.products)
+
+
+def binary_decode(state: CodecState, _: int) -> None:
+    PRODUCT_CODEC.decode(state.binary)
+
+
+def binary_rows(state: CodecState, _: int) -> None:
+    PRODUCT_CODEC.view(state.binary).rows()
+
+
+def json_encode(state: CodecState, _: int) -> None:
+    ADAPTER.dump_json(state.products)
+
+
+def json_decode(state: CodecState, _: int) -> None:
+    ADAPTER.validate_json(state.json)
+
+
+def pickle_encode(state: CodecState, _: int) -> None:
+    pickle.dumps(state.products)
+
+
+def pickle_decode(state: CodecState, _: int) -> None:
+    pickle.loads(state.pickle)
+
+
+def binary_bytes(state: CodecState) -> int:
+    return len(state.binary)
+
+
+def json_bytes(state: CodecState) -> int:
+    return len(state.json)
+
+
+def pickle_bytes(state: CodecState) -> int:
+    return len(state.pickle)
+
+
+# cases of the suite
+CASES: list[BenchmarkCase] = [
+    BenchmarkCase(
+        "codec.binary_encode", setup, binary_encode, None, None, binary_bytes
+    ),
+    BenchmarkCase(
+        "codec.binary_decode", setup, binary_decode, None, None, binary_bytes
+    ),
+    BenchmarkCase(
+        "codec.binary_rows", setup, binary_rows, None, None, binary_bytes
+    ),
+    BenchmarkCase(
+        "codec.json_encode", setup, json_encode, None, None, json_bytes
+    ),
+    BenchmarkCase(
+        "codec.json_decode", setup, json_decode, None, None, json_bytes
+    ),
+    BenchmarkCase(
+        "codec.pickle_encode", setup, pickle_encode, None, None, pickle_bytes
+    ),
+    BenchmarkCase(
+        "codec.pickle_decode", setup, pickle_decode, None, None, pickle_bytes
+    ),
+]
@@ -0,0 +1,542 @@
+"""Benchmark suite for MySQLService, InMemoryService, TieredSQLService
+and LSMService CRUD operations."""
+
+
+import threading
+from benchmarks.harness import BenchmarkCase
+from core.services.sql_service.auto_indexer import AutoIndexer
+from core.services.sql_service.bloom_filtered_sql_service import (
+    BloomFilteredSQLService,
+)
+from core.services.sql_service.in_memory_service import InMemoryService
+from core.services.sql_service.instrumented_sql_service import (
+    InstrumentedSQLService,
+)
+from core.services.sql_service.lsm_service import LSMService
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.optimistic import update_with_retry
+from core.services.sql_service.parallel_scan import ParallelScanner
+from core.services.sql_service.tiered_sql_service import (
+    TieredSQLService,
+    row_bytes,
+)
+from core.services.sql_service.write_behind_sql_service import (
+    WriteBehindSQLService,
+)
+from features.product.models.product import Product
+
+
+def make_record(record_id: int) -> dict:
+    """Return a product record for 'record_id'.
+
+    Prices repeat every 100 rows so that price queries match ~1% of rows.
+    """
+
+    return {
+        "id": record_id,
+        "name": f"product-{record_id}",
+        "price": float(record_id % 100) + 0.99,
+    }
+
+
+def fill_database(size: int) -> None:
+    """Replace DATABASE content with 'size' product records."""
+
+    DATABASE.clear()
+    DATABASE.extend(make_record(record_id) for record_id in range(1, size + 1))
+
+
+def target_id(size: int, i: int) -> int:
+    """Return a spread out, existing id for iteration 'i'."""
+
+    return (i * 7919) % size + 1
+
+
+class SQLServiceState:
+    """State shared by the MySQLService cases."""
+
+    def __init__(self, size: int) -> None:
+        fill_database(size)
+        self.size = size
+        self.service = MySQLService[Product]()
+
+
+def setup(size: int) -> SQLServiceState:
+    return SQLServiceState(size)
+
+
+def setup_instrumented(size: int) -> SQLServiceState:
+    state = SQLServiceState(size)
+    state.service = InstrumentedSQLService[Product](
+        state.service, table="products"
+    )
+    return state
+
+
+def setup_instrumented_disabled(size: int) -> SQLServiceState:
+    state = setup_instrumented(size)
+    state.service.enabled = False
+    return state
+
+
+def setup_bloom(size: int) -> SQLServiceState:
+    state = SQLServiceState(size)
+    state.service = BloomFilteredSQLService[Product](
+        state.service, table="products"
+    )
+    state.service.rebuild()
+    return state
+
+
+def setup_write_behind(size: int) -> SQLServiceState:
+    state = SQLServiceState(size)
+    state.service = WriteBehindSQLService[Product](
+        state.service, table="products", flush_interval=None
+    )
+    return state
+
+
+def setup_memory(
+    size: int,
+    auto_index: AutoIndexer | None = None,
+    scanner: ParallelScanner | None = None,
+) -> SQLServiceState:
+    state = SQLServiceState(size)
+    state.service = InMemoryService[Product](
+        auto_index=auto_index, scanner=scanner
+    )
+    state.service.create_many(
+        [Product(**record) for record in DATABASE]  # type: ignore
+    )
+    DATABASE.clear()
+    return state
+
+
+def setup_memory_indexed(size: int) -> SQLServiceState:
+    state = setup_memory(size)
+    state.service.create_index("price")
+    state.service.create_index("name")
+    return state
+
+
+def setup_memory_auto_index(size: int) -> SQLServiceState:
+    # indexes fields queried by the first 10 full scans
+    return setup_memory(size, AutoIndexer(build_cost=size * 10))
+
+
+def setup_memory_parallel(size: int) -> SQLServiceState:
+    # every full scan runs in the process pool
+    return setup_memory(size, scanner=ParallelScanner(threshold=0))
+
+
+def teardown_scanner(state: SQLServiceState) -> None:
+    state.service.scanner.close()
+    teardown(state)
+
+
+def setup_memory_snapshot(size: int) -> SQLServiceState:
+    # writes keep before images while the snapshot is open
+    state = setup_memory(size)
+    state.snapshot = state.service.snapshot()
+    return state
+
+
+def teardown_snapshot(state: SQLServiceState) -> None:
+    state.snapshot.close()
+    teardown(state)
+
+
+def setup_tiered(size: int, hot_share: float = 0.1) -> SQLServiceState:
+    # hot tier budget of 'hot_share' of the rows
+    state = SQLServiceState(size)
+    budget = int(
+        size * hot_share * row_bytes(tuple(make_record(size).values()))
+    )
+    state.service = TieredSQLService[Product](max_hot_bytes=budget)
+    state.service.create_many(
+        [Product(**record) for record in DATABASE]  # type: ignore
+    )
+    DATABASE.clear()
+    return state
+
+
+def setup_tiered_hot(size: int) -> SQLServiceState:
+    return setup_tiered(size, hot_share=1.0)
+
+
+def teardown_close(state: SQLServiceState) -> None:
+    state.service.close()
+    teardown(state)
+
+
+def setup_lsm(size: int) -> SQLServiceState:
+    # rows compacted into level 1, writes go to the memtable
+    state = SQLServiceState(size)
+    state.service = LSMService[Product]()
+    state.service.create_many(
+        [Product(**record) for record in DATABASE]  # type: ignore
+    )
+    state.service.flush()
+    state.service.compact()
+    DATABASE.clear()
+    return state
+
+
+def start_hot_writer(state: SQLServiceState) -> SQLServiceState:
+    # a second writer keeps updating id 1, optimistic updates of id 1
+    # conflict with it and retry
+    state.stop = threading.Event()
+
+    def write() -> None:
+        while not state.stop.is_set():
+            update_with_retry(state.service, 1, raise_price, retries=1000)
+
+    state.writer = threading.Thread(target=write, daemon=True)
+    state.writer.start()
+    return state
+
+
+def setup_contended(size: int) -> SQLServiceState:
+    return start_hot_writer(SQLServiceState(size))
+
+
+def setup_memory_contended(size: int) -> SQLServiceState:
+    return start_hot_writer(setup_memory(size))
+
+
+def teardown_contended(state: SQLServiceState) -> None:
+    state.stop.set()
+    state.writer.join()
+    teardown(state)
+
+
+def teardown(_: SQLServiceState) -> None:
+    DATABASE.clear()
+
+
+def create(state: SQLServiceState, i: int) -> None:
+    state.service.create(Product(**make_record(state.size + i + 1)))
+
+
+def create_reset(_: SQLServiceState, __: int) -> None:
+    DATABASE.pop()
+
+
+def read_single(state: SQLServiceState, i: int) -> None:
+    state.service.read_single({"id": target_id(state.size, i)})
+
+
+def read_single_miss(state: SQLServiceState, _: int) -> None:
+    state.service.read_single({"id": 0})
+
+
+def read_multiple(state: SQLServiceState, i: int) -> None:
+    state.service.read_multiple({"price": float(i % 100) + 0.99})
+
+
+def read_multiple_fields(state: SQLServiceState, i: int) -> None:
+    record_id = target_id(state.size, i)
+    state.service.read_multiple(
+        {"price": float(record_id % 100) + 0.99, "name": f"product-{i}"}
+    )
+
+
+def delete_miss(state: SQLServiceState, i: int) -> None:
+    state.service.delete({"price": float(i % 100) + 0.5})
+
+
+def delete_by_name(state: SQLServiceState, i: int) -> None:
+    # full scan matching a single row
+    state.service.delete({"name": f"product-{target_id(state.size, i)}"})
+
+
+def update_read_multiple(state: SQLServiceState, i: int) -> None:
+    # a write between every full scan
+    record_id = target_id(state.size, i)
+    price = float(i % 100) + 0.99
+    state.service.update(
+        Product(id=record_id, name=f"product-{record_id}", price=price)
+    )
+    state.service.read_multiple({"price": price})
+
+
+def snapshot_read_multiple(state: SQLServiceState, i: int) -> None:
+    with state.service.snapshot() as snapshot:
+        snapshot.read_multiple({"price": float(i % 100) + 0.99})
+
+
+def read_range(state: SQLServiceState, i: int) -> None:
+    start = target_id(state.size, i)
+    state.service.read_range(start, start + 100)
+
+
+def read_by_ids(state: SQLServiceState, i: int) -> None:
+    state.service.read_by_ids(
+        [target_id(state.size, i + offset) for offset in range(50)]
+    )
+
+
+def update(state: SQLServiceState, i: int) -> None:
+    record = make_record(target_id(state.size, i))
+    record["price"] += 1.0
+    state.service.update(Product(**record))
+
+
+def raise_price(product: Product) -> Product:
+    return product.model_copy(update={"price": product.price + 1.0})
+
+
+def update_optimistic(state: SQLServiceState, i: int) -> None:
+    update_with_retry(
+        state.service, target_id(state.size, i), raise_price, retries=1000
+    )
+
+
+def update_optimistic_hot(state: SQLServiceState, _: int) -> None:
+    update_with_retry(state.service, 1, raise_price, retries=1000)
+
+
+def delete(state: SQLServiceState, i: int) -> None:
+    state.service.delete({"id": target_id(state.size, i)})
+
+
+def delete_reset(state: SQLServiceState, i: int) -> None:
+    DATABASE.append(make_record(target_id(state.size, i)))
+
+
+def memory_create_reset(state: SQLServiceState, i: int) -> None:
+    state.service.delete({"id": state.size + i + 1})
+
+
+def memory_delete_reset(state: SQLServiceState, i: int) -> None:
+    state.service.create(Product(**make_record(target_id(state.size, i))))
+
+
+# cases of the suite
+CASES: list[BenchmarkCase] = [
+    BenchmarkCase("sql.create", setup, create, create_reset, teardown),
+    BenchmarkCase("sql.read_single", setup, read_single, None, teardown),
+    BenchmarkCase(
+        "sql.read_single_miss", setup, read_single_miss, None, teardown
+    ),
+    BenchmarkCase("sql.read_multiple", setup, read_multiple, None, teardown),
+    BenchmarkCase(
+        "sql.create_bloom", setup_bloom, create, create_reset, teardown
+    ),
+    BenchmarkCase(
+        "sql.read_single_bloom", setup_bloom, read_single, None, teardown
+    ),
+    BenchmarkCase(
+        "sql.read_single_miss_bloom",
+        setup_bloom,
+        read_single_miss,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "sql.read_multiple_fields", setup, read_multiple_fields, None, teardown
+    ),
+    BenchmarkCase("sql.delete_miss", setup, delete_miss, None, teardown),
+    BenchmarkCase("sql.read_by_ids", setup, read_by_ids, None, teardown),
+    BenchmarkCase("sql.update", setup, update, None, teardown),
+    BenchmarkCase("sql.delete", setup, delete, delete_reset, teardown),
+    BenchmarkCase(
+        "sql.update_write_behind", setup_write_behind, update, None, teardown
+    ),
+    BenchmarkCase(
+        "sql.update_optimistic", setup, update_optimistic, None, teardown
+    ),
+    BenchmarkCase(
+        "sql.update_optimistic_contended",
+        setup_contended,
+        update_optimistic_hot,
+        None,
+        teardown_contended,
+    ),
+    BenchmarkCase(
+        "memory.create", setup_memory, create, memory_create_reset, teardown
+    ),
+    BenchmarkCase(
+        "memory.read_single", setup_memory, read_single, None, teardown
+    ),
+    BenchmarkCase(
+        "memory.read_multiple", setup_memory, read_multiple, None, teardown
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_fields",
+        setup_memory,
+        read_multiple_fields,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.delete_miss", setup_memory, delete_miss, None, teardown
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_parallel",
+        setup_memory_parallel,
+        read_multiple,
+        None,
+        teardown_scanner,
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_fields_parallel",
+        setup_memory_parallel,
+        read_multiple_fields,
+        None,
+        teardown_scanner,
+    ),
+    BenchmarkCase(
+        "memory.delete_miss_parallel",
+        setup_memory_parallel,
+        delete_miss,
+        None,
+        teardown_scanner,
+    ),
+    BenchmarkCase(
+        "memory.delete_by_name",
+        setup_memory,
+        delete_by_name,
+        memory_delete_reset,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.delete_by_name_parallel",
+        setup_memory_parallel,
+        delete_by_name,
+        memory_delete_reset,
+        teardown_scanner,
+    ),
+    BenchmarkCase(
+        "memory.update_read_multiple",
+        setup_memory,
+        update_read_multiple,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.update_read_multiple_parallel",
+        setup_memory_parallel,
+        update_read_multiple,
+        None,
+        teardown_scanner,
+    ),
+    BenchmarkCase(
+        "memory.read_by_ids", setup_memory, read_by_ids, None, teardown
+    ),
+    BenchmarkCase("memory.update", setup_memory, update, None, teardown),
+    BenchmarkCase(
+        "memory.delete", setup_memory, delete, memory_delete_reset, teardown
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_indexed",
+        setup_memory_indexed,
+        read_multiple,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_fields_indexed",
+        setup_memory_indexed,
+        read_multiple_fields,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.read_multiple_fields_auto_index",
+        setup_memory_auto_index,
+        read_multiple_fields,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.snapshot_read_multiple",
+        setup_memory,
+        snapshot_read_multiple,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.update_snapshot_open",
+        setup_memory_snapshot,
+        update,
+        None,
+        teardown_snapshot,
+    ),
+    BenchmarkCase(
+        "memory.update_indexed", setup_memory_indexed, update, None, teardown
+    ),
+    BenchmarkCase(
+        "memory.update_optimistic",
+        setup_memory,
+        update_optimistic,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "memory.update_optimistic_contended",
+        setup_memory_contended,
+        update_optimistic_hot,
+        None,
+        teardown_contended,
+    ),
+    BenchmarkCase(
+        "tiered.read_single_hot",
+        setup_tiered_hot,
+        read_single,
+        None,
+        teardown_close,
+    ),
+    BenchmarkCase(
+        "tiered.read_single", setup_tiered, read_single, None, teardown_close
+    ),
+    BenchmarkCase(
+        "tiered.read_single_miss",
+        setup_tiered,
+        read_single_miss,
+        None,
+        teardown_close,
+    ),
+    BenchmarkCase(
+        "tiered.read_multiple",
+        setup_tiered,
+        read_multiple,
+        None,
+        teardown_close,
+    ),
+    BenchmarkCase("tiered.update", setup_tiered, update, None, teardown_close),
+    BenchmarkCase(
+        "lsm.create", setup_lsm, create, memory_create_reset, teardown_close
+    ),
+    BenchmarkCase(
+        "lsm.read_single", setup_lsm, read_single, None, teardown_close
+    ),
+    BenchmarkCase(
+        "lsm.read_single_miss",
+        setup_lsm,
+        read_single_miss,
+        None,
+        teardown_close,
+    ),
+    BenchmarkCase(
+        "lsm.read_multiple", setup_lsm, read_multiple, None, teardown_close
+    ),
+    BenchmarkCase(
+        "lsm.read_range", setup_lsm, read_range, None, teardown_close
+    ),
+    BenchmarkCase("lsm.update", setup_lsm, update, None, teardown_close),
+    BenchmarkCase(
+        "sql.read_single_instrumented",
+        setup_instrumented,
+        read_single,
+        None,
+        teardown,
+    ),
+    BenchmarkCase(
+        "sql.read_single_instrumented_disabled",
+        setup_instrumented_disabled,
+        read_single,
+        None,
+        teardown,
+    ),
+]
@@ -0,0 +1,93 @@
+"""Benchmark suite for NDJSON export and import of a product table.
+
+MB/s is computed on uncompressed NDJSON bytes.
+"""
+
+
+import os
+import shutil
+import tempfile
+from benchmarks.bench_sql_service import fill_database
+from benchmarks.harness import BenchmarkCase
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.ndjson_table import (
+    export_ndjson,
+    import_ndjson,
+)
+from features.product.models.product import Product
+
+
+class TableIOState:
+    """State shared by the NDJSON cases."""
+
+    def __init__(self, size: int, extension: str) -> None:
+        fill_database(size)
+        self.service = MySQLService[Product]()
+        self.directory = tempfile.mkdtemp(prefix="bench_table_io_")
+        self.path = os.path.join(self.directory, "products" + extension)
+        # uncompressed bytes of the exported table
+        self.bytes = export_ndjson(self.service, Product, self.path).bytes
+
+
+def setup_export(size: int) -> TableIOState:
+    return TableIOState(size, ".ndjson")
+
+
+def setup_export_gzip(size: int) -> TableIOState:
+    return TableIOState(size, ".ndjson.gz")
+
+
+def setup_import(size: int) -> TableIOState:
+    state = TableIOState(size, ".ndjson")
+    DATABASE.clear()
+    return state
+
+
+def teardown(state: TableIOState) -> None:
+    DATABASE.clear()
+    shutil.rmtree(state.directory, ignore_errors=True)
+
+
+def export(state: TableIOState, _: int) -> None:
+    export_ndjson(state.service, Product, state.path)
+
+
+def import_(state: TableIOState, _: int) -> None:
+    import_ndjson(state.service, Product, state.path)
+
+
+def import_reset(_: TableIOState, __: int) -> None:
+    DATABASE.clear()
+
+
+def payload_bytes(state: TableIOState) -> int:
+    return state.bytes
+
+
+# cases of the suite
+CASES: list[BenchmarkCase] = [
+    BenchmarkCase(
+        "table_io.export_ndjson",
+        setup_export,
+        export,
+        None,
+        teardown,
+        payload_bytes,
+    ),
+    BenchmarkCase(
+        "table_io.export_ndjson_gzip",
+        setup_export_gzip,
+        export,
+        None,
+        teardown,
+        payload_bytes,
+    ),
+    BenchmarkCase(
+        "table_io.import_ndjson",
+        setup_import,
+        import_,
+        import_reset,
+        teardown,
+        payload_bytes,
+    ),
+]
@@ -0,0 +1,320 @@
+"""This file includes the micro-benchmark harness used by all suites."""
+
+
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+
+# version of the stored baseline format
+BASELINE_VERSION = 1
+
+
+@dataclass
+class BenchmarkCase:
+    """A single benchmark case.
+
+    'setup' builds the state for a table of 'size' rows, 'operation' is the
+    timed call, 'reset' (untimed) restores the state after every call and
+    'teardown' releases the state once the case is finished. Cases moving
+    data set 'payload_bytes' to the bytes processed per call, read from the
+    state after the timing pass, to report MB/s.
+    """
+
+    name: str
+    setup: Callable[[int], Any]
+    operation: Callable[[Any, int], Any]
+    reset: Callable[[Any, int], None] | None = None
+    teardown: Callable[[Any], None] | None = None
+    payload_bytes: Callable[[Any], int] | None = None
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of a single benchmark case at a single table size."""
+
+    name: str
+    size: int
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_kb: float
+    mb_per_sec: float | None = None
+
+    @property
+    def key(self) -> str:
+        """Unique key of the result inside a baseline."""
+
+        return f"{self.name}[{self.size}]"
+
+
+@dataclass
+class Regression:
+    """Benchmark result slower than its baseline by more than threshold."""
+
+    key: str
+    baseline_ops_per_sec: float
+    current_ops_per_sec: float
+
+    @property
+    def change(self) -> float:
+        """Relative throughput change, negative when slower."""
+
+        return self.current_ops_per_sec / self.baseline_ops_per_sec - 1.0
+
+
+def default_iterations(size: int) -> int:
+    """Number of timed calls for a table of 'size' rows.
+
+    Keeps the total number of rows touched per case roughly constant so that
+    large tables finish in reasonable time.
+
+    Args:
+        size (int): Number of rows in the table.
+
+    Returns:
+        int: Number of iterations.
+    """
+
+    return max(5, min(1000, 2_000_000 // max(size, 1)))
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Return nearest-rank percentile of 'samples'.
+
+    Args:
+        samples (list[float]): Measured values.
+        fraction (float): Percentile between 0.0 and 1.0.
+
+    Returns:
+        float: Percentile value, 0.0 if there are no samples.
+    """
+
+    # no samples
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    # nearest rank index
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def run_case(
+    case: BenchmarkCase,
+    size: int,
+    iterations: int | None = None,
+) -> BenchmarkResult:
+    """Run a benchmark case against a table of 'size' rows.
+
+    Latency is measured without tracing, peak memory is measured in a
+    separate pass with tracemalloc so that it does not skew the timings.
+
+    Args:
+        case (BenchmarkCase): Case to run.
+        size (int): Number of rows in the table.
+        iterations (int | None): Timed calls, defaults to
+            default_iterations(size).
+
+    Returns:
+        BenchmarkResult: Measurements of the case.
+    """
+
+    # resolve iterations
+    if iterations is None:
+        iterations = default_iterations(size)
+
+    state = case.setup(size)
+    try:
+        # timing pass
+        samples: list[float] = []
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i in range(iterations):
+                start = time.perf_counter()
+                case.operation(state, i)
+                samples.append(time.perf_counter() - start)
+
+                # restore state outside of the timed section
+                if case.reset is not None:
+                    case.reset(state, i)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        # bytes processed per call
+        payload = (
+            case.payload_bytes(state)
+            if case.payload_bytes is not None
+            else None
+        )
+
+        # memory pass
+        tracemalloc.start()
+        try:
+            for i in range(min(iterations, 10)):
+                case.operation(state, i)
+                if case.reset is not None:
+                    case.reset(state, i)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        if case.teardown is not None:
+            case.teardown(state)
+
+    total = sum(samples)
+    ops_per_sec = iterations / total if total > 0 else float("inf")
+    mb_per_sec = payload * ops_per_sec / 1e6 if payload is not None else None
+
+    return BenchmarkResult(
+        name=case.name,
+        size=size,
+        iterations=iterations,
+        ops_per_sec=ops_per_sec,
+        p50_ms=percentile(samples, 0.50) * 1000,
+        p99_ms=percentile(samples, 0.99) * 1000,
+        peak_memory_kb=peak / 1024,
+        mb_per_sec=mb_per_sec,
+    )
+
+
+def run_suite(
+    cases: list[BenchmarkCase],
+    sizes: list[int],
+    iterations: int | None = None,
+) -> list[BenchmarkResult]:
+    """Run every case of a suite for every table size.
+
+    Args:
+        cases (list[BenchmarkCase]): Cases to run.
+        sizes (list[int]): Table sizes.
+        iterations (int | None): Timed calls per case, defaults to
+            default_iterations(size).
+
+    Returns:
+        list[BenchmarkResult]: Measurements in run order.
+    """
+
+    return [
+        run_case(case, size, iterations) for size in sizes for case in cases
+    ]
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    """Format results as a plain text table.
+
+    Args:
+        results (list[BenchmarkResult]): Measurements.
+
+    Returns:
+        str: Text table.
+    """
+
+    lines = [
+        f"{'benchmark':<48} {'ops/sec':>12} {'p50 ms':>10} "
+        f"{'p99 ms':>10} {'peak KB':>10} {'MB/s':>8}"
+    ]
+    for result in results:
+        mb_per_sec = (
+            f"{result.mb_per_sec:.1f}"
+            if result.mb_per_sec is not None
+            else "-"
+        )
+        lines.append(
+            f"{result.key:<48} {result.ops_per_sec:>12.1f} "
+            f"{result.p50_ms:>10.4f} {result.p99_ms:>10.4f} "
+            f"{result.peak_memory_kb:>10.1f} {mb_per_sec:>8}"
+        )
+
+    return "\n".join(lines)
+
+
+def save_baseline(results: list[BenchmarkResult], path: str) -> None:
+    """Store results as a JSON baseline.
+
+    Args:
+        results (list[BenchmarkResult]): Measurements.
+        path (str): Baseline file path.
+    """
+
+    data = {
+        "version": BASELINE_VERSION,
+        "results": {result.key: asdict(result) for result in results},
+    }
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> dict[str, BenchmarkResult]:
+    """Load a JSON baseline stored by save_baseline().
+
+    Args:
+        path (str): Baseline file path.
+
+    Raises:
+        ValueError: If baseline version is not supported.
+
+    Returns:
+        dict[str, BenchmarkResult]: Results by key.
+    """
+
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+
+    # verify baseline version
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(
+            f"unsupported baseline version: {data.get('version')}"
+        )
+
+    return {
+        key: BenchmarkResult(**value) for key, value in data["results"].items()
+    }
+
+
+def compare_to_baseline(
+    results: list[BenchmarkResult],
+    baseline: dict[str, BenchmarkResult],
+    threshold: float = 0.2,
+) -> list[Regression]:
+    """Find results slower than their baseline by more than 'threshold'.
+
+    Results without a baseline entry are ignored.
+
+    Args:
+        results (list[BenchmarkResult]): Current measurements.
+        baseline (dict[str, BenchmarkResult]): Baseline results by key.
+        threshold (float): Allowed relative throughput drop.
+
+    Returns:
+        list[Regression]: Regressions found, [] if none.
+    """
+
+    regressions: list[Regression] = []
+
+    for result in results:
+        previous = baseline.get(result.key)
+
+        # no baseline for this result
+        if previous is None:
+            continue
+
+        # throughput dropped more than allowed
+        if result.ops_per_sec < previous.ops_per_sec * (1.0 - threshold):
+            regressions.append(
+                Regression(
+                    key=result.key,
+                    baseline_ops_per_sec=previous.ops_per_sec,
+                    current_ops_per_sec=result.ops_per_sec,
+                )
+            )
+
+    return regressions
@@ -0,0 +1,228 @@
+"""Test Cases
+
+- percentile() should return 0.0 for no samples
+- percentile() should return nearest-rank percentile
+
+- run_case() should call setup, operation, reset and teardown
+- run_case() should return measurements of the case
+- run_case() should report MB/s of cases with 'payload_bytes'
+
+- save_baseline() and load_baseline() should round trip results
+- load_baseline() should raise ValueError for unsupported version
+
+- compare_to_baseline() should report results slower than threshold
+- compare_to_baseline() should ignore results without baseline
+
+- every suite case should run and leave DATABASE empty
+- main() should return 1 if a regression is found
+"""
+
+
+import json
+import pytest
+from benchmarks.__main__ import SUITES, main
+from benchmarks.harness import (
+    BenchmarkCase,
+    BenchmarkResult,
+    compare_to_baseline,
+    load_baseline,
+    percentile,
+    run_case,
+    run_suite,
+    save_baseline,
+)
+from core.services.sql_service.mysql_service import DATABASE
+
+
+def make_result(ops_per_sec: float, name: str = "case") -> BenchmarkResult:
+    """Return a result with given throughput."""
+
+    return BenchmarkResult(
+        name=name,
+        size=10,
+        iterations=5,
+        ops_per_sec=ops_per_sec,
+        p50_ms=1.0,
+        p99_ms=2.0,
+        peak_memory_kb=3.0,
+    )
+
+
+def test_percentile_no_samples():
+    """percentile() should return 0.0 for no samples."""
+
+    # verify result
+    assert percentile([], 0.5) == 0.0
+
+
+def test_percentile_nearest_rank():
+    """percentile() should return nearest-rank percentile."""
+
+    # samples 1..100
+    samples = [float(i) for i in range(100, 0, -1)]
+
+    # verify results
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile(samples, 1.0) == 100.0
+
+
+def test_run_case_calls():
+    """run_case() should call setup, operation, reset and teardown."""
+
+    calls: list[str] = []
+
+    # create case recording calls
+    case = BenchmarkCase(
+        name="calls",
+        setup=lambda size: calls.append(f"setup:{size}") or "state",
+        operation=lambda state, i: calls.append(f"op:{state}:{i}"),
+        reset=lambda state, i: calls.append(f"reset:{i}"),
+        teardown=lambda state: calls.append(f"teardown:{state}"),
+    )
+
+    # run case
+    run_case(case, size=7, iterations=2)
+
+    # verify calls of the timing pass
+    assert calls[:5] == [
+        "setup:7",
+        "op:state:0",
+        "reset:0",
+        "op:state:1",
+        "reset:1",
+    ]
+    # verify teardown called last
+    assert calls[-1] == "teardown:state"
+
+
+def test_run_case_result():
+    """run_case() should return measurements of the case."""
+
+    # create case allocating memory
+    case = BenchmarkCase(
+        name="alloc",
+        setup=lambda size: None,
+        operation=lambda state, i: bytearray(64 * 1024),
+    )
+
+    # run case
+    result = run_case(case, size=3, iterations=20)
+
+    # verify result
+    assert result.key == "alloc[3]"
+    assert result.iterations == 20
+    assert result.ops_per_sec > 0
+    assert result.p50_ms <= result.p99_ms
+    assert result.peak_memory_kb >= 64
+    assert result.mb_per_sec is None
+
+
+def test_run_case_mb_per_sec():
+    """run_case() should report MB/s of cases with 'payload_bytes'."""
+
+    # create case processing 1 MB per call
+    case = BenchmarkCase(
+        name="payload",
+        setup=lambda size: None,
+        operation=lambda state, i: None,
+        payload_bytes=lambda state: 1_000_000,
+    )
+
+    # run case
+    result = run_case(case, size=3, iterations=5)
+
+    # verify throughput
+    assert result.mb_per_sec == pytest.approx(result.ops_per_sec)
+
+
+def test_baseline_round_trip(tmp_path):
+    """save_baseline() and load_baseline() should round trip results."""
+
+    # store baseline
+    path = str(tmp_path / "baseline.json")
+    save_baseline([make_result(100.0)], path)
+
+    # verify loaded baseline
+    assert load_baseline(path) == {"case[10]": make_result(100.0)}
+
+
+def test_load_baseline_version(tmp_path):
+    """load_baseline() should raise ValueError for unsupported version."""
+
+    # store baseline with unknown version
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"version": 99, "results": {}}))
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        load_baseline(str(path))
+
+    # verify error message
+    assert "unsupported baseline version: 99" in str(exc_info.value)
+
+
+def test_compare_to_baseline_regression():
+    """compare_to_baseline() should report results slower than threshold."""
+
+    baseline = {"case[10]": make_result(100.0)}
+
+    # within threshold
+    assert compare_to_baseline([make_result(85.0)], baseline, 0.2) == []
+
+    # slower than threshold
+    regressions = compare_to_baseline([make_result(50.0)], baseline, 0.2)
+
+    # verify regression
+    assert len(regressions) == 1
+    assert regressions[0].key == "case[10]"
+    assert regressions[0].change == pytest.approx(-0.5)
+
+
+def test_compare_to_baseline_missing():
+    """compare_to_baseline() should ignore results without baseline."""
+
+    # verify result
+    assert compare_to_baseline([make_result(1.0, "new")], {}, 0.2) == []
+
+
+def test_suites_run():
+    """Every suite case should run and leave DATABASE empty."""
+
+    cases = [case for suite in SUITES.values() for case in suite]
+
+    # run all cases on a small table
+    results = run_suite(cases, sizes=[50], iterations=5)
+
+    # verify results
+    assert len(results) == len(cases)
+    assert all(result.ops_per_sec > 0 for result in results)
+
+    # verify database cleaned up
+    assert DATABASE == []
+
+
+def test_main_regression(tmp_path, capsys):
+    """main() should return 1 if a regression is found."""
+
+    # store baseline with unreachable throughput
+    path = str(tmp_path / "baseline.json")
+    save_baseline([make_result(float("inf"), "sql.read_single")], path)
+
+    # run suite against the baseline
+    code = main(
+        [
+            "--suite",
+            "sql",
+            "--sizes",
+            "10",
+            "--iterations",
+            "5",
+            "--baseline",
+            path,
+        ]
+    )
+
+    # verify exit code and report
+    assert code == 1
+    assert "REGRESSION sql.read_single[10]" in capsys.readouterr().out
@@ -0,0 +1,162 @@
+"""This file includes a small dependency injection container.
+
+Providers are registered by name and services are constructed on first use,
+so importing the container does not open pools or files. Every provider has
+a scope:
+
+- SINGLETON: one instance per container
+- THREAD: one instance per thread
+- REQUEST: one instance per 'with container.request_scope():' block
+"""
+
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+
+# scopes
+SINGLETON = "singleton"
+THREAD = "thread"
+REQUEST = "request"
+SCOPES = (SINGLETON, THREAD, REQUEST)
+
+
+@dataclass(frozen=True)
+class Provider:
+    """Registered factory of a service."""
+
+    # factory receiving the container to resolve its own dependencies
+    factory: Callable[["Container"], Any]
+    # one of SCOPES
+    scope: str
+
+
+class Container:
+    """Registry of lazily constructed services."""
+
+    def __init__(self) -> None:
+        self.__providers: dict[str, Provider] = {}
+        # singleton instances
+        self.__singletons: dict[str, Any] = {}
+        # per-thread instances
+        self.__thread = threading.local()
+        # per-request instances, None outside of a request scope
+        self.__request: ContextVar[dict[str, Any] | None] = ContextVar(
+            f"request_scope_{id(self)}", default=None
+        )
+        self.__lock = threading.RLock()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[["Container"], Any],
+        scope: str = SINGLETON,
+    ) -> None:
+        """Register a service provider, replacing any existing one.
+
+        Args:
+            name (str): Service name.
+            factory (Callable[[Container], Any]): Builds the service.
+            scope (str): One of SINGLETON, THREAD or REQUEST.
+
+        Raises:
+            TypeError: If factory is not callable.
+            ValueError: If scope is unknown.
+        """
+
+        # verify arguments
+        if not callable(factory):
+            raise TypeError("'factory' should be callable.")
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope: {scope}")
+
+        with self.__lock:
+            self.__providers[name] = Provider(factory, scope)
+            self.__singletons.pop(name, None)
+
+    def resolve(self, name: str) -> Any:
+        """Return the service instance, constructing it on first use.
+
+        Args:
+            name (str): Service name.
+
+        Raises:
+            LookupError: If no provider is registered with this name.
+            RuntimeError: If a REQUEST service is resolved outside
+                of a request scope.
+
+        Returns:
+            Any: Service instance.
+        """
+
+        provider = self.__providers.get(name)
+        if provider is None:
+            raise LookupError(f"unknown service: {name}")
+
+        # singleton
+        if provider.scope == SINGLETON:
+            try:
+                return self.__singletons[name]
+            except KeyError:
+                pass
+            with self.__lock:
+                if name not in self.__singletons:
+                    self.__singletons[name] = provider.factory(self)
+                return self.__singletons[name]
+
+        # per thread
+        if provider.scope == THREAD:
+            instances = self.__thread.__dict__
+        # per request
+        else:
+            instances = self.__request.get()
+            if instances is None:
+                raise RuntimeError(
+                    f"'{name}' should be resolved in a request scope."
+                )
+
+        if name not in instances:
+            instances[name] = provider.factory(self)
+        return instances[name]
+
+    def is_resolved(self, name: str) -> bool:
+        """Return True if the service was constructed in the current
+        singleton, thread or request scope."""
+
+        instances = self.__request.get() or {}
+        return (
+            name in self.__singletons
+            or name in self.__thread.__dict__
+            or name in instances
+        )
+
+    @contextmanager
+    def request_scope(self) -> Iterator[None]:
+        """Scope REQUEST services to the 'with' block.
+
+        Scopes are tied to the current context, so concurrent threads and
+        asyncio tasks get their own instances. Nested scopes share the
+        outer instances.
+        """
+
+        # reuse enclosing request scope
+        if self.__request.get() is not None:
+            yield
+            return
+
+        token = self.__request.set({})
+        try:
+            yield
+        finally:
+            self.__request.reset(token)
+
+    def reset(self) -> None:
+        """Drop constructed singletons and current thread instances,
+        providers are kept."""
+
+        with self.__lock:
+            self.__singletons.clear()
+            self.__thread.__dict__.clear()
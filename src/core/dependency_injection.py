@@ -1,16 +1,120 @@
-"""Injection of all the required dependencies."""
+"""Injection of all the required dependencies.
 
+Services are registered in 'container' and constructed on first access,
+e.g. 'dependency_injection.product_crud_usecase', so importing this module
+stays cheap as services are added.
+"""
 
+
+from core.container import Container
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.id_sequence import IdSequence, max_id
+from core.services.sql_service.materialized_view import ViewRegistry
 from core.services.sql_service.sql_service import SQLService
 from core.services.sql_service.mysql_service import MySQLService
+from core.services.sql_service.coalescing_sql_service import (
+    CoalescingSQLService,
+)
+from core.services.sql_service.instrumented_sql_service import (
+    InstrumentedSQLService,
+)
+from core.services.sql_service.slow_query_log import SlowQueryLog
 
 from features.product.models.product import Product
 from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+from features.product.views.product_views import product_views
+
+
+container = Container()
+
+
+# metrics
+container.register("metrics", lambda c: MetricsRegistry())
+container.register("slow_query_log", lambda c: SlowQueryLog())
 
 
 # services
-__product_sql_service: SQLService = MySQLService[Product]()
+container.register(
+    "product_change_feed",
+    lambda c: ChangeFeed(name="products", metrics=c.resolve("metrics")),
+)
+
+
+def product_sql_service(c: Container) -> SQLService:
+    """Build the instrumented product SQL service, concurrent identical
+    reads are coalesced before reaching it and every change is appended
+    to the product change feed."""
+
+    return CoalescingSQLService[Product](
+        InstrumentedSQLService[Product](
+            MySQLService[Product](
+                change_feed=c.resolve("product_change_feed")
+            ),
+            table="products",
+            metrics=c.resolve("metrics"),
+            slow_query_log=c.resolve("slow_query_log"),
+        ),
+        table="products",
+        metrics=c.resolve("metrics"),
+    )
+
+
+container.register("product_sql_service", product_sql_service)
+
+
+def product_view_registry(c: Container) -> ViewRegistry:
+    """Build the product views, maintained from the product change
+    feed."""
+
+    registry = ViewRegistry(
+        c.resolve("product_sql_service"), c.resolve("product_change_feed")
+    )
+    for view in product_views():
+        registry.register(view)
+
+    return registry
+
+
+container.register("product_views", product_view_registry)
+container.register(
+    "product_id_sequence",
+    lambda c: IdSequence(
+        start=max_id(c.resolve("product_sql_service")) + 1,
+        name="products",
+        metrics=c.resolve("metrics"),
+    ),
+)
 
 
 # usecases
-product_crud_usecase = ProductCrudUsecase(__product_sql_service)
+container.register(
+    "product_crud_usecase",
+    lambda c: ProductCrudUsecase(
+        c.resolve("product_sql_service"),
+        views=c.resolve("product_views"),
+        ids=c.resolve("product_id_sequence"),
+    ),
+)
+
+
+# services exposed as module attributes
+__SERVICES = (
+    "metrics",
+    "slow_query_log",
+    "product_change_feed",
+    "product_crud_usecase",
+)
+
+
+def __getattr__(name: str):
+    """Resolve exposed services on first access."""
+
+    if name in __SERVICES:
+        return container.resolve(name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__SERVICES])
@@ -0,0 +1,310 @@
+"""Test Cases
+
+- TTLCache should raise ValueError for invalid durations or size
+- get_or_load() should load missing keys and serve them until their TTL
+  expires
+- None values should expire after 'negative_ttl', never if it is 0
+- Expired values should be served within 'stale_ttl' while a single
+  background refresh reloads them
+- Failed refreshes should keep the stale value
+- Least recently used entries should be evicted past 'max_entries'
+- invalidate(), invalidate_where() and clear() should remove entries and
+  drop loads started before them
+- invalidate_indexed() should remove entries by index key, check only
+  entries without index keys and drop only the loads it matches
+- close() should wait for the refreshes of the default executor
+"""
+
+
+import threading
+import pytest
+from typing import Hashable
+from concurrent.futures import Executor, Future
+from core.services.cache_service.ttl_cache import TTLCache
+
+
+class InlineExecutor(Executor):
+    """Executor running calls in the submitting thread."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class Clock:
+    """Clock moved forward by tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    """Loader returning queued values and counting its calls."""
+
+    def __init__(self, *values) -> None:
+        self.values = list(values)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def make_cache(clock: Clock, **options) -> TTLCache:
+    """Return cache of 10s TTL, 2s negative TTL, refreshing inline."""
+
+    options = {
+        "name": "products",
+        "ttl": 10.0,
+        "negative_ttl": 2.0,
+        "executor": InlineExecutor(),
+        "clock": clock,
+        **options,
+    }
+
+    return TTLCache(**options)
+
+
+def requests(cache: TTLCache, result: str) -> float:
+    """Return number of requests with a result."""
+
+    return cache.metrics.counter_value(
+        "cache_requests_total", {"name": "products", "result": result}
+    )
+
+
+def test_ttl_cache_incorrect():
+    """TTLCache should raise ValueError for invalid durations or size."""
+
+    # verify ValueError raised
+    for options, message in [
+        ({"ttl": 0}, "'ttl' must be a positive number"),
+        ({"negative_ttl": -1}, "'negative_ttl' must not be negative"),
+        ({"stale_ttl": -1}, "'stale_ttl' must not be negative"),
+        ({"max_entries": 0}, "'max_entries' must be a positive integer"),
+    ]:
+        with pytest.raises(ValueError) as exc_info:
+            TTLCache(**options)
+        assert message in str(exc_info.value)
+
+
+def test_ttl():
+    """get_or_load() should load missing keys and serve them until their
+    TTL expires."""
+
+    clock = Clock()
+    cache = make_cache(clock)
+    loader = Loader("a", "b", "c")
+
+    # verify loaded once while fresh
+    assert cache.get_or_load(1, loader) == "a"
+    clock.now = 9.9
+    assert cache.get_or_load(1, loader) == "a"
+    assert loader.calls == 1
+
+    # verify reloaded once expired
+    clock.now = 10.0
+    assert cache.get_or_load(1, loader) == "b"
+    assert (requests(cache, "hit"), requests(cache, "miss")) == (1, 2)
+
+    # verify per entry TTL
+    assert cache.get_or_load(2, loader, ttl=1.0) == "c"
+    clock.now = 11.0
+    assert cache.get_or_load(2, Loader("d")) == "d"
+
+    # verify set values
+    cache.set(3, "e", ttl=0.5)
+    assert cache.get_or_load(3, Loader()) == "e"
+    clock.now = 11.5
+    assert cache.get_or_load(3, Loader("f")) == "f"
+    assert len(cache) == 3
+
+
+def test_negative_ttl():
+    """None values should expire after 'negative_ttl', never if it is
+    0."""
+
+    clock = Clock()
+    cache = make_cache(clock, stale_ttl=5.0)
+    loader = Loader(None, None, "a")
+
+    # verify None served until negative TTL expires, without staleness
+    assert cache.get_or_load(1, loader) is None
+    clock.now = 1.9
+    assert cache.get_or_load(1, loader, ttl=60.0) is None
+    clock.now = 2.0
+    assert cache.get_or_load(1, loader) is None
+    clock.now = 4.0
+    assert cache.get_or_load(1, loader) == "a"
+    assert loader.calls == 3
+    assert requests(cache, "negative_hit") == 1
+
+    # verify negative caching disabled
+    cache = make_cache(clock, negative_ttl=0)
+    loader = Loader(None, None)
+    cache.get_or_load(1, loader)
+    cache.get_or_load(1, loader)
+    assert loader.calls == 2
+    assert len(cache) == 0
+
+
+def test_stale_while_revalidate():
+    """Expired values should be served within 'stale_ttl' while a single
+    background refresh reloads them."""
+
+    clock = Clock()
+    cache = make_cache(clock, stale_ttl=5.0, executor=None)
+    release = threading.Event()
+
+    def slow_loader() -> str:
+        release.wait()
+        return "b"
+
+    cache.set(1, "a")
+
+    # verify stale value served and refreshed once
+    clock.now = 12.0
+    assert cache.get_or_load(1, slow_loader) == "a"
+    assert cache.get_or_load(1, slow_loader) == "a"
+    assert requests(cache, "stale") == 2
+    release.set()
+    cache.close()
+    assert cache.get_or_load(1, slow_loader) == "b"
+    assert requests(cache, "hit") == 1
+    assert (
+        cache.metrics.counter_value(
+            "cache_refreshes_total", {"name": "products"}
+        )
+        == 1
+    )
+
+    # verify values past the stale window are loaded
+    clock.now = 27.0
+    assert cache.get_or_load(1, Loader("c")) == "c"
+    cache.close()
+
+
+def test_refresh_error():
+    """Failed refreshes should keep the stale value."""
+
+    clock = Clock()
+    cache = make_cache(clock, stale_ttl=5.0)
+    cache.set(1, "a")
+
+    # verify stale value kept
+    clock.now = 11.0
+    loader = Loader(RuntimeError("down"), "b")
+    assert cache.get_or_load(1, loader) == "a"
+    assert cache.get_or_load(1, loader) == "a"
+    assert cache.get_or_load(1, loader) == "b"
+    assert (
+        cache.metrics.counter_value(
+            "cache_refresh_errors_total", {"name": "products"}
+        )
+        == 1
+    )
+
+
+def test_eviction():
+    """Least recently used entries should be evicted past
+    'max_entries'."""
+
+    clock = Clock()
+    cache = make_cache(clock, max_entries=2)
+    cache.set(1, "a")
+    cache.set(2, "b")
+
+    # verify least recently used entry evicted
+    cache.get_or_load(1, Loader())
+    cache.set(3, "c")
+    assert len(cache) == 2
+    assert cache.get_or_load(2, Loader("d")) == "d"
+    assert (
+        cache.metrics.counter_value(
+            "cache_evictions_total", {"name": "products"}
+        )
+        == 2
+    )
+
+
+def test_invalidate():
+    """invalidate(), invalidate_where() and clear() should remove entries
+    and drop loads started before them."""
+
+    clock = Clock()
+    cache = make_cache(clock)
+    for key, value in [(1, "a"), (2, None), (3, "c")]:
+        cache.set(key, value)
+
+    # verify entries removed
+    cache.invalidate(1)
+    assert cache.invalidate_where(lambda key, value: value is None) == 1
+    assert cache.get_or_load(1, Loader("d")) == "d"
+    assert cache.get_or_load(2, Loader("e")) == "e"
+    cache.clear()
+    assert len(cache) == 0
+
+    # verify load racing an invalidation not stored
+    def loader() -> str:
+        cache.invalidate(4)
+        return "stale"
+
+    assert cache.get_or_load(4, loader) == "stale"
+    assert cache.get_or_load(4, Loader("fresh")) == "fresh"
+    assert cache.get_or_load(4, Loader()) == "fresh"
+
+    # verify load racing an invalidation of another key stored
+    def other() -> str:
+        cache.invalidate(4)
+        return "kept"
+
+    assert cache.get_or_load(5, other) == "kept"
+    assert cache.get_or_load(5, Loader()) == "kept"
+
+
+def test_invalidate_indexed():
+    """invalidate_indexed() should remove entries by index key, check
+    only entries without index keys and drop only the loads it
+    matches."""
+
+    cache = make_cache(Clock())
+    for key in range(100):
+        cache.set(("id", key), f"product-{key}", index=(key,))
+    cache.set(("name", "a"), "product-1")
+    cache.set(("name", "b"), "product-2")
+    checked = []
+
+    def predicate(key, value) -> bool:
+        checked.append(key)
+        return value == "product-1"
+
+    # verify entries of the index keys and matching unindexed entries
+    assert cache.invalidate_indexed({1, 7}, predicate) == 3
+    assert sorted(checked) == [("name", "a"), ("name", "b")]
+    assert len(cache) == 99
+    assert cache.invalidate_indexed({1, 8}) == 1
+    assert cache.get_or_load(("name", "b"), Loader()) == "product-2"
+
+    # verify loads dropped only if matched
+    def load(key: Hashable, value: str, index: tuple = ()) -> str:
+        def invalidate() -> str:
+            cache.invalidate_indexed({1}, lambda _, cached: cached == "x")
+            return value
+
+        return cache.get_or_load(key, invalidate, index=index)
+
+    assert load(("id", 1), "a", (1,)) == "a"
+    assert load(("id", 200), "x", (200,)) == "x"
+    assert load(("name", "x"), "x") == "x"
+    assert load(("name", "y"), "y") == "y"
+    assert cache.get_or_load(("id", 1), Loader("b"), index=(1,)) == "b"
+    assert cache.get_or_load(("id", 200), Loader()) == "x"
+    assert cache.get_or_load(("name", "x"), Loader("z")) == "z"
+    assert cache.get_or_load(("name", "y"), Loader()) == "y"
@@ -0,0 +1,426 @@
+"""This file includes a TTL cache of loaded values, with negative caching
+and stale-while-revalidate.
+
+Every entry expires after its own TTL. Entries holding None (negative
+results, e.g. a missing product) expire after the shorter 'negative_ttl'
+so that created records show up soon. Other entries expired for less than
+'stale_ttl' seconds are still returned while a single background refresh
+per key reloads them.
+
+Writers of the cached source should call invalidate(), invalidate_where()
+or invalidate_indexed() rather than wait for the TTL. Entries may be
+loaded with index keys, e.g. the record id of a query, so that
+invalidate_indexed() finds them without scanning the cache. Loads started
+before an invalidation are not stored if the invalidation matches their
+key and value, other loads are not affected.
+
+Recorded metrics (label: name):
+    cache_requests_total: Number of get_or_load() calls, also labelled by
+        'result' (hit, negative_hit, stale, miss).
+    cache_refreshes_total: Background refreshes of stale entries.
+    cache_refresh_errors_total: Background refreshes that raised an
+        exception, the stale entry is served until it expires.
+    cache_evictions_total: Least recently used entries evicted past
+        'max_entries'.
+"""
+
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+from core.services.metrics_service.metrics import MetricsRegistry
+
+
+# default TTLs in seconds
+TTL = 60.0
+NEGATIVE_TTL = 5.0
+
+# default number of entries
+MAX_ENTRIES = 10_000
+
+# threads of the default refresh executor
+REFRESH_WORKERS = 4
+
+# invalidations kept for the running loads, every running load is dropped
+# past this number
+MAX_INVALIDATIONS = 1000
+
+
+class TTLCache:
+    """Thread safe cache of values by key.
+
+    Args:
+        name (str): Cache name, label of the metrics.
+        ttl (float): Seconds an entry is fresh, unless set per entry.
+        negative_ttl (float): Seconds a None entry is fresh, 0 disables
+            negative caching.
+        stale_ttl (float): Seconds an expired entry is still served while
+            it is refreshed, 0 disables stale-while-revalidate.
+        max_entries (int): Number of entries.
+        executor (Executor | None): Runs background refreshes, a thread
+            pool is created on first refresh if None.
+        clock (Callable[[], float]): Returns current time in seconds.
+        metrics (MetricsRegistry | None): Metrics registry.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        ttl: float = TTL,
+        negative_ttl: float = NEGATIVE_TTL,
+        stale_ttl: float = 0.0,
+        max_entries: int = MAX_ENTRIES,
+        executor: Executor | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # verify durations and size
+        if ttl <= 0:
+            raise ValueError("'ttl' must be a positive number")
+        if negative_ttl < 0:
+            raise ValueError("'negative_ttl' must not be negative")
+        if stale_ttl < 0:
+            raise ValueError("'stale_ttl' must not be negative")
+        if max_entries <= 0:
+            raise ValueError("'max_entries' must be a positive integer")
+
+        self.name: str = name
+        self.ttl: float = ttl
+        self.negative_ttl: float = negative_ttl
+        self.stale_ttl: float = stale_ttl
+        self.max_entries: int = max_entries
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        self.__clock = clock
+        self.__executor: Executor | None = executor
+        self.__owns_executor: bool = executor is None
+        # (value, expiry time) by key, least recently used first
+        self.__entries: OrderedDict[
+            Hashable, tuple[Any, float]
+        ] = OrderedDict()
+        # cache keys by index key, index keys of indexed cache keys and
+        # cache keys without index keys
+        self.__index: dict[Hashable, set[Hashable]] = {}
+        self.__indexed: dict[Hashable, tuple] = {}
+        self.__unindexed: set[Hashable] = set()
+        # keys with a background refresh running
+        self.__refreshing: set[Hashable] = set()
+        # bumped by invalidations, loads check the invalidations of a
+        # newer generation before they are stored
+        self.__generation: int = 0
+        # number of running loads by generation
+        self.__loads: dict[int, int] = {}
+        # (generation, check(key, index keys, value)) of invalidations
+        # since the oldest running load
+        self.__invalidations: list[tuple[int, Callable[..., bool]]] = []
+        # loads of older generations are not stored
+        self.__floor: int = 0
+        self.__lock = threading.Lock()
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float | None = None,
+        index: tuple = (),
+    ) -> Any:
+        """Return the cached value of a key, load and cache it if missing
+        or expired.
+
+        Args:
+            key (Hashable): Cache key.
+            loader (Callable[[], Any]): Loads the value, also called by
+                background refreshes.
+            ttl (float | None): Seconds the loaded value is fresh, 'ttl'
+                of the cache if None. None values use 'negative_ttl'.
+            index (tuple): Index keys of the entry, see
+                invalidate_indexed().
+
+        Returns:
+            Any: Cached or loaded value.
+        """
+
+        now = self.__clock()
+        result, refresh = "miss", False
+
+        with self.__lock:
+            generation = self.__generation
+            entry = self.__entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if now < expires_at:
+                    result = "hit" if value is not None else "negative_hit"
+                elif value is not None and now < expires_at + self.stale_ttl:
+                    result = "stale"
+                    # single refresh per key
+                    refresh = key not in self.__refreshing
+                    self.__refreshing.add(key)
+                if result != "miss":
+                    self.__entries.move_to_end(key)
+            if result == "miss" or refresh:
+                self.__loads[generation] = self.__loads.get(generation, 0) + 1
+
+        # record request
+        self.metrics.inc(
+            "cache_requests_total", {"name": self.name, "result": result}
+        )
+
+        if result == "miss":
+            try:
+                value = loader()
+                self.__store(key, value, ttl, generation, index)
+            finally:
+                self.__loaded(generation)
+        elif refresh:
+            self.__refresh_executor().submit(
+                self.__refresh, key, loader, ttl, generation, index
+            )
+
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        index: tuple = (),
+    ) -> None:
+        """Cache a value.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value, None is a negative result.
+            ttl (float | None): Seconds the value is fresh, 'ttl' of the
+                cache if None. None values use 'negative_ttl'.
+            index (tuple): Index keys of the entry, see
+                invalidate_indexed().
+        """
+
+        with self.__lock:
+            generation = self.__generation
+
+        self.__store(key, value, ttl, generation, index)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove the entry of a key."""
+
+        with self.__lock:
+            self.__invalidated(lambda other, *_: other == key)
+            self.__remove(key)
+
+    def invalidate_where(
+        self, predicate: Callable[[Hashable, Any], bool]
+    ) -> int:
+        """Remove entries for which predicate(key, value) is True, every
+        entry is checked.
+
+        Returns:
+            int: Number of removed entries.
+        """
+
+        with self.__lock:
+            self.__invalidated(lambda key, _, value: predicate(key, value))
+            keys = [
+                key
+                for key, (value, _) in self.__entries.items()
+                if predicate(key, value)
+            ]
+            for key in keys:
+                self.__remove(key)
+
+        return len(keys)
+
+    def invalidate_indexed(
+        self,
+        index: set,
+        predicate: Callable[[Hashable, Any], bool] | None = None,
+    ) -> int:
+        """Remove entries holding one of the index keys, and entries
+        without index keys for which predicate(key, value) is True.
+
+        Args:
+            index (set): Index keys.
+            predicate (Callable | None): Checks entries without index
+                keys, which are kept if None.
+
+        Returns:
+            int: Number of removed entries.
+        """
+
+        def check(key: Hashable, keys: tuple, value: Any) -> bool:
+            if keys:
+                return not index.isdisjoint(keys)
+            return predicate is not None and predicate(key, value)
+
+        with self.__lock:
+            self.__invalidated(check)
+            keys = {
+                key
+                for index_key in index
+                for key in self.__index.get(index_key, ())
+            }
+            if predicate is not None:
+                keys.update(
+                    key
+                    for key in self.__unindexed
+                    if predicate(key, self.__entries[key][0])
+                )
+            for key in keys:
+                self.__remove(key)
+
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+
+        with self.__lock:
+            self.__generation += 1
+            self.__floor = self.__generation
+            self.__invalidations.clear()
+            self.__entries.clear()
+            self.__index.clear()
+            self.__indexed.clear()
+            self.__unindexed.clear()
+
+    def close(self) -> None:
+        """Wait for running refreshes of the default executor."""
+
+        if self.__owns_executor and self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+
+    def __enter__(self) -> "TTLCache":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __invalidated(self, check: Callable[..., bool]) -> None:
+        """Record an invalidation for the running loads, the lock is
+        held."""
+
+        self.__generation += 1
+        if not self.__loads:
+            return
+
+        self.__invalidations.append((self.__generation, check))
+        if len(self.__invalidations) > MAX_INVALIDATIONS:
+            # drop every running load rather than keep more checks
+            self.__floor = self.__generation
+            self.__invalidations.clear()
+
+    def __loaded(self, generation: int) -> None:
+        """Forget a finished load and the invalidations no running load
+        needs."""
+
+        with self.__lock:
+            self.__loads[generation] -= 1
+            if not self.__loads[generation]:
+                del self.__loads[generation]
+
+            oldest = min(self.__loads, default=self.__generation)
+            invalidations = self.__invalidations
+            while invalidations and invalidations[0][0] <= oldest:
+                invalidations.pop(0)
+
+    def __remove(self, key: Hashable) -> None:
+        """Remove the entry of a key and its index keys, the lock is
+        held."""
+
+        self.__entries.pop(key, None)
+        self.__unindexed.discard(key)
+        for index_key in self.__indexed.pop(key, ()):
+            keys = self.__index[index_key]
+            keys.discard(key)
+            if not keys:
+                del self.__index[index_key]
+
+    def __store(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None,
+        generation: int,
+        index: tuple = (),
+    ) -> None:
+        """Cache a loaded value unless invalidated since it was loaded."""
+
+        if value is None:
+            ttl = self.negative_ttl
+        elif ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+
+        expires_at = self.__clock() + ttl
+
+        with self.__lock:
+            if generation < self.__floor:
+                return
+            for invalidated, check in self.__invalidations:
+                if invalidated > generation and check(key, index, value):
+                    return
+
+            self.__remove(key)
+            self.__entries[key] = (value, expires_at)
+            if index:
+                self.__indexed[key] = index
+                for index_key in index:
+                    self.__index.setdefault(index_key, set()).add(key)
+            else:
+                self.__unindexed.add(key)
+
+            # evict least recently used entries
+            evicted = 0
+            while len(self.__entries) > self.max_entries:
+                self.__remove(next(iter(self.__entries)))
+                evicted += 1
+
+        if evicted:
+            self.metrics.inc(
+                "cache_evictions_total", {"name": self.name}, evicted
+            )
+
+    def __refresh(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float | None,
+        generation: int,
+        index: tuple,
+    ) -> None:
+        """Reload a stale entry in the background."""
+
+        labels = {"name": self.name}
+
+        try:
+            value = loader()
+        except Exception:
+            # stale entry is served until it expires
+            self.metrics.inc("cache_refresh_errors_total", labels)
+        else:
+            self.__store(key, value, ttl, generation, index)
+            self.metrics.inc("cache_refreshes_total", labels)
+        finally:
+            self.__loaded(generation)
+            with self.__lock:
+                self.__refreshing.discard(key)
+
+    def __refresh_executor(self) -> Executor:
+        """Return executor of background refreshes."""
+
+        if self.__executor is None:
+            with self.__lock:
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(
+                        max_workers=REFRESH_WORKERS,
+                        thread_name_prefix=f"cache-{self.name}",
+                    )
+
+        return self.__executor
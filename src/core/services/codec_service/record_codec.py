@@ -0,0 +1,368 @@
+"""This file includes a versioned binary codec for pydantic models with
+scalar fields (int, float, bool) and UTF-8 strings.
+
+Records of a batch are stored column by column so that scalar columns can
+be read in place through 'memoryview.cast()'. Batch layout (little endian):
+
+    header:  magic b"RCD", format version (u8), schema version (u16),
+             record count (u32), padded to 16 bytes
+    columns: int and float fields (i64 / f64), one u32 length column per
+             string field, bool fields (u8), in that order
+    strings: UTF-8 bytes of every string field, concatenated
+
+Decoded batches are views over the original buffer, no field is copied
+until it is read.
+"""
+
+
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Any, Iterable
+from pydantic import BaseModel, TypeAdapter
+
+
+# batch magic bytes
+MAGIC = b"RCD"
+
+# version of the batch layout
+FORMAT_VERSION = 1
+
+# magic, format version, schema version, record count
+_HEADER = struct.Struct("<3sBHI6x")
+
+# array type codes of scalar field types
+_TYPE_CODES: dict[type, str] = {int: "q", float: "d", bool: "B"}
+
+# array type code of string lengths
+_LENGTH_CODE = "I"
+
+# columns are stored little endian
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _pack(code: str, values: list) -> bytes:
+    """Pack a column of values."""
+
+    column = array(code, values)
+    if _BIG_ENDIAN:
+        column.byteswap()
+
+    return column.tobytes()
+
+
+def _unpack(data: memoryview, code: str) -> Any:
+    """Return column values, read in place on little endian hosts."""
+
+    if not _BIG_ENDIAN:
+        return data.cast(code)
+
+    column = array(code, data.tobytes())
+    column.byteswap()
+    return column
+
+
+class RecordCodec[T: BaseModel]:
+    """Binary codec of a pydantic model.
+
+    'schema_version' is written in every batch and checked on decode, bump
+    it whenever the model fields change.
+    """
+
+    def __init__(self, model: type[T], schema_version: int = 1) -> None:
+        # verify model
+        if not (isinstance(model, type) and issubclass(model, BaseModel)):
+            raise TypeError("'model' should be a pydantic model.")
+
+        self.model: type[T] = model
+        self.schema_version: int = schema_version
+
+        # fields in declaration order
+        self.fields: tuple[str, ...] = tuple(model.model_fields)
+        # int and float fields
+        self.scalar_fields: tuple[str, ...] = ()
+        # string fields
+        self.string_fields: tuple[str, ...] = ()
+        # bool fields, stored last to keep 8 and 4 byte columns aligned
+        self.bool_fields: tuple[str, ...] = ()
+        # array type code of every int, float and bool field
+        self.type_codes: dict[str, str] = {}
+
+        for name, field in model.model_fields.items():
+            if field.annotation is bool:
+                self.bool_fields += (name,)
+            elif field.annotation in _TYPE_CODES:
+                self.scalar_fields += (name,)
+            elif field.annotation is str:
+                self.string_fields += (name,)
+                continue
+            else:
+                raise TypeError(f"unsupported field type: {name}")
+
+            code = _TYPE_CODES[field.annotation]  # type: ignore
+            self.type_codes[name] = code
+
+        # strict validation of decoded records
+        self.__adapter = TypeAdapter(list[model])  # type: ignore
+
+    def encode(self, records: Iterable[T | dict[str, Any]]) -> bytes:
+        """Encode records in a single batch.
+
+        Args:
+            records (Iterable[T | dict[str, Any]]): Models or dicts
+                holding every field of the model.
+
+        Raises:
+            ValueError: If a value cannot be packed.
+
+        Returns:
+            bytes: Encoded batch.
+        """
+
+        # field values of every record
+        rows = [
+            record if isinstance(record, dict) else record.__dict__
+            for record in records
+        ]
+
+        parts: list[bytes] = [
+            _HEADER.pack(MAGIC, FORMAT_VERSION, self.schema_version, len(rows))
+        ]
+        strings: list[bytes] = []
+
+        try:
+            # int and float columns
+            for name in self.scalar_fields:
+                values = [row[name] for row in rows]
+                parts.append(_pack(self.type_codes[name], values))
+
+            # string length columns
+            for name in self.string_fields:
+                texts = [row[name] for row in rows]
+                data = "".join(texts).encode()
+                sizes = list(map(len, texts))
+                # non ascii column, character and byte lengths differ
+                if len(data) != sum(sizes):
+                    sizes = [len(text.encode()) for text in texts]
+                parts.append(_pack(_LENGTH_CODE, sizes))
+                strings.append(data)
+
+            # bool columns
+            for name in self.bool_fields:
+                values = [row[name] for row in rows]
+                parts.append(_pack(self.type_codes[name], values))
+        except (TypeError, KeyError, OverflowError) as error:
+            raise ValueError(f"cannot encode record: {error!r}") from None
+
+        return b"".join(parts + strings)
+
+    def view(self, buffer: bytes | bytearray | memoryview) -> "RecordBatch":
+        """Return a zero-copy view over an encoded batch.
+
+        Args:
+            buffer (bytes | bytearray | memoryview): Encoded batch.
+
+        Raises:
+            ValueError: If buffer is not a valid batch of this codec.
+
+        Returns:
+            RecordBatch: View over the batch.
+        """
+
+        return RecordBatch(self, buffer)
+
+    def decode(self, buffer: bytes | bytearray | memoryview) -> list[T]:
+        """Decode and strictly validate every record of a batch.
+
+        Args:
+            buffer (bytes | bytearray | memoryview): Encoded batch.
+
+        Raises:
+            ValueError: If buffer is not a valid batch of this codec.
+            ValidationError: If a decoded record is not a valid model.
+
+        Returns:
+            list[T]: Models in encoding order.
+        """
+
+        return self.__adapter.validate_python(
+            self.view(buffer).rows(), strict=True
+        )
+
+
+class RecordBatch:
+    """Zero-copy view over a batch encoded by RecordCodec."""
+
+    def __init__(
+        self,
+        codec: RecordCodec,
+        buffer: bytes | bytearray | memoryview,
+    ) -> None:
+        self.codec: RecordCodec = codec
+        self.buffer: memoryview = memoryview(buffer).cast("B")
+
+        # verify header
+        if len(self.buffer) < _HEADER.size:
+            raise ValueError("truncated record batch")
+        magic, version, schema_version, count = _HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC:
+            raise ValueError("not a record batch")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported format version: {version}")
+        if schema_version != codec.schema_version:
+            raise ValueError(
+                f"schema version mismatch: expected "
+                f"{codec.schema_version}, got {schema_version}"
+            )
+
+        self.count: int = count
+
+        # (field, type code) of every column, in storage order
+        layout = [
+            *[(name, codec.type_codes[name]) for name in codec.scalar_fields],
+            *[(name, _LENGTH_CODE) for name in codec.string_fields],
+            *[(name, codec.type_codes[name]) for name in codec.bool_fields],
+        ]
+
+        # values of scalar fields, lengths of string fields
+        self.__columns: dict[str, Any] = {}
+        offset = _HEADER.size
+        for name, code in layout:
+            end = offset + count * array(code).itemsize
+            if end > len(self.buffer):
+                raise ValueError("truncated record batch")
+            self.__columns[name] = _unpack(self.buffer[offset:end], code)
+            offset = end
+
+        # bytes of every string field
+        self.__strings: dict[str, memoryview] = {}
+        for name in codec.string_fields:
+            end = offset + sum(self.__columns[name])
+            self.__strings[name] = self.buffer[offset:end]
+            offset = end
+
+        # verify every byte belongs to a column
+        if offset != len(self.buffer):
+            raise ValueError("truncated record batch")
+
+        # string offsets, computed on first access
+        self.__offsets: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, field: str) -> memoryview:
+        """Return every value of an int, float or bool field in place.
+
+        Args:
+            field (str): Field name.
+
+        Raises:
+            KeyError: If field is not an int, float or bool field.
+
+        Returns:
+            memoryview: Column of the batch buffer, bool fields hold 0 or 1.
+        """
+
+        # string columns hold lengths
+        if field in self.__strings:
+            raise KeyError(field)
+
+        return self.__columns[field]
+
+    def raw(self, index: int, field: str) -> memoryview:
+        """Return UTF-8 bytes of a string field without copying them.
+
+        Args:
+            index (int): Record index.
+            field (str): String field name.
+
+        Raises:
+            IndexError: If index is out of range.
+            KeyError: If field is not a string field.
+
+        Returns:
+            memoryview: Slice of the batch buffer.
+        """
+
+        data = self.__strings[field]
+        offsets = self.__string_offsets(field)
+
+        # verify index, negative indexes count from the end
+        if not -self.count <= index < self.count:
+            raise IndexError("record index out of range")
+        index %= self.count
+        start, end = offsets[index], offsets[index + 1]
+
+        return data[start:end]
+
+    def get(self, index: int, field: str) -> Any:
+        """Return a field of a record.
+
+        Args:
+            index (int): Record index.
+            field (str): Field name.
+
+        Raises:
+            IndexError: If index is out of range.
+            KeyError: If field is not a field of the model.
+
+        Returns:
+            Any: Field value.
+        """
+
+        # string field
+        if field in self.__strings:
+            return str(self.raw(index, field), "utf-8")
+
+        # int, float or bool field
+        value = self.__columns[field][index]
+        return bool(value) if field in self.codec.bool_fields else value
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Return every record as a dict, without validation."""
+
+        codec = self.codec
+        values: dict[str, list] = {}
+
+        # int and float fields
+        for name in codec.scalar_fields:
+            values[name] = self.__columns[name].tolist()
+
+        # bool fields
+        for name in codec.bool_fields:
+            values[name] = [bool(value) for value in self.__columns[name]]
+
+        # string fields
+        for name in codec.string_fields:
+            data = self.__strings[name]
+            text = str(data, "utf-8")
+            bounds = self.__string_offsets(name)
+            starts, ends = bounds[:-1], bounds[1:]
+            # ascii only column, slice the decoded text
+            if len(text) == len(data):
+                values[name] = [text[a:b] for a, b in zip(starts, ends)]
+            else:
+                values[name] = [
+                    str(data[a:b], "utf-8") for a, b in zip(starts, ends)
+                ]
+
+        # records in field declaration order
+        fields = codec.fields
+        return [
+            dict(zip(fields, row))
+            for row in zip(*[values[name] for name in fields])
+        ]
+
+    def __string_offsets(self, field: str) -> list[int]:
+        """Return start offsets of a string field, plus its end."""
+
+        offsets = self.__offsets.get(field)
+        if offsets is None:
+            offsets = [0, *accumulate(self.__columns[field])]
+            self.__offsets[field] = offsets
+
+        return offsets
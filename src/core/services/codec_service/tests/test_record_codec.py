@@ -0,0 +1,249 @@
+"""Test Cases
+
+- RecordCodec should raise TypeError if 'model' is not a pydantic model
+- RecordCodec should raise TypeError for unsupported field types
+- RecordCodec should store int and float, string and bool fields
+  in separate columns
+
+- encode() should write a versioned header
+- encode() should raise ValueError if a value cannot be packed
+- encode() should accept models and dicts
+
+- view() should read every field in place
+- column() should return scalar columns without copying the buffer
+- column() should raise KeyError for string fields
+- raw() should return string bytes without copying the buffer
+- raw() should raise KeyError for non string fields and IndexError
+  for out of range records
+- view() should raise ValueError for invalid buffers
+
+- decode() should round trip models
+- decode() should decode empty batches
+"""
+
+
+import struct
+import pytest
+from pydantic import BaseModel
+from core.services.codec_service.record_codec import (
+    FORMAT_VERSION,
+    MAGIC,
+    RecordCodec,
+)
+
+
+class Item(BaseModel):
+    # item id
+    id: int
+    # item title
+    title: str
+    # item weight
+    weight: float
+    # item description
+    description: str
+    # item availability
+    available: bool
+
+
+# items with ascii, empty and multi byte strings
+ITEMS = [
+    Item(id=1, title="pen", weight=0.5, description="", available=True),
+    Item(
+        id=-2, title="näïve ✓", weight=1e300, description="b", available=False
+    ),
+]
+
+# item codec
+codec = RecordCodec(Item, schema_version=3)
+
+
+def test_codec_model_incorrect():
+    """RecordCodec should raise TypeError if 'model' is not
+    a pydantic model."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        RecordCodec(dict)  # type: ignore
+
+    # verify error message
+    assert "'model' should be a pydantic model." in str(exc_info.value)
+
+
+def test_codec_field_incorrect():
+    """RecordCodec should raise TypeError for unsupported field types."""
+
+    class Basket(BaseModel):
+        items: list[int]
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        RecordCodec(Basket)
+
+    # verify error message
+    assert "unsupported field type: items" in str(exc_info.value)
+
+
+def test_codec_layout():
+    """RecordCodec should store int and float, string and bool fields
+    in separate columns."""
+
+    # verify fields
+    assert codec.fields == (
+        "id",
+        "title",
+        "weight",
+        "description",
+        "available",
+    )
+    assert codec.scalar_fields == ("id", "weight")
+    assert codec.string_fields == ("title", "description")
+    assert codec.bool_fields == ("available",)
+    assert codec.type_codes == {"id": "q", "weight": "d", "available": "B"}
+
+
+def test_encode_header():
+    """encode() should write a versioned header."""
+
+    # encode items
+    buffer = codec.encode(ITEMS)
+
+    # verify header
+    assert struct.unpack_from("<3sBHI6x", buffer) == (
+        MAGIC,
+        FORMAT_VERSION,
+        3,
+        2,
+    )
+
+
+def test_encode_incorrect():
+    """encode() should raise ValueError if a value cannot be packed."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        codec.encode([ITEMS[0].model_copy(update={"id": 2**63})])
+
+    # verify error message
+    assert "cannot encode record" in str(exc_info.value)
+
+
+def test_encode_dicts():
+    """encode() should accept models and dicts."""
+
+    # verify same buffers
+    assert codec.encode([item.model_dump() for item in ITEMS]) == (
+        codec.encode(ITEMS)
+    )
+
+
+def test_view():
+    """view() should read every field in place."""
+
+    # view encoded items
+    batch = codec.view(codec.encode(ITEMS))
+
+    # verify fields
+    assert len(batch) == 2
+    for index, item in enumerate(ITEMS):
+        for field, value in item.model_dump().items():
+            assert batch.get(index, field) == value
+
+
+def test_column():
+    """column() should return scalar columns without copying
+    the buffer."""
+
+    # view encoded items held in a bytearray
+    buffer = bytearray(codec.encode(ITEMS))
+    batch = codec.view(buffer)
+
+    # verify columns
+    assert batch.column("id").tolist() == [1, -2]
+    assert batch.column("weight").tolist() == [0.5, 1e300]
+    assert batch.column("available").tolist() == [1, 0]
+
+    # verify column shares the buffer
+    buffer[16] = 7
+    assert batch.get(0, "id") == 7
+
+
+def test_column_incorrect():
+    """column() should raise KeyError for string fields."""
+
+    # verify KeyError raised
+    with pytest.raises(KeyError):
+        codec.view(codec.encode(ITEMS)).column("title")
+
+
+def test_raw():
+    """raw() should return string bytes without copying the buffer."""
+
+    # view encoded items held in a bytearray
+    buffer = bytearray(codec.encode(ITEMS))
+    batch = codec.view(buffer)
+
+    # verify bytes
+    raw = batch.raw(1, "title")
+    assert bytes(raw) == "näïve ✓".encode()
+    assert bytes(batch.raw(-1, "title")) == "näïve ✓".encode()
+    assert bytes(batch.raw(0, "description")) == b""
+
+    # verify slice shares the buffer
+    raw[0] = ord("N")
+    assert batch.get(1, "title") == "Näïve ✓"
+
+
+def test_raw_incorrect():
+    """raw() should raise KeyError for non string fields and IndexError
+    for out of range records."""
+
+    # verify KeyError raised
+    with pytest.raises(KeyError):
+        codec.view(codec.encode(ITEMS)).raw(0, "id")
+
+    # verify IndexError raised
+    with pytest.raises(IndexError):
+        codec.view(codec.encode(ITEMS)).raw(2, "title")
+
+
+@pytest.mark.parametrize(
+    "buffer, message",
+    [
+        (b"RC", "truncated record batch"),
+        (b"XYZ" + bytes(13), "not a record batch"),
+        (
+            struct.pack("<3sBHI6x", MAGIC, 9, 3, 0),
+            "unsupported format version",
+        ),
+        (struct.pack("<3sBHI6x", MAGIC, 1, 4, 0), "schema version mismatch"),
+        (struct.pack("<3sBHI6x", MAGIC, 1, 3, 1), "truncated record batch"),
+        (codec.encode(ITEMS)[:30], "truncated record batch"),
+        (codec.encode(ITEMS)[:-1], "truncated record batch"),
+        (codec.encode(ITEMS) + b"\x00", "truncated record batch"),
+    ],
+)
+def test_view_incorrect(buffer, message):
+    """view() should raise ValueError for invalid buffers."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        codec.view(buffer)
+
+    # verify error message
+    assert message in str(exc_info.value)
+
+
+def test_decode():
+    """decode() should round trip models."""
+
+    # verify round trip through bytes and memoryview
+    buffer = codec.encode(ITEMS)
+    assert codec.decode(buffer) == ITEMS
+    assert codec.decode(memoryview(buffer)) == ITEMS
+
+
+def test_decode_empty():
+    """decode() should decode empty batches."""
+
+    # verify empty batch
+    assert codec.decode(codec.encode([])) == []
@@ -0,0 +1,261 @@
+"""This file includes an in-process metrics registry with counters and
+latency histograms, exportable as a dict or Prometheus text snapshot."""
+
+
+import bisect
+import threading
+
+
+# histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        # bucket upper bounds, last bucket is +Inf
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # non cumulative count per bucket (+Inf included)
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        # sum of all observed values
+        self.sum: float = 0.0
+        # number of observed values
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        """Record a single value.
+
+        Args:
+            value (float): Observed value.
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[int]:
+        """Return cumulative counts per bucket, +Inf bucket last."""
+
+        result: list[int] = []
+        total = 0
+        for count in self.counts:
+            total += count
+            result.append(total)
+
+        return result
+
+
+def _labels_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    """Return hashable, ordered key of 'labels'."""
+
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    """Format labels in Prometheus text format."""
+
+    # no labels
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        f'{key}="{_escape_label_value(value)}"' for key, value in labels
+    )
+
+    return "{" + pairs + "}"
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape label value in Prometheus text format."""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    """Format histogram bucket bound in Prometheus text format."""
+
+    return repr(float(bound))
+
+
+class MetricsRegistry:
+    """Thread safe registry of labelled counters and histograms."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        # histogram bucket upper bounds
+        self.__buckets = buckets
+        # guards counters and histograms
+        self.__lock = threading.Lock()
+        # counters by name, then by labels
+        self.__counters: dict[str, dict[tuple, float]] = {}
+        # histograms by name, then by labels
+        self.__histograms: dict[str, dict[tuple, Histogram]] = {}
+
+    def inc(
+        self,
+        name: str,
+        labels: dict[str, str] | None = None,
+        amount: float = 1,
+    ) -> None:
+        """Increment a counter.
+
+        Args:
+            name (str): Metric name.
+            labels (dict[str, str] | None): Metric labels.
+            amount (float): Increment.
+        """
+
+        key = _labels_key(labels or {})
+
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        labels: dict[str, str] | None = None,
+    ) -> None:
+        """Record a value in a histogram.
+
+        Args:
+            name (str): Metric name.
+            value (float): Observed value.
+            labels (dict[str, str] | None): Metric labels.
+        """
+
+        key = _labels_key(labels or {})
+
+        with self.__lock:
+            series = self.__histograms.setdefault(name, {})
+            histogram = series.get(key)
+
+            # first observation of this series
+            if histogram is None:
+                histogram = series[key] = Histogram(self.__buckets)
+
+            histogram.observe(value)
+
+    def counter_value(
+        self,
+        name: str,
+        labels: dict[str, str] | None = None,
+    ) -> float:
+        """Return current value of a counter, 0 if never incremented."""
+
+        with self.__lock:
+            return self.__counters.get(name, {}).get(
+                _labels_key(labels or {}), 0
+            )
+
+    def histogram(
+        self,
+        name: str,
+        labels: dict[str, str] | None = None,
+    ) -> Histogram | None:
+        """Return a histogram, None if nothing was observed."""
+
+        with self.__lock:
+            return self.__histograms.get(name, {}).get(
+                _labels_key(labels or {})
+            )
+
+    def reset(self) -> None:
+        """Remove all recorded metrics."""
+
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def to_dict(self) -> dict:
+        """Return a snapshot of all metrics.
+
+        Returns:
+            dict: {"counters": {name: [{"labels", "value"}]},
+                "histograms": {name: [{"labels", "buckets", "sum",
+                "count"}]}}.
+        """
+
+        with self.__lock:
+            counters = {
+                name: [
+                    {"labels": dict(labels), "value": value}
+                    for labels, value in sorted(series.items())
+                ]
+                for name, series in sorted(self.__counters.items())
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "buckets": dict(
+                            zip(
+                                [*histogram.buckets, float("inf")],
+                                histogram.cumulative_counts(),
+                            )
+                        ),
+                        "sum": histogram.sum,
+                        "count": histogram.count,
+                    }
+                    for labels, histogram in sorted(series.items())
+                ]
+                for name, series in sorted(self.__histograms.items())
+            }
+
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """Return a snapshot of all metrics in Prometheus text format.
+
+        Returns:
+            str: Prometheus exposition text.
+        """
+
+        lines: list[str] = []
+
+        with self.__lock:
+            # counters
+            for name, series in sorted(self.__counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            # histograms
+            for name, series in sorted(self.__histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    bounds = [
+                        *map(_format_bound, histogram.buckets),
+                        "+Inf",
+                    ]
+                    for bound, count in zip(
+                        bounds, histogram.cumulative_counts()
+                    ):
+                        bucket_labels = _format_labels(
+                            (*labels, ("le", bound))
+                        )
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+
+                    label_text = _format_labels(labels)
+                    lines.append(f"{name}_sum{label_text} {histogram.sum}")
+                    lines.append(f"{name}_count{label_text} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,145 @@
+"""Test Cases
+
+- Histogram should count values in the correct bucket
+- Histogram should return cumulative counts
+
+- MetricsRegistry.inc() should increment counters per labels
+- MetricsRegistry.observe() should record values per labels
+- MetricsRegistry.reset() should remove all metrics
+- MetricsRegistry.to_dict() should return a snapshot of all metrics
+- MetricsRegistry.to_prometheus() should return Prometheus text format
+"""
+
+
+from core.services.metrics_service.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_observe():
+    """Histogram should count values in the correct bucket."""
+
+    # create histogram
+    histogram = Histogram(buckets=(1.0, 2.0))
+
+    # observe values
+    histogram.observe(0.5)
+    histogram.observe(1.0)
+    histogram.observe(1.5)
+    histogram.observe(3.0)
+
+    # verify bucket counts
+    assert histogram.counts == [2, 1, 1]
+    # verify sum and count
+    assert histogram.sum == 6.0
+    assert histogram.count == 4
+
+
+def test_histogram_cumulative_counts():
+    """Histogram should return cumulative counts."""
+
+    # create histogram
+    histogram = Histogram(buckets=(1.0, 2.0))
+
+    # observe values
+    histogram.observe(0.5)
+    histogram.observe(1.5)
+    histogram.observe(3.0)
+
+    # verify cumulative counts
+    assert histogram.cumulative_counts() == [1, 2, 3]
+
+
+def test_registry_inc():
+    """MetricsRegistry.inc() should increment counters per labels."""
+
+    # create registry
+    metrics = MetricsRegistry()
+
+    # increment counters
+    metrics.inc("calls", {"operation": "create"})
+    metrics.inc("calls", {"operation": "create"}, 2)
+    metrics.inc("calls", {"operation": "delete"})
+
+    # verify counter values
+    assert metrics.counter_value("calls", {"operation": "create"}) == 3
+    assert metrics.counter_value("calls", {"operation": "delete"}) == 1
+    assert metrics.counter_value("calls", {"operation": "update"}) == 0
+
+
+def test_registry_observe():
+    """MetricsRegistry.observe() should record values per labels."""
+
+    # create registry
+    metrics = MetricsRegistry(buckets=(1.0,))
+
+    # observe values
+    metrics.observe("latency", 0.5, {"operation": "create"})
+    metrics.observe("latency", 2.0, {"operation": "create"})
+
+    # verify histogram
+    histogram = metrics.histogram("latency", {"operation": "create"})
+    assert histogram is not None
+    assert histogram.counts == [1, 1]
+
+    # verify missing histogram
+    assert metrics.histogram("latency", {"operation": "delete"}) is None
+
+
+def test_registry_reset():
+    """MetricsRegistry.reset() should remove all metrics."""
+
+    # create registry with metrics
+    metrics = MetricsRegistry()
+    metrics.inc("calls")
+    metrics.observe("latency", 1.0)
+
+    # reset registry
+    metrics.reset()
+
+    # verify empty snapshot
+    assert metrics.to_dict() == {"counters": {}, "histograms": {}}
+
+
+def test_registry_to_dict():
+    """MetricsRegistry.to_dict() should return a snapshot of all metrics."""
+
+    # create registry with metrics
+    metrics = MetricsRegistry(buckets=(1.0,))
+    metrics.inc("calls", {"table": "products"})
+    metrics.observe("latency", 0.5, {"table": "products"})
+
+    # verify snapshot
+    assert metrics.to_dict() == {
+        "counters": {
+            "calls": [{"labels": {"table": "products"}, "value": 1}],
+        },
+        "histograms": {
+            "latency": [
+                {
+                    "labels": {"table": "products"},
+                    "buckets": {1.0: 1, float("inf"): 1},
+                    "sum": 0.5,
+                    "count": 1,
+                }
+            ],
+        },
+    }
+
+
+def test_registry_to_prometheus():
+    """MetricsRegistry.to_prometheus() should return Prometheus text format."""
+
+    # create registry with metrics
+    metrics = MetricsRegistry(buckets=(1.0,))
+    metrics.inc("calls", {"table": 'pro"ducts'})
+    metrics.observe("latency", 0.5, {"table": "products"})
+
+    # verify exposition text
+    assert metrics.to_prometheus() == (
+        "# TYPE calls counter\n"
+        'calls{table="pro\\"ducts"} 1\n'
+        "# TYPE latency histogram\n"
+        'latency_bucket{table="products",le="1.0"} 1\n'
+        'latency_bucket{table="products",le="+Inf"} 1\n'
+        'latency_sum{table="products"} 0.5\n'
+        'latency_count{table="products"} 1\n'
+    )
@@ -0,0 +1,195 @@
+"""This file includes a policy building and dropping indexes from the
+observed query patterns of a table.
+
+Every query reports its key set and its cost, the number of records it
+visited. Once the cost of a key set, halved at the end of every window of
+'window' queries, reaches 'build_cost', its fields get an index. An index
+built by the policy and not queried during a whole window is dropped.
+Indexes created by hand are never dropped.
+
+Recorded metrics (labels: table, field, decision):
+    auto_index_decisions_total: Number of index decisions, decision is
+        'build', 'drop' or 'reject' (index could not be built).
+"""
+
+
+import threading
+from dataclasses import dataclass
+from typing import Iterable
+from core.services.metrics_service.metrics import MetricsRegistry
+
+
+# index decisions
+BUILD, DROP, REJECT = "build", "drop", "reject"
+
+
+@dataclass(frozen=True)
+class IndexDecision:
+    """Index to build or drop, 'reason' is meant for humans."""
+
+    action: str
+    field: str
+    reason: str
+
+
+class AutoIndexer:
+    """Thread safe index policy of a single table.
+
+    Args:
+        table (str): Table name, used as metrics label.
+        build_cost (int): Records visited by the queries of a key set
+            before its fields are indexed.
+        window (int): Number of queries between two cost decays and unused
+            index checks.
+        max_indexes (int): Maximum number of indexes built by the policy.
+        metrics (MetricsRegistry | None): Registry of the decisions.
+    """
+
+    def __init__(
+        self,
+        table: str = "default",
+        build_cost: int = 100_000,
+        window: int = 1000,
+        max_indexes: int = 8,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # verify thresholds
+        if build_cost <= 0:
+            raise ValueError("'build_cost' must be a positive integer")
+        if window <= 0:
+            raise ValueError("'window' must be a positive integer")
+
+        self.table: str = table
+        self.build_cost: int = build_cost
+        self.window: int = window
+        self.max_indexes: int = max_indexes
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        # decayed cost by key set
+        self.__costs: dict[tuple[str, ...], float] = {}
+        # indexes built by the policy
+        self.__built: set[str] = set()
+        # fields whose index could not be built
+        self.__rejected: set[str] = set()
+        # fields queried in the current window
+        self.__used: set[str] = set()
+        # queries observed in the current window
+        self.__queries: int = 0
+        self.__lock = threading.Lock()
+
+    def observe(
+        self,
+        fields: Iterable[str],
+        cost: int,
+        indexed: Iterable[str],
+    ) -> list[IndexDecision]:
+        """Record a query and return the index decisions it triggers.
+
+        Args:
+            fields (Iterable[str]): Queried fields.
+            cost (int): Number of records visited by the query.
+            indexed (Iterable[str]): Currently indexed fields.
+
+        Returns:
+            list[IndexDecision]: Indexes to build, then indexes to drop.
+        """
+
+        key = tuple(sorted(fields))
+        indexed = set(indexed)
+        decisions: list[IndexDecision] = []
+
+        with self.__lock:
+            # forget indexes dropped by hand
+            self.__built &= indexed
+            self.__used.update(key)
+
+            cost_total = self.__costs.get(key, 0.0) + cost
+            self.__costs[key] = cost_total
+
+            # ids are looked up by the table itself
+            missing = [
+                field
+                for field in key
+                if field != "id"
+                and field not in indexed
+                and field not in self.__rejected
+            ]
+            if missing and cost_total >= self.build_cost:
+                for field in missing:
+                    if len(self.__built) >= self.max_indexes:
+                        break
+                    self.__built.add(field)
+                    decisions.append(
+                        IndexDecision(
+                            BUILD,
+                            field,
+                            f"queries on ({', '.join(key)}) visited "
+                            f"{int(cost_total)} records",
+                        )
+                    )
+                # pattern is served by the new indexes
+                self.__costs[key] = 0.0
+
+            self.__queries += 1
+            if self.__queries >= self.window:
+                decisions.extend(self.__end_window())
+
+        for decision in decisions:
+            self.__record(decision)
+
+        return decisions
+
+    def reject(self, field: str, reason: str) -> None:
+        """Record that the index of a field could not be built, it is not
+        proposed again."""
+
+        with self.__lock:
+            self.__built.discard(field)
+            self.__rejected.add(field)
+
+        self.__record(IndexDecision(REJECT, field, reason))
+
+    def built(self) -> list[str]:
+        """Return fields indexed by the policy."""
+
+        with self.__lock:
+            return sorted(self.__built)
+
+    def costs(self) -> dict[tuple[str, ...], float]:
+        """Return decayed cost of every observed key set."""
+
+        with self.__lock:
+            return dict(self.__costs)
+
+    def __end_window(self) -> list[IndexDecision]:
+        """Decay costs and drop unused indexes, called with the lock."""
+
+        decisions = [
+            IndexDecision(DROP, field, f"not queried in {self.window} queries")
+            for field in sorted(self.__built - self.__used)
+        ]
+        self.__built &= self.__used
+
+        # halve costs, forget cheap key sets
+        self.__costs = {
+            key: cost / 2
+            for key, cost in self.__costs.items()
+            if cost / 2 >= 1
+        }
+        self.__used = set()
+        self.__queries = 0
+
+        return decisions
+
+    def __record(self, decision: IndexDecision) -> None:
+        """Count a decision."""
+
+        self.metrics.inc(
+            "auto_index_decisions_total",
+            {
+                "table": self.table,
+                "field": decision.field,
+                "decision": decision.action,
+            },
+        )
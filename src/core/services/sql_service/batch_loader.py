@@ -0,0 +1,127 @@
+"""This file includes a DataLoader style batching loader for asyncio.
+
+Keys loaded within the same event loop tick are collected and dispatched
+as one call of the batch function, repeated keys are loaded once.
+
+Recorded metrics (label: name):
+    batch_loader_loads_total: Number of load() calls.
+    batch_loader_batches_total: Number of batch function calls.
+    batch_loader_keys_total: Distinct keys passed to the batch function.
+"""
+
+
+import asyncio
+from typing import Awaitable, Callable, Hashable
+from core.services.metrics_service.metrics import MetricsRegistry
+
+
+class BatchLoader[K: Hashable, V]:
+    """Batching loader, use from a single event loop.
+
+    'batch_function' receives distinct keys and returns one value per key,
+    in the same order.
+    """
+
+    def __init__(
+        self,
+        batch_function: Callable[[list[K]], Awaitable[list[V]]],
+        max_batch_size: int | None = None,
+        name: str = "default",
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # verify batch size
+        if max_batch_size is not None and max_batch_size <= 0:
+            raise ValueError("'max_batch_size' must be a positive integer")
+
+        self.max_batch_size: int | None = max_batch_size
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        self.__batch_function = batch_function
+        # futures of the keys collected in the current tick
+        self.__pending: dict[K, asyncio.Future] = {}
+        # running batches, the event loop only keeps weak references
+        self.__tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V:
+        """Load the value of a key in the next batch.
+
+        Args:
+            key (K): Key to load.
+
+        Raises:
+            Exception: Raised by the batch function.
+
+        Returns:
+            V: Value returned by the batch function for this key.
+        """
+
+        self.metrics.inc("batch_loader_loads_total", {"name": self.name})
+
+        future = self.__pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.__pending[key] = loop.create_future()
+
+            # first key of this tick, dispatch once the tick is over
+            if len(self.__pending) == 1:
+                loop.call_soon(self.__dispatch)
+            # full batch, dispatch now
+            elif len(self.__pending) == self.max_batch_size:
+                self.__dispatch()
+
+        # cancelling a caller does not cancel the other callers of the key
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: list[K]) -> list[V]:
+        """Load the values of keys in the next batch.
+
+        Args:
+            keys (list[K]): Keys to load.
+
+        Returns:
+            list[V]: Values in 'keys' order.
+        """
+
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def __dispatch(self) -> None:
+        """Send collected keys to the batch function."""
+
+        pending, self.__pending = self.__pending, {}
+
+        # keys already dispatched as a full batch
+        if not pending:
+            return
+
+        labels = {"name": self.name}
+        self.metrics.inc("batch_loader_batches_total", labels)
+        self.metrics.inc("batch_loader_keys_total", labels, len(pending))
+
+        task = asyncio.ensure_future(self.__run(pending))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __run(self, pending: dict[K, asyncio.Future]) -> None:
+        """Call the batch function and resolve futures of its keys."""
+
+        keys = list(pending)
+
+        try:
+            values = await self.__batch_function(keys)
+
+            # verify one value per key
+            if len(values) != len(keys):
+                raise ValueError(
+                    "batch function should return one value per key"
+                )
+        except Exception as error:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, value in zip(pending.values(), values):
+            if not future.done():
+                future.set_result(value)
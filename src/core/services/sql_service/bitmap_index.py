@@ -0,0 +1,350 @@
+"""This file includes compressed bitmaps of record ids and bitmap indexes.
+
+Bitmaps follow the roaring layout: ids are split by their high 16 bits
+into containers of at most 65536 ids. A container holding up to
+'ARRAY_MAX' ids is a sorted list, a denser container is an int used as
+a 65536 bit set, so sparse and dense id sets both stay small and AND /
+OR of two bitmaps only combines containers with the same high bits.
+
+A bitmap index keeps the bitmap of the ids holding every value of a
+field, queries combining several indexed fields are answered by
+intersecting bitmaps before a single record is read.
+"""
+
+
+from bisect import bisect_left
+from typing import Hashable, Iterable, Iterator
+
+
+# containers holding more ids are bit sets
+ARRAY_MAX = 4096
+
+# bytes of a bit set container
+_SET_BYTES = 1 << 13
+
+# set bit positions of every byte value
+_BITS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(bit for bit in range(8) if byte & (1 << bit)) for byte in range(256)
+)
+
+# container: sorted list of low bits, or int bit set
+_Container = list[int] | int
+
+
+def _to_set(values: list[int]) -> int:
+    """Return bit set container of sorted low bits."""
+
+    data = bytearray(_SET_BYTES)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+
+    return int.from_bytes(data, "little")
+
+
+def _to_list(bits: int) -> list[int]:
+    """Return sorted low bits of a bit set container."""
+
+    values: list[int] = []
+    for index, byte in enumerate(bits.to_bytes(_SET_BYTES, "little")):
+        if byte:
+            base = index << 3
+            values.extend(base + bit for bit in _BITS[byte])
+
+    return values
+
+
+def _length(container: _Container) -> int:
+    """Return number of ids of a container."""
+
+    if isinstance(container, int):
+        return container.bit_count()
+
+    return len(container)
+
+
+def _compact(container: _Container) -> _Container | None:
+    """Return container in its smallest form, None if empty."""
+
+    if isinstance(container, int):
+        if not container:
+            return None
+        if container.bit_count() <= ARRAY_MAX:
+            return _to_list(container)
+        return container
+
+    if not container:
+        return None
+    if len(container) > ARRAY_MAX:
+        return _to_set(container)
+
+    return container
+
+
+def _and(left: _Container, right: _Container) -> _Container | None:
+    """Return intersection of two containers."""
+
+    if isinstance(left, int) and isinstance(right, int):
+        return _compact(left & right)
+
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        # test low bits of the list in the bit set
+        data = right.to_bytes(_SET_BYTES, "little")
+        return _compact(
+            [
+                value
+                for value in left  # type: ignore
+                if data[value >> 3] & (1 << (value & 7))
+            ]
+        )
+
+    # probe the set of the larger list, keeps the smaller list order
+    if len(left) > len(right):
+        left, right = right, left
+    present = set(right)
+
+    return _compact([value for value in left if value in present])
+
+
+def _or(left: _Container, right: _Container) -> _Container:
+    """Return union of two containers."""
+
+    if isinstance(left, list) and isinstance(right, list):
+        return _compact(sorted(set(left).union(right)))  # type: ignore
+
+    if isinstance(left, list):
+        left = _to_set(left)
+    if isinstance(right, list):
+        right = _to_set(right)
+
+    return left | right
+
+
+class Bitmap:
+    """Compressed set of non negative int ids, not thread safe."""
+
+    __slots__ = ("_containers",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        # containers by high bits
+        self._containers: dict[int, _Container] = {}
+        for record_id in ids:
+            self.add(record_id)
+
+    def add(self, record_id: int) -> None:
+        """Add an id."""
+
+        # verify id
+        if type(record_id) is not int or record_id < 0:
+            raise ValueError("bitmap ids must be non negative integers")
+
+        high, low = record_id >> 16, record_id & 0xFFFF
+        container = self._containers.get(high)
+
+        if container is None:
+            self._containers[high] = [low]
+        elif isinstance(container, int):
+            self._containers[high] = container | (1 << low)
+        elif not container or container[-1] < low:
+            # ids are mostly added in increasing order
+            container.append(low)
+            self._containers[high] = _compact(container)  # type: ignore
+        else:
+            index = bisect_left(container, low)
+            if index == len(container) or container[index] != low:
+                container.insert(index, low)
+                self._containers[high] = _compact(container)  # type: ignore
+
+    def discard(self, record_id: int) -> None:
+        """Remove an id if present."""
+
+        if record_id not in self:
+            return
+
+        high, low = record_id >> 16, record_id & 0xFFFF
+        container = self._containers[high]
+
+        if isinstance(container, int):
+            container &= ~(1 << low)
+        else:
+            container.pop(bisect_left(container, low))
+
+        compact = _compact(container)
+        if compact is None:
+            del self._containers[high]
+        else:
+            self._containers[high] = compact
+
+    def __contains__(self, record_id: object) -> bool:
+        if type(record_id) is not int or record_id < 0:
+            return False
+
+        container = self._containers.get(record_id >> 16)
+        if container is None:
+            return False
+
+        low = record_id & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        index = bisect_left(container, low)
+
+        return index < len(container) and container[index] == low
+
+    def __len__(self) -> int:
+        return sum(map(_length, self._containers.values()))
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over ids in increasing order."""
+
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, int):
+                container = _to_list(container)
+            base = high << 16
+            for low in container:
+                yield base | low
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+
+        return self._containers == other._containers
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        result = Bitmap()
+        # visit the containers of the smaller bitmap
+        small, large = self._containers, other._containers
+        if len(small) > len(large):
+            small, large = large, small
+
+        for high, container in small.items():
+            match = large.get(high)
+            if match is None:
+                continue
+            both = _and(container, match)
+            if both is not None:
+                result._containers[high] = both
+
+        return result
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        result = self.copy()
+
+        for high, container in other._containers.items():
+            current = result._containers.get(high)
+            result._containers[high] = (
+                _copy(container)
+                if current is None
+                else _or(current, container)
+            )
+
+        return result
+
+    def copy(self) -> "Bitmap":
+        """Return a copy of the bitmap."""
+
+        result = Bitmap()
+        result._containers = {
+            high: _copy(container)
+            for high, container in self._containers.items()
+        }
+
+        return result
+
+    def __repr__(self) -> str:
+        return f"Bitmap({len(self)} ids)"
+
+
+def _copy(container: _Container) -> _Container:
+    """Return a copy of a container, ints are immutable."""
+
+    return container if isinstance(container, int) else list(container)
+
+
+def intersect(bitmaps: Iterable[Bitmap]) -> Bitmap:
+    """Return AND of bitmaps, smallest first so intermediate results
+    stay small. The result is a new bitmap, never one of 'bitmaps'."""
+
+    ordered = sorted(bitmaps, key=len)
+    if not ordered:
+        raise ValueError("'bitmaps' should not be empty")
+
+    result = ordered[0]
+    for bitmap in ordered[1:]:
+        if not result:
+            break
+        result = result & bitmap
+
+    # bitmaps of an index change with every write
+    if result is ordered[0]:
+        return result.copy()
+
+    return result
+
+
+def union(bitmaps: Iterable[Bitmap]) -> Bitmap:
+    """Return OR of bitmaps."""
+
+    result = Bitmap()
+    for bitmap in bitmaps:
+        result = result | bitmap
+
+    return result
+
+
+class BitmapIndex:
+    """Bitmap of record ids of every value of a field, not thread safe.
+
+    Args:
+        field (str): Indexed field.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field: str = field
+
+        # create private instances
+        # ids by field value, empty bitmaps are removed
+        self.__bitmaps: dict[Hashable, Bitmap] = {}
+
+    def add(self, value: Hashable, record_id: int) -> None:
+        """Add a record id to the bitmap of a value."""
+
+        bitmap = self.__bitmaps.get(value)
+        if bitmap is None:
+            bitmap = self.__bitmaps[value] = Bitmap()
+        bitmap.add(record_id)
+
+    def remove(self, value: Hashable, record_id: int) -> None:
+        """Remove a record id from the bitmap of a value."""
+
+        bitmap = self.__bitmaps.get(value)
+        if bitmap is None:
+            return
+
+        bitmap.discard(record_id)
+        if not bitmap:
+            del self.__bitmaps[value]
+
+    def get(self, value: Hashable) -> Bitmap:
+        """Return ids of records holding a value, do not mutate it."""
+
+        return self.__bitmaps.get(value) or Bitmap()
+
+    def any_of(self, values: Iterable[Hashable]) -> Bitmap:
+        """Return ids of records holding any of the values."""
+
+        return union(self.get(value) for value in values)
+
+    def values(self) -> list[Hashable]:
+        """Return indexed values."""
+
+        return list(self.__bitmaps)
+
+    def clear(self) -> None:
+        """Remove every id."""
+
+        self.__bitmaps.clear()
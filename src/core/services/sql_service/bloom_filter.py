@@ -0,0 +1,157 @@
+"""This file includes a bloom filter of keys.
+
+A bloom filter answers whether a key may be present or is surely absent
+with a few bits per key. Every key sets 'hashes' bits chosen by double
+hashing of a 64 bit key hash, a key is maybe present if all its bits are
+set. The false positive rate grows as keys are added past 'capacity'.
+
+Int, float, str and bytes keys have a hash independent of the process so
+that filters can be written to files (to_bytes, from_bytes), other keys
+use the builtin hash.
+"""
+
+
+import math
+import struct
+from hashlib import blake2b
+from typing import Hashable, Iterable
+
+
+# 64 bit mask
+_MASK = (1 << 64) - 1
+
+# bit count, number of hashes, number of added keys
+_HEADER = struct.Struct("<QII")
+
+
+def _mix(value: int) -> int:
+    """Return splitmix64 of a 64 bit value."""
+
+    value = (value + 0x9E3779B97F4A7C15) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+
+    return value ^ (value >> 31)
+
+
+def key_hash(key: Hashable) -> int:
+    """Return 64 bit hash of a key, equal keys have equal hashes."""
+
+    # integral floats equal their int
+    if type(key) is float and key.is_integer():
+        key = int(key)
+
+    if isinstance(key, int):
+        return _mix(key & _MASK)
+    if isinstance(key, str):
+        key = key.encode("utf-8", "surrogatepass")
+    if isinstance(key, bytes):
+        return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+    return _mix(hash(key) & _MASK)
+
+
+class BloomFilter:
+    """Bloom filter sized for 'capacity' keys at 'error_rate' false
+    positives, not thread safe.
+
+    Args:
+        capacity (int): Expected number of keys.
+        error_rate (float): False positive rate at capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        # verify sizes
+        if capacity <= 0:
+            raise ValueError("'capacity' must be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("'error_rate' must be between 0 and 1")
+
+        self.capacity: int = capacity
+        self.error_rate: float = error_rate
+        # number of bits and of hashes per key
+        self.bit_count: int = max(
+            64,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.hashes: int = max(
+            1, round(self.bit_count / capacity * math.log(2))
+        )
+        # number of added keys
+        self.count: int = 0
+
+        # create private instances
+        self.__bits = bytearray((self.bit_count + 7) // 8)
+
+    def add(self, key: Hashable) -> None:
+        """Add a key."""
+
+        bits = self.__bits
+        for position in self.__positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys: Iterable[Hashable]) -> None:
+        """Add every key."""
+
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Return False if the key was surely not added."""
+
+        bits = self.__bits
+        for position in self.__positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def false_positive_rate(self) -> float:
+        """Return expected false positive rate for the added keys."""
+
+        return (
+            1 - math.exp(-self.hashes * self.count / self.bit_count)
+        ) ** self.hashes
+
+    def to_bytes(self) -> bytes:
+        """Return the filter as bytes."""
+
+        return (
+            _HEADER.pack(self.bit_count, self.hashes, self.count) + self.__bits
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        """Return filter written by to_bytes().
+
+        Raises:
+            ValueError: If data is not a filter.
+        """
+
+        # verify size
+        if len(data) < _HEADER.size:
+            raise ValueError("truncated bloom filter")
+        bit_count, hashes, count = _HEADER.unpack_from(data)
+        if len(data) != _HEADER.size + (bit_count + 7) // 8:
+            raise ValueError("truncated bloom filter")
+
+        start = _HEADER.size
+        bloom = cls.__new__(cls)
+        bloom.capacity = max(1, count)
+        bloom.bit_count = bit_count
+        bloom.hashes = hashes
+        bloom.count = count
+        bloom.__bits = bytearray(data[start:])
+        bloom.error_rate = bloom.false_positive_rate()
+
+        return bloom
+
+    def __positions(self, key: Hashable) -> Iterable[int]:
+        """Return bit positions of a key."""
+
+        value = key_hash(key)
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        size = self.bit_count
+
+        return [(first + i * step) % size for i in range(self.hashes)]
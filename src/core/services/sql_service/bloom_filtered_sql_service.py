@@ -0,0 +1,405 @@
+"""This file includes a bloom filter of record ids around any SQLService.
+
+Lookups of ids the filter has never seen are answered without calling the
+wrapped service, and creates of such ids skip its duplicate check through
+create_new(). The filter is built from the ids of the table on first use,
+sized for 'GROWTH' times the number of records, and rebuilt once the table
+outgrows it or lookups of missing ids find too many false positives, e.g.
+after many deletes.
+
+Every write must go through this service, records written to the table by
+other means are only seen after rebuild().
+
+Recorded metrics (label: table):
+    bloom_checks_total: Ids checked against the filter, also labelled by
+        'result' (absent, present).
+    bloom_false_positives_total: Ids the filter reported present that are
+        missing from the table.
+    bloom_rebuilds_total: Number of filter builds.
+"""
+
+
+import threading
+from typing import Any, Iterator
+from pydantic import BaseModel
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.bloom_filter import BloomFilter
+from core.services.sql_service.sql_service import RowsScanned, SQLService
+
+
+# filter capacity per record of the table, leaves room for creates
+GROWTH = 2
+
+# smallest filter capacity
+MIN_CAPACITY = 1024
+
+# lookups of missing ids needed before the observed false positive rate
+# may trigger a rebuild
+MIN_SAMPLES = 1000
+
+
+class BloomFilteredSQLService[T](SQLService):
+    """SQL service skipping lookups of ids missing from the wrapped
+    service.
+
+    Deleted ids stay in the filter until the next rebuild, lookups of them
+    reach the wrapped service and are counted as false positives.
+    """
+
+    # records visited by the last operation of the thread, 0 if answered
+    # by the filter, None if the wrapped service does not report it
+    last_rows_scanned = RowsScanned()
+
+    def __init__(
+        self,
+        sql_service: SQLService[T],
+        table: str,
+        error_rate: float = 0.01,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # verify error rate
+        if not 0 < error_rate < 1:
+            raise ValueError("'error_rate' must be between 0 and 1")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+        self.__labels: dict[str, str] = {"table": table}
+        self.__error_rate: float = error_rate
+        self.__bloom: BloomFilter | None = None
+        # ids created while a rebuild scans the table, None otherwise
+        self.__created: list | None = None
+        # guards the filter, one rebuild at a time
+        self.__lock = threading.Lock()
+        self.__rebuild_lock = threading.Lock()
+        # one create at a time, the create of a claimed id is written
+        # before another create of the id checks for duplicates
+        self.__create_lock = threading.Lock()
+        # lookups of missing ids since the last build, answered by the
+        # filter (true negatives) or by the wrapped service
+        self.__negatives: int = 0
+        self.__false_positives: int = 0
+
+        # public instances
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+    def rebuild(self) -> None:
+        """Build the filter from the ids of the wrapped service."""
+
+        with self.__rebuild_lock:
+            self.__rebuild()
+
+    def false_positive_rate(self) -> float:
+        """Return share of lookups of missing ids that reached the wrapped
+        service since the last build."""
+
+        lookups = self.__negatives + self.__false_positives
+
+        return self.__false_positives / lookups if lookups else 0.0
+
+    def expected_false_positive_rate(self) -> float:
+        """Return false positive rate expected from the filter size and
+        its number of ids."""
+
+        return self.__filter().false_positive_rate()
+
+    def create(self, record: T) -> None:
+        # invalid records are rejected by the wrapped service
+        if not isinstance(record, BaseModel):
+            return self.__sql_service.create(record)
+
+        record_id = record.id  # type: ignore
+        with self.__create_lock:
+            if self.__claim([record_id])[0]:
+                # new id, no duplicate check needed
+                self.__sql_service.create_new([record])
+                claimed = True
+            else:
+                self.__sql_service.create(record)
+                claimed = False
+        if not claimed:
+            # the id was missing after all
+            self.__false_positive()
+        self.__after_create()
+
+    def create_many(self, records: list[T]) -> None:
+        # invalid records are rejected by the wrapped service
+        if not isinstance(records, list) or not all(
+            isinstance(record, BaseModel) for record in records
+        ):
+            return self.__sql_service.create_many(records)
+
+        # repeated ids are claimed once, later copies are present
+        ids = [record.id for record in records]  # type: ignore
+        with self.__create_lock:
+            absent = self.__claim(ids)
+            if all(absent):
+                # new and unique ids, no duplicate check needed
+                self.__sql_service.create_new(records)
+            else:
+                # bits of ids of a failed create are harmless
+                self.__sql_service.create_many(records)
+        for _ in range(absent.count(False)):
+            self.__false_positive()
+        self.__after_create()
+
+    def read_single(self, query_data: dict) -> T | None:
+        # queries on the id of a missing record match nothing
+        if self.__skip(query_data):
+            return None
+
+        result = self.__sql_service.read_single(query_data)
+        self.__scanned()
+        if result is None and _by_id(query_data):
+            self.__false_positive()
+
+        return result
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        # queries on the id of a missing record match nothing
+        if self.__skip(query_data):
+            return []
+
+        result = self.__sql_service.read_multiple(query_data)
+        self.__scanned()
+        if not result and _by_id(query_data):
+            self.__false_positive()
+
+        return result
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # invalid ids are rejected by the wrapped service
+        if not isinstance(ids, list):
+            return self.__sql_service.read_by_ids(ids)
+
+        absent = [self.__absent(record_id) for record_id in ids]
+        maybe = [ids[i] for i, missing in enumerate(absent) if not missing]
+
+        # only ids maybe present are read
+        records = iter([])
+        self.last_rows_scanned = 0
+        if maybe:
+            records = iter(self.__sql_service.read_by_ids(maybe))
+            self.__scanned()
+
+        result = [None if missing else next(records) for missing in absent]
+        for missing, record in zip(absent, result):
+            if not missing and record is None:
+                self.__false_positive()
+
+        return result
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        return self.__sql_service.iter_chunks(chunk_size)
+
+    def update(self, updated_record: T) -> None:
+        # updates of missing records change nothing
+        if isinstance(updated_record, BaseModel) and self.__absent(
+            updated_record.id  # type: ignore
+        ):
+            self.last_rows_scanned = 0
+            return
+
+        self.__sql_service.update(updated_record)
+        self.__scanned()
+
+    def update_many(self, updated_records: list[T]) -> None:
+        # invalid records are rejected by the wrapped service
+        if not isinstance(updated_records, list) or not all(
+            isinstance(record, BaseModel) for record in updated_records
+        ):
+            return self.__sql_service.update_many(updated_records)
+
+        # updates of missing records change nothing
+        present = [
+            record
+            for record in updated_records
+            if not self.__absent(record.id)  # type: ignore
+        ]
+        self.last_rows_scanned = 0
+        if present:
+            self.__sql_service.update_many(present)
+            self.__scanned()
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        if self.__absent(record_id):
+            self.last_rows_scanned = 0
+            return None, None
+
+        result = self.__sql_service.read_versioned(record_id)
+        self.__scanned()
+        if result[0] is None:
+            self.__false_positive()
+
+        return result
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        return self.__sql_service.update_if_version(
+            updated_record, expected_version
+        )
+
+    def delete(self, query_data: dict) -> None:
+        # queries on the id of a missing record match nothing
+        if self.__skip(query_data):
+            return
+
+        self.__sql_service.delete(query_data)
+        self.__scanned()
+
+    def __filter(self) -> BloomFilter:
+        """Return the filter, built on first use."""
+
+        if self.__bloom is None:
+            self.rebuild()
+
+        return self.__bloom  # type: ignore
+
+    def __rebuild(self) -> None:
+        """Build the filter, the rebuild lock is held."""
+
+        # creates during the scan are added to the new filter as well
+        with self.__lock:
+            self.__created = []
+
+        ids = [
+            record.id  # type: ignore
+            for chunk in self.__sql_service.iter_chunks()
+            for record in chunk
+        ]
+        bloom = BloomFilter(
+            max(MIN_CAPACITY, GROWTH * len(ids)), self.__error_rate
+        )
+        bloom.update(ids)
+
+        with self.__lock:
+            bloom.update(self.__created)  # type: ignore
+            self.__bloom, self.__created = bloom, None
+            self.__negatives = self.__false_positives = 0
+
+        # record build
+        self.metrics.inc("bloom_rebuilds_total", self.__labels)
+
+    def __maybe_rebuild(self) -> None:
+        """Rebuild the filter unless a rebuild is running."""
+
+        if self.__rebuild_lock.acquire(blocking=False):
+            try:
+                self.__rebuild()
+            finally:
+                self.__rebuild_lock.release()
+
+    def __absent(self, record_id: Any) -> bool:
+        """Return True if the id is surely missing from the table."""
+
+        bloom = self.__filter()
+        try:
+            present = record_id in bloom
+        except TypeError:
+            # unhashable ids are left to the wrapped service
+            return False
+
+        # record check
+        self.metrics.inc(
+            "bloom_checks_total",
+            {**self.__labels, "result": "present" if present else "absent"},
+        )
+        if not present:
+            with self.__lock:
+                self.__negatives += 1
+
+        return not present
+
+    def __skip(self, query_data: Any) -> bool:
+        """Return True if the query is on the id of a missing record."""
+
+        if not isinstance(query_data, dict) or "id" not in query_data:
+            return False
+        if not self.__absent(query_data["id"]):
+            return False
+
+        self.last_rows_scanned = 0
+
+        return True
+
+    def __claim(self, ids: list) -> list[bool]:
+        """Return True for every id surely missing from the table and add
+        it before it is created.
+
+        Checks and adds are atomic, so that concurrent creates of a new id
+        claim it once. Every id goes to the filter of a running rebuild,
+        ids the current filter holds may have been deleted and be created
+        again after the rebuild scanned the table.
+        """
+
+        self.__filter()
+
+        absent = []
+        with self.__lock:
+            # current filter, a rebuild may have replaced it
+            bloom: BloomFilter = self.__bloom  # type: ignore
+            for record_id in ids:
+                try:
+                    present = record_id in bloom
+                except TypeError:
+                    # unhashable ids are left to the wrapped service
+                    absent.append(False)
+                    continue
+
+                if self.__created is not None:
+                    self.__created.append(record_id)
+                if not present:
+                    bloom.add(record_id)
+                    self.__negatives += 1
+                absent.append(not present)
+
+                # record check
+                self.metrics.inc(
+                    "bloom_checks_total",
+                    {
+                        **self.__labels,
+                        "result": "present" if present else "absent",
+                    },
+                )
+
+        return absent
+
+    def __after_create(self) -> None:
+        """Copy records visited by a create, rebuild once the table
+        outgrows the filter."""
+
+        self.__scanned()
+
+        bloom = self.__filter()
+        if bloom.count > bloom.capacity:
+            self.__maybe_rebuild()
+
+    def __false_positive(self) -> None:
+        """Record an id reported present but missing, rebuild if the
+        observed rate exceeds twice the target."""
+
+        with self.__lock:
+            self.__false_positives += 1
+            lookups = self.__negatives + self.__false_positives
+            rate = self.__false_positives / lookups
+        self.metrics.inc("bloom_false_positives_total", self.__labels)
+
+        if lookups >= MIN_SAMPLES and rate > 2 * self.__error_rate:
+            self.__maybe_rebuild()
+
+    def __scanned(self) -> None:
+        """Copy records visited by the wrapped service."""
+
+        self.last_rows_scanned = getattr(
+            self.__sql_service, "last_rows_scanned", None
+        )
+
+
+def _by_id(query_data: Any) -> bool:
+    """Return True if the query only filters on the id."""
+
+    return isinstance(query_data, dict) and list(query_data) == ["id"]
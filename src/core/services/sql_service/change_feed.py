@@ -0,0 +1,267 @@
+"""This file includes an ordered change feed (change-data-capture) of
+a table.
+
+SQLService implementations append one change per inserted, updated or
+deleted record, with before and after images of the record and a sequence
+number increasing by one per change. Consumers either pull changes after
+the last sequence number they processed with read(), or subscribe() to
+receive them as they are appended, optionally replaying retained changes
+first. Only the last 'max_changes' changes are retained.
+
+Recorded metrics (labels: name, operation):
+    change_feed_changes_total: Number of appended changes.
+    change_feed_subscriber_errors_total: Callbacks that raised, label
+        'name' only.
+"""
+
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.sql_exception import SQLException
+
+
+# change operations
+INSERT, UPDATE, DELETE = "insert", "update", "delete"
+
+
+class ChangeFeedGap(SQLException):
+    """Raised when resuming from an offset that is no longer retained,
+    the consumer should re-read the table and resume from 'last_seq()'."""
+
+
+@dataclass(frozen=True)
+class Change:
+    """Single record change."""
+
+    # sequence number, starts at 1
+    seq: int
+    # insert, update or delete
+    operation: str
+    # id of the changed record
+    key: Any
+    # record before the change, None for inserts
+    before: dict[str, Any] | None
+    # record after the change, None for deletes
+    after: dict[str, Any] | None
+    # unix time of the change
+    timestamp: float
+
+
+class Subscription:
+    """Push subscription of a change feed.
+
+    'last_seq' holds the last delivered sequence number, persist it to
+    resume after a restart. A subscription whose callback raised is
+    closed and keeps the error in 'error'.
+    """
+
+    def __init__(
+        self,
+        feed: "ChangeFeed",
+        callback: Callable[[Change], Any],
+        last_seq: int,
+    ) -> None:
+        self.callback: Callable[[Change], Any] = callback
+        self.last_seq: int = last_seq
+        self.error: Exception | None = None
+        self.closed: bool = False
+
+        # create private instances
+        self.__feed: ChangeFeed = feed
+
+    def unsubscribe(self) -> None:
+        """Stop receiving changes."""
+
+        self.__feed.unsubscribe(self)
+
+
+class ChangeFeed:
+    """Thread safe, in-memory change feed of a table.
+
+    Subscriber callbacks run synchronously in the writing thread, in
+    sequence order, and should not write to the table themselves.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_changes: int = 100_000,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # verify retention
+        if max_changes <= 0:
+            raise ValueError("'max_changes' must be a positive integer")
+
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        self.__changes: deque[Change] = deque(maxlen=max_changes)
+        self.__last_seq: int = 0
+        self.__subscriptions: list[Subscription] = []
+        # guards changes and subscriptions, notified on append
+        self.__condition = threading.Condition(threading.RLock())
+
+    def append(
+        self,
+        operation: str,
+        key: Any,
+        before: dict[str, Any] | None,
+        after: dict[str, Any] | None,
+    ) -> Change:
+        """Append a change and deliver it to subscribers.
+
+        Args:
+            operation (str): insert, update or delete.
+            key (Any): Id of the changed record.
+            before (dict[str, Any] | None): Record before the change.
+            after (dict[str, Any] | None): Record after the change.
+
+        Raises:
+            ValueError: If operation is unknown.
+
+        Returns:
+            Change: Appended change.
+        """
+
+        # verify operation
+        if operation not in (INSERT, UPDATE, DELETE):
+            raise ValueError(f"unknown change operation: {operation}")
+
+        self.metrics.inc(
+            "change_feed_changes_total",
+            {"name": self.name, "operation": operation},
+        )
+
+        with self.__condition:
+            self.__last_seq += 1
+            change = Change(
+                self.__last_seq, operation, key, before, after, time.time()
+            )
+            self.__changes.append(change)
+
+            for subscription in list(self.__subscriptions):
+                self.__deliver(subscription, change)
+
+            self.__condition.notify_all()
+
+        return change
+
+    def last_seq(self) -> int:
+        """Return sequence number of the last change, 0 if none."""
+
+        return self.__last_seq
+
+    def read(
+        self,
+        after_seq: int = 0,
+        limit: int | None = None,
+        timeout: float | None = None,
+    ) -> list[Change]:
+        """Return retained changes after 'after_seq'.
+
+        Args:
+            after_seq (int): Last sequence number already processed.
+            limit (int | None): Maximum number of changes.
+            timeout (float | None): Seconds to wait for a change if there
+                is none yet, None to return at once.
+
+        Raises:
+            ChangeFeedGap: If changes after 'after_seq' are no longer
+                retained.
+
+        Returns:
+            list[Change]: Changes in sequence order, [] if none.
+        """
+
+        with self.__condition:
+            if timeout is not None:
+                self.__condition.wait_for(
+                    lambda: self.__last_seq > after_seq, timeout
+                )
+
+            return self.__since(after_seq, limit)
+
+    def subscribe(
+        self,
+        callback: Callable[[Change], Any],
+        after_seq: int | None = None,
+    ) -> Subscription:
+        """Call 'callback' with every new change.
+
+        Args:
+            callback (Callable[[Change], Any]): Change consumer.
+            after_seq (int | None): Replay retained changes after this
+                sequence number first, None to receive new changes only.
+
+        Raises:
+            ChangeFeedGap: If changes after 'after_seq' are no longer
+                retained.
+
+        Returns:
+            Subscription: Subscription to close with unsubscribe().
+        """
+
+        with self.__condition:
+            if after_seq is None:
+                after_seq = self.__last_seq
+            replay = self.__since(after_seq, None)
+
+            subscription = Subscription(self, callback, after_seq)
+            self.__subscriptions.append(subscription)
+
+            # replayed changes are delivered before any new change
+            for change in replay:
+                self.__deliver(subscription, change)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering changes to a subscription."""
+
+        with self.__condition:
+            subscription.closed = True
+            if subscription in self.__subscriptions:
+                self.__subscriptions.remove(subscription)
+
+    def __since(self, after_seq: int, limit: int | None) -> list[Change]:
+        """Return retained changes after 'after_seq'."""
+
+        # first retained sequence number
+        first_seq = (
+            self.__changes[0].seq if self.__changes else self.__last_seq + 1
+        )
+        if after_seq + 1 < first_seq:
+            raise ChangeFeedGap(
+                f"changes after {after_seq} are no longer retained, "
+                f"oldest retained change is {first_seq}"
+            )
+
+        # changes are contiguous, index of the first one to return
+        start = max(after_seq + 1 - first_seq, 0)
+        end = None if limit is None else start + limit
+        return list(islice(self.__changes, start, end))
+
+    def __deliver(self, subscription: Subscription, change: Change) -> None:
+        """Deliver a change, close the subscription if its callback
+        raises."""
+
+        if subscription.closed:
+            return
+
+        try:
+            subscription.callback(change)
+        except Exception as error:
+            self.metrics.inc(
+                "change_feed_subscriber_errors_total", {"name": self.name}
+            )
+            subscription.error = error
+            self.unsubscribe(subscription)
+            return
+
+        subscription.last_seq = change.seq
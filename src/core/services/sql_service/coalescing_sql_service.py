@@ -0,0 +1,189 @@
+"""This file includes single-flight coalescing of identical reads around
+any SQLService, for threads and for asyncio.
+
+Concurrent read_single() / read_multiple() calls with the same query share
+one call of the wrapped service. Callers of a shared call receive their own
+copies of the lists and models. Every write of CoalescingSQLService detaches
+the in-flight reads, a read issued once a write returned never joins a read
+started before it.
+"""
+
+
+import asyncio
+from typing import Any, Callable, Iterator
+from pydantic import BaseModel
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.single_flight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    query_key,
+)
+from core.services.sql_service.sql_service import SQLService
+
+
+def _copy(result: Any) -> Any:
+    """Return a per caller copy of a shared result."""
+
+    if isinstance(result, list):
+        return [_copy(item) for item in result]
+    if isinstance(result, BaseModel):
+        return result.model_copy()
+
+    return result
+
+
+class CoalescingSQLService[T](SQLService):
+    """SQL service coalescing concurrent identical reads of threads.
+
+    Writes are delegated and detach the in-flight reads, collapsed reads
+    are reported by the 'single_flight_collapsed_total' metric with 'name'
+    label 'table'.
+    """
+
+    def __init__(
+        self,
+        sql_service: SQLService[T],
+        table: str,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+
+        # public instances
+        self.single_flight = SingleFlight(name=table, metrics=metrics)
+
+    def create(self, record: T) -> None:
+        return self.__write(self.__sql_service.create, record)
+
+    def create_many(self, records: list[T]) -> None:
+        return self.__write(self.__sql_service.create_many, records)
+
+    def create_new(self, records: list[T]) -> None:
+        return self.__write(self.__sql_service.create_new, records)
+
+    def read_single(self, query_data: dict) -> T | None:
+        return self.__read(
+            "read_single", self.__sql_service.read_single, query_data
+        )
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        return self.__read(
+            "read_multiple", self.__sql_service.read_multiple, query_data
+        )
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        return self.__sql_service.read_by_ids(ids)
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        return self.__sql_service.iter_chunks(chunk_size)
+
+    def update(self, updated_record: T) -> None:
+        return self.__write(self.__sql_service.update, updated_record)
+
+    def update_many(self, updated_records: list[T]) -> None:
+        return self.__write(self.__sql_service.update_many, updated_records)
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        return self.__sql_service.read_versioned(record_id)
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        return self.__write(
+            lambda record: self.__sql_service.update_if_version(
+                record, expected_version
+            ),
+            updated_record,
+        )
+
+    def delete(self, query_data: dict) -> None:
+        return self.__write(self.__sql_service.delete, query_data)
+
+    def __write(self, method: Callable, argument: Any) -> Any:
+        """Call write 'method', later reads do not join reads started
+        before it returned."""
+
+        try:
+            return method(argument)
+        finally:
+            # failed writes may be partially applied
+            self.single_flight.forget()
+
+    def __read(self, operation: str, method: Callable, query_data: Any) -> Any:
+        """Call 'method' once for concurrent identical queries."""
+
+        # invalid or unhashable queries are not coalesced
+        key = (
+            query_key(operation, query_data)
+            if isinstance(query_data, dict)
+            else None
+        )
+        if key is None:
+            return method(query_data)
+
+        return _copy(self.single_flight.do(key, lambda: method(query_data)))
+
+
+class AsyncCoalescingReader[T]:
+    """asyncio reader coalescing concurrent identical reads.
+
+    Calls of the wrapped service run in the default executor, so the event
+    loop is not blocked while a query scans the table.
+    """
+
+    def __init__(
+        self,
+        sql_service: SQLService[T],
+        table: str,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+
+        # public instances
+        self.single_flight = AsyncSingleFlight(name=table, metrics=metrics)
+
+    async def read_single(self, query_data: dict) -> T | None:
+        """Read a single record, see SQLService.read_single()."""
+
+        return await self.__read(
+            "read_single", self.__sql_service.read_single, query_data
+        )
+
+    async def read_multiple(self, query_data: dict) -> list[T]:
+        """Read multiple records, see SQLService.read_multiple()."""
+
+        return await self.__read(
+            "read_multiple", self.__sql_service.read_multiple, query_data
+        )
+
+    async def __read(
+        self,
+        operation: str,
+        method: Callable,
+        query_data: Any,
+    ) -> Any:
+        """Await 'method' once for concurrent identical queries."""
+
+        # invalid or unhashable queries are not coalesced
+        key = (
+            query_key(operation, query_data)
+            if isinstance(query_data, dict)
+            else None
+        )
+        if key is None:
+            return await asyncio.to_thread(method, query_data)
+
+        return _copy(
+            await self.single_flight.do(
+                key, lambda: asyncio.to_thread(method, query_data)
+            )
+        )
@@ -0,0 +1,195 @@
+"""This file includes an auto-increment id sequence with block reservation.
+
+Writers reserve blocks of consecutive ids from the shared sequence and
+allocate ids from their own block without locking, so concurrent writers
+only contend once per block. Ids are unique but not gap free: ids left in
+the block of a finished writer are never handed out. Ids supplied by
+callers are reported with advance_past(): blocks reserved later start after
+them, and a block already holding one of them skips that id only.
+
+The sequence is kept in memory, start it after the largest stored id
+with max_id().
+
+Recorded metrics (label: name):
+    id_sequence_blocks_total: Number of reserved blocks.
+    id_sequence_ids_total: Number of reserved ids.
+"""
+
+
+import threading
+import weakref
+from typing import Iterable
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.sql_service import SQLService
+
+
+def max_id(sql_service: SQLService, chunk_size: int = 10_000) -> int:
+    """Return the largest id of a table, 0 if empty.
+
+    Args:
+        sql_service (SQLService): Table to scan.
+        chunk_size (int): Records read per chunk.
+
+    Raises: SQLException.
+
+    Returns:
+        int: Largest record id.
+    """
+
+    largest = 0
+    for chunk in sql_service.iter_chunks(chunk_size):
+        for record in chunk:
+            largest = max(largest, record.id)
+
+    return largest
+
+
+class IdBlock:
+    """Ids reserved by a single writer, not thread safe."""
+
+    def __init__(self, sequence: "IdSequence") -> None:
+        # create private instances
+        self.__sequence: IdSequence = sequence
+        self.__ids: range = range(0)
+        self.__index: int = 0
+        # ids of the block supplied by callers
+        self.__supplied: set[int] = set()
+
+    def next_id(self) -> int:
+        """Return the next id, reserve a new block once exhausted."""
+
+        while True:
+            if self.__index == len(self.__ids):
+                self.__sequence.reserve(self.__sequence.block_size, self)
+
+            record_id = self.__ids[self.__index]
+            self.__index += 1
+
+            if not self.__supplied or record_id not in self.__supplied:
+                return record_id
+
+            # supplied by a caller
+            self.__supplied.discard(record_id)
+
+    def assign(self, ids: range) -> None:
+        """Hand out 'ids' from now on, called by the sequence."""
+
+        self.__ids, self.__index = ids, 0
+        self.__supplied = set()
+
+    def skip(self, record_id: int) -> None:
+        """Never hand out 'record_id' if it is in the block, called by the
+        sequence."""
+
+        if record_id in self.__ids:
+            self.__supplied.add(record_id)
+
+
+class IdSequence:
+    """Thread safe sequence of positive ids."""
+
+    def __init__(
+        self,
+        start: int = 1,
+        block_size: int = 1000,
+        name: str = "default",
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # verify start and block size, ids must be positive
+        if not isinstance(start, int) or start <= 0:
+            raise ValueError("'start' must be a positive integer")
+        if block_size <= 0:
+            raise ValueError("'block_size' must be a positive integer")
+
+        self.block_size: int = block_size
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        # first id of the next block
+        self.__next: int = start
+        # blocks handing out ids, checked against supplied ids
+        self.__blocks: weakref.WeakSet[IdBlock] = weakref.WeakSet()
+        self.__lock = threading.Lock()
+        # block of every thread using next_id()
+        self.__local = threading.local()
+
+    def reserve(self, count: int, block: IdBlock | None = None) -> range:
+        """Reserve consecutive ids.
+
+        Args:
+            count (int): Number of ids.
+            block (IdBlock | None): Block handing out the ids, its ids are
+                checked against ids supplied by callers.
+
+        Raises:
+            ValueError: If count is not positive.
+
+        Returns:
+            range: Reserved ids.
+        """
+
+        # verify count
+        if count <= 0:
+            raise ValueError("'count' must be a positive integer")
+
+        with self.__lock:
+            start = self.__next
+            self.__next += count
+            ids = range(start, start + count)
+
+            # assigned under the lock, no supplied id is missed
+            if block is not None:
+                block.assign(ids)
+                self.__blocks.add(block)
+
+        labels = {"name": self.name}
+        self.metrics.inc("id_sequence_blocks_total", labels)
+        self.metrics.inc("id_sequence_ids_total", labels, count)
+
+        return ids
+
+    def block(self) -> IdBlock:
+        """Return a new block allocator, owned by a single writer."""
+
+        return IdBlock(self)
+
+    def next_id(self) -> int:
+        """Return the next id from the block of the calling thread."""
+
+        block = getattr(self.__local, "block", None)
+        if block is None:
+            block = self.__local.block = IdBlock(self)
+
+        return block.next_id()
+
+    def advance_past(self, record_id: int) -> None:
+        """Report an id supplied by a caller, see advance_past_many()."""
+
+        self.advance_past_many([record_id])
+
+    def advance_past_many(self, record_ids: Iterable[int]) -> None:
+        """Report ids supplied by callers rather than by the sequence.
+
+        Blocks reserved from now on start after the largest of them, and
+        the block holding one of them skips that id only, other blocks are
+        left as they are.
+
+        Args:
+            record_ids (Iterable[int]): Supplied ids.
+        """
+
+        with self.__lock:
+            for record_id in record_ids:
+                if record_id >= self.__next:
+                    self.__next = record_id + 1
+                    continue
+
+                # id of an already reserved range
+                for block in self.__blocks:
+                    block.skip(record_id)
+
+    def peek(self) -> int:
+        """Return first id of the next reserved block."""
+
+        return self.__next
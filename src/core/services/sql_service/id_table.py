@@ -0,0 +1,265 @@
+"""This file includes a table of rows keyed by id, stored in a direct
+address array while ids are dense and in a hash index otherwise.
+
+Direct mode keeps rows in a list indexed by id and a bitmap of present
+ids, so lookups are a single index and the memory per row is one list
+slot. Once less than 'MIN_DENSITY' of the slots up to the largest id are
+used, or an id is not a non negative int, rows move to a dict. Rows move
+back to direct mode once the ids are dense again. Lookups by a number equal
+to an int id (1.0, True) find it in both modes, like dict lookups do.
+"""
+
+
+from functools import partial
+from itertools import compress
+from numbers import Number
+from operator import is_not
+from typing import Any, Hashable, Iterator
+
+
+# direct mode is always used below this capacity
+MIN_DIRECT_CAPACITY = 1024
+
+# direct mode falls back to the hash index below this density
+MIN_DENSITY = 0.25
+
+# hash index moves back to direct mode from this density
+DIRECT_DENSITY = 0.5
+
+# storage modes
+DIRECT, HASH = "direct", "hash"
+
+
+def id_query(query_data: dict) -> Hashable | None:
+    """Return id of a query by id only, else None."""
+
+    if query_data.keys() != {"id"}:
+        return None
+
+    try:
+        hash(query_data["id"])
+    except TypeError:
+        return None
+
+    return id_key(query_data["id"])
+
+
+def id_key(key: Hashable) -> Hashable:
+    """Return the int equal to an integral number (1.0, True), the key
+    itself otherwise."""
+
+    if type(key) is int or not isinstance(key, Number):
+        return key
+
+    try:
+        integral = int(key)  # type: ignore
+    except (TypeError, ValueError, OverflowError):
+        # complex, nan and infinite numbers
+        return key
+
+    return integral if integral == key else key
+
+
+def direct_key(key: Hashable) -> bool:
+    """Return True if a key can index the direct address array."""
+
+    return type(key) is int and key >= 0
+
+
+class IdTable:
+    """Rows keyed by id, not thread safe.
+
+    Rows are iterated in id order in direct mode, and in insertion order
+    in hash mode.
+    """
+
+    def __init__(self) -> None:
+        self.__reset()
+
+    def __reset(self) -> None:
+        """Remove every row and go back to direct mode."""
+
+        # current storage mode
+        self.mode: str = DIRECT
+
+        # direct mode rows by id, None for absent ids
+        self.__rows: list[Any] = []
+        # direct mode bit of every present id
+        self.__bitmap: bytearray = bytearray()
+        # hash mode rows by id
+        self.__index: dict[Hashable, Any] = {}
+        # number of rows
+        self.__count: int = 0
+        # number of ids that cannot be stored in direct mode
+        self.__foreign: int = 0
+        # upper bound of the largest id, used to measure density
+        self.__max_key: int = -1
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __contains__(self, key: Hashable) -> bool:
+        if self.mode == HASH:
+            return key in self.__index
+        if type(key) is not int:
+            key = id_key(key)
+        if not direct_key(key) or key >= len(self.__rows):
+            return False
+
+        return bool(self.__bitmap[key >> 3] & (1 << (key & 7)))
+
+    def get(self, key: Hashable) -> Any:
+        """Return row of an id, None if absent."""
+
+        if self.mode == HASH:
+            return self.__index.get(key)
+        if type(key) is not int:
+            key = id_key(key)
+        if not direct_key(key) or key >= len(self.__rows):
+            return None
+
+        return self.__rows[key]
+
+    def get_many(self, keys: list) -> list[Any]:
+        """Return row of every id, None for absent ids."""
+
+        if self.mode == HASH:
+            return list(map(self.__index.get, keys))
+
+        # single C level pass when every id is a slot of the array
+        if set(map(type, keys)) <= {int} and min(keys, default=0) >= 0:
+            try:
+                return list(map(self.__rows.__getitem__, keys))
+            except IndexError:
+                pass
+
+        return [self.get(key) for key in keys]
+
+    def put(self, key: Hashable, row: Any) -> None:
+        """Insert or replace row of an id."""
+
+        if self.mode == DIRECT and not self.__fits(key):
+            self.__to_hash()
+
+        present = key in self
+        if self.mode == HASH:
+            self.__index[key] = row
+        else:
+            self.__rows[key] = row  # type: ignore
+            self.__bitmap[key >> 3] |= 1 << (key & 7)  # type: ignore
+
+        if not present:
+            self.__count += 1
+            if direct_key(key):
+                self.__max_key = max(self.__max_key, key)  # type: ignore
+            else:
+                self.__foreign += 1
+
+        # ids dense again
+        if self.mode == HASH:
+            self.__maybe_to_direct()
+
+    def delete(self, key: Hashable) -> Any:
+        """Remove row of an id and return it, None if absent."""
+
+        # stored under the equal int id
+        key = id_key(key)
+        if key not in self:
+            return None
+
+        self.__count -= 1
+        if self.mode == HASH:
+            if not direct_key(key):
+                self.__foreign -= 1
+            return self.__index.pop(key)
+
+        row = self.__rows[key]  # type: ignore
+        self.__rows[key] = None  # type: ignore
+        self.__bitmap[key >> 3] &= ~(1 << (key & 7)) & 0xFF  # type: ignore
+
+        # ids sparse
+        if self.__sparse(len(self.__rows)):
+            self.__to_hash()
+
+        return row
+
+    def keys(self) -> Iterator[Hashable]:
+        """Iterate over present ids."""
+
+        if self.mode == HASH:
+            return iter(list(self.__index))
+
+        # positions of the present rows, without a Python level loop
+        rows = self.__rows
+        return compress(range(len(rows)), map(partial(is_not, None), rows))
+
+    def values(self) -> Iterator[Any]:
+        """Iterate over rows."""
+
+        if self.mode == HASH:
+            return iter(list(self.__index.values()))
+
+        # skip absent ids without a Python level loop
+        return filter(partial(is_not, None), self.__rows)
+
+    def items(self) -> Iterator[tuple[Hashable, Any]]:
+        """Iterate over (id, row) pairs."""
+
+        for key in self.keys():
+            yield key, self.get(key)
+
+    def clear(self) -> None:
+        """Remove every row and go back to direct mode."""
+
+        self.__reset()
+
+    def __sparse(self, capacity: int) -> bool:
+        """Return True if direct mode would use less than MIN_DENSITY of
+        'capacity' slots."""
+
+        return (
+            capacity > MIN_DIRECT_CAPACITY
+            and self.__count < capacity * MIN_DENSITY
+        )
+
+    def __fits(self, key: Hashable) -> bool:
+        """Grow the direct address array for 'key' unless it would be
+        sparse, return False if the key does not fit direct mode."""
+
+        if not direct_key(key):
+            return False
+        if key < len(self.__rows):  # type: ignore
+            return True
+
+        # grow geometrically to amortize resizes
+        capacity = max(key + 1, 2 * len(self.__rows), 64)  # type: ignore
+        if self.__sparse(key + 1):  # type: ignore
+            return False
+
+        self.__rows.extend([None] * (capacity - len(self.__rows)))
+        self.__bitmap.extend(bytes((capacity >> 3) + 1 - len(self.__bitmap)))
+
+        return True
+
+    def __to_hash(self) -> None:
+        """Move rows to the hash index."""
+
+        self.__index = dict(self.items())
+        self.__rows, self.__bitmap = [], bytearray()
+        self.mode = HASH
+
+    def __maybe_to_direct(self) -> None:
+        """Move rows to direct mode once ids are dense and direct."""
+
+        capacity = self.__max_key + 1
+        if self.__foreign or self.__count < capacity * DIRECT_DENSITY:
+            return
+
+        rows, count = self.__index, self.__count
+        self.__reset()
+        self.__rows = [None] * capacity
+        self.__bitmap = bytearray((capacity >> 3) + 1)
+        for key, row in rows.items():
+            self.__rows[key] = row  # type: ignore
+            self.__bitmap[key >> 3] |= 1 << (key & 7)  # type: ignore
+        self.__count, self.__max_key = count, capacity - 1
@@ -0,0 +1,721 @@
+"""This file includes an in-memory implementation of SQLService.
+
+Records are stored as tuples of field values in an IdTable, a direct
+address array while ids are dense. Operations by id (create, queries by
+id only, read_by_ids, update, delete by id) cost O(1), other queries scan
+the table in id order.
+
+Fields with a bitmap index (create_index) keep the ids of the records
+holding every value. Queries on indexed fields intersect the bitmaps of
+the queried values and only read the records left, the remaining fields
+are checked on these records alone. Bitmap indexes require non negative
+int ids.
+
+With an AutoIndexer, every query other than by id only reports its key
+set and the number of records it visited, and indexes are built and
+dropped as the policy decides.
+
+Writes are serialized by the lock of a VersionStore and get a version
+number, snapshot() opens a consistent view of the table at the current
+version that writers do not wait for (see mvcc).
+
+With a ParallelScanner, full scans of read_multiple() and delete() on
+tables of at least its threshold rows are matched in a process pool over
+columns in shared memory, which every write updates in place. The rows it
+returns are checked again against the query.
+"""
+
+
+from itertools import islice
+from typing import Any, Hashable, Iterable, Iterator
+from pydantic import BaseModel, TypeAdapter
+from core.services.sql_service.auto_indexer import BUILD, AutoIndexer
+from core.services.sql_service.bitmap_index import (
+    Bitmap,
+    BitmapIndex,
+    intersect,
+)
+from core.services.sql_service.change_feed import (
+    DELETE,
+    INSERT,
+    UPDATE,
+    ChangeFeed,
+)
+from core.services.sql_service.id_table import (
+    DIRECT,
+    IdTable,
+    direct_key,
+    id_query,
+)
+from core.services.sql_service.mvcc import Snapshot, VersionStore
+from core.services.sql_service.parallel_scan import ParallelScanner
+from core.services.sql_service.query_compiler import (
+    CompiledQuery,
+    QueryCompiler,
+)
+from core.services.sql_service.sql_exception import (
+    SQLException,
+    VersionConflict,
+)
+from core.services.sql_service.sql_service import RowsScanned, SQLService
+
+
+# error of ids bitmap indexes cannot hold
+NOT_INDEXABLE = "bitmap indexes require non negative int ids"
+
+
+class InMemoryService[T](SQLService):
+    """In-memory implementation of SQL service.
+
+    Every inserted, updated and deleted record is appended to
+    'change_feed' if provided, indexes follow the decisions of
+    'auto_index' if provided, and large full scans run in 'scanner' if
+    provided.
+    """
+
+    # number of records visited by the last operation of the thread
+    last_rows_scanned = RowsScanned()
+
+    def __init__(
+        self,
+        change_feed: ChangeFeed | None = None,
+        auto_index: AutoIndexer | None = None,
+        scanner: ParallelScanner | None = None,
+    ) -> None:
+        self.change_feed: ChangeFeed | None = change_feed
+        self.auto_index: AutoIndexer | None = auto_index
+        self.scanner: ParallelScanner | None = scanner
+        self.table: IdTable = IdTable()
+
+        # create private instances
+        # fields of T in declaration order, set on first use
+        self.__fields: tuple[str, ...] = ()
+        # position of every field in a row
+        self.__positions: dict[str, int] = {}
+        # compiled query shapes, unknown fields raise KeyError
+        self.__queries = QueryCompiler(
+            field_key=lambda field: self.__positions[field]
+        )
+        # bitmap indexes by field
+        self.__indexes: dict[str, BitmapIndex] = {}
+        # write lock, versions kept for snapshots
+        self.__versions = VersionStore()
+        # version of the last write of every id, the row version
+        self.__row_versions: dict[Hashable, int] = {}
+
+    @property
+    def storage_mode(self) -> str:
+        """Storage mode of the table, 'direct' or 'hash'."""
+
+        return self.table.mode
+
+    def snapshot(self) -> Snapshot[T]:
+        """Open a consistent view of the table at the current version.
+
+        Returns:
+            Snapshot[T]: Snapshot to close once read.
+        """
+
+        self.__model_type()
+
+        return Snapshot(
+            self.__versions, self.table, self.__model, self.__compile
+        )
+
+    @property
+    def version_store(self) -> VersionStore:
+        """Write lock and versions of the table."""
+
+        return self.__versions
+
+    def create_index(self, field: str) -> None:
+        """Build a bitmap index of a field, kept up to date by every write.
+
+        Args:
+            field (str): Field of T.
+
+        Raises:
+            ValueError: If the field is unknown or already indexed, or an
+                id is not a non negative int.
+        """
+
+        self.__model_type()
+
+        # verify field
+        if field not in self.__positions:
+            raise ValueError(f"unknown field: {field}")
+
+        with self.__versions.lock:
+            if field in self.__indexes:
+                raise ValueError(f"index already exists: {field}")
+
+            # verify ids
+            if not all(map(direct_key, self.table.keys())):
+                raise ValueError(NOT_INDEXABLE)
+
+            index = BitmapIndex(field)
+            position = self.__positions[field]
+            for key, row in self.table.items():
+                index.add(row[position], key)  # type: ignore
+
+            self.__indexes[field] = index
+
+    def drop_index(self, field: str) -> None:
+        """Remove the bitmap index of a field, if any."""
+
+        with self.__versions.lock:
+            self.__indexes.pop(field, None)
+
+    def indexes(self) -> list[str]:
+        """Return indexed fields."""
+
+        with self.__versions.lock:
+            return list(self.__indexes)
+
+    def create(self, record: T) -> None:
+        # verify record type
+        if not isinstance(record, BaseModel):
+            # raise type error
+            raise TypeError("'record' should be a valid model.")
+
+        # get record id
+        record_id: Any = record.id  # type: ignore
+
+        # duplicate check is a single lookup
+        self.last_rows_scanned = 1
+        row = self.__row(record)
+
+        with self.__versions.lock:
+            # if record_id already present in table
+            if record_id in self.table:
+                # raise SQLException
+                raise SQLException(f"duplicate id: {record_id}")
+            self.__verify_indexable(record_id)
+
+            # otherwise add record to table
+            self.__write(record_id, None, row)
+
+    def create_many(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
+
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        rows = [self.__row(record) for record in records]
+        self.last_rows_scanned = len(records)
+
+        with self.__versions.lock:
+            # verify no duplicate id, nothing is inserted otherwise
+            seen: set = set()
+            for record in records:
+                record_id: Any = record.id  # type: ignore
+                if record_id in seen or record_id in self.table:
+                    # raise SQLException
+                    raise SQLException(f"duplicate id: {record_id}")
+                self.__verify_indexable(record_id)
+                seen.add(record_id)
+
+            # add records to table
+            for record, row in zip(records, rows):
+                self.__write(record.id, None, row)  # type: ignore
+
+    def read_single(self, query_data: dict) -> T | None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id is a single lookup
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            return self.__model(self.table.get(record_id))
+
+        # every candidate is visited unless a match is found
+        ids, query = self.__plan(query_data)
+        self.last_rows_scanned = self.__count(ids)
+        getter, values = query.getter, query.values
+
+        found = None
+        for scanned, row in enumerate(self.__candidates(ids), start=1):
+            if getter(row) == values:
+                # search stopped at this record
+                self.last_rows_scanned = scanned
+                found = row
+                break
+
+        self.__observe(query_data)
+
+        return self.__model(found)
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id is a single lookup
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            row = self.table.get(record_id)
+            return [] if row is None else [self.__model(row)]
+
+        # every candidate is visited
+        ids, query = self.__plan(query_data)
+        self.last_rows_scanned = self.__count(ids)
+        rows = self.__parallel_scan(ids, query_data, query)
+        if rows is None:
+            rows = list(query.filter(self.__candidates(ids)))
+        self.__observe(query_data)
+
+        return [self.__model(row) for row in rows]
+
+    def read_any(self, field: str, values: list) -> list[T]:
+        """Return records whose field holds any of the values.
+
+        Indexed fields are answered by OR of the bitmaps of the values,
+        other fields by a full scan.
+
+        Args:
+            field (str): Field of T.
+            values (list): Accepted values.
+
+        Raises:
+            TypeError: If values is not a list.
+            KeyError: If the field is unknown.
+
+        Returns:
+            list[T]: Matching records.
+        """
+
+        # verify values type
+        if not isinstance(values, list):
+            # raise type error
+            raise TypeError("'values' should be a valid list.")
+
+        self.__model_type()
+        position = self.__positions[field]
+
+        # bitmaps of the indexes change with every write
+        with self.__versions.lock:
+            index = self.__indexes.get(field)
+            ids = index.any_of(values) if index is not None else None
+
+        if ids is not None:
+            self.last_rows_scanned = len(ids)
+            rows = list(self.__candidates(ids))
+        else:
+            # every record is visited
+            self.last_rows_scanned = len(self.table)
+            rows = [
+                row for row in self.table.values() if row[position] in values
+            ]
+        self.__observe({field: values})
+
+        return [self.__model(row) for row in rows]
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        # one lookup per id
+        self.last_rows_scanned = len(ids)
+
+        return [self.__model(self.table.get(record_id)) for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        # validates a whole chunk in a single call
+        model = self.__model_type()
+        adapter = TypeAdapter(list[model])  # type: ignore
+        fields = self.__fields
+
+        # records visited so far
+        self.last_rows_scanned = 0
+
+        rows = self.table.values()
+        while chunk := list(islice(rows, chunk_size)):
+            self.last_rows_scanned += len(chunk)
+
+            # create and yield models of type T
+            yield adapter.validate_python(
+                [dict(zip(fields, row)) for row in chunk], strict=True
+            )
+
+    def update(self, updated_record: T) -> None:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        self.__update(updated_record)
+
+    def update_many(self, updated_records: list[T]) -> None:
+        # verify updated_records type
+        if not isinstance(updated_records, list):
+            # raise type error
+            raise TypeError("'updated_records' should be a valid list.")
+
+        # verify every updated_record type
+        for updated_record in updated_records:
+            if not isinstance(updated_record, BaseModel):
+                # raise type error
+                raise TypeError("'updated_record' should be a valid model.")
+
+        for updated_record in updated_records:
+            self.__update(updated_record)
+        self.last_rows_scanned = len(updated_records)
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        self.last_rows_scanned = 1
+
+        with self.__versions.lock:
+            row = self.table.get(record_id)
+            version = self.__row_versions.get(record_id)
+
+        if row is None:
+            return None, None
+
+        return self.__model(row), version
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        record_id: Hashable = updated_record.id  # type: ignore
+        self.last_rows_scanned = 1
+        row = self.__row(updated_record)
+
+        with self.__versions.lock:
+            # missing record or written since read
+            before = self.table.get(record_id)
+            if (
+                before is None
+                or self.__row_versions.get(record_id) != expected_version
+            ):
+                raise VersionConflict(
+                    f"version conflict on id {record_id}: "
+                    f"expected version {expected_version}"
+                )
+
+            self.__write(record_id, before, row)
+
+            return self.__row_versions[record_id]
+
+    def delete(self, query_data: dict) -> None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id is a single lookup
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            keys = [record_id] if record_id in self.table else []
+        else:
+            # every candidate is visited
+            ids, query = self.__plan(query_data)
+            self.last_rows_scanned = self.__count(ids)
+            rows = self.__parallel_scan(ids, query_data, query)
+            if rows is None:
+                rows = query.filter(self.__candidates(ids))
+            position = self.__positions["id"]
+            keys = [row[position] for row in rows]
+            self.__observe(query_data)
+
+        with self.__versions.lock:
+            for key in keys:
+                # skip records deleted since the scan
+                row = self.table.get(key)
+                if row is not None:
+                    self.__write(key, row, None)
+
+    def explain(self, query_data: dict) -> str:
+        """Return plan of a query on the table.
+
+        Args:
+            query_data (dict): SQL query data in dict format.
+
+        Returns:
+            str: Query plan, queries by id only are lookups, queries on
+                indexed fields are bitmap intersections, other queries are
+                full scans.
+        """
+
+        if isinstance(query_data, dict) and id_query(query_data) is not None:
+            return (
+                f"ID LOOKUP ({self.table.mode}) of {len(self.table)} records"
+            )
+
+        indexed = self.__indexed_fields(query_data)
+        if indexed:
+            rest = sorted(set(query_data) - set(indexed))
+            return (
+                f"BITMAP AND ({', '.join(indexed)}) of {len(self.table)} "
+                f"records, filter: {', '.join(rest) or 'none'}"
+            )
+
+        scan = "FULL SCAN"
+        if self.__parallel(query_data):
+            workers = self.scanner.workers  # type: ignore
+            scan = f"PARALLEL SCAN ({workers} workers)"
+
+        return (
+            f"{scan} of {len(self.table)} records, "
+            f"filter: {', '.join(sorted(query_data)) or 'none'}"
+        )
+
+    def __model_type(self) -> type[BaseModel]:
+        """Return type of T, cache its fields on first use."""
+
+        # get type of T
+        model = self.__orig_class__.__args__[0]  # type: ignore
+
+        if not self.__fields:
+            self.__fields = tuple(model.model_fields)
+            self.__positions = {
+                field: position for position, field in enumerate(self.__fields)
+            }
+
+        return model
+
+    def __row(self, record: BaseModel) -> tuple:
+        """Return field values of a record."""
+
+        self.__model_type()
+        values = record.__dict__
+
+        return tuple([values[field] for field in self.__fields])
+
+    def __model(self, row: tuple | None) -> Any:
+        """Create model of type T from a row, None for None."""
+
+        if row is None:
+            return None
+
+        return self.__model_type().model_validate(
+            obj=dict(zip(self.__fields, row)), strict=True
+        )
+
+    def __compile(self, query_data: dict) -> CompiledQuery:
+        """Compile a query on rows."""
+
+        self.__model_type()
+
+        return self.__queries.compile(query_data)
+
+    def __indexed_fields(self, query_data: dict) -> list[str]:
+        """Return queried fields answered by a bitmap index."""
+
+        indexed = []
+        for field, value in query_data.items():
+            if field not in self.__indexes:
+                continue
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            indexed.append(field)
+
+        return indexed
+
+    def __plan(self, query_data: dict) -> tuple[Bitmap | None, CompiledQuery]:
+        """Return ids of the candidate records, None for every record, and
+        the query on the fields left."""
+
+        # bitmaps of the indexes change with every write, the intersection
+        # is a new bitmap
+        with self.__versions.lock:
+            indexed = self.__indexed_fields(query_data)
+            ids = (
+                intersect(
+                    self.__indexes[field].get(query_data[field])
+                    for field in indexed
+                )
+                if indexed
+                else None
+            )
+
+        if ids is None:
+            return None, self.__compile(query_data)
+        rest = {
+            field: value
+            for field, value in query_data.items()
+            if field not in indexed
+        }
+
+        return ids, self.__compile(rest)
+
+    def __count(self, ids: Bitmap | None) -> int:
+        """Return number of candidate records."""
+
+        return len(self.table) if ids is None else len(ids)
+
+    def __candidates(self, ids: Bitmap | None) -> Iterable[tuple]:
+        """Iterate over candidate rows, rows deleted since the ids were
+        read are skipped."""
+
+        if ids is None:
+            return self.table.values()
+
+        return filter(None, map(self.table.get, ids))
+
+    def __parallel(self, query_data: dict) -> bool:
+        """Return True if a full scan of the query runs in the scanner."""
+
+        return (
+            self.scanner is not None
+            and bool(query_data)
+            and self.scanner.accepts(len(self.table))
+        )
+
+    def __parallel_scan(
+        self, ids: Bitmap | None, query_data: dict, query: CompiledQuery
+    ) -> list[tuple] | None:
+        """Return matching rows of a full scan run in the scanner, None if
+        the caller has to scan the rows itself."""
+
+        if ids is not None or not self.__parallel(query_data):
+            return None
+
+        # unknown fields are reported by the query compiler
+        positions = {
+            self.__positions[field]: value
+            for field, value in query_data.items()
+        }
+        keys = self.scanner.scan(self.__items, positions)  # type: ignore
+        if keys is None:
+            return None
+
+        # scanner appends inserted rows, direct mode iterates in id order
+        if self.table.mode == DIRECT:
+            keys.sort()
+
+        # rows written during the scan are checked again
+        return list(query.filter(filter(None, self.table.get_many(keys))))
+
+    def __items(self) -> list[tuple[Hashable, tuple]]:
+        """Return (id, row) pairs read with the write lock held, writes
+        may change the table while it is iterated otherwise."""
+
+        with self.__versions.lock:
+            return list(self.table.items())
+
+    def __observe(self, query_data: dict) -> None:
+        """Report a query to the auto indexer and apply its decisions."""
+
+        if self.auto_index is None:
+            return
+
+        decisions = self.auto_index.observe(
+            query_data, self.last_rows_scanned, self.indexes()
+        )
+        for decision in decisions:
+            if decision.action != BUILD:
+                self.drop_index(decision.field)
+                continue
+            try:
+                self.create_index(decision.field)
+            except ValueError as error:
+                # other errors come from concurrent decisions, e.g. the
+                # index was built by another query since this decision
+                if str(error) == NOT_INDEXABLE:
+                    self.auto_index.reject(decision.field, NOT_INDEXABLE)
+
+    def __verify_indexable(self, record_id: Any) -> None:
+        """Raise SQLException if bitmap indexes cannot hold an id."""
+
+        if self.__indexes and not direct_key(record_id):
+            raise SQLException(f"{NOT_INDEXABLE}: {record_id}")
+
+    def __index(self, record_id: Any, row: tuple | None, apply: Any) -> None:
+        """Add (BitmapIndex.add) or remove (BitmapIndex.remove) a row from
+        every bitmap index."""
+
+        if row is None:
+            return
+
+        for field, index in self.__indexes.items():
+            apply(index, row[self.__positions[field]], record_id)
+
+    def __update(self, updated_record: BaseModel) -> None:
+        """Replace stored record of the same id, if any."""
+
+        record_id: Hashable = updated_record.id  # type: ignore
+        self.last_rows_scanned = 1
+        row = self.__row(updated_record)
+
+        with self.__versions.lock:
+            before = self.table.get(record_id)
+            if before is not None:
+                self.__write(record_id, before, row)
+
+    def __write(
+        self, record_id: Any, before: tuple | None, after: tuple | None
+    ) -> None:
+        """Write a row (None to delete it) of an id holding 'before', with
+        the write lock held."""
+
+        self.__versions.record(record_id, before)
+        mode = self.table.mode
+        if after is None:
+            self.table.delete(record_id)
+            self.__row_versions.pop(record_id, None)
+        else:
+            self.table.put(record_id, after)
+            self.__row_versions[record_id] = self.__versions.version
+
+        if self.scanner is not None:
+            if self.table.mode != mode:
+                # rows of the new mode are iterated in another order
+                self.scanner.clear()
+            else:
+                self.scanner.write(record_id, after)
+
+        self.__index(record_id, before, BitmapIndex.remove)
+        self.__index(record_id, after, BitmapIndex.add)
+
+        if before is None:
+            operation = INSERT
+        elif after is None:
+            operation = DELETE
+        else:
+            operation = UPDATE
+        self.__capture(operation, record_id, before, after)
+
+    def __capture(
+        self,
+        operation: str,
+        record_id: Any,
+        before: tuple | None,
+        after: tuple | None,
+    ) -> None:
+        """Append a change to the change feed."""
+
+        if self.change_feed is None:
+            return
+
+        fields = self.__fields
+        self.change_feed.append(
+            operation,
+            record_id,
+            dict(zip(fields, before)) if before is not None else None,
+            dict(zip(fields, after)) if after is not None else None,
+        )
@@ -0,0 +1,188 @@
+"""This file includes an instrumentation wrapper around any SQLService."""
+
+
+import time
+from typing import Any, Callable, Iterator
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.slow_query_log import SlowQueryLog
+from core.services.sql_service.sql_service import SQLService
+
+
+class InstrumentedSQLService[T](SQLService):
+    """SQL service recording per operation and per table metrics.
+
+    Recorded metrics (labels: operation, table):
+        sql_calls_total: Number of calls.
+        sql_errors_total: Number of calls that raised an exception.
+        sql_rows_scanned_total: Records visited by the wrapped service,
+            only when it exposes 'last_rows_scanned' (see RowsScanned).
+        sql_rows_returned_total: Records returned by read operations.
+        sql_latency_seconds: Latency histogram.
+
+    Every call is also recorded in 'slow_query_log' if provided, the plan
+    of slow queries comes from 'explain()' of the wrapped service.
+    """
+
+    def __init__(
+        self,
+        sql_service: SQLService[T],
+        table: str,
+        metrics: MetricsRegistry | None = None,
+        enabled: bool = True,
+        slow_query_log: SlowQueryLog | None = None,
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+        self.__table: str = table
+
+        # public instances
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+        self.enabled: bool = enabled
+        self.slow_query_log: SlowQueryLog | None = slow_query_log
+
+    def create(self, record: T) -> None:
+        return self.__call("create", self.__sql_service.create, record)
+
+    def create_many(self, records: list[T]) -> None:
+        return self.__call(
+            "create_many", self.__sql_service.create_many, records
+        )
+
+    def create_new(self, records: list[T]) -> None:
+        return self.__call(
+            "create_new", self.__sql_service.create_new, records
+        )
+
+    def read_single(self, query_data: dict) -> T | None:
+        return self.__call(
+            "read_single", self.__sql_service.read_single, query_data
+        )
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        return self.__call(
+            "read_multiple", self.__sql_service.read_multiple, query_data
+        )
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        return self.__call("read_by_ids", self.__sql_service.read_by_ids, ids)
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        # streaming is not timed, chunks are produced on demand
+        return self.__sql_service.iter_chunks(chunk_size)
+
+    def update(self, updated_record: T) -> None:
+        return self.__call("update", self.__sql_service.update, updated_record)
+
+    def update_many(self, updated_records: list[T]) -> None:
+        return self.__call(
+            "update_many", self.__sql_service.update_many, updated_records
+        )
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        return self.__call(
+            "read_versioned", self.__sql_service.read_versioned, record_id
+        )
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        return self.__call(
+            "update_if_version",
+            lambda record: self.__sql_service.update_if_version(
+                record, expected_version
+            ),
+            updated_record,
+        )
+
+    def delete(self, query_data: dict) -> None:
+        return self.__call("delete", self.__sql_service.delete, query_data)
+
+    def __call(self, operation: str, method: Callable, argument: Any) -> Any:
+        """Call 'method' with 'argument' and record its metrics."""
+
+        # instrumentation disabled
+        if not self.enabled:
+            return method(argument)
+
+        labels = {"operation": operation, "table": self.__table}
+        start = time.perf_counter()
+
+        try:
+            result = method(argument)
+        except Exception:
+            # record failed call
+            self.metrics.inc("sql_errors_total", labels)
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+
+            # record every call
+            self.metrics.inc("sql_calls_total", labels)
+            self.metrics.observe("sql_latency_seconds", seconds, labels)
+
+        # visited records of this call if reported by wrapped service, kept
+        # per thread
+        scanned = getattr(self.__sql_service, "last_rows_scanned", None)
+
+        # record call in slow query log
+        if self.slow_query_log is not None:
+            self.__record_slow_query(operation, argument, seconds, scanned)
+
+        # record visited records
+        if scanned is not None:
+            self.metrics.inc("sql_rows_scanned_total", labels, scanned)
+
+        # record returned records of read operations, misses excluded
+        if isinstance(result, list):
+            self.metrics.inc(
+                "sql_rows_returned_total",
+                labels,
+                len(result) - result.count(None),
+            )
+        elif operation == "read_single":
+            self.metrics.inc(
+                "sql_rows_returned_total", labels, int(result is not None)
+            )
+
+        return result
+
+    def __record_slow_query(
+        self,
+        operation: str,
+        argument: Any,
+        seconds: float,
+        scanned: int | None,
+    ) -> None:
+        """Record a successful call in the slow query log."""
+
+        # bulk writes are fingerprinted by batch size
+        if isinstance(argument, list) and operation != "read_by_ids":
+            self.slow_query_log.record(  # type: ignore
+                operation, {}, seconds, scanned, batch=len(argument)
+            )
+            return
+
+        # records are looked up by id
+        if isinstance(argument, dict):
+            query_data = argument
+        elif operation == "read_by_ids":
+            query_data = {"id": tuple(argument)}
+        elif operation == "read_versioned":
+            query_data = {"id": argument}
+        else:
+            query_data = {"id": getattr(argument, "id", None)}
+
+        # plan of the wrapped service, if supported
+        explain = getattr(self.__sql_service, "explain", None)
+
+        self.slow_query_log.record(  # type: ignore
+            operation,
+            query_data,
+            seconds,
+            scanned,
+            (lambda: explain(query_data)) if callable(explain) else None,
+        )
@@ -0,0 +1,254 @@
+"""This file includes immutable sorted segments of an LSM table.
+
+A segment holds entries (id, row) sorted by int id, where a row of None
+is a tombstone: the id was deleted after older segments were written.
+Rows are stored in blocks of 'block_rows' rows encoded by RecordCodec,
+file layout:
+
+    blocks:  RecordCodec batches of live rows, in id order
+    bloom:   BloomFilter of every id (BloomFilter.to_bytes)
+    meta:    JSON object, first id, offset and length of every block
+             (the sparse index), tombstone ids, bloom offset and length
+    trailer: meta offset (u64), meta length (u32), magic b"LSM1"
+
+Reading an id checks the id range and the bloom filter, then decodes the
+single block the sparse index points to. Files are memory mapped, blocks
+are only read when needed.
+"""
+
+
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import islice
+from typing import Any, Iterable, Iterator
+from core.services.codec_service.record_codec import RecordCodec
+from core.services.sql_service.bloom_filter import BloomFilter
+
+
+# rows per block by default
+BLOCK_ROWS = 256
+
+# false positive rate of segment bloom filters
+BLOOM_ERROR_RATE = 0.01
+
+# meta offset, meta length, magic
+_TRAILER = struct.Struct("<QI4s")
+
+# trailer magic bytes
+MAGIC = b"LSM1"
+
+# result of ids absent from a segment, None is a tombstone
+MISSING: Any = object()
+
+
+class Segment:
+    """Read only view of a segment file, use write() to create one.
+
+    Args:
+        path (str): Segment file.
+        codec (RecordCodec): Codec of the row blocks.
+    """
+
+    def __init__(self, path: str, codec: RecordCodec) -> None:
+        self.path: str = path
+        self.codec: RecordCodec = codec
+
+        # create private instances
+        with open(path, "rb") as file:
+            self.__map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # verify trailer
+        if len(self.__map) < _TRAILER.size:
+            raise ValueError(f"truncated segment: {path}")
+        offset, length, magic = _TRAILER.unpack_from(
+            self.__map, len(self.__map) - _TRAILER.size
+        )
+        if magic != MAGIC:
+            raise ValueError(f"not a segment: {path}")
+        end = offset + length
+        meta = json.loads(self.__map[offset:end])
+
+        # sparse index, first id of every block
+        self.__first_ids: list[int] = [block[0] for block in meta["blocks"]]
+        self.__blocks: list[tuple[int, int]] = [
+            (block[1], block[2]) for block in meta["blocks"]
+        ]
+        self.__tombstones: list[int] = meta["tombstones"]
+        self.__deleted: frozenset[int] = frozenset(self.__tombstones)
+        start, length = meta["bloom"]
+        end = start + length
+        self.bloom: BloomFilter = BloomFilter.from_bytes(self.__map[start:end])
+        # position of the id in rows
+        self.__id_position: int = codec.fields.index("id")
+
+        # number of entries, tombstones included
+        self.count: int = meta["count"]
+        self.min_id: int | None = meta["min_id"]
+        self.max_id: int | None = meta["max_id"]
+
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        codec: RecordCodec,
+        entries: Iterable[tuple[int, tuple | None]],
+        block_rows: int = BLOCK_ROWS,
+    ) -> "Segment":
+        """Write entries sorted by id to a new segment file.
+
+        Args:
+            path (str): Segment file, written then renamed into place.
+            codec (RecordCodec): Codec of the row blocks.
+            entries (Iterable): (id, row or None) sorted by id, ids unique.
+            block_rows (int): Rows per block.
+
+        Returns:
+            Segment: The written segment.
+        """
+
+        fields = codec.fields
+        ids: list[int] = []
+        tombstones: list[int] = []
+        blocks: list[list] = []
+        temporary = path + ".tmp"
+
+        with open(temporary, "wb") as file:
+            offset = 0
+            rows: list[dict] = []
+
+            def write_block() -> None:
+                nonlocal offset, rows
+                data = codec.encode(rows)
+                file.write(data)
+                blocks.append([rows[0]["id"], offset, len(data)])
+                offset += len(data)
+                rows = []
+
+            for record_id, row in entries:
+                ids.append(record_id)
+                if row is None:
+                    tombstones.append(record_id)
+                    continue
+                rows.append(dict(zip(fields, row)))
+                if len(rows) == block_rows:
+                    write_block()
+            if rows:
+                write_block()
+
+            bloom = BloomFilter(max(1, len(ids)), BLOOM_ERROR_RATE)
+            bloom.update(ids)
+            data = bloom.to_bytes()
+            file.write(data)
+            bloom_range = [offset, len(data)]
+            offset += len(data)
+
+            meta = json.dumps(
+                {
+                    "count": len(ids),
+                    "min_id": ids[0] if ids else None,
+                    "max_id": ids[-1] if ids else None,
+                    "blocks": blocks,
+                    "tombstones": tombstones,
+                    "bloom": bloom_range,
+                }
+            ).encode()
+            file.write(meta)
+            file.write(_TRAILER.pack(offset, len(meta), MAGIC))
+
+        os.replace(temporary, path)
+
+        return cls(path, codec)
+
+    def get(self, record_id: int) -> tuple | None:
+        """Return row of an id, None for a tombstone, MISSING if the
+        segment has no entry of the id."""
+
+        if self.min_id is None or not self.min_id <= record_id <= self.max_id:
+            return MISSING
+        if record_id not in self.bloom:
+            return MISSING
+        if record_id in self.__deleted:
+            return None
+
+        index = bisect_right(self.__first_ids, record_id) - 1
+        if index < 0:
+            return MISSING
+        batch = self.__batch(index)
+        ids = batch.column("id")
+        position = bisect_left(ids, record_id)
+        if position == len(ids) or ids[position] != record_id:
+            return MISSING
+
+        return tuple(batch.get(position, field) for field in self.codec.fields)
+
+    def scan(
+        self, start: int | None = None, end: int | None = None
+    ) -> Iterator[tuple[int, tuple | None]]:
+        """Iterate over entries with start <= id < end, in id order."""
+
+        first = 0
+        if start is not None:
+            first = max(0, bisect_right(self.__first_ids, start) - 1)
+
+        rows = self.__rows(first, end)
+        tombstones = iter(self.__tombstones)
+        if start is not None:
+            tombstones = islice(
+                tombstones, bisect_left(self.__tombstones, start), None
+            )
+        tombstone_entries = ((record_id, None) for record_id in tombstones)
+
+        for entry in merge(rows, tombstone_entries, key=_entry_id):
+            record_id = entry[0]
+            if start is not None and record_id < start:
+                continue
+            if end is not None and record_id >= end:
+                return
+            yield entry
+
+    def size(self) -> int:
+        """Return size of the file in bytes."""
+
+        return len(self.__map)
+
+    def close(self) -> None:
+        """Release the file mapping."""
+
+        self.__map.close()
+
+    def remove(self) -> None:
+        """Delete the file, open readers keep their mapping."""
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __batch(self, index: int) -> Any:
+        """Return view of a block."""
+
+        offset, length = self.__blocks[index]
+        end = offset + length
+
+        return self.codec.view(self.__map[offset:end])
+
+    def __rows(
+        self, first: int, end: int | None
+    ) -> Iterator[tuple[int, tuple]]:
+        """Iterate over live entries from block 'first' on."""
+
+        position = self.__id_position
+        for index in range(first, len(self.__blocks)):
+            if end is not None and self.__first_ids[index] >= end:
+                return
+            for record in self.__batch(index).rows():
+                row = tuple(record.values())
+                yield row[position], row
+
+
+def _entry_id(entry: tuple) -> int:
+    """Return id of an entry."""
+
+    return entry[0]
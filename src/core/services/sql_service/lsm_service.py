@@ -0,0 +1,724 @@
+"""This file includes a log-structured merge (LSM) implementation of
+SQLService for write heavy tables.
+
+Writes go to an in-memory memtable (id -> row, None for a deleted id).
+Once it holds 'memtable_size' ids it is frozen and written as a level 0
+segment (see lsm_segment) while a new memtable takes the writes. Once
+'level0_segments' level 0 segments exist they are merged with the level 1
+segment into a new level 1 segment, dropping overwritten rows and
+tombstones. With 'background', flushes and compactions run on a worker
+thread and writers only wait once 'max_frozen' memtables are waiting for
+their flush.
+
+Reads merge the levels, newest first: memtable, frozen memtables, level
+0 segments, level 1 segment. Reads by id stop at the first level holding
+the id, segments are skipped by id range and bloom filter. Range reads
+(read_range) and other queries merge the sorted levels in id order.
+
+Ids must be ints. Segments are kept in 'directory' (a temporary one if
+None) and reloaded by the next service of the directory, close() flushes
+the memtable first. There is no write ahead log: memtable rows are lost
+if the process stops before they are flushed.
+
+Recorded metrics (label: table):
+    lsm_flushes_total: Memtables written as level 0 segments.
+    lsm_compactions_total: Merges into the level 1 segment.
+"""
+
+
+import os
+import shutil
+import tempfile
+import threading
+from heapq import merge
+from typing import Any, Hashable, Iterable, Iterator
+from pydantic import BaseModel
+from core.services.codec_service.record_codec import RecordCodec
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.change_feed import (
+    DELETE,
+    INSERT,
+    UPDATE,
+    ChangeFeed,
+)
+from core.services.sql_service.id_table import id_query
+from core.services.sql_service.lsm_segment import BLOCK_ROWS, MISSING, Segment
+from core.services.sql_service.query_compiler import (
+    CompiledQuery,
+    QueryCompiler,
+)
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import RowsScanned, SQLService
+
+
+# entry of an id: row, None for a tombstone
+_Entry = tuple[int, tuple | None]
+
+
+def _ranked(
+    entries: Iterable[_Entry], rank: int
+) -> Iterator[tuple[int, int, tuple | None]]:
+    """Tag sorted entries with the rank of their level."""
+
+    for record_id, row in entries:
+        yield record_id, rank, row
+
+
+def merge_entries(sources: list[Iterable[_Entry]]) -> Iterator[_Entry]:
+    """Merge entries of levels sorted by id, newest level first, and
+    yield the newest entry of every id."""
+
+    last = None
+    for record_id, _, row in merge(
+        *[_ranked(source, rank) for rank, source in enumerate(sources)]
+    ):
+        if record_id != last:
+            last = record_id
+            yield record_id, row
+
+
+def _range(
+    table: dict[int, tuple | None], start: int | None, end: int | None
+) -> list[_Entry]:
+    """Return entries of a memtable with start <= id < end, sorted."""
+
+    return sorted(
+        (record_id, row)
+        for record_id, row in table.items()
+        if (start is None or record_id >= start)
+        and (end is None or record_id < end)
+    )
+
+
+class LSMService[T](SQLService):
+    """LSM implementation of SQL service.
+
+    Every inserted, updated and deleted record is appended to
+    'change_feed' if provided. Close the service to flush the memtable
+    and stop the worker.
+
+    Args:
+        table (str): Table name, used as metrics label.
+        directory (str | None): Directory of the segments.
+        memtable_size (int): Ids of a memtable before it is flushed.
+        level0_segments (int): Level 0 segments before a compaction.
+        max_frozen (int): Memtables waiting for their flush before
+            writers flush them.
+        block_rows (int): Rows per segment block.
+        background (bool): Flush and compact on a worker thread, else in
+            the writing thread.
+        metrics (MetricsRegistry | None): Registry of the LSM metrics.
+        change_feed (ChangeFeed | None): Feed of the changes.
+    """
+
+    # number of records visited by the last operation of the thread
+    last_rows_scanned = RowsScanned()
+
+    def __init__(
+        self,
+        table: str = "default",
+        directory: str | None = None,
+        memtable_size: int = 10_000,
+        level0_segments: int = 4,
+        max_frozen: int = 2,
+        block_rows: int = BLOCK_ROWS,
+        background: bool = True,
+        metrics: MetricsRegistry | None = None,
+        change_feed: ChangeFeed | None = None,
+    ) -> None:
+        # verify thresholds
+        for name, value in [
+            ("memtable_size", memtable_size),
+            ("level0_segments", level0_segments),
+            ("max_frozen", max_frozen),
+            ("block_rows", block_rows),
+        ]:
+            if value <= 0:
+                raise ValueError(f"'{name}' must be a positive integer")
+
+        self.table: str = table
+        self.memtable_size: int = memtable_size
+        self.level0_segments: int = level0_segments
+        self.max_frozen: int = max_frozen
+        self.block_rows: int = block_rows
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+        self.change_feed: ChangeFeed | None = change_feed
+
+        # create private instances
+        # newest rows by id, None for deleted ids
+        self.__memtable: dict[int, tuple | None] = {}
+        # memtables waiting for their flush, newest first
+        self.__frozen: list[dict[int, tuple | None]] = []
+        # level 0 segments, newest first
+        self.__level0: list[Segment] = []
+        self.__level1: Segment | None = None
+        # sequence number of the last segment file
+        self.__sequence: int = 0
+        # fields of T in declaration order, set on first use
+        self.__fields: tuple[str, ...] = ()
+        self.__positions: dict[str, int] = {}
+        self.__codec: RecordCodec | None = None
+        self.__queries = QueryCompiler(
+            field_key=lambda field: self.__positions[field]
+        )
+        # guards memtables and levels, flushes and compactions run
+        # one at a time under the io lock
+        self.__lock = threading.RLock()
+        self.__io_lock = threading.Lock()
+        self.__wake = threading.Condition(self.__lock)
+        self.__closed = False
+
+        self.__temporary = directory is None
+        self.directory: str = directory or tempfile.mkdtemp(prefix="lsm-")
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.__worker: threading.Thread | None = None
+        if background:
+            self.__worker = threading.Thread(target=self.__work, daemon=True)
+            self.__worker.start()
+
+    def levels(self) -> dict[str, int]:
+        """Return number of ids of the memtable, of frozen memtables and
+        of the segments of each level (tombstones included)."""
+
+        self.__model_type()
+
+        with self.__lock:
+            return {
+                "memtable": len(self.__memtable),
+                "frozen": sum(map(len, self.__frozen)),
+                "level0_segments": len(self.__level0),
+                "level0": sum(segment.count for segment in self.__level0),
+                "level1": self.__level1.count if self.__level1 else 0,
+            }
+
+    def flush(self) -> None:
+        """Write the memtable and frozen memtables as level 0 segments."""
+
+        self.__model_type()
+
+        with self.__lock:
+            self.__freeze()
+        self.__flush_frozen()
+
+    def compact(self) -> None:
+        """Merge level 0 segments into the level 1 segment."""
+
+        self.__model_type()
+
+        with self.__io_lock:
+            self.__compact()
+
+    def close(self) -> None:
+        """Flush the memtable, stop the worker and release the segments,
+        the directory is removed if temporary."""
+
+        if self.__fields:
+            self.flush()
+
+        with self.__lock:
+            self.__closed = True
+            self.__wake.notify_all()
+        if self.__worker is not None:
+            self.__worker.join()
+
+        with self.__lock:
+            for segment in self.__segments():
+                segment.close()
+            self.__level0, self.__level1 = [], None
+        if self.__temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "LSMService[T]":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def create(self, record: T) -> None:
+        # verify record type
+        if not isinstance(record, BaseModel):
+            # raise type error
+            raise TypeError("'record' should be a valid model.")
+
+        self.create_many([record])
+
+    def create_many(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
+
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        rows = [self.__row(record) for record in records]
+        self.last_rows_scanned = len(records)
+
+        with self.__lock:
+            # verify no duplicate id, nothing is inserted otherwise
+            seen: set = set()
+            for record in records:
+                record_id: Any = record.id  # type: ignore
+                if type(record_id) is not int:
+                    raise SQLException(
+                        f"LSM tables require int ids: {record_id}"
+                    )
+                if record_id in seen or self.__get(record_id) is not None:
+                    # raise SQLException
+                    raise SQLException(f"duplicate id: {record_id}")
+                seen.add(record_id)
+
+            for record, row in zip(records, rows):
+                self.__memtable[record.id] = row  # type: ignore
+                self.__capture(INSERT, record.id, None, row)  # type: ignore
+
+        self.__after_write()
+
+    def read_single(self, query_data: dict) -> T | None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id stops at the newest level holding the id
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            return self.__model(self.__get(record_id))
+
+        for row in self.__scan(query_data):
+            return self.__model(row)
+
+        return None
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id stops at the newest level holding the id
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            row = self.__get(record_id)
+            return [] if row is None else [self.__model(row)]
+
+        return [self.__model(row) for row in self.__scan(query_data)]
+
+    def read_range(self, start: int | None, end: int | None) -> list[T]:
+        """Return records with start <= id < end, in id order.
+
+        Args:
+            start (int | None): First id, None for no lower bound.
+            end (int | None): Id after the last id, None for no upper
+                bound.
+
+        Returns:
+            list[T]: Records of the range.
+        """
+
+        self.__model_type()
+        self.last_rows_scanned = 0
+        rows = []
+        for row in self.__rows(start, end):
+            self.last_rows_scanned += 1
+            rows.append(row)
+
+        return [self.__model(row) for row in rows]
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        # one lookup per id
+        self.last_rows_scanned = len(ids)
+
+        return [self.__model(self.__get(record_id)) for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        self.__model_type()
+        self.last_rows_scanned = 0
+
+        chunk: list[T] = []
+        for row in self.__rows(None, None):
+            self.last_rows_scanned += 1
+            chunk.append(self.__model(row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def update(self, updated_record: T) -> None:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        self.update_many([updated_record])
+
+    def update_many(self, updated_records: list[T]) -> None:
+        # verify updated_records type
+        if not isinstance(updated_records, list):
+            # raise type error
+            raise TypeError("'updated_records' should be a valid list.")
+
+        # verify every updated_record type
+        for updated_record in updated_records:
+            if not isinstance(updated_record, BaseModel):
+                # raise type error
+                raise TypeError("'updated_record' should be a valid model.")
+
+        rows = [self.__row(record) for record in updated_records]
+        self.last_rows_scanned = len(updated_records)
+
+        with self.__lock:
+            for updated_record, row in zip(updated_records, rows):
+                record_id: Any = updated_record.id  # type: ignore
+                # only present records are updated
+                before = self.__get(record_id)
+                if before is not None:
+                    self.__memtable[record_id] = row
+                    self.__capture(UPDATE, record_id, before, row)
+
+        self.__after_write()
+
+    def delete(self, query_data: dict) -> None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # ids of the deleted records
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            ids = [record_id]
+        else:
+            position = self.__positions_of("id")
+            ids = [row[position] for row in self.__scan(query_data)]
+
+        with self.__lock:
+            for key in ids:
+                # skip records deleted since the scan
+                before = self.__get(key)
+                if before is not None:
+                    self.__memtable[key] = None
+                    self.__capture(DELETE, key, before, None)
+
+        self.__after_write()
+
+    def explain(self, query_data: dict) -> str:
+        """Return plan of a query on the table.
+
+        Args:
+            query_data (dict): SQL query data in dict format.
+
+        Returns:
+            str: Query plan, queries by id only are lookups stopping at
+                the newest level holding the id, other queries merge
+                every level.
+        """
+
+        levels = self.levels()
+        sources = (
+            f"memtable, {len(self.__frozen)} frozen memtables, "
+            f"{levels['level0_segments']} level 0 segments, "
+            f"{'1' if self.__level1 else '0'} level 1 segment"
+        )
+
+        if isinstance(query_data, dict) and id_query(query_data) is not None:
+            return f"ID LOOKUP of {sources}"
+
+        return (
+            f"MERGE SCAN of {sources}, "
+            f"filter: {', '.join(sorted(query_data)) or 'none'}"
+        )
+
+    def __model_type(self) -> type[BaseModel]:
+        """Return type of T, load the segments of the directory on first
+        use."""
+
+        # get type of T
+        model = self.__orig_class__.__args__[0]  # type: ignore
+
+        if not self.__fields:
+            with self.__lock:
+                if not self.__fields:
+                    self.__load(model)
+
+        return model
+
+    def __load(self, model: type[BaseModel]) -> None:
+        """Cache fields of T and open the segments of the directory."""
+
+        # verify id field
+        if model.model_fields.get("id") is None or (
+            model.model_fields["id"].annotation is not int
+        ):
+            raise ValueError("LSM tables require an int 'id' field")
+
+        self.__codec = RecordCodec(model)
+        self.__positions = {
+            field: position
+            for position, field in enumerate(model.model_fields)
+        }
+
+        # segment files are named '<sequence>-L<level>.seg'
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                # unfinished write
+                os.remove(os.path.join(self.directory, name))
+            elif name.endswith(".seg"):
+                sequence, level = name[:-4].split("-L")
+                files.append((int(sequence), int(level), name))
+        files.sort()
+
+        # level 1 segment merged every older segment
+        level1 = max((file for file in files if file[1] == 1), default=None)
+        for sequence, level, name in files:
+            path = os.path.join(self.directory, name)
+            if level1 is not None and sequence < level1[0]:
+                os.remove(path)
+            elif level == 1:
+                self.__level1 = Segment(path, self.__codec)
+            else:
+                self.__level0.insert(0, Segment(path, self.__codec))
+        self.__sequence = files[-1][0] if files else 0
+
+        self.__fields = tuple(model.model_fields)
+
+    def __positions_of(self, field: str) -> int:
+        """Return position of a field in rows."""
+
+        self.__model_type()
+
+        return self.__positions[field]
+
+    def __row(self, record: BaseModel) -> tuple:
+        """Return field values of a record."""
+
+        self.__model_type()
+        values = record.__dict__
+
+        return tuple([values[field] for field in self.__fields])
+
+    def __model(self, row: tuple | None) -> Any:
+        """Create model of type T from a row, None for None."""
+
+        if row is None:
+            return None
+
+        return self.__model_type().model_validate(
+            obj=dict(zip(self.__fields, row)), strict=True
+        )
+
+    def __compile(self, query_data: dict) -> CompiledQuery:
+        """Compile a query on rows."""
+
+        self.__model_type()
+
+        return self.__queries.compile(query_data)
+
+    def __segments(self) -> list[Segment]:
+        """Return segments, newest first."""
+
+        if self.__level1 is None:
+            return list(self.__level0)
+
+        return [*self.__level0, self.__level1]
+
+    def __get(self, record_id: Hashable) -> tuple | None:
+        """Return row of an id from the newest level holding it."""
+
+        self.__model_type()
+
+        # other ids are never stored
+        if type(record_id) not in (int, float):
+            return None
+
+        with self.__lock:
+            tables = [self.__memtable, *self.__frozen]
+            segments = self.__segments()
+
+        for table in tables:
+            row = table.get(record_id, MISSING)  # type: ignore
+            if row is not MISSING:
+                return row
+        for segment in segments:
+            row = segment.get(record_id)  # type: ignore
+            if row is not MISSING:
+                return row
+
+        return None
+
+    def __rows(self, start: int | None, end: int | None) -> Iterator[tuple]:
+        """Iterate over rows with start <= id < end, in id order."""
+
+        with self.__lock:
+            sources: list[Iterable[_Entry]] = [
+                _range(self.__memtable, start, end)
+            ]
+            frozen = list(self.__frozen)
+            segments = self.__segments()
+
+        # frozen memtables and segments are not written anymore
+        sources.extend(_range(table, start, end) for table in frozen)
+        sources.extend(segment.scan(start, end) for segment in segments)
+
+        for _, row in merge_entries(sources):
+            if row is not None:
+                yield row
+
+    def __scan(self, query_data: dict) -> Iterator[tuple]:
+        """Iterate over rows matching a query, in id order."""
+
+        query = self.__compile(query_data)
+        getter, values = query.getter, query.values
+        self.last_rows_scanned = 0
+
+        for row in self.__rows(None, None):
+            self.last_rows_scanned += 1
+            if getter(row) == values:
+                yield row
+
+    def __after_write(self) -> None:
+        """Freeze a full memtable, flush it now if writes are not flushed
+        in the background or too many memtables wait for their flush."""
+
+        with self.__lock:
+            if len(self.__memtable) < self.memtable_size:
+                return
+            self.__freeze()
+            stalled = (
+                self.__worker is None or len(self.__frozen) > self.max_frozen
+            )
+
+        # never called with the lock held, the worker needs it
+        if stalled:
+            self.__flush_frozen()
+
+    def __freeze(self) -> None:
+        """Move the memtable to the frozen memtables, with the lock
+        held."""
+
+        if not self.__memtable:
+            return
+
+        self.__frozen.insert(0, self.__memtable)
+        self.__memtable = {}
+        self.__wake.notify_all()
+
+    def __flush_frozen(self) -> None:
+        """Write frozen memtables as level 0 segments, oldest first, then
+        compact if needed."""
+
+        with self.__io_lock:
+            while True:
+                with self.__lock:
+                    if not self.__frozen:
+                        break
+                    table = self.__frozen[-1]
+                    self.__sequence += 1
+                    path = self.__path(self.__sequence, 0)
+
+                segment = Segment.write(
+                    path, self.__codec, sorted(table.items()), self.block_rows
+                )
+
+                # rows move from the frozen memtable to the segment
+                with self.__lock:
+                    self.__level0.insert(0, segment)
+                    self.__frozen.pop()
+                self.metrics.inc("lsm_flushes_total", {"table": self.table})
+
+            if len(self.__level0) >= self.level0_segments:
+                self.__compact()
+
+    def __compact(self) -> None:
+        """Merge level 0 segments into the level 1 segment, with the io
+        lock held."""
+
+        with self.__lock:
+            level0 = list(self.__level0)
+            level1 = self.__level1
+            if not level0:
+                return
+            self.__sequence += 1
+            path = self.__path(self.__sequence, 1)
+        merged = [*level0, level1] if level1 is not None else level0
+
+        # level 1 is the last level, deleted ids are dropped
+        entries = (
+            entry
+            for entry in merge_entries([segment.scan() for segment in merged])
+            if entry[1] is not None
+        )
+        segment: Segment | None = Segment.write(
+            path, self.__codec, entries, self.block_rows
+        )
+        if segment.count == 0:  # type: ignore
+            # every id was deleted
+            segment.close()  # type: ignore
+            segment.remove()  # type: ignore
+            segment = None
+
+        # segments flushed since are not merged
+        with self.__lock:
+            self.__level0 = [
+                current for current in self.__level0 if current not in level0
+            ]
+            self.__level1 = segment
+
+        # open readers keep their mapping
+        for old in merged:
+            old.remove()
+        self.metrics.inc("lsm_compactions_total", {"table": self.table})
+
+    def __path(self, sequence: int, level: int) -> str:
+        """Return path of a segment file."""
+
+        return os.path.join(self.directory, f"{sequence:010d}-L{level}.seg")
+
+    def __work(self) -> None:
+        """Flush frozen memtables until the service is closed."""
+
+        while True:
+            with self.__lock:
+                while not self.__frozen and not self.__closed:
+                    self.__wake.wait()
+                if self.__closed and not self.__frozen:
+                    return
+            self.__flush_frozen()
+
+    def __capture(
+        self,
+        operation: str,
+        record_id: Any,
+        before: tuple | None,
+        after: tuple | None,
+    ) -> None:
+        """Append a change to the change feed."""
+
+        if self.change_feed is None:
+            return
+
+        fields = self.__fields
+        self.change_feed.append(
+            operation,
+            record_id,
+            dict(zip(fields, before)) if before is not None else None,
+            dict(zip(fields, after)) if after is not None else None,
+        )
@@ -0,0 +1,295 @@
+"""This file includes incrementally maintained materialized views of
+a table.
+
+A view filters records, groups them and keeps count, sum and average
+aggregates per group. Views are filled once from the table, then every
+change of the table change feed only updates the groups of its before and
+after images, so reading a group costs O(1) whatever the table size.
+
+Sums are maintained by adding and subtracting values, float aggregates
+may drift from a full recomputation by rounding errors.
+"""
+
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+from core.services.sql_service.change_feed import (
+    Change,
+    ChangeFeed,
+    Subscription,
+)
+from core.services.sql_service.sql_service import SQLService
+
+
+# aggregate kinds
+COUNT, SUM, AVG = "count", "sum", "avg"
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """Aggregate of a view, 'field' is None for counts."""
+
+    kind: str
+    field: str | None = None
+
+    def __post_init__(self) -> None:
+        # verify kind and field
+        if self.kind not in (COUNT, SUM, AVG):
+            raise ValueError(f"unknown aggregate: {self.kind}")
+        if (self.field is None) != (self.kind == COUNT):
+            raise ValueError(f"invalid field of {self.kind} aggregate")
+
+
+def count() -> Aggregate:
+    """Return number of records aggregate."""
+
+    return Aggregate(COUNT)
+
+
+def sum_of(field: str) -> Aggregate:
+    """Return sum of 'field' aggregate."""
+
+    return Aggregate(SUM, field)
+
+
+def avg_of(field: str) -> Aggregate:
+    """Return average of 'field' aggregate."""
+
+    return Aggregate(AVG, field)
+
+
+def _matcher(where: dict | Callable[[dict], bool] | None) -> Callable:
+    """Return filter function of a 'where' definition."""
+
+    if where is None:
+        return lambda record: True
+    if isinstance(where, dict):
+        items = list(where.items())
+        return lambda record: all(record[key] == value for key, value in items)
+
+    return where
+
+
+def _grouper(group_by: str | Callable[[dict], Hashable] | None) -> Callable:
+    """Return group key function of a 'group_by' definition."""
+
+    if group_by is None:
+        return lambda record: None
+    if isinstance(group_by, str):
+        return lambda record: record[group_by]
+
+    return group_by
+
+
+class MaterializedView:
+    """Filter + group + aggregate view over record dicts.
+
+    Args:
+        name (str): View name.
+        aggregates (dict[str, Aggregate]): Aggregates by output name.
+        group_by (str | Callable | None): Field name or function returning
+            the group of a record, None for a single group.
+        where (dict | Callable | None): Query data in dict format or
+            function selecting records, None for every record.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        aggregates: dict[str, Aggregate],
+        group_by: str | Callable[[dict], Hashable] | None = None,
+        where: dict | Callable[[dict], bool] | None = None,
+    ) -> None:
+        # verify aggregates
+        if not aggregates or not all(
+            isinstance(aggregate, Aggregate)
+            for aggregate in aggregates.values()
+        ):
+            raise TypeError("'aggregates' should be a dict of Aggregate.")
+
+        self.name: str = name
+        self.aggregates: dict[str, Aggregate] = dict(aggregates)
+
+        # create private instances
+        self.__matches = _matcher(where)
+        self.__group = _grouper(group_by)
+        # summed fields
+        self.__fields: tuple[str, ...] = tuple(
+            {
+                aggregate.field: None
+                for aggregate in self.aggregates.values()
+                if aggregate.field is not None
+            }
+        )
+        # record count and field sums by group
+        self.__groups: dict[Hashable, list] = {}
+        self.__lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        """Add a record to its group if it matches the filter."""
+
+        self.__apply(record, 1)
+
+    def remove(self, record: dict) -> None:
+        """Remove a record from its group if it matches the filter."""
+
+        self.__apply(record, -1)
+
+    def apply(self, change: Change) -> None:
+        """Apply a change of the table."""
+
+        if change.before is not None:
+            self.remove(change.before)
+        if change.after is not None:
+            self.add(change.after)
+
+    def clear(self) -> None:
+        """Remove every group."""
+
+        with self.__lock:
+            self.__groups.clear()
+
+    def get(self, group: Hashable = None) -> dict[str, Any] | None:
+        """Return aggregates of a group in O(1).
+
+        Args:
+            group (Hashable): Group key, None for views without group_by.
+
+        Returns:
+            dict[str, Any] | None: Aggregates by output name, None if no
+                record is in the group.
+        """
+
+        with self.__lock:
+            state = self.__groups.get(group)
+            return None if state is None else self.__values(state)
+
+    def rows(self) -> dict[Hashable, dict[str, Any]]:
+        """Return aggregates of every non empty group."""
+
+        with self.__lock:
+            return {
+                group: self.__values(state)
+                for group, state in self.__groups.items()
+            }
+
+    def __apply(self, record: dict, sign: int) -> None:
+        """Add (sign 1) or remove (sign -1) a record."""
+
+        if not self.__matches(record):
+            return
+
+        group = self.__group(record)
+        values = [record[field] for field in self.__fields]
+
+        with self.__lock:
+            state = self.__groups.get(group)
+            if state is None:
+                state = self.__groups[group] = [0] + [0] * len(values)
+
+            state[0] += sign
+            for i, value in enumerate(values, start=1):
+                state[i] += sign * value
+
+            # empty group
+            if state[0] == 0:
+                del self.__groups[group]
+
+    def __values(self, state: list) -> dict[str, Any]:
+        """Return aggregates of a group state."""
+
+        values: dict[str, Any] = {}
+        for name, aggregate in self.aggregates.items():
+            if aggregate.kind == COUNT:
+                values[name] = state[0]
+                continue
+
+            total = state[1 + self.__fields.index(aggregate.field)]
+            if aggregate.kind == SUM:
+                values[name] = total
+            else:
+                values[name] = total / state[0]
+
+        return values
+
+
+class ViewRegistry:
+    """Materialized views of a table, kept up to date from its change
+    feed.
+
+    Register views before writes run concurrently: a view is filled from
+    the table, and changes appended while it is being filled would be
+    applied twice.
+    """
+
+    def __init__(
+        self, sql_service: SQLService, change_feed: ChangeFeed
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+        self.__views: dict[str, MaterializedView] = {}
+
+        # public instances
+        self.change_feed: ChangeFeed = change_feed
+        self.subscription: Subscription = change_feed.subscribe(self.__apply)
+
+    def register(self, view: MaterializedView) -> MaterializedView:
+        """Fill a view from the table and keep it up to date.
+
+        Args:
+            view (MaterializedView): View to register.
+
+        Raises:
+            ValueError: If a view with the same name is registered.
+            SQLException: If the table cannot be read.
+
+        Returns:
+            MaterializedView: Registered view.
+        """
+
+        # verify name
+        if view.name in self.__views:
+            raise ValueError(f"view already registered: {view.name}")
+
+        view.clear()
+        for chunk in self.__sql_service.iter_chunks():
+            for record in chunk:
+                view.add(record.model_dump())
+
+        self.__views[view.name] = view
+
+        return view
+
+    def unregister(self, name: str) -> None:
+        """Stop maintaining a view."""
+
+        self.__views.pop(name, None)
+
+    def get(self, name: str) -> MaterializedView:
+        """Return a registered view.
+
+        Raises:
+            ValueError: If no view is registered with this name.
+        """
+
+        view = self.__views.get(name)
+        if view is None:
+            raise ValueError(f"unknown view: {name}")
+
+        return view
+
+    def names(self) -> list[str]:
+        """Return names of the registered views."""
+
+        return list(self.__views)
+
+    def __apply(self, change: Change) -> None:
+        """Apply a change to every view."""
+
+        for view in list(self.__views.values()):
+            view.apply(change)
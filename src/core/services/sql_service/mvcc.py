@@ -0,0 +1,272 @@
+"""This file includes multi-version snapshots of an IdTable.
+
+Every write of the table gets the next version number. While snapshots
+are open, writers keep the row an id held before their write (its before
+image) in the version chain of the id, so a snapshot opened at version v
+reads the before image of the first write after v, or the live row if
+the id was not written since. Writers never wait for readers: reads only
+take the lock for a chunk of rows at a time.
+
+A before image is only kept if an open snapshot can read it, and images
+older than the oldest open snapshot are collected when a snapshot is
+closed, all of them once no snapshot is open.
+"""
+
+
+import threading
+from typing import Any, Callable, Hashable, Iterator
+from core.services.sql_service.id_table import DIRECT, IdTable, direct_key
+from core.services.sql_service.query_compiler import CompiledQuery
+from core.services.sql_service.sql_exception import SQLException
+
+
+# rows resolved per lock acquisition
+SCAN_CHUNK = 1000
+
+
+class VersionStore:
+    """Version counter and version chains of a table.
+
+    Writers hold 'lock' while they call record() and write the table.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        # version of the last write
+        self.version: int = 0
+        # number of before images collected
+        self.collected: int = 0
+
+        # create private instances
+        # (version of the write, before image) by id, oldest first
+        self.__chains: dict[Hashable, list[tuple[int, Any]]] = {}
+        # number of open snapshots by version
+        self.__open: dict[int, int] = {}
+
+    def begin(self) -> int:
+        """Register a snapshot of the current version and return it."""
+
+        with self.lock:
+            self.__open[self.version] = self.__open.get(self.version, 0) + 1
+            return self.version
+
+    def end(self, version: int) -> None:
+        """Release a snapshot and collect the images no snapshot reads."""
+
+        with self.lock:
+            count = self.__open.get(version, 0) - 1
+            if count > 0:
+                self.__open[version] = count
+                return
+            self.__open.pop(version, None)
+            self.__collect()
+
+    def record(self, key: Hashable, before: Any) -> None:
+        """Start a write of an id holding 'before' (None if absent).
+
+        Called with 'lock' held, before the table is written.
+        """
+
+        self.version += 1
+        if not self.__open:
+            return
+
+        # images written after the newest snapshot are never read
+        chain = self.__chains.get(key)
+        if chain is None:
+            self.__chains[key] = [(self.version, before)]
+        elif chain[-1][0] <= max(self.__open):
+            chain.append((self.version, before))
+
+    def as_of(self, key: Hashable, version: int, current: Any) -> Any:
+        """Return row of an id at a version, given its live row."""
+
+        for written, before in self.__chains.get(key, ()):
+            if written > version:
+                return before
+
+        return current
+
+    def changed(self) -> list[Hashable]:
+        """Return ids with a version chain."""
+
+        return list(self.__chains)
+
+    def as_of_many(self, keys: list, version: int, current: list) -> list[Any]:
+        """Return rows of ids at a version, given their live rows."""
+
+        chains = self.__chains
+        if not chains:
+            return current
+
+        return [
+            self.as_of(key, version, row) if key in chains else row
+            for key, row in zip(keys, current)
+        ]
+
+    def snapshots(self) -> int:
+        """Return number of open snapshots."""
+
+        with self.lock:
+            return sum(self.__open.values())
+
+    def versions(self) -> int:
+        """Return number of kept before images."""
+
+        with self.lock:
+            return sum(map(len, self.__chains.values()))
+
+    def __collect(self) -> None:
+        """Drop images older than the oldest open snapshot."""
+
+        before = sum(map(len, self.__chains.values()))
+
+        if not self.__open:
+            self.__chains.clear()
+        else:
+            oldest = min(self.__open)
+            chains: dict[Hashable, list[tuple[int, Any]]] = {}
+            for key, chain in self.__chains.items():
+                kept = [image for image in chain if image[0] > oldest]
+                if kept:
+                    chains[key] = kept
+            self.__chains = chains
+
+        self.collected += before - sum(map(len, self.__chains.values()))
+
+
+class Snapshot[T]:
+    """Consistent read only view of a table at a version.
+
+    Close snapshots (or use them as context managers) so that the before
+    images they read can be collected.
+
+    Args:
+        store (VersionStore): Versions of the table.
+        table (IdTable): Live table.
+        to_model (Callable): Creates a model of type T from a row.
+        compile_query (Callable): Compiles query data on rows.
+    """
+
+    def __init__(
+        self,
+        store: VersionStore,
+        table: IdTable,
+        to_model: Callable[[tuple], T],
+        compile_query: Callable[[dict], CompiledQuery],
+    ) -> None:
+        # create private instances
+        self.__store: VersionStore = store
+        self.__table: IdTable = table
+        self.__to_model = to_model
+        self.__compile = compile_query
+
+        # public instances
+        self.version: int = store.begin()
+        self.closed: bool = False
+
+    def read_single(self, query_data: dict) -> T | None:
+        """Return first record matching the query, in id order."""
+
+        query = self.__query(query_data)
+
+        for row in query.filter(self.__rows()):
+            return self.__to_model(row)
+
+        return None
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        """Return records matching the query, in id order."""
+
+        query = self.__query(query_data)
+
+        return [self.__to_model(row) for row in query.filter(self.__rows())]
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        """Return record of every id, None for absent ids."""
+
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+        self.__verify_open()
+
+        with self.__store.lock:
+            rows = self.__store.as_of_many(
+                ids, self.version, self.__table.get_many(ids)
+            )
+
+        return [None if row is None else self.__to_model(row) for row in rows]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        """Iterate over every record in chunks of 'chunk_size'."""
+
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        chunk: list[T] = []
+        for row in self.__rows():
+            chunk.append(self.__to_model(row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self) -> None:
+        """Release the snapshot."""
+
+        if not self.closed:
+            self.closed = True
+            self.__store.end(self.version)
+
+    def __enter__(self) -> "Snapshot[T]":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __verify_open(self) -> None:
+        """Raise SQLException if the snapshot is closed."""
+
+        if self.closed:
+            raise SQLException("snapshot is closed")
+
+    def __query(self, query_data: dict) -> CompiledQuery:
+        """Verify and compile query data."""
+
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+        self.__verify_open()
+
+        return self.__compile(query_data)
+
+    def __rows(self) -> Iterator[tuple]:
+        """Iterate over rows at the snapshot version."""
+
+        store, table = self.__store, self.__table
+
+        # ids live now, and ids deleted since
+        with store.lock:
+            keys = list(table.keys())
+            deleted = [key for key in store.changed() if key not in table]
+            direct = table.mode == DIRECT
+        if deleted:
+            keys.extend(deleted)
+            # keep id order of direct mode
+            if direct and all(map(direct_key, deleted)):
+                keys.sort()
+
+        for start in range(0, len(keys), SCAN_CHUNK):
+            end = start + SCAN_CHUNK
+            self.__verify_open()
+            chunk = keys[start:end]
+            with store.lock:
+                rows = store.as_of_many(
+                    chunk, self.version, table.get_many(chunk)
+                )
+            # ids created since are absent
+            yield from (row for row in rows if row is not None)
@@ -1,18 +1,52 @@
 """This file includes MySQL implementation of SQLService."""
 
 
-from pydantic import BaseModel
-from core.services.sql_service.sql_exception import SQLException
-from core.services.sql_service.sql_service import SQLService
+import threading
+from itertools import count
+from typing import Any, Iterator
+from pydantic import BaseModel, TypeAdapter
+from core.services.sql_service.change_feed import (
+    DELETE,
+    INSERT,
+    UPDATE,
+    ChangeFeed,
+)
+from core.services.sql_service.query_compiler import compile_query
+from core.services.sql_service.sql_exception import (
+    SQLException,
+    VersionConflict,
+)
+from core.services.sql_service.sql_service import RowsScanned, SQLService
 
 
 # mock database
 # records are stored in format: {"id": 1, "name": "orange", "price": 4.99}
 DATABASE = []
 
+# row version by record id, records missing here are at version 0
+VERSIONS: dict = {}
+
+# versions are unique across ids, a recreated record never gets back the
+# version of a deleted one
+_VERSION_CLOCK = count(1)
+
+# held by every write, makes duplicate and version checks atomic with
+# the write and keeps row positions stable while a record is replaced
+_WRITE_LOCK = threading.Lock()
+
 
 class MySQLService[T](SQLService):
-    """MySQL implementation of SQL service."""
+    """MySQL implementation of SQL service.
+
+    Every inserted, updated and deleted record is appended to
+    'change_feed' if provided.
+    """
+
+    # number of records visited by the last operation of the thread
+    last_rows_scanned = RowsScanned()
+
+    def __init__(self, change_feed: ChangeFeed | None = None) -> None:
+        self.change_feed: ChangeFeed | None = change_feed
 
     def create(self, record: T) -> None:
         # verify record type
@@ -23,13 +57,69 @@ class MySQLService[T](SQLService):
         # get record id
         record_id: int = record.id  # type: ignore
 
-        # if record_id already present in database
-        if record_id in [item["id"] for item in DATABASE]:
-            # raise SQLException
-            raise SQLException(f"duplicate id: {record_id}")
+        item = record.model_dump()
+
+        with _WRITE_LOCK:
+            # duplicate check visits every record
+            self.last_rows_scanned = len(DATABASE)
+
+            # if record_id already present in database
+            if record_id in [stored["id"] for stored in DATABASE]:
+                # raise SQLException
+                raise SQLException(f"duplicate id: {record_id}")
+
+            # otherwise add record to database
+            self.__insert([item])
+
+    def create_many(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
 
-        # otherwise add record to database
-        DATABASE.append(record.model_dump())
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        items = [record.model_dump() for record in records]
+
+        with _WRITE_LOCK:
+            # ids already present in database, single scan
+            existing: set[int] = {item["id"] for item in DATABASE}
+            self.last_rows_scanned = len(DATABASE)
+
+            # verify no duplicate id, nothing is inserted otherwise
+            for record in records:
+                record_id: int = record.id  # type: ignore
+                if record_id in existing:
+                    # raise SQLException
+                    raise SQLException(f"duplicate id: {record_id}")
+                existing.add(record_id)
+
+            # add records to database
+            self.__insert(items)
+
+    def create_new(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
+
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        # ids are known to be absent, no duplicate check scan
+        self.last_rows_scanned = 0
+
+        # add records to database
+        items = [record.model_dump() for record in records]
+        with _WRITE_LOCK:
+            self.__insert(items)
 
     def read_single(self, query_data: dict) -> T | None:
         # verify record type
@@ -37,19 +127,18 @@ class MySQLService[T](SQLService):
             # raise type error
             raise TypeError("'query_data' should be a valid dict.")
 
-        # for each record in database
-        for record in DATABASE:
-            success = True
-
-            # for each key-value pair in query_data
-            for key, value in query_data.items():
-                # if record's key does not match with value
-                if record[key] != value:
-                    success = False
-                    break
+        # every record is visited unless a match is found
+        self.last_rows_scanned = len(DATABASE)
+        # queried fields of a record, compared with queried values
+        query = compile_query(query_data)
+        getter, values = query.getter, query.values
 
+        # for each record in database
+        for scanned, record in enumerate(DATABASE, start=1):
             # if all key-value pairs matched
-            if success:
+            if getter(record) == values:
+                # search stopped at this record
+                self.last_rows_scanned = scanned
                 # get type of T
                 type_t = self.__orig_class__.__args__[0]  # type: ignore
                 # create and return model of type T
@@ -64,19 +153,16 @@ class MySQLService[T](SQLService):
         # will hold matching objects
         result: list[T] = []
 
+        # every record is visited
+        self.last_rows_scanned = len(DATABASE)
+        # queried fields of a record, compared with queried values
+        query = compile_query(query_data)
+        getter, values = query.getter, query.values
+
         # for each record in database
         for record in DATABASE:
-            success = True
-
-            # for each key-value pair in query_data
-            for key, value in query_data.items():
-                # if record's key does not match with value
-                if record[key] != value:
-                    success = False
-                    break
-
             # if all key-value pairs matched
-            if success:
+            if getter(record) == values:
                 # get type of T
                 type_t = self.__orig_class__.__args__[0]  # type: ignore
                 # create and append model of type T to result
@@ -84,41 +170,263 @@ class MySQLService[T](SQLService):
 
         return result
 
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        # ids still searched for
+        missing: set = set(ids)
+        # matching records by id
+        found: dict = {}
+
+        # every record is visited unless all ids are found
+        self.last_rows_scanned = len(DATABASE)
+
+        # single scan for every id
+        for scanned, record in enumerate(DATABASE, start=1):
+            if not missing:
+                # search stopped before this record
+                self.last_rows_scanned = scanned - 1
+                break
+            if record["id"] in missing:
+                missing.discard(record["id"])
+                found[record["id"]] = record
+
+        # get type of T
+        type_t = self.__orig_class__.__args__[0]  # type: ignore
+        # create models of type T, once per id
+        models = {
+            record_id: type_t.model_validate(obj=record, strict=True)
+            for record_id, record in found.items()
+        }
+
+        return [models.get(record_id) for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        # get type of T
+        type_t = self.__orig_class__.__args__[0]  # type: ignore
+        # validates a whole chunk in a single call
+        adapter = TypeAdapter(list[type_t])
+
+        # records visited so far
+        self.last_rows_scanned = 0
+
+        for start in range(0, len(DATABASE), chunk_size):
+            end = start + chunk_size
+            chunk = DATABASE[start:end]
+            self.last_rows_scanned += len(chunk)
+
+            # create and yield models of type T
+            yield adapter.validate_python(chunk, strict=True)
+
     def update(self, updated_record: T) -> None:
         # verify updated_record type
         if not isinstance(updated_record, BaseModel):
             # raise type error
             raise TypeError("'updated_record' should be a valid model.")
 
+        # every record is visited unless a match is found
+        self.last_rows_scanned = len(DATABASE)
+
         # for each record in database
         for i, record in enumerate(DATABASE):
             # if record id matches
             if record["id"] == updated_record.id:  # type: ignore
-                # update the record
-                DATABASE[i] = updated_record.model_dump()
+                # search stopped at this record
+                self.last_rows_scanned = i + 1
+                # update the record, unless deleted since the scan
+                item = updated_record.model_dump()
+                with _WRITE_LOCK:
+                    position = self.__relocate(record["id"], i)
+                    if position >= 0:
+                        self.__replace(position, item)
 
                 # break the loop
                 break
 
+    def update_many(self, updated_records: list[T]) -> None:
+        # verify updated_records type
+        if not isinstance(updated_records, list):
+            # raise type error
+            raise TypeError("'updated_records' should be a valid list.")
+
+        # verify every updated_record type
+        for updated_record in updated_records:
+            if not isinstance(updated_record, BaseModel):
+                # raise type error
+                raise TypeError("'updated_record' should be a valid model.")
+
+        # updated records by id, last one wins
+        pending: dict = {
+            updated_record.id: updated_record  # type: ignore
+            for updated_record in updated_records
+        }
+
+        # every record is visited unless all ids are found
+        self.last_rows_scanned = len(DATABASE)
+
+        # single scan for every id, positions are checked again under
+        # the write lock
+        found: list[tuple[int, dict]] = []
+        for i, record in enumerate(DATABASE):
+            if not pending:
+                # search stopped before this record
+                self.last_rows_scanned = i
+                break
+            updated_record = pending.pop(record["id"], None)
+            if updated_record is not None:
+                found.append((i, updated_record.model_dump()))
+
+        # update the records, unless deleted since the scan
+        with _WRITE_LOCK:
+            for i, item in found:
+                position = self.__relocate(item["id"], i)
+                if position >= 0:
+                    self.__replace(position, item)
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        # version read first, a write in between fails the next update
+        version = VERSIONS.get(record_id, 0)
+
+        record = self.read_single({"id": record_id})
+        if record is None:
+            return None, None
+
+        return record, version
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        record_id = updated_record.id  # type: ignore
+
+        # scan without the lock, only the version check and write hold it
+        position = -1
+        self.last_rows_scanned = len(DATABASE)
+        for i, record in enumerate(DATABASE):
+            if record["id"] == record_id:
+                position = i
+                self.last_rows_scanned = i + 1
+                break
+
+        item = updated_record.model_dump()
+
+        with _WRITE_LOCK:
+            # find the record again if it moved since the scan
+            if position >= 0:
+                position = self.__relocate(record_id, position)
+
+            # missing record or written since read
+            if position < 0 or VERSIONS.get(record_id, 0) != expected_version:
+                raise VersionConflict(
+                    f"version conflict on id {record_id}: "
+                    f"expected version {expected_version}"
+                )
+
+            return self.__replace(position, item)
+
     def delete(self, query_data: dict) -> None:
         # verify record type
         if not isinstance(query_data, dict):
             # raise type error
             raise TypeError("'query_data' should be a valid dict.")
 
-        i: int = 0
-        while i < len(DATABASE):
-            success = True
+        # every record is visited
+        self.last_rows_scanned = len(DATABASE)
+        # queried fields of a record, compared with queried values
+        query = compile_query(query_data)
+        getter, values = query.getter, query.values
 
-            # for each key-value pair in query_data
-            for key, value in query_data.items():
-                # if record's key does not match with value
-                if DATABASE[i][key] != value:
-                    success = False
-                    break
+        with _WRITE_LOCK:
+            i: int = 0
+            while i < len(DATABASE):
+                # if all key-value pairs matched
+                if getter(DATABASE[i]) == values:
+                    record = DATABASE.pop(i)
+                    VERSIONS.pop(record["id"], None)
+                    self.__capture(DELETE, record, None)
+                else:
+                    i += 1
 
-            # if all key-value pairs matched
-            if success:
-                DATABASE.pop(i)
-            else:
-                i += 1
+    def explain(self, query_data: dict) -> str:
+        """Return plan of a query on the mock database.
+
+        Args:
+            query_data (dict): SQL query data in dict format.
+
+        Returns:
+            str: Query plan, mock database has no indexes so every
+                query is a full scan.
+        """
+
+        return (
+            f"FULL SCAN of {len(DATABASE)} records, "
+            f"filter: {', '.join(sorted(query_data)) or 'none'}"
+        )
+
+    def __insert(self, items: list[dict]) -> None:
+        """Append rows with their versions and changes, the write lock is
+        held."""
+
+        DATABASE.extend(items)
+        for item in items:
+            VERSIONS[item["id"]] = next(_VERSION_CLOCK)
+            self.__capture(INSERT, None, item)
+
+    def __relocate(self, record_id: Any, position: int) -> int:
+        """Return position of a record found at 'position' by a scan
+        without the lock, -1 if deleted since, the write lock is held."""
+
+        if position < len(DATABASE) and DATABASE[position]["id"] == record_id:
+            return position
+
+        # record moved since the scan
+        return next(
+            (
+                i
+                for i, record in enumerate(DATABASE)
+                if record["id"] == record_id
+            ),
+            -1,
+        )
+
+    def __replace(self, position: int, item: dict) -> int:
+        """Replace the record at a position, return its new version, the
+        write lock is held."""
+
+        before = DATABASE[position]
+        DATABASE[position] = item
+        version = VERSIONS[item["id"]] = next(_VERSION_CLOCK)
+        self.__capture(UPDATE, before, item)
+
+        return version
+
+    def __capture(
+        self,
+        operation: str,
+        before: dict | None,
+        after: dict | None,
+    ) -> None:
+        """Append a change to the change feed, with copies of the stored
+        records."""
+
+        if self.change_feed is None:
+            return
+
+        key = (after or before)["id"]  # type: ignore
+        self.change_feed.append(
+            operation,
+            key,
+            dict(before) if before is not None else None,
+            dict(after) if after is not None else None,
+        )
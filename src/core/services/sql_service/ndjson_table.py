@@ -0,0 +1,170 @@
+"""This file includes streaming export and import of SQLService tables as
+NDJSON files (one JSON record per line), gzip compressed if the path ends
+with '.gz'.
+
+Records are serialized with the pydantic-core serializer of the model and
+every chunk of lines is validated with a single 'validate_json' call, only
+one chunk is held in memory at a time.
+"""
+
+
+import gzip
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import IO
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from core.services.sql_service.sql_service import SQLService
+
+
+@dataclass
+class TransferReport:
+    """Summary of a table export or import."""
+
+    # records written or read
+    rows: int = 0
+    # uncompressed NDJSON bytes written or read
+    bytes: int = 0
+    # wall clock duration
+    seconds: float = 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """Uncompressed throughput in MB/s."""
+
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+
+def _open_binary(path: str, mode: str, compresslevel: int) -> IO[bytes]:
+    """Open a binary file, gzip compressed if path ends with '.gz'."""
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=compresslevel)
+
+    return open(path, mode)
+
+
+def export_ndjson(
+    sql_service: SQLService,
+    model: type[BaseModel],
+    path: str,
+    chunk_size: int = 10_000,
+    compresslevel: int = 6,
+) -> TransferReport:
+    """Write every record of the table to a NDJSON file.
+
+    Args:
+        sql_service (SQLService): Table to export.
+        model (type[BaseModel]): Model of the table records.
+        path (str): Output file path, gzip compressed if it ends with '.gz'.
+        chunk_size (int): Records serialized per write.
+        compresslevel (int): Gzip compression level.
+
+    Raises:
+        ValueError: If chunk_size is not positive.
+        SQLException: If the table cannot be read.
+
+    Returns:
+        TransferReport: Summary of the export.
+    """
+
+    report = TransferReport()
+    start = time.perf_counter()
+
+    # record serializer
+    to_json = TypeAdapter(model).serializer.to_json
+
+    with _open_binary(path, "wb", compresslevel) as file:
+        for chunk in sql_service.iter_chunks(chunk_size):
+            data = b"\n".join([to_json(record) for record in chunk]) + b"\n"
+            file.write(data)
+
+            report.rows += len(chunk)
+            report.bytes += len(data)
+
+    report.seconds = time.perf_counter() - start
+
+    return report
+
+
+def _invalid_line(
+    record_adapter: TypeAdapter,
+    chunk: list[tuple[int, bytes]],
+) -> ValueError:
+    """Return error of the first invalid line of a rejected chunk."""
+
+    for number, line in chunk:
+        try:
+            record_adapter.validate_json(line)
+        except ValidationError as error:
+            message = error.errors(include_url=False)[0]["msg"]
+            return ValueError(f"line {number}: {message}")
+
+    return ValueError(f"line {chunk[0][0]}: invalid chunk")
+
+
+def import_ndjson(
+    sql_service: SQLService,
+    model: type[BaseModel],
+    path: str,
+    chunk_size: int = 10_000,
+) -> TransferReport:
+    """Insert every record of a NDJSON file in the table.
+
+    Blank lines are skipped. Chunks are inserted with create_many() as soon
+    as they are validated, so chunks before an invalid line stay inserted.
+
+    Args:
+        sql_service (SQLService): Table to import into.
+        model (type[BaseModel]): Model of the table records.
+        path (str): Input file path, gzip compressed if it ends with '.gz'.
+        chunk_size (int): Records validated and inserted per call.
+
+    Raises:
+        ValueError: If chunk_size is not positive or a line is not a
+            valid record, the message starts with the line number.
+        SQLException: If records cannot be inserted.
+
+    Returns:
+        TransferReport: Summary of the import.
+    """
+
+    # verify chunk size
+    if chunk_size <= 0:
+        raise ValueError("'chunk_size' must be a positive integer")
+
+    report = TransferReport()
+    start = time.perf_counter()
+
+    # validate a single record or a whole chunk
+    record_adapter = TypeAdapter(model)
+    chunk_adapter = TypeAdapter(list[model])  # type: ignore
+
+    with _open_binary(path, "rb", 0) as file:
+        # (line number, line) of non blank lines
+        lines = (
+            (number, line)
+            for number, line in enumerate(file, start=1)
+            if line.strip()
+        )
+
+        while chunk := list(islice(lines, chunk_size)):
+            data = b",".join([line for _, line in chunk])
+
+            try:
+                records = chunk_adapter.validate_json(b"[" + data + b"]")
+            except ValidationError:
+                records = None
+
+            # invalid line, or a line holding more than one value
+            if records is None or len(records) != len(chunk):
+                raise _invalid_line(record_adapter, chunk)
+
+            sql_service.create_many(records)
+
+            report.rows += len(records)
+            report.bytes += sum(len(line) for _, line in chunk)
+
+    report.seconds = time.perf_counter() - start
+
+    return report
@@ -0,0 +1,108 @@
+"""This file includes retry helpers of optimistic concurrency control.
+
+Writers do not lock a record while they change it: they read the record
+with its version, compute the new record and write it with
+'update_if_version', which fails with VersionConflict if another writer
+updated the record in between. The helpers retry the whole read, change
+and write cycle with jittered exponential backoff, so concurrent writers
+of a hot record never lose an update.
+"""
+
+
+import random
+import time
+from typing import Any, Callable
+from pydantic import BaseModel
+from core.services.sql_service.sql_exception import VersionConflict
+from core.services.sql_service.sql_service import SQLService
+
+
+# retries of a conflicting write
+RETRIES = 10
+
+# sleep before the first retry, in seconds
+BACKOFF = 0.001
+
+
+def retry_on_conflict(
+    operation: Callable[[], Any],
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+    sleep: Callable[[float], Any] = time.sleep,
+) -> Any:
+    """Call an operation until it does not raise VersionConflict.
+
+    Args:
+        operation (Callable): Reads, changes and writes with
+            'update_if_version'.
+        retries (int): Number of calls after the first one.
+        backoff (float): Maximum sleep before the first retry, doubled
+            after every retry. Sleeps are random so that conflicting
+            writers do not retry in lockstep.
+        sleep (Callable): Sleep function, e.g. replaced in tests.
+
+    Raises:
+        VersionConflict: If the last retry conflicts.
+
+    Returns:
+        Any: Result of the operation.
+    """
+
+    # verify retries
+    if retries < 0:
+        raise ValueError("'retries' must be a non negative integer")
+
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except VersionConflict:
+            if attempt == retries:
+                raise
+        if backoff > 0:
+            sleep(random.uniform(0, backoff * (1 << attempt)))
+
+    # unreachable, the last attempt returns or raises
+    raise AssertionError("retry loop ended")
+
+
+def update_with_retry(
+    sql_service: SQLService,
+    record_id: Any,
+    change: Callable[[BaseModel], BaseModel],
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+) -> BaseModel | None:
+    """Apply a change to a record with compare-and-set, retried on
+    conflict.
+
+    Args:
+        sql_service (SQLService): Service supporting row versions.
+        record_id (Any): Id of the record.
+        change (Callable): Returns the updated record, may be called
+            once per attempt and should not have side effects.
+        retries (int): Number of attempts after the first one.
+        backoff (float): Maximum sleep before the first retry.
+
+    Raises:
+        ValueError: If 'change' returns a record with another id.
+        VersionConflict: If every attempt conflicts.
+        SQLException: If the service does not support row versions.
+
+    Returns:
+        BaseModel | None: Updated record, None if no record has the id.
+    """
+
+    def attempt() -> BaseModel | None:
+        record, version = sql_service.read_versioned(record_id)
+        if record is None or version is None:
+            return None
+
+        updated = change(record)
+        # verify id
+        if getattr(updated, "id", None) != record_id:
+            raise ValueError("'change' should not change the record id")
+
+        sql_service.update_if_version(updated, version)
+        return updated
+
+    return retry_on_conflict(attempt, retries, backoff)
@@ -0,0 +1,540 @@
+"""This file includes a parallel scan of table columns in shared memory.
+
+Queried columns are dictionary encoded: every distinct value gets an int32
+code, and the codes of the rows are copied to a multiprocessing
+shared_memory segment. A query value is translated to its code once, a
+value absent from the dictionary matches nothing without scanning. The
+row range is split across a process pool, every worker attaches to the
+segments and returns the positions of the rows holding every queried
+code, searched with bytes.find.
+
+The rows are read once by the first scan, then the table reports every
+write with write(): updates overwrite the codes of their row, inserts
+append codes and deletes leave a code no query matches, so writes do not
+encode the table again. Writes reported while the rows are read are
+applied once they are loaded. The rows are read again once deleted rows
+make up half of the positions. Tables under 'threshold' rows are scanned
+in the calling thread by the caller.
+
+Neither the rows nor the match are read with the scanner lock held, so
+writes wait for encoding only. Matches run on the rows present when they
+start, segments replaced or dropped meanwhile are removed once no match
+runs, and callers check the returned rows again.
+
+Recorded metrics (label: name):
+    parallel_scans_total: Number of scans.
+    parallel_scan_columns_built_total: Columns encoded in shared memory.
+"""
+
+
+import multiprocessing
+import os
+import sys
+import threading
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Hashable, Iterable
+from core.services.metrics_service.metrics import MetricsRegistry
+
+
+# rows under which scans stay in the calling thread
+THRESHOLD = 100_000
+
+# row ranges per worker, evens out uneven match counts
+RANGES_PER_WORKER = 4
+
+# smallest number of codes of a segment, segments double once full
+MIN_CAPACITY = 1024
+
+# workers are not forked from the caller, which may run other threads
+START_METHOD = (
+    "forkserver"
+    if "forkserver" in multiprocessing.get_all_start_methods()
+    else "spawn"
+)
+
+# int32 codes
+_CODE_TYPE = "i"
+_CODE_SIZE = array(_CODE_TYPE).itemsize
+
+# code of deleted rows, never a query code
+_DELETED = -1
+
+
+def _attach(name: str) -> SharedMemory:
+    """Attach to a segment of the parent process, which unlinks it."""
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)  # type: ignore
+
+    # attaching registers the segment for cleanup before 3.13, the shared
+    # resource tracker would then lose the registration of the parent
+    register = resource_tracker.register
+    resource_tracker.register = lambda *_: None  # type: ignore
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register  # type: ignore
+
+
+def _find(buffer: Any, code: int, start: int, end: int) -> list[int]:
+    """Return positions in [start, end) of the rows holding a code."""
+
+    needle = code.to_bytes(_CODE_SIZE, sys.byteorder, signed=True)
+    first, last = start * _CODE_SIZE, end * _CODE_SIZE
+    data = bytes(buffer[first:last])
+
+    positions = []
+    offset = data.find(needle)
+    while offset >= 0:
+        # matches must be aligned on a code
+        if offset % _CODE_SIZE:
+            offset = data.find(needle, offset + 1)
+            continue
+        positions.append(start + offset // _CODE_SIZE)
+        offset = data.find(needle, offset + _CODE_SIZE)
+
+    return positions
+
+
+def _match(
+    buffers: list[Any], codes: list[int], start: int, end: int
+) -> list[int]:
+    """Return positions in [start, end) of the rows holding every code."""
+
+    positions = _find(buffers[0], codes[0], start, end)
+    for buffer, code in zip(buffers[1:], codes[1:]):
+        view = buffer.cast(_CODE_TYPE)
+        try:
+            positions = [i for i in positions if view[i] == code]
+        finally:
+            view.release()
+
+    return positions
+
+
+def _scan_range(
+    columns: list[tuple[str, int]], start: int, end: int
+) -> list[int]:
+    """Worker task, return positions in [start, end) of the rows holding
+    the code of every (segment name, code) column."""
+
+    segments = [_attach(name) for name, _ in columns]
+    try:
+        return _match(
+            [segment.buf for segment in segments],
+            [code for _, code in columns],
+            start,
+            end,
+        )
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+class _Column:
+    """Dictionary encoded column in shared memory.
+
+    Raises TypeError for values that are not hashable.
+    """
+
+    def __init__(self, values: list[Any], deleted: list[bool]) -> None:
+        # code of every distinct value
+        self.codes: dict[Hashable, int] = {}
+        self.count: int = len(values)
+        encoded = array(
+            _CODE_TYPE,
+            [
+                _DELETED if gone else self.encode(value)
+                for value, gone in zip(values, deleted)
+            ],
+        )
+
+        self.segment = SharedMemory(
+            create=True, size=max(MIN_CAPACITY, self.count) * _CODE_SIZE
+        )
+        end = self.count * _CODE_SIZE
+        self.segment.buf[:end] = encoded.tobytes()
+
+    def encode(self, value: Any) -> int:
+        """Return code of a value, a new code for a new value."""
+
+        return self.codes.setdefault(value, len(self.codes))
+
+    def set(self, position: int, code: int) -> None:
+        """Write the code of a row."""
+
+        first = position * _CODE_SIZE
+        end = first + _CODE_SIZE
+        self.segment.buf[first:end] = code.to_bytes(
+            _CODE_SIZE, sys.byteorder, signed=True
+        )
+
+    def append(self, code: int) -> SharedMemory | None:
+        """Add the code of a new row, move to a larger segment if full.
+
+        Returns:
+            SharedMemory | None: Previous segment if replaced, to be
+                removed by the caller.
+        """
+
+        previous = None
+        if (self.count + 1) * _CODE_SIZE > self.segment.size:
+            segment = SharedMemory(create=True, size=2 * self.segment.size)
+            end = self.count * _CODE_SIZE
+            segment.buf[:end] = self.segment.buf[:end]
+            previous, self.segment = self.segment, segment
+
+        self.set(self.count, code)
+        self.count += 1
+
+        return previous
+
+
+def _remove(segment: SharedMemory) -> None:
+    """Release and remove a segment."""
+
+    segment.close()
+    segment.unlink()
+
+
+class ParallelScanner:
+    """Scans the rows of a single table in a process pool, thread safe.
+
+    Every write of the table must be reported with write() once the
+    scanner is used.
+
+    Args:
+        workers (int | None): Scan processes, os.cpu_count() if None, 0
+            to match encoded columns in the calling thread.
+        threshold (int): Rows under which accepts() is False.
+        name (str): Scanner name, label of the metrics.
+        metrics (MetricsRegistry | None): Metrics registry.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        threshold: int = THRESHOLD,
+        name: str = "default",
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # resolve workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        # verify workers and threshold
+        if workers < 0:
+            raise ValueError("'workers' must not be negative")
+        if threshold < 0:
+            raise ValueError("'threshold' must not be negative")
+
+        self.workers: int = workers
+        self.threshold: int = threshold
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # create private instances
+        self.__pool: Executor | None = None
+        # True once the rows are read, writes are applied from then on
+        self.__loaded: bool = False
+        # key and row of every position, None for deleted rows
+        self.__keys: list[Hashable | None] = []
+        self.__rows: list[tuple | None] = []
+        # position of every present key
+        self.__positions: dict[Hashable, int] = {}
+        self.__deleted: int = 0
+        # encoded columns by row position, None if not encodable
+        self.__columns: dict[int, _Column | None] = {}
+        # writes reported while the rows are read, None otherwise
+        self.__pending: list[tuple[Hashable, tuple | None]] | None = None
+        # running matches and the segments they may still read
+        self.__matches: int = 0
+        self.__retired: list[SharedMemory] = []
+        # guards the rows and columns, one read of the rows at a time
+        self.__lock = threading.Condition()
+        self.__load_lock = threading.Lock()
+
+    def accepts(self, count: int) -> bool:
+        """Return True if a table of 'count' rows is scanned in
+        parallel."""
+
+        return count >= self.threshold
+
+    def scan(
+        self,
+        items: Callable[[], Iterable[tuple[Hashable, tuple]]],
+        query: dict[int, Any],
+    ) -> list[Hashable] | None:
+        """Return keys of the rows holding every queried value.
+
+        Args:
+            items (Callable): Returns (key, row) of every row in scan
+                order, called by the first scan and after clear().
+            query (dict[int, Any]): Queried value by row position.
+
+        Returns:
+            list[Hashable] | None: Keys in 'items' order followed by keys
+                inserted since, None if a queried value or column cannot
+                be encoded and the caller has to scan the rows itself.
+        """
+
+        while True:
+            self.__load(items)
+
+            with self.__lock:
+                # cleared since the rows were read
+                if not self.__loaded:
+                    continue
+
+                # code of every queried value
+                columns: list[tuple[_Column, int]] = []
+                for position, value in query.items():
+                    column = self.__column(position)
+                    if column is None:
+                        return None
+                    try:
+                        code = column.codes.get(value)
+                    except TypeError:
+                        # unhashable value
+                        return None
+                    if code is None:
+                        # no row holds the value
+                        return []
+                    columns.append((column, code))
+
+                # record scan
+                self.metrics.inc("parallel_scans_total", {"name": self.name})
+
+                keys = self.__keys
+                if not columns:
+                    return [key for key in keys if key is not None]
+
+                # rows present now, segments are kept until the match ends
+                count = len(keys)
+                segments = [(column.segment, code) for column, code in columns]
+                pool = self.__executor() if self.workers else None
+                self.__matches += 1
+                break
+
+        try:
+            positions = self.__match(pool, segments, count)
+        finally:
+            with self.__lock:
+                self.__matches -= 1
+                if not self.__matches:
+                    for segment in self.__retired:
+                        _remove(segment)
+                    self.__retired = []
+                    self.__lock.notify_all()
+
+        # rows deleted during the match are skipped
+        found = (keys[position] for position in positions)
+        return [key for key in found if key is not None]
+
+    def write(self, key: Hashable, row: tuple | None) -> None:
+        """Apply a write of the table, None deletes the row of the key."""
+
+        with self.__lock:
+            if self.__pending is not None:
+                # applied once the rows are loaded
+                self.__pending.append((key, row))
+                return
+            if not self.__loaded:
+                return
+
+            self.__apply(key, row)
+
+    def clear(self) -> None:
+        """Drop the encoded columns, the next scan reads the rows again."""
+
+        with self.__lock:
+            self.__reset()
+
+    def close(self) -> None:
+        """Stop the process pool and remove the encoded columns."""
+
+        with self.__lock:
+            self.__lock.wait_for(lambda: not self.__matches)
+            if self.__pool is not None:
+                self.__pool.shutdown(cancel_futures=True)
+                self.__pool = None
+            self.__reset()
+
+    def __enter__(self) -> "ParallelScanner":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __load(
+        self, items: Callable[[], Iterable[tuple[Hashable, tuple]]]
+    ) -> None:
+        """Read the rows unless loaded, the writes reported meanwhile are
+        applied once they are loaded."""
+
+        with self.__load_lock:
+            with self.__lock:
+                if self.__loaded:
+                    return
+                pending = self.__pending = []
+
+            rows = list(items())
+
+            with self.__lock:
+                if self.__pending is not pending:
+                    # cleared while the rows were read
+                    return
+                for key, row in rows:
+                    # deleted while the rows are read
+                    if row is None:
+                        continue
+                    self.__positions[key] = len(self.__keys)
+                    self.__keys.append(key)
+                    self.__rows.append(row)
+                self.__pending = None
+                self.__loaded = True
+
+                # writes the rows may already hold are applied again
+                for key, row in pending:
+                    if not self.__loaded:
+                        # mostly deleted, the rows are read again
+                        break
+                    self.__apply(key, row)
+
+    def __apply(self, key: Hashable, row: tuple | None) -> None:
+        """Apply a write to the loaded rows, the lock is held."""
+
+        position = self.__positions.get(key)
+        if row is None:
+            if position is not None:
+                self.__delete(key, position)
+            return
+
+        if position is None:
+            # new row
+            position = self.__positions[key] = len(self.__keys)
+            self.__keys.append(key)
+            self.__rows.append(row)
+            self.__encode(
+                row, lambda column, code: self.__retire(column.append(code))
+            )
+        else:
+            self.__rows[position] = row
+            self.__encode(row, lambda column, code: column.set(position, code))
+
+    def __retire(self, segment: SharedMemory | None) -> None:
+        """Remove a segment once no match reads it, the lock is held."""
+
+        if segment is None:
+            return
+        if self.__matches:
+            self.__retired.append(segment)
+        else:
+            _remove(segment)
+
+    def __reset(self) -> None:
+        """Remove the rows and the encoded columns, the lock is held."""
+
+        for column in self.__columns.values():
+            if column is not None:
+                self.__retire(column.segment)
+        self.__columns = {}
+        self.__keys, self.__rows, self.__positions = [], [], {}
+        self.__deleted = 0
+        self.__loaded = False
+        self.__pending = None
+
+    def __delete(self, key: Hashable, position: int) -> None:
+        """Mark the row of a position deleted, the lock is held."""
+
+        del self.__positions[key]
+        self.__keys[position] = self.__rows[position] = None
+        for column in self.__columns.values():
+            if column is not None:
+                column.set(position, _DELETED)
+
+        # read the rows again once mostly deleted
+        self.__deleted += 1
+        if self.__deleted * 2 > len(self.__keys):
+            self.__reset()
+
+    def __encode(
+        self, row: tuple, write: Callable[[_Column, int], None]
+    ) -> None:
+        """Write the codes of a row to every encoded column, the lock is
+        held."""
+
+        for position, column in self.__columns.items():
+            if column is None:
+                continue
+            try:
+                code = column.encode(row[position])
+            except TypeError:
+                # unhashable value, the column is not scanned anymore
+                self.__retire(column.segment)
+                self.__columns[position] = None
+                continue
+            write(column, code)
+
+    def __column(self, position: int) -> _Column | None:
+        """Return encoded column of a row position, encoded on first use,
+        None if a value is not hashable."""
+
+        if position not in self.__columns:
+            rows = self.__rows
+            try:
+                column: _Column | None = _Column(
+                    [None if row is None else row[position] for row in rows],
+                    [row is None for row in rows],
+                )
+            except TypeError:
+                column = None
+            self.__columns[position] = column
+            self.metrics.inc(
+                "parallel_scan_columns_built_total", {"name": self.name}
+            )
+
+        return self.__columns[position]
+
+    def __executor(self) -> Executor:
+        """Return the process pool, started on first use, the lock is
+        held."""
+
+        if self.__pool is None:
+            self.__pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(START_METHOD),
+            )
+
+        return self.__pool
+
+    def __match(
+        self,
+        pool: Executor | None,
+        segments: list[tuple[SharedMemory, int]],
+        count: int,
+    ) -> list[int]:
+        """Return positions under 'count' of the rows holding the code of
+        every (segment, code), matched in the calling thread without a
+        pool."""
+
+        codes = [code for _, code in segments]
+
+        # match in the calling thread
+        if pool is None:
+            return _match(
+                [segment.buf for segment, _ in segments], codes, 0, count
+            )
+
+        # split the rows in ranges
+        names = [(segment.name, code) for segment, code in segments]
+        step = max(1, -(-count // (self.workers * RANGES_PER_WORKER)))
+        futures = [
+            pool.submit(_scan_range, names, start, min(start + step, count))
+            for start in range(0, count, step)
+        ]
+
+        return [position for future in futures for position in future.result()]
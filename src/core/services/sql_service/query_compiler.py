@@ -0,0 +1,160 @@
+"""This file includes a compiler of query data into record predicates.
+
+Interpreting a query loops over its key-value pairs for every record.
+A compiled query reads every queried field of a record with a single
+'operator.itemgetter' (or 'attrgetter') call and compares the result to
+the tuple of queried values, so matching a record costs one C level call
+and one comparison. Getters only depend on the queried fields, they are
+cached by key signature and reused by every query of the same shape.
+"""
+
+
+import threading
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Hashable, Iterable, Iterator
+
+
+# number of query shapes kept by default
+MAX_SHAPES = 256
+
+
+def _no_fields(record: Any) -> tuple:
+    """Getter of queries without fields."""
+
+    return ()
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """Query data compiled into 'getter(record) == values'.
+
+    Scans may inline the comparison to avoid a call per record.
+    """
+
+    fields: tuple[str, ...]
+    getter: Callable[[Any], Any]
+    values: Any
+
+    def matches(self, record: Any) -> bool:
+        """Return True if every queried field of the record matches."""
+
+        return self.getter(record) == self.values
+
+    def filter(self, records: Iterable) -> Iterator:
+        """Iterate over matching records."""
+
+        getter, values = self.getter, self.values
+
+        return (record for record in records if getter(record) == values)
+
+
+class QueryCompiler:
+    """Thread safe cache of compiled query shapes.
+
+    Args:
+        getter (Callable): Getter factory, 'itemgetter' for dict or tuple
+            records, 'attrgetter' for models.
+        field_key (Callable | None): Maps a field to the key passed to
+            'getter', e.g. its position in tuple records. Called once per
+            shape, unknown fields should raise KeyError.
+        max_shapes (int): Number of cached shapes, the oldest shape is
+            evicted first.
+    """
+
+    def __init__(
+        self,
+        getter: Callable[..., Callable[[Any], Any]] = itemgetter,
+        field_key: Callable[[str], Hashable] | None = None,
+        max_shapes: int = MAX_SHAPES,
+    ) -> None:
+        # verify max shapes
+        if max_shapes <= 0:
+            raise ValueError("'max_shapes' must be a positive integer")
+
+        self.max_shapes: int = max_shapes
+        # number of compilations served from / added to the cache,
+        # approximate under concurrency
+        self.hits: int = 0
+        self.misses: int = 0
+
+        # create private instances
+        self.__getter = getter
+        self.__field_key = field_key
+        # getter by key signature
+        self.__shapes: dict[tuple[str, ...], Callable[[Any], Any]] = {}
+        self.__lock = threading.Lock()
+
+    def compile(self, query_data: dict) -> CompiledQuery:
+        """Compile query data.
+
+        Args:
+            query_data (dict): SQL query data in dict format.
+
+        Raises:
+            KeyError: If 'field_key' does not know a queried field.
+
+        Returns:
+            CompiledQuery: Predicate of the query.
+        """
+
+        fields = tuple(query_data)
+
+        getter = self.__shapes.get(fields)
+        if getter is None:
+            getter = self.__compile_shape(fields)
+        else:
+            self.hits += 1
+
+        # single field getters return the value itself
+        values: Any = tuple(query_data.values())
+        if len(fields) == 1:
+            values = values[0]
+
+        return CompiledQuery(fields, getter, values)
+
+    def shapes(self) -> int:
+        """Return number of cached shapes."""
+
+        return len(self.__shapes)
+
+    def clear(self) -> None:
+        """Remove every cached shape."""
+
+        with self.__lock:
+            self.__shapes.clear()
+
+    def __compile_shape(self, fields: tuple[str, ...]) -> Callable[[Any], Any]:
+        """Build the getter of a key signature and cache it."""
+
+        if not fields:
+            getter: Callable[[Any], Any] = _no_fields
+        else:
+            keys = fields
+            if self.__field_key is not None:
+                keys = tuple(self.__field_key(field) for field in fields)
+            getter = self.__getter(*keys)
+
+        with self.__lock:
+            self.misses += 1
+            # evict the oldest shape
+            if fields not in self.__shapes and (
+                len(self.__shapes) >= self.max_shapes
+            ):
+                del self.__shapes[next(iter(self.__shapes))]
+            self.__shapes[fields] = getter
+
+        return getter
+
+
+# compiler of queries on dict records
+DICT_QUERIES = QueryCompiler()
+
+# compiler of queries on models
+MODEL_QUERIES = QueryCompiler(getter=attrgetter)
+
+
+def compile_query(query_data: dict) -> CompiledQuery:
+    """Compile query data on dict records with the shared cache."""
+
+    return DICT_QUERIES.compile(query_data)
@@ -0,0 +1,193 @@
+"""This file includes single-flight call coalescing.
+
+Concurrent calls sharing a key run the backend call once, every caller
+receives its result (or exception). Only calls that overlap in time are
+coalesced, nothing is cached once the call is finished.
+
+Recorded metrics (label: name):
+    single_flight_calls_total: Number of calls.
+    single_flight_collapsed_total: Calls served by another in-flight call.
+"""
+
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+from core.services.metrics_service.metrics import MetricsRegistry
+
+
+def query_key(operation: str, query_data: dict) -> Hashable | None:
+    """Return coalescing key of a query.
+
+    Args:
+        operation (str): Operation name.
+        query_data (dict): SQL query data in dict format.
+
+    Returns:
+        Hashable | None: Key independent of the order of query keys, None
+            if a query value is not hashable.
+    """
+
+    try:
+        return (operation, frozenset(query_data.items()))
+    except TypeError:
+        return None
+
+
+def _record_call(
+    metrics: MetricsRegistry,
+    name: str,
+    collapsed: bool,
+) -> None:
+    """Record a single-flight call in metrics."""
+
+    labels = {"name": name}
+    metrics.inc("single_flight_calls_total", labels)
+    if collapsed:
+        metrics.inc("single_flight_collapsed_total", labels)
+
+
+class _Call:
+    """In-flight call shared by the threads of a key."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Thread based single-flight group."""
+
+    def __init__(
+        self,
+        name: str = "default",
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # in-flight calls by key
+        self.__calls: dict[Hashable, _Call] = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Call 'function' unless a call with the same key is in flight,
+        in which case wait for it and return its result.
+
+        Args:
+            key (Hashable): Coalescing key.
+            function (Callable[[], Any]): Backend call.
+
+        Raises:
+            Exception: Raised by the backend call.
+
+        Returns:
+            Any: Result of the backend call.
+        """
+
+        # join or start the call of this key
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self.__calls[key] = _Call()
+
+        _record_call(self.metrics, self.name, collapsed=not leader)
+
+        # wait for the in-flight call
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        # run the call and share its outcome
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.__lock:
+                # the key may run a newer call once forgotten
+                if self.__calls.get(key) is call:
+                    del self.__calls[key]
+            call.done.set()
+
+        return call.result
+
+    def forget(self) -> None:
+        """Detach every in-flight call, later calls of their keys start
+        new calls while current callers still receive their results."""
+
+        with self.__lock:
+            self.__calls.clear()
+
+    def in_flight(self) -> int:
+        """Return number of keys with an attached in-flight call."""
+
+        return len(self.__calls)
+
+
+class AsyncSingleFlight:
+    """asyncio based single-flight group, use from a single event loop.
+
+    The backend call runs in its own task, cancelling a caller does not
+    cancel the call shared with the other callers.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self.name: str = name
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+        # in-flight calls by key, and key of every in-flight call
+        self.__tasks: dict[Hashable, asyncio.Future] = {}
+        self.__keys: dict[asyncio.Future, Hashable] = {}
+
+    async def do(
+        self,
+        key: Hashable,
+        function: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Await 'function()' unless a call with the same key is in flight,
+        in which case await it and return its result.
+
+        Args:
+            key (Hashable): Coalescing key.
+            function (Callable[[], Awaitable[Any]]): Backend call.
+
+        Raises:
+            Exception: Raised by the backend call.
+
+        Returns:
+            Any: Result of the backend call.
+        """
+
+        task = self.__tasks.get(key)
+        leader = task is None
+
+        # start the call of this key
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self.__tasks[key] = task
+            self.__keys[task] = key
+            task.add_done_callback(self.__finish)
+
+        _record_call(self.metrics, self.name, collapsed=not leader)
+
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Return number of keys with an in-flight call."""
+
+        return len(self.__tasks)
+
+    def __finish(self, task: asyncio.Future) -> None:
+        """Forget a finished call."""
+
+        del self.__tasks[self.__keys.pop(task)]
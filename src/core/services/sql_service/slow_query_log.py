@@ -0,0 +1,218 @@
+"""This file includes a slow query log aggregating statistics per query
+fingerprint."""
+
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+
+# default logger of slow queries
+LOGGER = logging.getLogger("sql.slow_query")
+
+
+def fingerprint(
+    operation: str, keys: Iterable[str], batch: int | None = None
+) -> str:
+    """Return fingerprint of a query, independent of queried values.
+
+    Queries only support equality, so the fingerprint is the operation
+    followed by the sorted key set, e.g. 'read_multiple(name=?,price=?)'.
+    Bulk operations are fingerprinted by batch size instead, e.g.
+    'create_many(batch=500)'.
+
+    Args:
+        operation (str): SQL service operation name.
+        keys (Iterable[str]): Queried keys.
+        batch (int | None): Records of a bulk operation.
+
+    Returns:
+        str: Query fingerprint.
+    """
+
+    if batch is not None:
+        return f"{operation}(batch={batch})"
+
+    return f"{operation}({','.join(f'{key}=?' for key in sorted(keys))})"
+
+
+@dataclass
+class FingerprintStats:
+    """Aggregate statistics of a single query fingerprint."""
+
+    fingerprint: str
+    calls: int = 0
+    slow_calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows_scanned: int = 0
+    plan: str | None = None
+
+    @property
+    def mean_seconds(self) -> float:
+        """Mean latency of the fingerprint."""
+
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+@dataclass
+class SlowQuery:
+    """Single query exceeding a slow query threshold."""
+
+    fingerprint: str
+    query_data: dict
+    seconds: float
+    rows_scanned: int | None
+    plan: str | None
+
+
+class SlowQueryLog:
+    """Log queries exceeding latency or rows scanned thresholds.
+
+    Every recorded query updates the statistics of its fingerprint, so that
+    fingerprints scanning many rows (missing indexes) can be dumped later.
+    """
+
+    def __init__(
+        self,
+        latency_threshold: float | None = 0.1,
+        rows_scanned_threshold: int | None = None,
+        max_entries: int = 1000,
+        logger: logging.Logger = LOGGER,
+    ) -> None:
+        # seconds above which a query is slow, None to disable
+        self.latency_threshold = latency_threshold
+        # visited records above which a query is slow, None to disable
+        self.rows_scanned_threshold = rows_scanned_threshold
+        # logger of slow queries
+        self.logger = logger
+
+        # guards entries and stats
+        self.__lock = threading.Lock()
+        # most recent slow queries
+        self.__entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        # aggregate stats by fingerprint
+        self.__stats: dict[str, FingerprintStats] = {}
+
+    def is_slow(self, seconds: float, rows_scanned: int | None) -> bool:
+        """Return True if a query exceeds any of the thresholds."""
+
+        # latency threshold exceeded
+        if (
+            self.latency_threshold is not None
+            and seconds > self.latency_threshold
+        ):
+            return True
+
+        # rows scanned threshold exceeded
+        return (
+            self.rows_scanned_threshold is not None
+            and rows_scanned is not None
+            and rows_scanned > self.rows_scanned_threshold
+        )
+
+    def record(
+        self,
+        operation: str,
+        query_data: dict,
+        seconds: float,
+        rows_scanned: int | None = None,
+        explain: Callable[[], str] | None = None,
+        batch: int | None = None,
+    ) -> bool:
+        """Record a query, log it if it is slow.
+
+        Args:
+            operation (str): SQL service operation name.
+            query_data (dict): Query data of the operation.
+            seconds (float): Query latency.
+            rows_scanned (int | None): Records visited by the query.
+            explain (Callable[[], str] | None): Returns the query plan,
+                called only for slow queries.
+            batch (int | None): Records of a bulk operation.
+
+        Returns:
+            bool: True if the query was slow.
+        """
+
+        key = fingerprint(operation, query_data.keys(), batch)
+        slow = self.is_slow(seconds, rows_scanned)
+        plan = explain() if slow and explain is not None else None
+
+        with self.__lock:
+            stats = self.__stats.get(key)
+
+            # first query of this fingerprint
+            if stats is None:
+                stats = self.__stats[key] = FingerprintStats(key)
+
+            # update aggregate stats
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows_scanned += rows_scanned or 0
+
+            # keep slow query
+            if slow:
+                stats.slow_calls += 1
+                stats.plan = plan
+                self.__entries.append(
+                    SlowQuery(
+                        key, dict(query_data), seconds, rows_scanned, plan
+                    )
+                )
+
+        # log slow query
+        if slow:
+            self.logger.warning(
+                "slow query %s: %.6fs, rows scanned: %s, plan: %s",
+                key,
+                seconds,
+                rows_scanned,
+                plan,
+            )
+
+        return slow
+
+    def entries(self) -> list[SlowQuery]:
+        """Return most recent slow queries, oldest first."""
+
+        with self.__lock:
+            return list(self.__entries)
+
+    def stats(self) -> list[FingerprintStats]:
+        """Return stats of every fingerprint, most rows scanned first."""
+
+        with self.__lock:
+            return sorted(
+                self.__stats.values(),
+                key=lambda stats: (stats.rows_scanned, stats.total_seconds),
+                reverse=True,
+            )
+
+    def dump(self) -> list[dict]:
+        """Return stats of every fingerprint as dicts, most rows
+        scanned first."""
+
+        return [
+            {
+                "fingerprint": stats.fingerprint,
+                "calls": stats.calls,
+                "slow_calls": stats.slow_calls,
+                "total_seconds": stats.total_seconds,
+                "mean_seconds": stats.mean_seconds,
+                "max_seconds": stats.max_seconds,
+                "rows_scanned": stats.rows_scanned,
+                "plan": stats.plan,
+            }
+            for stats in self.stats()
+        ]
+
+    def reset(self) -> None:
+        """Remove all slow queries and stats."""
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__stats.clear()
@@ -2,3 +2,10 @@ class SQLException(Exception):
     """Exception thrown by SQLService"""
 
     pass
+
+
+class VersionConflict(SQLException):
+    """Exception thrown by a compare-and-set update when the row version
+    is not the expected one"""
+
+    pass
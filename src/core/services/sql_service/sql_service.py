@@ -1,4 +1,39 @@
+import threading
 from abc import ABC, abstractmethod
+from typing import Any, Iterator
+from core.services.sql_service.sql_exception import SQLException
+
+
+class RowsScanned:
+    """'last_rows_scanned' attribute of a SQL service, kept per thread.
+
+    Services are shared by concurrent callers, every caller reads the
+    records visited by its own last operation.
+
+    Args:
+        default (int | None): Value before the first operation of a
+            thread.
+    """
+
+    def __init__(self, default: int | None = 0) -> None:
+        self.default: int | None = default
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name: str = f"_{name}_local"
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        # class attribute
+        if instance is None:
+            return self
+
+        local = instance.__dict__.get(self.name)
+        return getattr(local, "value", self.default)
+
+    def __set__(self, instance: Any, value: int | None) -> None:
+        local = instance.__dict__.get(self.name)
+        if local is None:
+            local = instance.__dict__.setdefault(self.name, threading.local())
+        local.value = value
 
 
 class SQLService[T](ABC):
@@ -14,6 +49,36 @@ class SQLService[T](ABC):
         Raises: SQLException.
         """
 
+    def create_many(self, records: list[T]) -> None:
+        """Create new records in database.
+
+        Default implementation calls create() for every record,
+        implementations should override it with a bulk path.
+
+        Args:
+            records (list[T]): New records.
+
+        Raises: SQLException.
+        """
+
+        for record in records:
+            self.create(record)
+
+    def create_new(self, records: list[T]) -> None:
+        """Create records whose ids are known to be absent from the table,
+        e.g. by a bloom filter, so the duplicate check can be skipped.
+
+        Default implementation calls create_many(), implementations should
+        override it if their duplicate check is costly.
+
+        Args:
+            records (list[T]): New records, ids unique and absent.
+
+        Raises: SQLException.
+        """
+
+        self.create_many(records)
+
     @abstractmethod
     def read_single(self, query_data: dict) -> T | None:
         """Read and return a single record from database.
@@ -40,6 +105,52 @@ class SQLService[T](ABC):
             list[T]: List of records if found else [].
         """
 
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        """Read records by id in a single batch.
+
+        Default implementation calls read_single() for every id,
+        implementations should override it with a single lookup.
+
+        Args:
+            ids (list): Record ids, may repeat.
+
+        Raises: TypeError if ids is not a list, SQLException.
+
+        Returns:
+            list[T | None]: Record of every id in 'ids' order,
+                None for missing ids.
+        """
+
+        # verify ids type
+        if not isinstance(ids, list):
+            raise TypeError("'ids' should be a valid list.")
+
+        return [self.read_single({"id": record_id}) for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        """Stream every record of the table in chunks.
+
+        Default implementation reads the whole table with read_multiple(),
+        implementations should override it to keep memory bounded.
+
+        Args:
+            chunk_size (int): Records per chunk.
+
+        Raises: ValueError if chunk_size is not positive, SQLException.
+
+        Yields:
+            list[T]: Chunk of records, in table order.
+        """
+
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        records = self.read_multiple({})
+        for start in range(0, len(records), chunk_size):
+            end = start + chunk_size
+            yield records[start:end]
+
     @abstractmethod
     def update(self, updated_record: T) -> None:
         """Update record in database.
@@ -50,6 +161,65 @@ class SQLService[T](ABC):
         Raises: SQLException.
         """
 
+    def update_many(self, updated_records: list[T]) -> None:
+        """Update records in database.
+
+        Default implementation calls update() for every record,
+        implementations should override it with a bulk path.
+
+        Args:
+            updated_records (list[T]): Updated records.
+
+        Raises: SQLException.
+        """
+
+        for updated_record in updated_records:
+            self.update(updated_record)
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        """Read a record and its row version.
+
+        Row versions are optional, every write of a record gives it a new
+        version. Default implementation raises SQLException.
+
+        Args:
+            record_id (Any): Record id.
+
+        Raises: SQLException.
+
+        Returns:
+            tuple[T | None, int | None]: Record and its version,
+                (None, None) if the record is missing.
+        """
+
+        raise SQLException(
+            f"row versions are not supported by {type(self).__name__}"
+        )
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        """Update a record only if its row version is still
+        'expected_version' (compare-and-set).
+
+        Default implementation raises SQLException.
+
+        Args:
+            updated_record (T): Updated record.
+            expected_version (int): Version returned by read_versioned().
+
+        Raises:
+            VersionConflict: If the record was written since, or deleted.
+            SQLException: If row versions are not supported.
+
+        Returns:
+            int: New row version.
+        """
+
+        raise SQLException(
+            f"row versions are not supported by {type(self).__name__}"
+        )
+
     @abstractmethod
     def delete(self, query_data: dict) -> None:
         """Delete record(s) in database.
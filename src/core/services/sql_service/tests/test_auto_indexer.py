@@ -0,0 +1,144 @@
+"""Test Cases
+
+- AutoIndexer should raise ValueError if thresholds are not positive
+- observe() should build indexes once a key set reaches 'build_cost'
+- observe() should not propose indexed, id or rejected fields
+- observe() should drop built indexes not queried during a window
+- observe() should halve costs at the end of every window
+- observe() should build at most 'max_indexes' indexes
+- Every decision should be recorded in metrics
+"""
+
+
+import pytest
+from core.services.sql_service.auto_indexer import (
+    BUILD,
+    DROP,
+    AutoIndexer,
+    IndexDecision,
+)
+
+
+def actions(decisions: list[IndexDecision]) -> list[tuple[str, str]]:
+    """Return (action, field) of decisions."""
+
+    return [(decision.action, decision.field) for decision in decisions]
+
+
+def test_auto_indexer_thresholds_incorrect():
+    """AutoIndexer should raise ValueError if thresholds are not
+    positive."""
+
+    # verify ValueError raised
+    for kwargs, message in [
+        ({"build_cost": 0}, "'build_cost' must be a positive integer"),
+        ({"window": 0}, "'window' must be a positive integer"),
+    ]:
+        with pytest.raises(ValueError) as exc_info:
+            AutoIndexer(**kwargs)
+        assert message in str(exc_info.value)
+
+
+def test_observe_build():
+    """observe() should build indexes once a key set reaches
+    'build_cost'."""
+
+    indexer = AutoIndexer(build_cost=1000)
+
+    # verify no decision below the threshold
+    assert indexer.observe(["price", "name"], 600, []) == []
+    assert indexer.observe(["price"], 600, []) == []
+
+    # verify key set indexed once its cost reaches the threshold
+    decisions = indexer.observe(["name", "price"], 400, [])
+    assert actions(decisions) == [(BUILD, "name"), (BUILD, "price")]
+    assert decisions[0].reason == (
+        "queries on (name, price) visited 1000 records"
+    )
+    assert indexer.built() == ["name", "price"]
+    assert indexer.costs() == {("name", "price"): 0.0, ("price",): 600}
+
+
+def test_observe_skipped_fields():
+    """observe() should not propose indexed, id or rejected fields."""
+
+    indexer = AutoIndexer(build_cost=10)
+
+    # verify indexed and id fields skipped
+    assert indexer.observe(["id", "price"], 100, ["price"]) == []
+
+    # verify rejected fields skipped
+    assert actions(indexer.observe(["name"], 100, [])) == [(BUILD, "name")]
+    indexer.reject("name", "bitmap indexes require non negative int ids")
+    assert indexer.observe(["name"], 100, []) == []
+    assert indexer.built() == []
+
+
+def test_observe_drop():
+    """observe() should drop built indexes not queried during a window."""
+
+    indexer = AutoIndexer(build_cost=10, window=3)
+    indexer.observe(["price"], 100, [])
+    indexer.observe(["name"], 100, ["price"])
+
+    # verify no drop of indexes queried in the window
+    assert indexer.observe(["price"], 1, ["price", "name"]) == []
+
+    # verify unused index dropped at the end of the next window
+    indexer.observe(["price"], 1, ["price", "name"])
+    indexer.observe(["price"], 1, ["price", "name"])
+    decisions = indexer.observe(["price"], 1, ["price", "name"])
+    assert actions(decisions) == [(DROP, "name")]
+    assert decisions[0].reason == "not queried in 3 queries"
+    assert indexer.built() == ["price"]
+
+    # verify indexes dropped by hand forgotten
+    indexer.observe(["name"], 1, [])
+    assert indexer.built() == []
+
+
+def test_observe_decay():
+    """observe() should halve costs at the end of every window."""
+
+    indexer = AutoIndexer(build_cost=1000, window=2)
+    indexer.observe(["price"], 600, [])
+    indexer.observe(["name"], 1, [])
+
+    # verify costs halved, cheap key sets forgotten
+    assert indexer.costs() == {("price",): 300}
+
+    # verify threshold not reached after decay
+    assert indexer.observe(["price"], 600, []) == []
+
+
+def test_observe_max_indexes():
+    """observe() should build at most 'max_indexes' indexes."""
+
+    indexer = AutoIndexer(build_cost=10, max_indexes=1)
+
+    # verify single index built
+    decisions = indexer.observe(["name", "price"], 100, [])
+    assert actions(decisions) == [(BUILD, "name")]
+
+
+def test_decision_metrics():
+    """Every decision should be recorded in metrics."""
+
+    indexer = AutoIndexer(table="products", build_cost=10, window=2)
+    indexer.observe(["price"], 100, [])
+    indexer.observe(["name"], 100, ["price"])
+    indexer.reject("name", "failed")
+    indexer.observe(["name"], 100, ["price"])
+    indexer.observe(["name"], 100, ["price"])
+
+    # verify counters
+    def value(field: str, decision: str) -> float:
+        return indexer.metrics.counter_value(
+            "auto_index_decisions_total",
+            {"table": "products", "field": field, "decision": decision},
+        )
+
+    assert value("price", "build") == 1
+    assert value("name", "build") == 1
+    assert value("name", "reject") == 1
+    assert value("price", "drop") == 1
@@ -0,0 +1,161 @@
+"""Test Cases
+
+- BatchLoader should raise ValueError if 'max_batch_size' is not positive
+- load() should dispatch keys of the same tick as one batch
+- load() should dispatch keys of different ticks as separate batches
+- load() should dispatch full batches of 'max_batch_size' keys
+- load() should share exceptions of the batch function with every caller
+- load() should reject batch results without one value per key
+- load() should not fail other callers of a key if a caller is cancelled
+- load_many() should return values in keys order
+"""
+
+
+import asyncio
+import pytest
+from core.services.sql_service.batch_loader import BatchLoader
+
+
+def make_loader(max_batch_size: int | None = None):
+    """Return loader doubling keys and the list of its batches."""
+
+    batches: list[list[int]] = []
+
+    async def batch_function(keys: list[int]) -> list[int]:
+        batches.append(keys)
+        return [key * 2 for key in keys]
+
+    return BatchLoader(batch_function, max_batch_size), batches
+
+
+def test_loader_batch_size_incorrect():
+    """BatchLoader should raise ValueError if 'max_batch_size' is
+    not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        make_loader(max_batch_size=0)
+
+    # verify error message
+    assert "'max_batch_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_load_same_tick():
+    """load() should dispatch keys of the same tick as one batch."""
+
+    loader, batches = make_loader()
+
+    async def main():
+        return await asyncio.gather(*[loader.load(key) for key in [3, 1, 3]])
+
+    # verify values and single batch of distinct keys
+    assert asyncio.run(main()) == [6, 2, 6]
+    assert batches == [[3, 1]]
+
+    # verify metrics
+    labels = {"name": "default"}
+    assert (
+        loader.metrics.counter_value("batch_loader_loads_total", labels) == 3
+    )
+    assert (
+        loader.metrics.counter_value("batch_loader_batches_total", labels) == 1
+    )
+    assert loader.metrics.counter_value("batch_loader_keys_total", labels) == 2
+
+
+def test_load_different_ticks():
+    """load() should dispatch keys of different ticks as separate
+    batches."""
+
+    loader, batches = make_loader()
+
+    async def main():
+        first = await loader.load(1)
+        second = await loader.load(2)
+        return first, second
+
+    # verify values and batches
+    assert asyncio.run(main()) == (2, 4)
+    assert batches == [[1], [2]]
+
+
+def test_load_max_batch_size():
+    """load() should dispatch full batches of 'max_batch_size' keys."""
+
+    loader, batches = make_loader(max_batch_size=2)
+
+    async def main():
+        return await asyncio.gather(*[loader.load(key) for key in range(5)])
+
+    # verify values and batches
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+def test_load_error():
+    """load() should share exceptions of the batch function with
+    every caller."""
+
+    async def batch_function(keys: list[int]) -> list[int]:
+        raise RuntimeError("backend down")
+
+    loader = BatchLoader(batch_function)
+
+    async def main():
+        return await asyncio.gather(
+            loader.load(1), loader.load(2), return_exceptions=True
+        )
+
+    # verify every caller received the exception
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["backend down"] * 2
+
+
+def test_load_result_length():
+    """load() should reject batch results without one value per key."""
+
+    async def batch_function(keys: list[int]) -> list[int]:
+        return []
+
+    loader = BatchLoader(batch_function)
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        asyncio.run(loader.load(1))
+
+    # verify error message
+    assert "batch function should return one value per key" in str(
+        exc_info.value
+    )
+
+
+def test_load_cancel():
+    """load() should not fail other callers of a key if a caller
+    is cancelled."""
+
+    loader, _ = make_loader()
+
+    async def main():
+        first = asyncio.ensure_future(loader.load(1))
+        second = asyncio.ensure_future(loader.load(1))
+        await asyncio.sleep(0)
+
+        # cancel first caller
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    # verify second caller received the value
+    assert asyncio.run(main()) == 2
+
+
+def test_load_many():
+    """load_many() should return values in keys order."""
+
+    loader, batches = make_loader()
+
+    # verify values and single batch
+    assert asyncio.run(loader.load_many([5, 4, 5])) == [10, 8, 10]
+    assert batches == [[5, 4]]
@@ -0,0 +1,129 @@
+"""Test Cases
+
+- Bitmap should raise ValueError for ids that are not non negative ints
+- Bitmap should add, discard and iterate over ids in increasing order
+- Bitmap should convert dense containers to bit sets and back
+- Bitmap AND / OR should match set intersection / union
+- intersect() and union() should combine several bitmaps
+- BitmapIndex should keep ids of every value
+"""
+
+
+import random
+import pytest
+from core.services.sql_service.bitmap_index import (
+    ARRAY_MAX,
+    Bitmap,
+    BitmapIndex,
+    intersect,
+    union,
+)
+
+
+def test_bitmap_id_incorrect():
+    """Bitmap should raise ValueError for ids that are not non negative
+    ints."""
+
+    # verify ValueError raised
+    for record_id in [-1, 1.0, "1"]:
+        with pytest.raises(ValueError) as exc_info:
+            Bitmap().add(record_id)  # type: ignore
+        assert "bitmap ids must be non negative integers" in str(
+            exc_info.value
+        )
+
+
+def test_bitmap():
+    """Bitmap should add, discard and iterate over ids in increasing
+    order."""
+
+    bitmap = Bitmap([70_000, 5, 3, 5, 1 << 40])
+
+    # verify ids
+    assert list(bitmap) == [3, 5, 70_000, 1 << 40]
+    assert len(bitmap) == 4
+    assert 5 in bitmap and 4 not in bitmap and "5" not in bitmap
+
+    # discard present and absent ids
+    bitmap.discard(5)
+    bitmap.discard(4)
+    bitmap.discard(70_000)
+
+    # verify ids
+    assert list(bitmap) == [3, 1 << 40]
+    assert bitmap == Bitmap([1 << 40, 3])
+    assert not Bitmap()
+
+
+def test_bitmap_containers():
+    """Bitmap should convert dense containers to bit sets and back."""
+
+    bitmap = Bitmap(range(0, 2 * (ARRAY_MAX + 1), 2))
+
+    # verify bit set container
+    assert isinstance(bitmap._containers[0], int)
+    assert len(bitmap) == ARRAY_MAX + 1
+    assert 2 * ARRAY_MAX in bitmap and 1 not in bitmap
+
+    # back to a sorted list
+    bitmap.discard(0)
+    assert bitmap._containers[0] == list(range(2, 2 * (ARRAY_MAX + 1), 2))
+
+
+def test_bitmap_and_or():
+    """Bitmap AND / OR should match set intersection / union."""
+
+    generator = random.Random(7)
+    for left_size, right_size in [(10, 20), (10, 9000), (9000, 12000)]:
+        left = set(generator.sample(range(200_000), left_size))
+        right = set(generator.sample(range(200_000), right_size))
+        left_bitmap, right_bitmap = Bitmap(left), Bitmap(right)
+
+        # verify AND / OR
+        assert list(left_bitmap & right_bitmap) == sorted(left & right)
+        assert list(right_bitmap & left_bitmap) == sorted(left & right)
+        assert list(left_bitmap | right_bitmap) == sorted(left | right)
+
+        # verify operands unchanged
+        assert list(left_bitmap) == sorted(left)
+
+
+def test_intersect_union():
+    """intersect() and union() should combine several bitmaps."""
+
+    bitmaps = [Bitmap(range(10)), Bitmap(range(5, 20)), Bitmap([7, 30])]
+
+    # verify results
+    assert list(intersect(bitmaps)) == [7]
+    assert list(union(bitmaps)) == list(range(20)) + [30]
+    assert not union([])
+    with pytest.raises(ValueError):
+        intersect([])
+
+    # verify result is a copy of a single bitmap
+    result = intersect(bitmaps[2:])
+    bitmaps[2].add(8)
+    assert list(result) == [7, 30]
+
+
+def test_bitmap_index():
+    """BitmapIndex should keep ids of every value."""
+
+    index = BitmapIndex("price")
+    index.add(4.99, 1)
+    index.add(6.99, 2)
+    index.add(4.99, 3)
+
+    # verify bitmaps
+    assert list(index.get(4.99)) == [1, 3]
+    assert list(index.get(9.99)) == []
+    assert list(index.any_of([4.99, 6.99, 9.99])) == [1, 2, 3]
+
+    # remove ids
+    index.remove(6.99, 2)
+    index.remove(9.99, 2)
+
+    # verify empty values removed
+    assert index.values() == [4.99]
+    index.clear()
+    assert index.values() == []
@@ -0,0 +1,90 @@
+"""Test Cases
+
+- BloomFilter should raise ValueError for invalid sizes
+- Added keys should always be maybe present
+- False positives should stay near 'error_rate' at capacity
+- Equal keys of different types should have equal hashes, str hashes
+  should not depend on the process
+- from_bytes() should restore a filter written by to_bytes()
+"""
+
+
+import pytest
+from hashlib import blake2b
+from core.services.sql_service.bloom_filter import BloomFilter, key_hash
+
+
+def test_bloom_filter_incorrect():
+    """BloomFilter should raise ValueError for invalid sizes."""
+
+    # verify ValueError raised
+    for capacity, error_rate, message in [
+        (0, 0.01, "'capacity' must be a positive integer"),
+        (10, 0.0, "'error_rate' must be between 0 and 1"),
+        (10, 1.0, "'error_rate' must be between 0 and 1"),
+    ]:
+        with pytest.raises(ValueError) as exc_info:
+            BloomFilter(capacity, error_rate)
+        assert message in str(exc_info.value)
+
+
+def test_no_false_negatives():
+    """Added keys should always be maybe present."""
+
+    bloom = BloomFilter(1000)
+    keys = [*range(500), *(f"key-{i}" for i in range(500))]
+    bloom.update(keys)
+
+    # verify every key present
+    assert all(key in bloom for key in keys)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate():
+    """False positives should stay near 'error_rate' at capacity."""
+
+    bloom = BloomFilter(10_000, 0.01)
+    bloom.update(range(10_000))
+
+    # verify measured and expected rates
+    false_positives = sum(key in bloom for key in range(10_000, 60_000))
+    assert false_positives / 50_000 < 0.02
+    assert 0.005 < bloom.false_positive_rate() < 0.015
+
+
+def test_key_hash():
+    """Equal keys of different types should have equal hashes, str
+    hashes should not depend on the process."""
+
+    # verify equal keys
+    assert key_hash(1) == key_hash(1.0) == key_hash(True)
+    assert key_hash("id") == key_hash("id")
+    assert key_hash(1) != key_hash(2)
+    assert key_hash(-1) != key_hash(1)
+
+    # verify str hash independent of the process
+    digest = blake2b(b"product", digest_size=8).digest()
+    assert key_hash("product") == int.from_bytes(digest, "little")
+
+
+def test_to_bytes():
+    """from_bytes() should restore a filter written by to_bytes()."""
+
+    bloom = BloomFilter(100)
+    bloom.update(range(0, 200, 2))
+
+    # verify restored filter
+    restored = BloomFilter.from_bytes(bloom.to_bytes())
+    assert (restored.bit_count, restored.hashes, restored.count) == (
+        bloom.bit_count,
+        bloom.hashes,
+        100,
+    )
+    assert [key in restored for key in range(200)] == [
+        key in bloom for key in range(200)
+    ]
+
+    # verify truncated data rejected
+    with pytest.raises(ValueError) as exc_info:
+        BloomFilter.from_bytes(bloom.to_bytes()[:-1])
+    assert "truncated bloom filter" in str(exc_info.value)
@@ -0,0 +1,339 @@
+"""Test Cases
+
+- BloomFilteredSQLService should be of type SQLService
+- BloomFilteredSQLService should raise TypeError if 'sql_service' is
+  not of type SQLService, and ValueError for an invalid 'error_rate'
+- Lookups and writes of missing ids should not reach the wrapped service
+- Lookups of present ids should be delegated to the wrapped service
+- Creates of new ids should skip the duplicate check, creates of ids
+  maybe present should be checked by the wrapped service
+- Lookups of deleted ids should be counted as false positives and
+  rebuild the filter once too frequent
+- The filter should be rebuilt once the table outgrows it
+- rebuild() should add ids written by other means
+- Concurrent creates of a new id should claim it once, creates during a
+  rebuild should reach the new filter
+- Ids deleted and created again during a rebuild should stay visible
+"""
+
+
+import sys
+import threading
+import pytest
+from unittest.mock import Mock, call
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.bloom_filtered_sql_service import (
+    MIN_CAPACITY,
+    MIN_SAMPLES,
+    BloomFilteredSQLService,
+)
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+from features.product.models.product import Product
+
+
+def make_product(product_id: int) -> Product:
+    """Return product of an id."""
+
+    return Product(id=product_id, name=f"product-{product_id}", price=1.0)
+
+
+def make_service(
+    sql_service: SQLService | None = None,
+) -> BloomFilteredSQLService[Product]:
+    """Return filtered service of 'products' table."""
+
+    return BloomFilteredSQLService[Product](
+        sql_service or MySQLService[Product](),
+        table="products",
+        metrics=MetricsRegistry(),
+    )
+
+
+def make_mock(*ids: int) -> Mock:
+    """Return mocked service holding products of 'ids'."""
+
+    mock = Mock(spec=SQLService)
+    mock.iter_chunks.return_value = iter([[make_product(i) for i in ids]])
+    mock.last_rows_scanned = 7
+
+    return mock
+
+
+def counter(service: BloomFilteredSQLService, name: str, **labels) -> float:
+    """Return value of a counter of 'products' table."""
+
+    return service.metrics.counter_value(name, {"table": "products", **labels})
+
+
+def test_bloom_filtered_service_type():
+    """BloomFilteredSQLService should be of type SQLService."""
+
+    # verify type
+    assert isinstance(make_service(make_mock()), SQLService)
+
+
+def test_bloom_filtered_service_incorrect():
+    """BloomFilteredSQLService should raise TypeError if 'sql_service' is
+    not of type SQLService, and ValueError for an invalid 'error_rate'."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        BloomFilteredSQLService[Product]("str", table="products")
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        BloomFilteredSQLService[Product](make_mock(), "products", 1.0)
+    assert "'error_rate' must be between 0 and 1" in str(exc_info.value)
+
+
+def test_missing_ids():
+    """Lookups and writes of missing ids should not reach the wrapped
+    service."""
+
+    mock = make_mock(1, 2)
+    service = make_service(mock)
+
+    # verify results of missing ids
+    assert service.read_single({"id": 3}) is None
+    assert service.read_single({"id": 3, "price": 1.0}) is None
+    assert service.read_multiple({"id": 3}) == []
+    assert service.read_by_ids([3, 4]) == [None, None]
+    assert service.read_versioned(3) == (None, None)
+    service.update(make_product(3))
+    service.update_many([make_product(3), make_product(4)])
+    service.delete({"id": 3})
+
+    # verify wrapped service only scanned to build the filter
+    assert mock.mock_calls == [call.iter_chunks()]
+    assert service.last_rows_scanned == 0
+    assert counter(service, "bloom_checks_total", result="absent") == 10
+    assert counter(service, "bloom_rebuilds_total") == 1
+    assert service.false_positive_rate() == 0.0
+    assert 0 < service.expected_false_positive_rate() < 0.01
+
+
+def test_present_ids():
+    """Lookups of present ids should be delegated to the wrapped
+    service."""
+
+    mock = make_mock(1, 2)
+    service = make_service(mock)
+    mock.read_single.return_value = make_product(1)
+    mock.read_multiple.return_value = [make_product(1)]
+    mock.read_by_ids.return_value = [make_product(2), make_product(1)]
+    mock.read_versioned.return_value = (make_product(1), 3)
+
+    # verify delegation
+    assert service.read_single({"id": 1}) == make_product(1)
+    mock.read_single.assert_called_once_with({"id": 1})
+    assert service.read_multiple({"id": 1}) == [make_product(1)]
+    mock.read_multiple.assert_called_once_with({"id": 1})
+    assert service.read_by_ids([2, 3, 1]) == [
+        make_product(2),
+        None,
+        make_product(1),
+    ]
+    mock.read_by_ids.assert_called_once_with([2, 1])
+    assert service.read_versioned(1) == (make_product(1), 3)
+    mock.read_versioned.assert_called_once_with(1)
+    service.update_many([make_product(3), make_product(2)])
+    mock.update_many.assert_called_once_with([make_product(2)])
+    service.update(make_product(1))
+    mock.update.assert_called_once_with(make_product(1))
+    service.delete({"price": 1.0})
+    mock.delete.assert_called_once_with({"price": 1.0})
+    mock.update_if_version.return_value = 4
+    assert service.update_if_version(make_product(1), 3) == 4
+    assert service.last_rows_scanned == 7
+
+    # verify unhashable ids and invalid arguments delegated
+    service.read_single({"id": [1]})
+    mock.read_single.assert_called_with({"id": [1]})
+    service.read_by_ids("str")
+    mock.read_by_ids.assert_called_with("str")
+
+
+def test_create():
+    """Creates of new ids should skip the duplicate check, creates of ids
+    maybe present should be checked by the wrapped service."""
+
+    service = make_service()
+    DATABASE.append({"id": 1, "name": "product-1", "price": 1.0})
+
+    # verify new ids created without a duplicate check scan
+    service.create(make_product(2))
+    service.create_many([make_product(3), make_product(4)])
+    assert service.last_rows_scanned == 0
+    assert [record["id"] for record in DATABASE] == [1, 2, 3, 4]
+
+    # verify duplicates raise SQLException
+    for create, records in [
+        (service.create, make_product(1)),
+        (service.create_many, [make_product(5), make_product(4)]),
+        (service.create_many, [make_product(5), make_product(5)]),
+    ]:
+        with pytest.raises(SQLException):
+            create(records)
+
+    # verify created ids are looked up
+    assert service.read_by_ids([4, 2]) == [make_product(4), make_product(2)]
+    assert service.read_single({"id": 5}) is None
+    service.create_many([make_product(5)])
+    assert service.read_single({"id": 5}) == make_product(5)
+
+    # verify invalid records rejected
+    with pytest.raises(TypeError):
+        service.create("str")  # type: ignore
+    with pytest.raises(TypeError):
+        service.create_many([{"id": 6}])  # type: ignore
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_false_positives():
+    """Lookups of deleted ids should be counted as false positives and
+    rebuild the filter once too frequent."""
+
+    service = make_service()
+    service.create_many([make_product(i) for i in range(1, 101)])
+    service.delete({})
+
+    # verify lookups of deleted ids reach the wrapped service
+    for product_id in range(1, 11):
+        assert service.read_single({"id": product_id}) is None
+    assert counter(service, "bloom_false_positives_total") == 10
+    assert service.false_positive_rate() == 10 / 110
+
+    # verify filter rebuilt once lookups are numerous enough
+    for i in range(MIN_SAMPLES):
+        service.read_by_ids([i % 100 + 1])
+    assert counter(service, "bloom_rebuilds_total") == 2
+    assert service.false_positive_rate() == 0.0
+    assert counter(service, "bloom_false_positives_total") == (
+        MIN_SAMPLES - 100
+    )
+
+
+def test_growth():
+    """The filter should be rebuilt once the table outgrows it."""
+
+    service = make_service()
+    service.create_many([make_product(i) for i in range(1, MIN_CAPACITY)])
+    assert counter(service, "bloom_rebuilds_total") == 1
+
+    # verify rebuild sized for the table
+    service.create_many(
+        [make_product(MIN_CAPACITY), make_product(MIN_CAPACITY + 1)]
+    )
+    assert counter(service, "bloom_rebuilds_total") == 2
+    assert service.expected_false_positive_rate() < 0.01
+    assert service.read_by_ids([MIN_CAPACITY + 1, MIN_CAPACITY]) == [
+        make_product(MIN_CAPACITY + 1),
+        make_product(MIN_CAPACITY),
+    ]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_rebuild():
+    """rebuild() should add ids written by other means."""
+
+    service = make_service()
+    assert service.read_single({"id": 1}) is None
+
+    # verify ids written to the table are seen after rebuild
+    DATABASE.append({"id": 1, "name": "product-1", "price": 1.0})
+    assert service.read_single({"id": 1}) is None
+    service.rebuild()
+    assert service.read_single({"id": 1}) == make_product(1)
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_concurrent_creates():
+    """Concurrent creates of a new id should claim it once, creates during
+    a rebuild should reach the new filter."""
+
+    sql_service = MySQLService[Product]()
+    service = make_service(sql_service)
+    errors: list[int] = []
+
+    def create() -> None:
+        for product_id in range(1, 201):
+            try:
+                service.create(make_product(product_id))
+            except SQLException:
+                errors.append(product_id)
+
+    # switch threads often so that creates interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=create) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # verify every id created once, the other create rejected
+    assert sorted(record["id"] for record in DATABASE) == list(range(1, 201))
+    assert sorted(errors) == list(range(1, 201))
+
+    # verify id created while a rebuild scans the table
+    chunks = sql_service.iter_chunks
+
+    def iter_chunks(*args):
+        yield from chunks(*args)
+        service.create(make_product(500))
+
+    sql_service.iter_chunks = iter_chunks  # type: ignore
+    service.rebuild()
+    assert service.read_single({"id": 500}) == make_product(500)
+    with pytest.raises(SQLException):
+        service.create(make_product(500))
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_recreate_during_rebuild():
+    """Ids deleted and created again during a rebuild should stay
+    visible."""
+
+    sql_service = MySQLService[Product]()
+    service = make_service(sql_service)
+    service.create_many([make_product(1), make_product(2)])
+    service.delete({"id": 1})
+    service.delete({"id": 2})
+
+    # recreate ids still in the old filter once the scan is done
+    chunks = sql_service.iter_chunks
+
+    def iter_chunks(*args):
+        yield from chunks(*args)
+        service.create(make_product(1))
+        service.create_many([make_product(2)])
+
+    sql_service.iter_chunks = iter_chunks  # type: ignore
+    service.rebuild()
+
+    # verify records read, updated and deleted through the new filter
+    assert service.read_single({"id": 1}) == make_product(1)
+    assert service.read_by_ids([2]) == [make_product(2)]
+    service.update(Product(id=1, name="updated", price=2.0))
+    assert sql_service.read_single({"id": 1}).name == "updated"
+    service.delete({"id": 2})
+    assert sql_service.read_single({"id": 2}) is None
+
+    # remove records from database
+    DATABASE.clear()
@@ -0,0 +1,211 @@
+"""Test Cases
+
+- ChangeFeed should raise ValueError if 'max_changes' is not positive
+- append() should raise ValueError for unknown operations
+- append() should number changes from 1 and record metrics
+- read() should return changes after an offset, up to 'limit'
+- read() should wait up to 'timeout' for a new change
+- read() should raise ChangeFeedGap for offsets no longer retained
+- subscribe() should deliver new changes in order
+- subscribe() should replay retained changes after an offset first
+- unsubscribe() should stop delivering changes
+- A subscription whose callback raised should be closed
+"""
+
+
+import threading
+import pytest
+from core.services.sql_service.change_feed import (
+    Change,
+    ChangeFeed,
+    ChangeFeedGap,
+)
+from core.services.sql_service.sql_exception import SQLException
+
+
+def insert(feed: ChangeFeed, key: int) -> Change:
+    """Append insert of record 'key'."""
+
+    return feed.append("insert", key, None, {"id": key})
+
+
+def test_change_feed_max_changes_incorrect():
+    """ChangeFeed should raise ValueError if 'max_changes' is
+    not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        ChangeFeed(max_changes=0)
+
+    # verify error message
+    assert "'max_changes' must be a positive integer" in str(exc_info.value)
+
+
+def test_append_operation_incorrect():
+    """append() should raise ValueError for unknown operations."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        ChangeFeed().append("upsert", 1, None, {"id": 1})
+
+    # verify error message
+    assert "unknown change operation: upsert" in str(exc_info.value)
+
+
+def test_append():
+    """append() should number changes from 1 and record metrics."""
+
+    feed = ChangeFeed(name="products")
+    assert feed.last_seq() == 0
+
+    # append changes
+    first = insert(feed, 1)
+    second = feed.append("update", 1, {"id": 1}, {"id": 1, "name": "x"})
+
+    # verify changes
+    assert (first.seq, first.operation, first.key) == (1, "insert", 1)
+    assert (first.before, first.after) == (None, {"id": 1})
+    assert second.seq == feed.last_seq() == 2
+    assert second.before == {"id": 1}
+
+    # verify metrics
+    assert (
+        feed.metrics.counter_value(
+            "change_feed_changes_total",
+            {"name": "products", "operation": "insert"},
+        )
+        == 1
+    )
+
+
+def test_read():
+    """read() should return changes after an offset, up to 'limit'."""
+
+    feed = ChangeFeed()
+    for key in range(1, 6):
+        insert(feed, key)
+
+    # verify reads
+    assert [change.key for change in feed.read()] == [1, 2, 3, 4, 5]
+    assert [change.seq for change in feed.read(2, limit=2)] == [3, 4]
+    assert feed.read(5) == []
+
+
+def test_read_timeout():
+    """read() should wait up to 'timeout' for a new change."""
+
+    feed = ChangeFeed()
+
+    # verify empty read once timed out
+    assert feed.read(timeout=0.01) == []
+
+    # append from another thread
+    timer = threading.Timer(0.01, insert, (feed, 1))
+    timer.start()
+
+    # verify change received
+    assert [change.key for change in feed.read(timeout=5)] == [1]
+    timer.join()
+
+
+def test_read_gap():
+    """read() should raise ChangeFeedGap for offsets no longer
+    retained."""
+
+    feed = ChangeFeed(max_changes=2)
+    for key in range(1, 5):
+        insert(feed, key)
+
+    # verify ChangeFeedGap raised
+    with pytest.raises(ChangeFeedGap) as exc_info:
+        feed.read(1)
+
+    # verify error type and message
+    assert isinstance(exc_info.value, SQLException)
+    assert "oldest retained change is 3" in str(exc_info.value)
+
+    # verify retained changes
+    assert [change.seq for change in feed.read(2)] == [3, 4]
+
+
+def test_subscribe():
+    """subscribe() should deliver new changes in order."""
+
+    feed = ChangeFeed()
+    insert(feed, 1)
+    received: list[int] = []
+
+    # subscribe to new changes
+    subscription = feed.subscribe(lambda change: received.append(change.seq))
+    insert(feed, 2)
+    insert(feed, 3)
+
+    # verify changes and offset
+    assert received == [2, 3]
+    assert subscription.last_seq == 3
+
+
+def test_subscribe_replay():
+    """subscribe() should replay retained changes after an offset
+    first."""
+
+    feed = ChangeFeed()
+    for key in range(1, 4):
+        insert(feed, key)
+    received: list[int] = []
+
+    # resume after change 1
+    feed.subscribe(lambda change: received.append(change.seq), after_seq=1)
+    insert(feed, 4)
+
+    # verify replayed and new changes
+    assert received == [2, 3, 4]
+
+
+def test_unsubscribe():
+    """unsubscribe() should stop delivering changes."""
+
+    feed = ChangeFeed()
+    received: list[int] = []
+    subscription = feed.subscribe(lambda change: received.append(change.seq))
+
+    # unsubscribe
+    insert(feed, 1)
+    subscription.unsubscribe()
+    insert(feed, 2)
+
+    # verify changes
+    assert received == [1]
+    assert subscription.closed
+
+
+def test_subscriber_error():
+    """A subscription whose callback raised should be closed."""
+
+    feed = ChangeFeed(name="products")
+    received: list[int] = []
+
+    def callback(change: Change) -> None:
+        if change.seq == 2:
+            raise RuntimeError("consumer down")
+        received.append(change.seq)
+
+    subscription = feed.subscribe(callback)
+    for key in range(1, 4):
+        insert(feed, key)
+
+    # verify subscription closed at the failed change
+    assert received == [1]
+    assert subscription.closed
+    assert str(subscription.error) == "consumer down"
+    assert subscription.last_seq == 1
+    assert (
+        feed.metrics.counter_value(
+            "change_feed_subscriber_errors_total", {"name": "products"}
+        )
+        == 1
+    )
+
+    # verify consumer can resume from its offset
+    feed.subscribe(lambda change: received.append(change.seq), after_seq=1)
+    assert received == [1, 2, 3]
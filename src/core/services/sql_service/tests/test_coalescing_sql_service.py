@@ -0,0 +1,250 @@
+"""Test Cases
+
+- CoalescingSQLService should be of type SQLService
+- CoalescingSQLService should raise TypeError if 'sql_service' is
+  not of type SQLService
+- Every operation should be delegated to the wrapped service
+- Concurrent identical reads should share one call of the wrapped service
+  and receive their own models
+- Reads issued after a write should not join reads started before it
+- Invalid and unhashable queries should not be coalesced
+
+- AsyncCoalescingReader should raise TypeError if 'sql_service' is
+  not of type SQLService
+- AsyncCoalescingReader should share one call of the wrapped service
+  between concurrent identical reads
+"""
+
+
+import asyncio
+import threading
+import pytest
+from unittest.mock import Mock
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.coalescing_sql_service import (
+    AsyncCoalescingReader,
+    CoalescingSQLService,
+)
+from core.services.sql_service.sql_service import SQLService
+from core.services.sql_service.tests.test_single_flight import wait_for
+from features.product.models.product import Product
+
+
+# product returned by the mocked service
+PRODUCT = Product(id=1, name="orange", price=4.99)
+
+
+def make_service(
+    sql_service: SQLService | None = None,
+) -> CoalescingSQLService:
+    """Return coalescing service for 'products' table."""
+
+    return CoalescingSQLService[Product](
+        sql_service or Mock(spec=SQLService),
+        table="products",
+        metrics=MetricsRegistry(),
+    )
+
+
+def collapsed(metrics: MetricsRegistry) -> int:
+    """Return number of collapsed reads of 'products' table."""
+
+    return metrics.counter_value(
+        "single_flight_collapsed_total", {"name": "products"}
+    )
+
+
+def test_coalescing_service_type():
+    """CoalescingSQLService should be of type SQLService."""
+
+    # verify type
+    assert isinstance(make_service(), SQLService)
+
+
+def test_coalescing_service_incorrect():
+    """CoalescingSQLService should raise TypeError if 'sql_service' is
+    not of type SQLService."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        CoalescingSQLService("abcd", table="products")  # type: ignore
+
+    # verify error message
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+
+def test_delegation():
+    """Every operation should be delegated to the wrapped service."""
+
+    # create coalescing mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+
+    # return values of mock
+    mock.create.return_value = None
+    mock.create_many.return_value = None
+    mock.read_single.return_value = PRODUCT
+    mock.read_multiple.return_value = [PRODUCT]
+    mock.update.return_value = None
+    mock.delete.return_value = None
+    mock.iter_chunks.return_value = iter([[PRODUCT]])
+    mock.read_by_ids.return_value = [PRODUCT]
+    mock.update_many.return_value = None
+    mock.create_new.return_value = None
+
+    # verify delegation
+    assert service.create(PRODUCT) is None
+    mock.create.assert_called_once_with(PRODUCT)
+    assert service.create_many([PRODUCT]) is None
+    mock.create_many.assert_called_once_with([PRODUCT])
+    assert service.create_new([PRODUCT]) is None
+    mock.create_new.assert_called_once_with([PRODUCT])
+    assert service.read_single({"id": 1}) == PRODUCT
+    mock.read_single.assert_called_once_with({"id": 1})
+    assert service.read_multiple({"id": 1}) == [PRODUCT]
+    mock.read_multiple.assert_called_once_with({"id": 1})
+    assert service.update(PRODUCT) is None
+    mock.update.assert_called_once_with(PRODUCT)
+    assert service.delete({"id": 1}) is None
+    mock.delete.assert_called_once_with({"id": 1})
+    assert list(service.iter_chunks(5)) == [[PRODUCT]]
+    mock.iter_chunks.assert_called_once_with(5)
+    assert service.read_by_ids([1]) == [PRODUCT]
+    mock.read_by_ids.assert_called_once_with([1])
+    assert service.update_many([PRODUCT]) is None
+    mock.update_many.assert_called_once_with([PRODUCT])
+    mock.read_versioned.return_value = (PRODUCT, 3)
+    assert service.read_versioned(1) == (PRODUCT, 3)
+    mock.read_versioned.assert_called_once_with(1)
+    mock.update_if_version.return_value = 4
+    assert service.update_if_version(PRODUCT, 3) == 4
+    mock.update_if_version.assert_called_once_with(PRODUCT, 3)
+
+
+def test_coalesce_reads():
+    """Concurrent identical reads should share one call of the wrapped
+    service."""
+
+    release = threading.Event()
+    mock = Mock(spec=SQLService)
+    mock.read_multiple.side_effect = lambda _: release.wait() and [PRODUCT]
+    service = make_service(mock)
+    results: list = []
+
+    # concurrent identical reads
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(
+                service.read_multiple({"name": "orange", "id": 1})
+            )
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # release wrapped service once every read joined
+    wait_for(lambda: collapsed(service.single_flight.metrics) == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    # verify single call and per caller lists and models
+    mock.read_multiple.assert_called_once()
+    assert results == [[PRODUCT]] * 5
+    assert len({id(result) for result in results}) == 5
+    assert len({id(result[0]) for result in results} | {id(PRODUCT)}) == 6
+
+
+def test_read_after_write():
+    """Reads issued after a write should not join reads started before
+    it."""
+
+    release = threading.Event()
+    updated = Product(id=1, name="orange", price=5.99)
+
+    def stale() -> Product:
+        # bounded, a joined read fails instead of blocking
+        release.wait(timeout=2.0)
+        return PRODUCT
+
+    reads = iter([stale, lambda: updated])
+    mock = Mock(spec=SQLService)
+    mock.read_single.side_effect = lambda _: next(reads)()
+    service = make_service(mock)
+    results: list = []
+
+    # read in flight before the write
+    thread = threading.Thread(
+        target=lambda: results.append(service.read_single({"id": 1}))
+    )
+    thread.start()
+    wait_for(lambda: service.single_flight.in_flight() == 1)
+    service.update(updated)
+
+    # verify read after the write runs its own call
+    assert service.read_single({"id": 1}) == updated
+    release.set()
+    thread.join()
+    assert results == [PRODUCT]
+    assert collapsed(service.single_flight.metrics) == 0
+
+
+def test_no_coalesce():
+    """Invalid and unhashable queries should not be coalesced."""
+
+    # create coalescing mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+
+    # read with invalid and unhashable queries
+    service.read_single("abcd")  # type: ignore
+    service.read_single({"id": [1]})
+
+    # verify calls
+    assert mock.read_single.call_count == 2
+    assert service.single_flight.in_flight() == 0
+
+
+def test_async_reader_incorrect():
+    """AsyncCoalescingReader should raise TypeError if 'sql_service' is
+    not of type SQLService."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        AsyncCoalescingReader("abcd", table="products")  # type: ignore
+
+    # verify error message
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+
+def test_async_reader_coalesce():
+    """AsyncCoalescingReader should share one call of the wrapped service
+    between concurrent identical reads."""
+
+    release = threading.Event()
+    mock = Mock(spec=SQLService)
+    mock.read_single.side_effect = lambda _: release.wait() and PRODUCT
+    metrics = MetricsRegistry()
+    reader = AsyncCoalescingReader[Product](mock, "products", metrics)
+
+    async def main():
+        reads = asyncio.gather(
+            *[reader.read_single({"id": 1}) for _ in range(10)],
+            reader.read_multiple({"id": 1}),
+        )
+        # release wrapped service once every read joined
+        await asyncio.sleep(0)
+        release.set()
+        return await reads
+
+    # verify results and calls
+    results = asyncio.run(main())
+    assert results[:10] == [PRODUCT] * 10
+    mock.read_single.assert_called_once_with({"id": 1})
+    mock.read_multiple.assert_called_once_with({"id": 1})
+    assert collapsed(metrics) == 9
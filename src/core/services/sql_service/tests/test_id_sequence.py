@@ -0,0 +1,223 @@
+"""Test Cases
+
+- IdSequence should raise ValueError if 'start' or 'block_size' is
+  not positive
+- reserve() should raise ValueError if 'count' is not positive
+- reserve() should return consecutive ids and record metrics
+- next_id() should allocate ids from a block per thread
+- Concurrent writers should never receive the same id
+- advance_past() should only move the sequence forward
+- Reserved blocks should only skip the ids passed to advance_past()
+- Concurrent writers of allocated ids should reserve one block each
+- max_id() should return the largest id of a table
+"""
+
+
+import sys
+import threading
+import pytest
+from core.services.sql_service.id_sequence import IdSequence, max_id
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from features.product.models.product import Product
+
+
+def test_id_sequence_incorrect():
+    """IdSequence should raise ValueError if 'start' or 'block_size' is
+    not positive."""
+
+    # verify ValueError raised for start
+    for start in [0, -1, 1.5]:
+        with pytest.raises(ValueError) as exc_info:
+            IdSequence(start=start)  # type: ignore
+        assert "'start' must be a positive integer" in str(exc_info.value)
+
+    # verify ValueError raised for block_size
+    with pytest.raises(ValueError) as exc_info:
+        IdSequence(block_size=0)
+    assert "'block_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_reserve_incorrect():
+    """reserve() should raise ValueError if 'count' is not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        IdSequence().reserve(0)
+
+    # verify error message
+    assert "'count' must be a positive integer" in str(exc_info.value)
+
+
+def test_reserve():
+    """reserve() should return consecutive ids and record metrics."""
+
+    sequence = IdSequence(start=10, name="products")
+
+    # verify consecutive ranges
+    assert sequence.reserve(3) == range(10, 13)
+    assert sequence.reserve(2) == range(13, 15)
+    assert sequence.peek() == 15
+
+    # verify metrics
+    labels = {"name": "products"}
+    assert (
+        sequence.metrics.counter_value("id_sequence_blocks_total", labels) == 2
+    )
+    assert sequence.metrics.counter_value("id_sequence_ids_total", labels) == 5
+
+
+def test_next_id():
+    """next_id() should allocate ids from a block per thread."""
+
+    sequence = IdSequence(block_size=3)
+
+    # verify ids of the calling thread block
+    assert [sequence.next_id() for _ in range(4)] == [1, 2, 3, 4]
+
+    # verify other thread uses its own block
+    other: list[int] = []
+    thread = threading.Thread(target=lambda: other.append(sequence.next_id()))
+    thread.start()
+    thread.join()
+    assert other == [7]
+
+    # verify calling thread block continues
+    assert sequence.next_id() == 5
+
+
+def test_concurrent_writers():
+    """Concurrent writers should never receive the same id."""
+
+    sequence = IdSequence(block_size=10)
+    ids: list[list[int]] = [[] for _ in range(8)]
+
+    def writer(index: int) -> None:
+        block = sequence.block()
+        ids[index].extend(block.next_id() for _ in range(1000))
+
+    # run writers
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # verify unique positive ids, one block reserved per 10 ids
+    allocated = [record_id for writer_ids in ids for record_id in writer_ids]
+    assert len(set(allocated)) == 8000
+    assert min(allocated) == 1
+    assert (
+        sequence.metrics.counter_value(
+            "id_sequence_blocks_total", {"name": "default"}
+        )
+        == 800
+    )
+
+
+def test_advance_past():
+    """advance_past() should only move the sequence forward."""
+
+    sequence = IdSequence()
+
+    # verify sequence moved after the id
+    sequence.advance_past(41)
+    assert sequence.reserve(1) == range(42, 43)
+
+    # verify sequence not moved back
+    sequence.advance_past(5)
+    assert sequence.peek() == 43
+
+
+def test_advance_past_blocks():
+    """Reserved blocks should only skip the ids passed to advance_past()."""
+
+    sequence = IdSequence(block_size=10)
+    block = sequence.block()
+    other = sequence.block()
+    assert block.next_id() == 1
+    assert other.next_id() == 11
+
+    # verify supplied ids skipped within the blocks holding them
+    sequence.advance_past_many([4, 13, 2])
+    assert [block.next_id() for _ in range(3)] == [3, 5, 6]
+    assert [other.next_id() for _ in range(3)] == [12, 14, 15]
+
+    # verify ids after the reserved blocks move the sequence
+    sequence.advance_past(25)
+    assert [block.next_id() for _ in range(6)] == [7, 8, 9, 10, 26, 27]
+    assert other.next_id() == 16
+
+    # verify ids of ranges reserved by callers ignored
+    assert sequence.reserve(5) == range(36, 41)
+    sequence.advance_past(38)
+    assert [block.next_id() for _ in range(4)] == [28, 29, 30, 31]
+    assert (
+        sequence.metrics.counter_value(
+            "id_sequence_blocks_total", {"name": "default"}
+        )
+        == 4
+    )
+
+
+def test_concurrent_allocations():
+    """Concurrent writers of allocated ids should reserve one block
+    each."""
+
+    sequence = IdSequence(block_size=1000)
+    ids: list[list[int]] = [[], []]
+
+    def writer(index: int) -> None:
+        for _ in range(50):
+            record_id = sequence.next_id()
+            ids[index].append(record_id)
+            # every created id is reported, like caller supplied ids
+            sequence.advance_past(record_id)
+
+    # run interleaved writers
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(target=writer, args=(i,)) for i in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # verify unique ids from a single block per writer
+    allocated = ids[0] + ids[1]
+    assert len(set(allocated)) == 100
+    assert max(allocated) <= 2000
+    assert (
+        sequence.metrics.counter_value(
+            "id_sequence_blocks_total", {"name": "default"}
+        )
+        == 2
+    )
+
+
+def test_max_id():
+    """max_id() should return the largest id of a table."""
+
+    sql_service = MySQLService[Product]()
+
+    # verify empty table
+    assert max_id(sql_service) == 0
+
+    # add records in database
+    DATABASE.extend(
+        [
+            {"id": 3, "name": "orange", "price": 4.99},
+            {"id": 7, "name": "banana", "price": 6.99},
+            {"id": 5, "name": "papaya", "price": 1.99},
+        ]
+    )
+
+    # verify largest id
+    assert max_id(sql_service, chunk_size=2) == 7
+
+    # remove records from database
+    DATABASE.clear()
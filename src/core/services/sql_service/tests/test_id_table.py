@@ -0,0 +1,209 @@
+"""Test Cases
+
+- IdTable should store rows by id in direct mode
+- keys() should iterate over present ids in id order
+- IdTable should fall back to the hash index for sparse ids
+- IdTable should fall back to the hash index for non int ids
+- IdTable should fall back to the hash index once deletes leave
+  it sparse
+- IdTable should move back to direct mode once ids are dense again
+- get_many() should return row of every id, None for absent ids
+- Lookups by numbers equal to an int id should find it in both modes
+- clear() should remove every row and go back to direct mode
+- id_query() should return id of queries by id only
+"""
+
+
+from core.services.sql_service.id_table import (
+    DIRECT,
+    HASH,
+    MIN_DIRECT_CAPACITY,
+    IdTable,
+    id_key,
+    id_query,
+)
+
+
+def fill(table: IdTable, keys) -> None:
+    """Put row 'row-<key>' for every key."""
+
+    for key in keys:
+        table.put(key, f"row-{key}")
+
+
+def test_direct_mode():
+    """IdTable should store rows by id in direct mode."""
+
+    table = IdTable()
+    fill(table, [3, 1, 2])
+
+    # verify rows
+    assert table.mode == DIRECT
+    assert len(table) == 3
+    assert table.get(2) == "row-2"
+    assert table.get(4) is None and table.get(10**9) is None
+    assert 1 in table and 0 not in table and -1 not in table
+
+    # verify replace and delete
+    table.put(2, "new")
+    assert table.get(2) == "new" and len(table) == 3
+    assert table.delete(2) == "new"
+    assert table.delete(2) is None
+    assert 2 not in table and len(table) == 2
+
+
+def test_keys_order():
+    """keys() should iterate over present ids in id order."""
+
+    table = IdTable()
+    fill(table, [17, 0, 9, 8])
+
+    # verify ids, values and items in id order
+    assert list(table.keys()) == [0, 8, 9, 17]
+    assert list(table.values()) == ["row-0", "row-8", "row-9", "row-17"]
+    assert dict(table.items()) == {key: f"row-{key}" for key in [0, 8, 9, 17]}
+
+
+def test_sparse_ids():
+    """IdTable should fall back to the hash index for sparse ids."""
+
+    table = IdTable()
+    fill(table, range(1, 11))
+
+    # far id
+    table.put(10**9, "far")
+
+    # verify hash mode with every row
+    assert table.mode == HASH
+    assert len(table) == 11
+    assert table.get(10**9) == "far"
+    assert table.get(5) == "row-5"
+
+
+def test_non_int_ids():
+    """IdTable should fall back to the hash index for non int ids."""
+
+    table = IdTable()
+    fill(table, [1, 2])
+    table.put("abc", "text")
+
+    # verify hash mode with every row
+    assert table.mode == HASH
+    assert table.get("abc") == "text" and table.get(1) == "row-1"
+    assert list(table.keys()) == [1, 2, "abc"]
+
+
+def test_sparse_after_delete():
+    """IdTable should fall back to the hash index once deletes leave
+    it sparse."""
+
+    table = IdTable()
+    size = MIN_DIRECT_CAPACITY * 2
+    fill(table, range(size))
+
+    # delete most ids
+    for key in range(size - 1):
+        table.delete(key)
+
+    # verify hash mode with remaining row
+    assert table.mode == HASH
+    assert list(table.items()) == [(size - 1, f"row-{size - 1}")]
+
+
+def test_back_to_direct():
+    """IdTable should move back to direct mode once ids are dense
+    again."""
+
+    table = IdTable()
+    fill(table, [1, MIN_DIRECT_CAPACITY * 4])
+    assert table.mode == HASH
+
+    # fill ids up to the largest one
+    fill(table, range(2, MIN_DIRECT_CAPACITY * 2 + 2))
+
+    # verify direct mode with every row
+    assert table.mode == DIRECT
+    assert len(table) == MIN_DIRECT_CAPACITY * 2 + 2
+    assert (
+        table.get(MIN_DIRECT_CAPACITY * 4) == f"row-{MIN_DIRECT_CAPACITY * 4}"
+    )
+    assert table.get(1) == "row-1"
+
+
+def test_get_many():
+    """get_many() should return row of every id, None for absent ids."""
+
+    table = IdTable()
+    fill(table, [1, 2])
+
+    # verify direct mode, out of range, equal and invalid ids
+    assert table.get_many([2, 1]) == ["row-2", "row-1"]
+    assert table.get_many([1, 10**6, -1, True, "1"]) == [
+        "row-1",
+        None,
+        None,
+        "row-1",
+        None,
+    ]
+
+    # verify hash mode
+    table.put("abc", "text")
+    assert table.get_many(["abc", 2, 3]) == ["text", "row-2", None]
+
+
+def test_numeric_keys():
+    """Lookups by numbers equal to an int id should find it in both
+    modes."""
+
+    # verify normalized keys
+    assert type(id_key(True)) is int
+    assert type(id_key(2.0)) is int
+    assert id_key(2.5) == 2.5
+    assert id_key("2") == "2"
+    assert id_key(complex(2, 0)) == complex(2, 0)
+    assert id_key(float("nan")) != id_key(float("nan"))
+
+    for keys, mode in [([1, 2, 3], DIRECT), ([1, 2, 3, "a"], HASH)]:
+        table = IdTable()
+        fill(table, keys)
+        assert table.mode == mode
+
+        # verify lookups
+        assert table.get(1.0) == "row-1"
+        assert table.get(True) == "row-1"
+        assert 2.0 in table
+        assert table.get(2.5) is None
+        assert table.get_many([3.0, False]) == ["row-3", None]
+
+        # verify delete by an equal number
+        assert table.delete(2.0) == "row-2"
+        assert 2 not in table
+        assert len(table) == len(keys) - 1
+
+
+def test_clear():
+    """clear() should remove every row and go back to direct mode."""
+
+    table = IdTable()
+    fill(table, ["abc", 1])
+    table.clear()
+
+    # verify empty direct table
+    assert table.mode == DIRECT
+    assert len(table) == 0
+    assert list(table.items()) == []
+
+
+def test_id_query():
+    """id_query() should return id of queries by id only."""
+
+    # verify queries
+    assert id_query({"id": 3}) == 3
+    assert id_query({"id": 3, "name": "orange"}) is None
+    assert id_query({"name": "orange"}) is None
+    assert id_query({"id": [3]}) is None
+
+    # verify integral numbers normalized
+    assert type(id_query({"id": 3.0})) is int
+    assert id_query({"id": True}) == 1
+    assert id_query({"id": 3.5}) == 3.5
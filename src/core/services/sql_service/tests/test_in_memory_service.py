@@ -0,0 +1,669 @@
+"""Test Cases
+
+- InMemoryService should be of type SQLService
+- Every operation should raise TypeError for invalid arguments
+- create() and create_many() should raise SQLException for duplicate ids
+- Operations by id should visit a single record
+- Other queries should scan the table in id order
+- update() and update_many() should replace present records only
+- delete() should delete records by id or by query
+- iter_chunks() should stream every record in chunks
+- Sparse ids should be stored in the hash index
+- Queries by numbers equal to an id should match in both storage modes
+- Every change should be appended to 'change_feed'
+- explain() should return a lookup plan for queries by id only
+- create_index() should raise ValueError for unknown, indexed or
+  non int id tables
+- Queries on indexed fields should only visit records of the
+  intersected bitmaps
+- Bitmap indexes should follow every write
+- Queries on indexed fields should not read bitmaps being written
+- Indexes should follow the decisions of 'auto_index'
+- Decisions of 'auto_index' racing with other index changes should not
+  reject the field
+- update_if_version() should only update records still at the
+  expected version
+- Full scans of large tables should run in 'scanner' and match the
+  sequential scan
+- Writes should update the columns of 'scanner' in place, in id and in
+  hash mode
+- Writes should not wait for full scans running in 'scanner'
+"""
+
+
+import random
+import sys
+import threading
+import pytest
+from core.services.sql_service.auto_indexer import AutoIndexer
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.in_memory_service import InMemoryService
+from core.services.sql_service import parallel_scan
+from core.services.sql_service.parallel_scan import ParallelScanner
+from core.services.sql_service.sql_exception import (
+    SQLException,
+    VersionConflict,
+)
+from core.services.sql_service.sql_service import SQLService
+from features.product.models.product import Product
+
+
+# products of the table
+ORANGE = Product(id=1, name="orange", price=4.99)
+BANANA = Product(id=2, name="banana", price=6.99)
+PAPAYA = Product(id=3, name="papaya", price=4.99)
+
+
+def make_service(
+    change_feed: ChangeFeed | None = None,
+) -> InMemoryService[Product]:
+    """Return service holding ORANGE, BANANA and PAPAYA."""
+
+    service = InMemoryService[Product](change_feed=change_feed)
+    service.create_many([PAPAYA, ORANGE, BANANA])
+
+    return service
+
+
+def test_in_memory_service_type():
+    """InMemoryService should be of type SQLService."""
+
+    # verify type
+    assert isinstance(InMemoryService[Product](), SQLService)
+
+
+def test_invalid_arguments():
+    """Every operation should raise TypeError for invalid arguments."""
+
+    service = make_service()
+
+    # verify TypeError raised
+    for call, message in [
+        (lambda: service.create("str"), "'record' should be a valid model."),
+        (lambda: service.create_many("str"), "'records' should be a valid"),
+        (lambda: service.create_many([{}]), "'record' should be a valid"),
+        (lambda: service.read_single("str"), "'query_data' should be"),
+        (lambda: service.read_multiple("str"), "'query_data' should be"),
+        (lambda: service.read_by_ids("str"), "'ids' should be a valid list."),
+        (lambda: service.update("str"), "'updated_record' should be"),
+        (lambda: service.update_many("str"), "'updated_records' should be"),
+        (lambda: service.update_many([{}]), "'updated_record' should be"),
+        (lambda: service.delete("str"), "'query_data' should be"),
+    ]:
+        with pytest.raises(TypeError) as exc_info:
+            call()
+        assert message in str(exc_info.value)
+
+
+def test_create_duplicate_id():
+    """create() and create_many() should raise SQLException for duplicate
+    ids."""
+
+    service = make_service()
+
+    # verify SQLException raised for stored and repeated ids
+    with pytest.raises(SQLException) as exc_info:
+        service.create(Product(id=1, name="apple", price=7.99))
+    assert "duplicate id: 1" in str(exc_info.value)
+    with pytest.raises(SQLException) as exc_info:
+        service.create_many(
+            [
+                Product(id=4, name="apple", price=7.99),
+                Product(id=4, name="mango", price=7.99),
+            ]
+        )
+    assert "duplicate id: 4" in str(exc_info.value)
+
+    # verify nothing inserted
+    assert service.read_by_ids([1, 4]) == [ORANGE, None]
+
+
+def test_operations_by_id():
+    """Operations by id should visit a single record."""
+
+    service = make_service()
+
+    # verify reads by id
+    assert service.read_single({"id": 2}) == BANANA
+    assert service.last_rows_scanned == 1
+    assert service.read_single({"id": 9}) is None
+    assert service.read_multiple({"id": 3}) == [PAPAYA]
+    assert service.read_multiple({"id": 9}) == []
+    assert service.read_by_ids([3, 9, 3]) == [PAPAYA, None, PAPAYA]
+
+    # verify returned models are copies
+    service.read_single({"id": 1}).price = 0.0  # type: ignore
+    assert service.read_single({"id": 1}) == ORANGE
+
+
+def test_scan_queries():
+    """Other queries should scan the table in id order."""
+
+    service = make_service()
+
+    # verify scans
+    assert service.read_single({"price": 4.99}) == ORANGE
+    assert service.last_rows_scanned == 1
+    assert service.read_multiple({"price": 4.99}) == [ORANGE, PAPAYA]
+    assert service.last_rows_scanned == 3
+    assert service.read_multiple({}) == [ORANGE, BANANA, PAPAYA]
+    assert service.read_single({"name": "apple"}) is None
+
+    # verify unknown fields
+    with pytest.raises(KeyError):
+        service.read_multiple({"color": "red"})
+
+
+def test_update():
+    """update() and update_many() should replace present records only."""
+
+    service = make_service()
+    orange = Product(id=1, name="orange", price=5.99)
+    banana = Product(id=2, name="banana", price=7.99)
+
+    # update present and missing records
+    service.update(orange)
+    service.update(Product(id=9, name="apple", price=8.99))
+    service.update_many([banana, Product(id=8, name="mango", price=8.99)])
+
+    # verify table
+    assert service.read_multiple({}) == [orange, banana, PAPAYA]
+
+
+def test_delete():
+    """delete() should delete records by id or by query."""
+
+    service = make_service()
+
+    # delete by id and by query
+    service.delete({"id": 2})
+    service.delete({"id": 9})
+    service.delete({"price": 4.99, "name": "papaya"})
+
+    # verify table
+    assert service.read_multiple({}) == [ORANGE]
+
+
+def test_iter_chunks():
+    """iter_chunks() should stream every record in chunks."""
+
+    service = make_service()
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        next(service.iter_chunks(0))
+    assert "'chunk_size' must be a positive integer" in str(exc_info.value)
+
+    # verify chunks
+    assert list(service.iter_chunks(2)) == [[ORANGE, BANANA], [PAPAYA]]
+    assert service.last_rows_scanned == 3
+
+
+def test_sparse_ids():
+    """Sparse ids should be stored in the hash index."""
+
+    service = make_service()
+    assert service.storage_mode == "direct"
+
+    # far id
+    far = Product(id=10**12, name="faraway", price=1.99)
+    service.create(far)
+
+    # verify hash mode and every record
+    assert service.storage_mode == "hash"
+    assert service.read_single({"id": 10**12}) == far
+    assert len(service.read_multiple({})) == 4
+
+
+def test_numeric_ids():
+    """Queries by numbers equal to an id should match in both storage
+    modes."""
+
+    for far_id in [None, 10**12]:
+        service = make_service()
+        if far_id is not None:
+            service.create(Product(id=far_id, name="faraway", price=1.99))
+
+        # verify reads by equal numbers
+        assert service.read_single({"id": 1.0}) == ORANGE
+        assert service.read_single({"id": True}) == ORANGE
+        assert service.read_multiple({"id": 3.0}) == [PAPAYA]
+        assert service.read_by_ids([2.0, 2.5]) == [BANANA, None]
+        assert service.read_single({"id": 2.5}) is None
+
+        # verify delete by an equal number
+        service.delete({"id": 2.0})
+        assert service.read_single({"id": 2}) is None
+        assert service.read_multiple({"name": "orange", "id": 1.0}) == [ORANGE]
+
+
+def test_change_feed():
+    """Every change should be appended to 'change_feed'."""
+
+    feed = ChangeFeed()
+    service = make_service(feed)
+    service.update(Product(id=1, name="orange", price=5.99))
+    service.delete({"id": 1})
+
+    # verify changes
+    changes = [
+        (change.operation, change.key, change.before, change.after)
+        for change in feed.read(3)
+    ]
+    assert changes == [
+        (
+            "update",
+            1,
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 1, "name": "orange", "price": 5.99},
+        ),
+        ("delete", 1, {"id": 1, "name": "orange", "price": 5.99}, None),
+    ]
+    assert [change.key for change in feed.read(0, limit=3)] == [3, 1, 2]
+
+
+def test_explain():
+    """explain() should return a lookup plan for queries by id only."""
+
+    service = make_service()
+
+    # verify plans
+    assert service.explain({"id": 1}) == "ID LOOKUP (direct) of 3 records"
+    assert service.explain({"price": 4.99}) == (
+        "FULL SCAN of 3 records, filter: price"
+    )
+
+
+def test_create_index_incorrect():
+    """create_index() should raise ValueError for unknown, indexed or
+    non int id tables."""
+
+    service = make_service()
+    service.create_index("price")
+
+    # verify ValueError raised
+    for field, message in [
+        ("color", "unknown field: color"),
+        ("price", "index already exists: price"),
+    ]:
+        with pytest.raises(ValueError) as exc_info:
+            service.create_index(field)
+        assert message in str(exc_info.value)
+
+    # verify ValueError raised for tables holding non int ids
+    other = InMemoryService[Product]()
+    other.create(Product.model_construct(id="abc", name="apple", price=1.0))
+    with pytest.raises(ValueError) as exc_info:
+        other.create_index("price")
+    assert "bitmap indexes require non negative int ids" in str(exc_info.value)
+
+    # verify SQLException raised for ids bitmaps cannot hold
+    with pytest.raises(SQLException) as exc_info:
+        service.create(Product.model_construct(id=-4, name="x", price=1.0))
+    assert "bitmap indexes require non negative int ids" in str(exc_info.value)
+    assert service.read_single({"id": -4}) is None
+
+
+def test_bitmap_index_queries():
+    """Queries on indexed fields should only visit records of the
+    intersected bitmaps."""
+
+    service = make_service()
+    service.create_many(
+        [
+            Product(id=4, name="orange", price=6.99),
+            Product(id=5, name="mango", price=4.99),
+        ]
+    )
+    service.create_index("price")
+    service.create_index("name")
+    assert service.indexes() == ["price", "name"]
+
+    # verify AND of two indexed fields
+    query = {"name": "orange", "price": 4.99}
+    assert service.read_multiple(query) == [ORANGE]
+    assert service.last_rows_scanned == 1
+    assert service.explain(query) == (
+        "BITMAP AND (name, price) of 5 records, filter: none"
+    )
+
+    # verify indexed and non indexed fields
+    query = {"price": 4.99, "id": 5}
+    assert service.read_single(query).name == "mango"  # type: ignore
+    assert service.last_rows_scanned == 3
+    assert service.explain(query) == (
+        "BITMAP AND (price) of 5 records, filter: id"
+    )
+
+    # verify OR of indexed values
+    products = service.read_any("name", ["papaya", "mango", "apple"])
+    assert [product.id for product in products] == [3, 5]
+    assert service.last_rows_scanned == 2
+
+
+def test_bitmap_index_maintenance():
+    """Bitmap indexes should follow every write."""
+
+    service = make_service()
+    service.create_index("price")
+
+    # write records
+    service.create(Product(id=4, name="mango", price=4.99))
+    service.update(Product(id=1, name="orange", price=6.99))
+    service.delete({"id": 3})
+    service.delete({"price": 6.99, "name": "banana"})
+
+    # verify indexed and scanned queries agree
+    assert [p.id for p in service.read_multiple({"price": 4.99})] == [4]
+    assert [p.id for p in service.read_multiple({"price": 6.99})] == [1]
+    service.drop_index("price")
+    assert [p.id for p in service.read_multiple({"price": 6.99})] == [1]
+    assert [p.id for p in service.read_any("price", [4.99, 6.99])] == [1, 4]
+
+
+def test_bitmap_index_concurrent():
+    """Queries on indexed fields should not read bitmaps being written."""
+
+    # records in 100 bitmap containers
+    service = InMemoryService[Product]()
+    service.create_index("name")
+    service.create_index("price")
+    service.create_many(
+        [
+            Product(id=high * 65536 + 2, name="orange", price=4.99)
+            for high in range(100)
+        ]
+    )
+    stop = threading.Event()
+    errors: list[Exception] = []
+
+    def write() -> None:
+        # add and remove containers of the bitmaps
+        high = 100
+        while not stop.is_set():
+            high = 100 + (high + 1) % 100
+            service.create(
+                Product(id=high * 65536 + 1, name="orange", price=4.99)
+            )
+            service.delete({"id": high * 65536 + 1})
+
+    def read() -> None:
+        try:
+            for _ in range(200):
+                query = {"name": "orange", "price": 4.99}
+                assert len(service.read_multiple(query)) >= 100
+                assert len(service.read_any("name", ["orange"])) >= 100
+        except Exception as error:
+            errors.append(error)
+
+    # read while writing, switching often
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        writer = threading.Thread(target=write)
+        readers = [threading.Thread(target=read) for _ in range(2)]
+        writer.start()
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(interval)
+
+    # verify every read succeeded
+    assert errors == []
+    assert len(service.read_multiple({"name": "orange"})) == 100
+
+
+def test_auto_index():
+    """Indexes should follow the decisions of 'auto_index'."""
+
+    indexer = AutoIndexer(build_cost=5, window=4)
+    service = InMemoryService[Product](auto_index=indexer)
+    service.create_many([ORANGE, BANANA, PAPAYA])
+
+    # verify index built once queries visited 'build_cost' records
+    service.read_multiple({"price": 4.99})
+    assert service.indexes() == []
+    service.read_multiple({"price": 4.99})
+    assert service.indexes() == ["price"]
+    assert service.read_multiple({"price": 4.99}) == [ORANGE, PAPAYA]
+    assert service.last_rows_scanned == 2
+
+    # verify unused index dropped at the end of the next window
+    for _ in range(5):
+        service.read_single({"id": 1})
+        service.read_single({"name": "banana"})
+    assert service.indexes() == ["name"]
+
+    # verify index rejected for non int ids
+    other = InMemoryService[Product](auto_index=AutoIndexer(build_cost=1))
+    other.create(Product.model_construct(id="abc", name="apple", price=1.0))
+    assert other.read_any("price", [2.0]) == []
+    assert other.indexes() == []
+    assert (
+        other.auto_index.metrics.counter_value(  # type: ignore
+            "auto_index_decisions_total",
+            {"table": "default", "field": "price", "decision": "reject"},
+        )
+        == 1
+    )
+
+
+def test_auto_index_race():
+    """Decisions of 'auto_index' racing with other index changes should not
+    reject the field."""
+
+    indexer = AutoIndexer(build_cost=1, window=100)
+    service = InMemoryService[Product](auto_index=indexer)
+    service.create_many([ORANGE, BANANA, PAPAYA])
+    observe = indexer.observe
+    calls: list = []
+
+    def racing_observe(*args):
+        calls.append(args)
+        decisions = observe(*args)
+        # index built by another query since the decision
+        if decisions:
+            service.create_index(decisions[0].field)
+        return decisions
+
+    indexer.observe = racing_observe  # type: ignore
+
+    # verify index built and not rejected
+    service.read_single({"name": "banana"})
+    assert service.indexes() == ["name"]
+    assert (
+        indexer.metrics.counter_value(
+            "auto_index_decisions_total",
+            {"table": "default", "field": "name", "decision": "reject"},
+        )
+        == 0
+    )
+
+    # verify indexed fields passed as a snapshot, not following the build
+    assert calls[0][2] == []
+
+
+def test_update_if_version():
+    """update_if_version() should only update records still at the
+    expected version."""
+
+    feed = ChangeFeed()
+    service = make_service(feed)
+    ripe = Product(id=1, name="orange", price=5.99)
+
+    # verify versioned read
+    record, version = service.read_versioned(1)
+    assert record == ORANGE
+    assert service.read_versioned(9) == (None, None)
+
+    # verify compare-and-set
+    new_version = service.update_if_version(ripe, version)
+    assert new_version > version
+    assert service.read_versioned(1) == (ripe, new_version)
+    assert feed.read()[-1].after == ripe.model_dump()
+
+    # verify stale version rejected
+    with pytest.raises(VersionConflict):
+        service.update_if_version(ORANGE, version)
+    assert service.read_single({"id": 1}) == ripe
+
+    # verify writes of other records do not conflict
+    service.update(BANANA)
+    assert service.update_if_version(ORANGE, new_version) > new_version
+
+    # verify deleted record rejected
+    _, version = service.read_versioned(2)
+    service.delete({"id": 2})
+    with pytest.raises(VersionConflict):
+        service.update_if_version(BANANA, version)
+    assert service.read_versioned(2) == (None, None)
+
+
+def test_parallel_scan():
+    """Full scans of large tables should run in 'scanner' and match the
+    sequential scan."""
+
+    scanner = ParallelScanner(workers=0, threshold=3)
+    service = InMemoryService[Product](scanner=scanner)
+    service.create_many([PAPAYA, ORANGE, BANANA])
+
+    # verify plans
+    assert service.explain({"price": 4.99}) == (
+        "PARALLEL SCAN (0 workers) of 3 records, filter: price"
+    )
+    assert service.explain({}) == "FULL SCAN of 3 records, filter: none"
+
+    # verify reads match the sequential scan
+    assert service.read_multiple({"price": 4.99}) == [ORANGE, PAPAYA]
+    assert service.read_multiple({"name": "banana", "price": 6.99}) == [BANANA]
+    assert service.read_multiple({"name": "apple"}) == []
+    assert service.read_multiple({"price": [4.99]}) == []
+    assert service.last_rows_scanned == 3
+    with pytest.raises(KeyError):
+        service.read_multiple({"color": "red"})
+
+    # verify writes seen by the next scan
+    service.update(Product(id=2, name="banana", price=4.99))
+    assert [p.id for p in service.read_multiple({"price": 4.99})] == [1, 2, 3]
+    service.delete({"name": "orange"})
+    assert service.read_multiple({}) == [
+        Product(id=2, name="banana", price=4.99),
+        PAPAYA,
+    ]
+
+    # verify small tables scanned sequentially
+    assert service.explain({"price": 4.99}).startswith("FULL SCAN")
+    assert len(service.read_multiple({"price": 4.99})) == 2
+    assert (
+        scanner.metrics.counter_value(
+            "parallel_scans_total", {"name": "default"}
+        )
+        == 4
+    )
+    scanner.close()
+
+
+def test_parallel_scan_writes():
+    """Writes should update the columns of 'scanner' in place, in id and
+    in hash mode."""
+
+    scanner = ParallelScanner(workers=0, threshold=0)
+    service = InMemoryService[Product](scanner=scanner)
+    sequential = InMemoryService[Product]()
+    generator = random.Random(3)
+    names = ["apple", "grape", "melon"]
+
+    # interleave writes and scans, sparse ids move the table to hash mode
+    for step in range(600):
+        product = Product(
+            id=generator.choice([generator.randint(1, 300), 10**6 + step]),
+            name=generator.choice(names),
+            price=generator.choice([1.0, 2.0]),
+        )
+        query = {"name": generator.choice(names)}
+        for target in (service, sequential):
+            if step % 3 == 0:
+                target.delete(query)
+            elif target.read_by_ids([product.id])[0] is None:
+                target.create(product)
+            else:
+                target.update(product)
+
+        # verify same rows in the same order
+        assert service.read_multiple(query) == sequential.read_multiple(query)
+        assert service.read_multiple(
+            {**query, "price": 2.0}
+        ) == sequential.read_multiple({**query, "price": 2.0})
+
+    scanner.close()
+
+    # verify consecutive deletes do not encode the columns again
+    scanner = ParallelScanner(workers=0, threshold=0)
+    service = InMemoryService[Product](scanner=scanner)
+    service.create_many(
+        [
+            Product(id=i, name=f"item-{i % 20:02}", price=1.0)
+            for i in range(1, 201)
+        ]
+    )
+    for i in range(5):
+        service.delete({"name": f"item-{i:02}"})
+    assert len(service.read_multiple({"price": 1.0})) == 150
+    assert (
+        scanner.metrics.counter_value(
+            "parallel_scan_columns_built_total", {"name": "default"}
+        )
+        == 2
+    )
+    scanner.close()
+
+
+def test_parallel_scan_concurrent_writes(monkeypatch):
+    """Writes should not wait for full scans running in 'scanner'."""
+
+    started, release = threading.Event(), threading.Event()
+    match = parallel_scan._match
+
+    def blocked_match(*args):
+        started.set()
+        release.wait(timeout=2.0)
+        return match(*args)
+
+    scanner = ParallelScanner(workers=0, threshold=0)
+    service = InMemoryService[Product](scanner=scanner)
+    service.create_many(
+        [Product(id=i, name="apple", price=1.0) for i in range(1, 101)]
+    )
+    service.read_multiple({"name": "apple"})
+    monkeypatch.setattr(parallel_scan, "_match", blocked_match)
+
+    result: list = []
+    thread = threading.Thread(
+        target=lambda: result.extend(service.read_multiple({"price": 1.0}))
+    )
+    thread.start()
+    assert started.wait(timeout=2.0)
+
+    # verify writes done while the scan runs
+    writer = threading.Thread(
+        target=lambda: (
+            service.create(Product(id=101, name="melon", price=1.0)),
+            service.delete({"id": 1}),
+        ),
+        daemon=True,
+    )
+    writer.start()
+    writer.join(timeout=1.0)
+    done = not writer.is_alive()
+    release.set()
+    thread.join()
+    assert done
+
+    # verify rows deleted during the scan skipped
+    assert [product.id for product in result] == list(range(2, 101))
+    assert len(service.read_multiple({"price": 1.0})) == 100
+    scanner.close()
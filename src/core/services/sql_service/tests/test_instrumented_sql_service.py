@@ -0,0 +1,307 @@
+"""Test Cases
+
+- InstrumentedSQLService should be of type SQLService
+- InstrumentedSQLService should raise TypeError if 'sql_service' is
+  not of type SQLService
+
+- Every operation should be delegated to the wrapped service
+- Every operation should record calls and latency per operation and table
+- Failed operations should record errors and re-raise the exception
+- Read operations should record returned rows
+- Operations should record rows scanned by MySQLService
+- Concurrent operations should record their own rows scanned
+- Disabled service should delegate without recording metrics
+"""
+
+
+import pytest
+import sys
+import threading
+from unittest.mock import Mock
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.instrumented_sql_service import (
+    InstrumentedSQLService,
+)
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+from features.product.models.product import Product
+
+
+def make_service(
+    sql_service: SQLService | None = None,
+) -> InstrumentedSQLService:
+    """Return instrumented service for 'products' table."""
+
+    return InstrumentedSQLService[Product](
+        sql_service or Mock(spec=SQLService),
+        table="products",
+        metrics=MetricsRegistry(),
+    )
+
+
+def labels(operation: str) -> dict:
+    """Return metric labels of 'operation'."""
+
+    return {"operation": operation, "table": "products"}
+
+
+def test_instrumented_service_type():
+    """InstrumentedSQLService should be of type SQLService."""
+
+    # verify type
+    assert isinstance(make_service(), SQLService)
+
+
+def test_instrumented_service_incorrect():
+    """InstrumentedSQLService should raise TypeError if 'sql_service' is
+    not of type SQLService."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        InstrumentedSQLService("abcd", table="products")  # type: ignore
+
+    # verify error message
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+
+def test_delegation():
+    """Every operation should be delegated to the wrapped service."""
+
+    # create instrumented mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+    product = Product(id=1, name="orange", price=4.99)
+
+    # return values of mock
+    mock.create.return_value = None
+    mock.read_single.return_value = product
+    mock.read_multiple.return_value = [product]
+    mock.update.return_value = None
+    mock.delete.return_value = None
+    mock.iter_chunks.return_value = iter([[product]])
+    mock.read_by_ids.return_value = [product]
+    mock.update_many.return_value = None
+    mock.create_new.return_value = None
+
+    # verify delegation
+    assert service.create(product) is None
+    mock.create.assert_called_once_with(product)
+    assert service.read_single({"id": 1}) is product
+    mock.read_single.assert_called_once_with({"id": 1})
+    assert service.read_multiple({"id": 1}) == [product]
+    mock.read_multiple.assert_called_once_with({"id": 1})
+    assert service.update(product) is None
+    mock.update.assert_called_once_with(product)
+    assert service.delete({"id": 1}) is None
+    mock.delete.assert_called_once_with({"id": 1})
+    assert list(service.iter_chunks(5)) == [[product]]
+    assert service.read_by_ids([1]) == [product]
+    mock.read_by_ids.assert_called_once_with([1])
+    assert service.update_many([product]) is None
+    mock.update_many.assert_called_once_with([product])
+    mock.read_versioned.return_value = (product, 3)
+    assert service.read_versioned(1) == (product, 3)
+    mock.read_versioned.assert_called_once_with(1)
+    mock.update_if_version.return_value = 4
+    assert service.update_if_version(product, 3) == 4
+    mock.update_if_version.assert_called_once_with(product, 3)
+    mock.iter_chunks.assert_called_once_with(5)
+    assert service.create_new([product]) is None
+    mock.create_new.assert_called_once_with([product])
+
+
+def test_calls_and_latency():
+    """Every operation should record calls and latency per operation
+    and table."""
+
+    # create instrumented service
+    service = make_service()
+
+    # call operations
+    service.read_single({"id": 1})
+    service.read_single({"id": 2})
+    service.delete({"id": 1})
+
+    # verify calls
+    assert (
+        service.metrics.counter_value("sql_calls_total", labels("read_single"))
+        == 2
+    )
+    assert (
+        service.metrics.counter_value("sql_calls_total", labels("delete")) == 1
+    )
+
+    # verify latency histogram
+    histogram = service.metrics.histogram(
+        "sql_latency_seconds", labels("read_single")
+    )
+    assert histogram is not None
+    assert histogram.count == 2
+
+
+def test_errors():
+    """Failed operations should record errors and re-raise the exception."""
+
+    # create instrumented mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+
+    # raise exception on create
+    mock.create.side_effect = SQLException("duplicate id: 1")
+
+    # verify SQLException raised
+    with pytest.raises(SQLException):
+        service.create(Product(id=1, name="orange", price=4.99))
+
+    # verify errors and calls
+    assert (
+        service.metrics.counter_value("sql_errors_total", labels("create"))
+        == 1
+    )
+    assert (
+        service.metrics.counter_value("sql_calls_total", labels("create")) == 1
+    )
+
+
+def test_rows_returned():
+    """Read operations should record returned rows."""
+
+    # create instrumented mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+    product = Product(id=1, name="orange", price=4.99)
+
+    # return values of mock
+    mock.read_single.return_value = None
+    mock.read_multiple.return_value = [product, product]
+    mock.read_by_ids.return_value = [product, None]
+
+    # read records
+    service.read_single({"id": 1})
+    service.read_multiple({"price": 4.99})
+    service.read_by_ids([1, 2])
+
+    # verify rows returned
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_returned_total", labels("read_single")
+        )
+        == 0
+    )
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_returned_total", labels("read_multiple")
+        )
+        == 2
+    )
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_returned_total", labels("read_by_ids")
+        )
+        == 1
+    )
+
+
+def test_rows_scanned():
+    """Operations should record rows scanned by MySQLService."""
+
+    # create instrumented mysql service
+    service = make_service(MySQLService[Product]())
+
+    # add records in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+    DATABASE.append({"id": 2, "name": "banana", "price": 6.99})
+    DATABASE.append({"id": 3, "name": "papaya", "price": 4.99})
+
+    # read records
+    service.read_single({"id": 2})
+    service.read_multiple({"price": 4.99})
+
+    # verify rows scanned and returned
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_scanned_total", labels("read_single")
+        )
+        == 2
+    )
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_scanned_total", labels("read_multiple")
+        )
+        == 3
+    )
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_returned_total", labels("read_multiple")
+        )
+        == 2
+    )
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_rows_scanned_concurrent():
+    """Concurrent operations should record their own rows scanned."""
+
+    # create instrumented mysql service
+    service = make_service(MySQLService[Product]())
+
+    # add records in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+    DATABASE.append({"id": 2, "name": "banana", "price": 6.99})
+    DATABASE.append({"id": 3, "name": "papaya", "price": 4.99})
+
+    def read() -> None:
+        for _ in range(200):
+            service.read_single({"id": 1})
+            service.read_multiple({"price": 4.99})
+
+    # read records from several threads, switching often
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # verify rows scanned of every call
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_scanned_total", labels("read_single")
+        )
+        == 800
+    )
+    assert (
+        service.metrics.counter_value(
+            "sql_rows_scanned_total", labels("read_multiple")
+        )
+        == 2400
+    )
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_disabled():
+    """Disabled service should delegate without recording metrics."""
+
+    # create disabled instrumented mock service
+    mock = Mock(spec=SQLService)
+    service = make_service(mock)
+    service.enabled = False
+
+    # call operation
+    service.delete({"id": 1})
+
+    # verify delegation
+    mock.delete.assert_called_once_with({"id": 1})
+    # verify nothing recorded
+    assert service.metrics.to_dict() == {"counters": {}, "histograms": {}}
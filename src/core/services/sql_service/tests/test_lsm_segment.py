@@ -0,0 +1,117 @@
+"""Test Cases
+
+- write() should store entries readable by id, tombstones as None
+- get() should return MISSING for ids outside the segment
+- scan() should iterate over the entries of an id range in id order
+- Segment should raise ValueError for files that are not segments
+- remove() should delete the file, open segments stay readable
+"""
+
+
+import os
+import pytest
+from core.services.codec_service.record_codec import RecordCodec
+from core.services.sql_service.lsm_segment import MISSING, Segment
+from features.product.models.product import Product
+
+
+# codec of product rows
+CODEC = RecordCodec(Product)
+
+
+def entries() -> list[tuple[int, tuple | None]]:
+    """Return entries of even ids 2 to 100, multiples of 10 deleted."""
+
+    return [
+        (i, None if i % 10 == 0 else (i, f"product-{i}", i + 0.5))
+        for i in range(2, 101, 2)
+    ]
+
+
+def test_get(tmp_path):
+    """write() should store entries readable by id, tombstones as None."""
+
+    segment = Segment.write(
+        str(tmp_path / "1-L0.seg"), CODEC, entries(), block_rows=8
+    )
+
+    # verify metadata
+    assert (segment.count, segment.min_id, segment.max_id) == (50, 2, 100)
+
+    # verify rows and tombstones
+    assert segment.get(2) == (2, "product-2", 2.5)
+    assert segment.get(64) == (64, "product-64", 64.5)
+    assert segment.get(98) == (98, "product-98", 98.5)
+    assert segment.get(20) is None
+
+    segment.close()
+
+
+def test_get_missing(tmp_path):
+    """get() should return MISSING for ids outside the segment."""
+
+    segment = Segment.write(
+        str(tmp_path / "1-L0.seg"), CODEC, entries(), block_rows=8
+    )
+
+    # verify absent ids
+    for record_id in [0, 1, 3, 63, 101, 1000]:
+        assert segment.get(record_id) is MISSING
+
+    # verify empty segment
+    empty = Segment.write(str(tmp_path / "2-L0.seg"), CODEC, [])
+    assert empty.count == 0
+    assert empty.get(1) is MISSING
+    assert list(empty.scan()) == []
+
+    segment.close()
+    empty.close()
+
+
+def test_scan(tmp_path):
+    """scan() should iterate over the entries of an id range in id
+    order."""
+
+    segment = Segment.write(
+        str(tmp_path / "1-L0.seg"), CODEC, entries(), block_rows=8
+    )
+
+    # verify full scan
+    assert list(segment.scan()) == entries()
+
+    # verify ranges
+    assert list(segment.scan(17, 31)) == [
+        entry for entry in entries() if 17 <= entry[0] < 31
+    ]
+    assert list(segment.scan(20, 21)) == [(20, None)]
+    assert list(segment.scan(end=5)) == entries()[:2]
+    assert list(segment.scan(101)) == []
+
+    segment.close()
+
+
+def test_not_a_segment(tmp_path):
+    """Segment should raise ValueError for files that are not
+    segments."""
+
+    path = tmp_path / "1-L0.seg"
+    path.write_bytes(b"not a segment file")
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        Segment(str(path), CODEC)
+    assert "not a segment" in str(exc_info.value)
+
+
+def test_remove(tmp_path):
+    """remove() should delete the file, open segments stay readable."""
+
+    path = str(tmp_path / "1-L0.seg")
+    segment = Segment.write(path, CODEC, entries())
+
+    # verify file removed, rows readable
+    segment.remove()
+    assert not os.path.exists(path)
+    assert segment.get(2) == (2, "product-2", 2.5)
+
+    segment.close()
@@ -0,0 +1,317 @@
+"""Test Cases
+
+- LSMService should be of type SQLService
+- LSMService should raise ValueError for non positive thresholds or
+  models without an int id
+- Every operation should raise TypeError for invalid arguments
+- Full memtables should be flushed as level 0 segments, and level 0
+  segments compacted into level 1
+- Reads by id should return the newest row of an id across levels
+- create() should raise SQLException for ids of any level
+- Queries and read_range() should merge levels in id order
+- delete() should hide rows of older levels until compaction drops them
+- Every change should be appended to 'change_feed'
+- Segments should be reloaded from 'directory'
+- Background flushes should not lose rows of concurrent writers
+"""
+
+
+import threading
+import pytest
+from pydantic import BaseModel
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.lsm_service import LSMService
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+from features.product.models.product import Product
+
+
+def make_product(product_id: int, price: float = 1.0) -> Product:
+    """Return product of an id."""
+
+    return Product(id=product_id, name=f"product-{product_id}", price=price)
+
+
+def make_service(**options) -> LSMService[Product]:
+    """Return service flushing every 10 ids and compacting every 3
+    segments in the writing thread."""
+
+    options = {
+        "table": "products",
+        "memtable_size": 10,
+        "level0_segments": 3,
+        "block_rows": 4,
+        "background": False,
+        **options,
+    }
+
+    return LSMService[Product](**options)
+
+
+def counter(service: LSMService, name: str) -> float:
+    """Return value of a counter of 'products' table."""
+
+    return service.metrics.counter_value(name, {"table": "products"})
+
+
+def test_lsm_service_type():
+    """LSMService should be of type SQLService."""
+
+    # verify type
+    with make_service() as service:
+        assert isinstance(service, SQLService)
+
+
+def test_lsm_service_incorrect():
+    """LSMService should raise ValueError for non positive thresholds or
+    models without an int id."""
+
+    # verify ValueError raised
+    for name in ["memtable_size", "level0_segments", "max_frozen"]:
+        with pytest.raises(ValueError) as exc_info:
+            make_service(**{name: 0})
+        assert f"'{name}' must be a positive integer" in str(exc_info.value)
+
+    class Named(BaseModel):
+        id: str
+
+    with LSMService[Named](background=False) as service:
+        with pytest.raises(ValueError) as exc_info:
+            service.create(Named(id="a"))
+        assert "LSM tables require an int 'id' field" in str(exc_info.value)
+
+
+def test_invalid_arguments():
+    """Every operation should raise TypeError for invalid arguments."""
+
+    with make_service() as service:
+        # verify TypeError raised
+        for call, message in [
+            (lambda: service.create("str"), "'record' should be a valid"),
+            (lambda: service.create_many("str"), "'records' should be"),
+            (lambda: service.create_many([{}]), "'record' should be"),
+            (lambda: service.read_single("str"), "'query_data' should be"),
+            (lambda: service.read_multiple("str"), "'query_data' should"),
+            (lambda: service.read_by_ids("str"), "'ids' should be a valid"),
+            (lambda: service.update("str"), "'updated_record' should be"),
+            (lambda: service.update_many("str"), "'updated_records' should"),
+            (lambda: service.update_many([{}]), "'updated_record' should"),
+            (lambda: service.delete("str"), "'query_data' should be"),
+        ]:
+            with pytest.raises(TypeError) as exc_info:
+                call()
+            assert message in str(exc_info.value)
+
+
+def test_flush_and_compaction():
+    """Full memtables should be flushed as level 0 segments, and level 0
+    segments compacted into level 1."""
+
+    with make_service() as service:
+        # fill two memtables
+        for i in range(1, 21):
+            service.create(make_product(i))
+        assert service.levels() == {
+            "memtable": 0,
+            "frozen": 0,
+            "level0_segments": 2,
+            "level0": 20,
+            "level1": 0,
+        }
+        assert counter(service, "lsm_flushes_total") == 2
+
+        # third segment triggers a compaction
+        service.create_many([make_product(i) for i in range(21, 31)])
+        assert service.levels()["level0_segments"] == 0
+        assert service.levels()["level1"] == 30
+        assert counter(service, "lsm_compactions_total") == 1
+
+        # verify manual flush and compaction
+        service.create(make_product(31))
+        service.flush()
+        assert service.levels()["level0_segments"] == 1
+        service.compact()
+        assert service.levels()["level1"] == 31
+
+
+def test_read_newest_row():
+    """Reads by id should return the newest row of an id across
+    levels."""
+
+    with make_service() as service:
+        service.create_many([make_product(i) for i in range(1, 31)])
+        service.update(make_product(5, 2.0))
+        service.flush()
+        service.update(make_product(6, 3.0))
+
+        # verify rows of the memtable, level 0 and level 1
+        assert service.read_single({"id": 6}) == make_product(6, 3.0)
+        assert service.read_single({"id": 5}) == make_product(5, 2.0)
+        assert service.read_multiple({"id": 7}) == [make_product(7)]
+        assert service.read_by_ids([5, 99, "5"]) == [
+            make_product(5, 2.0),
+            None,
+            None,
+        ]
+
+        # verify updates of missing ids ignored
+        service.update(make_product(99))
+        assert service.read_single({"id": 99}) is None
+
+
+def test_create_duplicate_id():
+    """create() should raise SQLException for ids of any level."""
+
+    with make_service() as service:
+        service.create_many([make_product(i) for i in range(1, 31)])
+        service.create(make_product(31))
+        service.flush()
+        service.create(make_product(32))
+
+        # verify SQLException raised for every level
+        for product_id in [1, 31, 32]:
+            with pytest.raises(SQLException) as exc_info:
+                service.create(make_product(product_id))
+            assert f"duplicate id: {product_id}" in str(exc_info.value)
+
+        # verify nothing inserted
+        with pytest.raises(SQLException):
+            service.create_many([make_product(33), make_product(33)])
+        assert service.read_single({"id": 33}) is None
+
+
+def test_merged_queries():
+    """Queries and read_range() should merge levels in id order."""
+
+    with make_service() as service:
+        service.create_many([make_product(i) for i in range(1, 31)])
+        service.create_many([make_product(i) for i in range(40, 30, -1)])
+        service.update_many([make_product(i, 2.0) for i in range(2, 41, 4)])
+
+        # verify id order and newest rows
+        expected = [make_product(i, 2.0) for i in range(2, 41, 4)]
+        assert service.read_multiple({"price": 2.0}) == expected
+        assert service.last_rows_scanned == 40
+        assert service.read_single({"price": 2.0}) == expected[0]
+        assert service.read_single({"price": 9.0}) is None
+
+        # verify ranges
+        assert [product.id for product in service.read_range(28, 33)] == [
+            28,
+            29,
+            30,
+            31,
+            32,
+        ]
+        assert len(service.read_range(None, None)) == 40
+
+        # verify chunks
+        chunks = list(service.iter_chunks(15))
+        assert [len(chunk) for chunk in chunks] == [15, 15, 10]
+        assert [product.id for product in chunks[0]] == list(range(1, 16))
+
+
+def test_delete():
+    """delete() should hide rows of older levels until compaction drops
+    them."""
+
+    with make_service() as service:
+        service.create_many([make_product(i) for i in range(1, 31)])
+        service.update_many([make_product(i, 2.0) for i in range(1, 31, 3)])
+
+        # delete by id and by query
+        service.delete({"id": 2})
+        service.delete({"price": 2.0})
+        service.delete({"id": 99})
+
+        # verify rows hidden
+        remaining = [product.id for product in service.read_range(1, 10)]
+        assert remaining == [3, 5, 6, 8, 9]
+        assert service.read_single({"id": 2}) is None
+
+        # verify tombstones dropped by compaction
+        service.flush()
+        service.compact()
+        assert service.levels()["level1"] == 19
+        assert len(service.read_range(None, None)) == 19
+
+
+def test_change_feed():
+    """Every change should be appended to 'change_feed'."""
+
+    feed = ChangeFeed()
+    with make_service(change_feed=feed) as service:
+        service.create(make_product(1))
+        service.flush()
+        service.update(make_product(1, 2.0))
+        service.delete({"id": 1})
+
+        # verify changes
+        assert [
+            (change.operation, change.key, change.before, change.after)
+            for change in feed.read()
+        ] == [
+            ("insert", 1, None, make_product(1).model_dump()),
+            (
+                "update",
+                1,
+                make_product(1).model_dump(),
+                make_product(1, 2.0).model_dump(),
+            ),
+            ("delete", 1, make_product(1, 2.0).model_dump(), None),
+        ]
+
+
+def test_reload(tmp_path):
+    """Segments should be reloaded from 'directory'."""
+
+    directory = str(tmp_path / "products")
+    with make_service(directory=directory) as service:
+        for i in range(1, 36):
+            service.create(make_product(i))
+        service.delete({"id": 3})
+
+    # verify rows of every level reloaded
+    with make_service(directory=directory) as service:
+        assert service.levels()["level0_segments"] == 1
+        assert service.levels()["level1"] == 30
+        assert len(service.read_range(None, None)) == 34
+        assert service.read_single({"id": 35}) == make_product(35)
+        assert service.read_single({"id": 3}) is None
+
+        # verify new segments after the reloaded ones
+        service.update(make_product(35, 2.0))
+        service.flush()
+        assert service.read_single({"id": 35}) == make_product(35, 2.0)
+
+
+def test_background_flush():
+    """Background flushes should not lose rows of concurrent writers."""
+
+    with make_service(background=True, memtable_size=50) as service:
+
+        def writer(offset: int) -> None:
+            for i in range(offset, offset + 500):
+                service.create(make_product(i))
+
+        threads = [
+            threading.Thread(target=writer, args=(offset,))
+            for offset in [1, 1001, 2001]
+        ]
+        for thread in threads:
+            thread.start()
+
+        # read while flushes and compactions run
+        while any(thread.is_alive() for thread in threads):
+            assert service.read_single({"id": 1}) in (None, make_product(1))
+        for thread in threads:
+            thread.join()
+
+        # verify every row readable
+        assert len(service.read_range(None, None)) == 1500
+        assert service.read_by_ids([500, 1500, 2500]) == [
+            make_product(500),
+            make_product(1500),
+            make_product(2500),
+        ]
+        assert counter(service, "lsm_flushes_total") >= 1
@@ -0,0 +1,223 @@
+"""Test Cases
+
+- Aggregate should raise ValueError for unknown kinds or invalid fields
+- MaterializedView should raise TypeError if 'aggregates' is not
+  a dict of Aggregate
+- MaterializedView should group and aggregate added records
+- MaterializedView should only aggregate records matching 'where'
+- apply() should move records between groups and drop empty groups
+
+- ViewRegistry should raise TypeError if 'sql_service' is not
+  of type SQLService
+- register() should fill a view from the table
+- register() should raise ValueError for a registered name
+- Registered views should be updated from the change feed
+- get() should raise ValueError for unknown views
+"""
+
+
+import pytest
+from unittest.mock import Mock
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.materialized_view import (
+    Aggregate,
+    MaterializedView,
+    ViewRegistry,
+    avg_of,
+    count,
+    sum_of,
+)
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.sql_service import SQLService
+from features.product.models.product import Product
+
+
+# records of the table
+RECORDS = [
+    {"id": 1, "name": "orange", "price": 4.0},
+    {"id": 2, "name": "banana", "price": 6.0},
+    {"id": 3, "name": "orange", "price": 2.0},
+]
+
+
+def make_view(**kwargs) -> MaterializedView:
+    """Return view of count, total and average price by name."""
+
+    return MaterializedView(
+        "by_name",
+        {"count": count(), "total": sum_of("price"), "avg": avg_of("price")},
+        **kwargs,
+    )
+
+
+def test_aggregate_incorrect():
+    """Aggregate should raise ValueError for unknown kinds or invalid
+    fields."""
+
+    # verify ValueError raised for unknown kind
+    with pytest.raises(ValueError) as exc_info:
+        Aggregate("median", "price")
+    assert "unknown aggregate: median" in str(exc_info.value)
+
+    # verify ValueError raised for invalid fields
+    for kind, field in [("sum", None), ("count", "price")]:
+        with pytest.raises(ValueError) as exc_info:
+            Aggregate(kind, field)
+        assert f"invalid field of {kind} aggregate" in str(exc_info.value)
+
+
+def test_view_aggregates_incorrect():
+    """MaterializedView should raise TypeError if 'aggregates' is not
+    a dict of Aggregate."""
+
+    # verify TypeError raised
+    for aggregates in [{}, {"count": "count"}]:
+        with pytest.raises(TypeError) as exc_info:
+            MaterializedView("view", aggregates)  # type: ignore
+        assert "'aggregates' should be a dict of Aggregate." in str(
+            exc_info.value
+        )
+
+
+def test_view_group():
+    """MaterializedView should group and aggregate added records."""
+
+    view = make_view(group_by="name")
+    for record in RECORDS:
+        view.add(record)
+
+    # verify groups
+    assert view.get("orange") == {"count": 2, "total": 6.0, "avg": 3.0}
+    assert view.get("banana") == {"count": 1, "total": 6.0, "avg": 6.0}
+    assert view.get("papaya") is None
+    assert set(view.rows()) == {"orange", "banana"}
+
+
+def test_view_where():
+    """MaterializedView should only aggregate records matching
+    'where'."""
+
+    # filter by query data and by function
+    by_query = make_view(where={"name": "orange"})
+    by_function = make_view(where=lambda record: record["price"] > 3)
+    for record in RECORDS:
+        by_query.add(record)
+        by_function.add(record)
+
+    # verify single group
+    assert by_query.get() == {"count": 2, "total": 6.0, "avg": 3.0}
+    assert by_function.get() == {"count": 2, "total": 10.0, "avg": 5.0}
+
+
+def test_view_apply():
+    """apply() should move records between groups and drop empty
+    groups."""
+
+    feed = ChangeFeed()
+    view = make_view(group_by="name")
+    view.add(RECORDS[1])
+
+    # rename banana to papaya
+    view.apply(
+        feed.append("update", 2, RECORDS[1], {**RECORDS[1], "name": "papaya"})
+    )
+
+    # verify groups
+    assert view.get("banana") is None
+    assert view.get("papaya") == {"count": 1, "total": 6.0, "avg": 6.0}
+
+    # delete papaya
+    view.apply(
+        feed.append("delete", 2, {**RECORDS[1], "name": "papaya"}, None)
+    )
+
+    # verify no group left
+    assert view.rows() == {}
+
+
+def test_view_registry_incorrect():
+    """ViewRegistry should raise TypeError if 'sql_service' is not
+    of type SQLService."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        ViewRegistry("abcd", ChangeFeed())  # type: ignore
+
+    # verify error message
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+
+def test_register():
+    """register() should fill a view from the table."""
+
+    # add records to database
+    DATABASE.extend(RECORDS)
+
+    feed = ChangeFeed()
+    registry = ViewRegistry(MySQLService[Product](change_feed=feed), feed)
+    view = registry.register(make_view(group_by="name"))
+
+    # verify view filled and registered
+    assert view.get("orange") == {"count": 2, "total": 6.0, "avg": 3.0}
+    assert registry.get("by_name") is view
+    assert registry.names() == ["by_name"]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_register_duplicate():
+    """register() should raise ValueError for a registered name."""
+
+    # empty table
+    mock = Mock(spec=SQLService)
+    mock.iter_chunks.return_value = iter([])
+    registry = ViewRegistry(mock, ChangeFeed())
+    registry.register(make_view())
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        registry.register(make_view())
+
+    # verify error message
+    assert "view already registered: by_name" in str(exc_info.value)
+
+
+def test_registry_changes():
+    """Registered views should be updated from the change feed."""
+
+    feed = ChangeFeed()
+    service = MySQLService[Product](change_feed=feed)
+    registry = ViewRegistry(service, feed)
+    view = registry.register(make_view(group_by="name"))
+
+    # mutate table
+    service.create_many([Product(**record) for record in RECORDS])
+    service.update(Product(id=3, name="orange", price=8.0))
+    service.delete({"id": 2})
+
+    # verify view matches the table
+    assert view.rows() == {"orange": {"count": 2, "total": 12.0, "avg": 6.0}}
+
+    # verify unregistered view not updated
+    registry.unregister("by_name")
+    service.delete({"id": 1})
+    assert view.get("orange") == {"count": 2, "total": 12.0, "avg": 6.0}
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_registry_get_unknown():
+    """get() should raise ValueError for unknown views."""
+
+    registry = ViewRegistry(Mock(spec=SQLService), ChangeFeed())
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        registry.get("by_name")
+
+    # verify error message
+    assert "unknown view: by_name" in str(exc_info.value)
@@ -0,0 +1,181 @@
+"""Test Cases
+
+- VersionStore should number writes and keep before images for open
+  snapshots only
+- VersionStore should collect images no open snapshot reads
+- Snapshot should read the table as of its version
+- Snapshot should raise TypeError for invalid arguments
+- Snapshot should raise SQLException once closed
+- Snapshot scans should stay consistent while writers proceed
+"""
+
+
+import threading
+import pytest
+from core.services.sql_service.in_memory_service import InMemoryService
+from core.services.sql_service.mvcc import SCAN_CHUNK, VersionStore
+from core.services.sql_service.sql_exception import SQLException
+from features.product.models.product import Product
+
+
+# products of the table
+ORANGE = Product(id=1, name="orange", price=4.99)
+BANANA = Product(id=2, name="banana", price=6.99)
+PAPAYA = Product(id=3, name="papaya", price=4.99)
+
+
+def make_service() -> InMemoryService[Product]:
+    """Return service holding ORANGE, BANANA and PAPAYA."""
+
+    service = InMemoryService[Product]()
+    service.create_many([ORANGE, BANANA, PAPAYA])
+
+    return service
+
+
+def test_version_store_record():
+    """VersionStore should number writes and keep before images for open
+    snapshots only."""
+
+    store = VersionStore()
+
+    # verify no image kept without snapshots
+    store.record(1, None)
+    assert (store.version, store.versions()) == (1, 0)
+
+    # verify first image after the snapshot kept, later ones skipped
+    version = store.begin()
+    store.record(1, "a")
+    store.record(1, "b")
+    store.record(2, None)
+    assert store.version == 4
+    assert store.versions() == 2
+    assert store.as_of(1, version, "c") == "a"
+    assert store.as_of(2, version, "d") is None
+    assert store.as_of(3, version, "e") == "e"
+
+    # verify images of a newer snapshot kept
+    newer = store.begin()
+    store.record(1, "c")
+    assert store.as_of(1, version, "f") == "a"
+    assert store.as_of(1, newer, "f") == "c"
+    assert store.snapshots() == 2
+
+
+def test_version_store_collect():
+    """VersionStore should collect images no open snapshot reads."""
+
+    store = VersionStore()
+    first = store.begin()
+    store.record(1, "a")
+    second = store.begin()
+    store.record(1, "b")
+
+    # verify images older than the oldest snapshot collected
+    store.end(first)
+    assert (store.versions(), store.collected) == (1, 1)
+    assert store.as_of(1, second, "c") == "b"
+
+    # verify every image collected
+    store.end(second)
+    assert (store.versions(), store.collected) == (0, 2)
+    assert store.snapshots() == 0
+
+
+def test_snapshot_reads():
+    """Snapshot should read the table as of its version."""
+
+    service = make_service()
+
+    with service.snapshot() as snapshot:
+        # write after the snapshot
+        service.update(Product(id=1, name="orange", price=5.99))
+        service.delete({"id": 2})
+        service.create(Product(id=4, name="mango", price=4.99))
+
+        # verify snapshot reads
+        assert snapshot.read_multiple({}) == [ORANGE, BANANA, PAPAYA]
+        assert snapshot.read_single({"price": 6.99}) == BANANA
+        assert snapshot.read_multiple({"price": 4.99}) == [ORANGE, PAPAYA]
+        assert snapshot.read_by_ids([2, 4, 1]) == [BANANA, None, ORANGE]
+        assert list(snapshot.iter_chunks(2)) == [[ORANGE, BANANA], [PAPAYA]]
+
+        # verify live reads
+        assert [p.id for p in service.read_multiple({})] == [1, 3, 4]
+
+    # verify versions collected once closed
+    assert service.version_store.versions() == 0
+
+
+def test_snapshot_arguments_incorrect():
+    """Snapshot should raise TypeError for invalid arguments."""
+
+    with make_service().snapshot() as snapshot:
+        # verify TypeError raised
+        with pytest.raises(TypeError):
+            snapshot.read_multiple("str")  # type: ignore
+        with pytest.raises(TypeError):
+            snapshot.read_by_ids("str")  # type: ignore
+        with pytest.raises(ValueError):
+            next(snapshot.iter_chunks(0))
+
+
+def test_snapshot_closed():
+    """Snapshot should raise SQLException once closed."""
+
+    snapshot = make_service().snapshot()
+    snapshot.close()
+    snapshot.close()
+
+    # verify SQLException raised
+    with pytest.raises(SQLException) as exc_info:
+        snapshot.read_multiple({})
+    assert "snapshot is closed" in str(exc_info.value)
+
+
+def test_snapshot_concurrent_writes():
+    """Snapshot scans should stay consistent while writers proceed."""
+
+    service = InMemoryService[Product]()
+    size = SCAN_CHUNK * 3
+    service.create_many(
+        [
+            Product(id=record_id, name=f"product-{record_id}", price=1.0)
+            for record_id in range(1, size + 1)
+        ]
+    )
+    stop = threading.Event()
+
+    def write() -> None:
+        # raise every price by one, from the last record to the first one
+        price = 1.0
+        while not stop.is_set():
+            price += 1.0
+            for record_id in range(size, 0, -1):
+                service.update(
+                    Product(
+                        id=record_id, name=f"product-{record_id}", price=price
+                    )
+                )
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(20):
+            with service.snapshot() as snapshot:
+                prices = [
+                    record.price
+                    for chunk in snapshot.iter_chunks(100)
+                    for record in chunk
+                ]
+
+            # verify every snapshot sees the state between two writes
+            assert len(prices) == size
+            assert prices == sorted(prices)
+            assert prices[-1] - prices[0] in (0.0, 1.0)
+    finally:
+        stop.set()
+        writer.join()
+
+    # verify versions collected
+    assert service.version_store.versions() == 0
@@ -62,14 +62,62 @@
 - delete() method should delete records from database if records with
   'query_data' are present in database.
 - delete() method should return None after successful deletion.
+
+- last_rows_scanned should hold number of records visited by
+  the last operation.
+
+- explain() method should return a full scan plan.
+
+- create_many() method should raise TypeError if 'records' is
+  not a list.
+- create_many() method should raise TypeError if a record is
+  not a valid model object.
+- create_many() method should raise SQLException and insert nothing
+  if a record id is already present in database or repeated.
+- create_many() method should insert every record in database.
+
+- create_new() method should raise TypeError for invalid arguments.
+- create_new() method should insert every record without a duplicate
+  check scan.
+
+- update_many() method should raise TypeError if 'updated_records' is
+  not a list.
+- update_many() method should raise TypeError if a record is
+  not a valid model object.
+- update_many() method should update every present record in
+  a single scan.
+
+- read_by_ids() method should raise TypeError if 'ids' is not a list.
+- read_by_ids() method should return object 'T' or None for every id
+  in a single scan.
+
+- Every inserted, updated and deleted record should be appended to
+  'change_feed' with before and after images.
+- Changes of concurrent writers should hold the rows they wrote, in the
+  order they were written.
+
+- iter_chunks() method should raise ValueError if 'chunk_size'
+  is not positive.
+- iter_chunks() method should stream every record as object 'T'
+  in chunks.
+
+- update_if_version() method should only update records still at the
+  expected version, and return their new version.
+- Concurrent updates, creates and deletes should only write the records
+  of their ids.
 """
 
 
 import inspect
+import threading
 import pytest
-from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_exception import (
+    SQLException,
+    VersionConflict,
+)
 from core.services.sql_service.sql_service import SQLService
 from core.services.sql_service.mysql_service import MySQLService, DATABASE
+from core.services.sql_service.change_feed import ChangeFeed
 from features.product.models.product import Product
 
 
@@ -589,3 +637,519 @@ def test_delete_return_none():
 
     # verify result
     assert result is None
+
+
+def test_last_rows_scanned():
+    """last_rows_scanned should hold number of records visited by
+    the last operation."""
+
+    # add records in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+    DATABASE.append({"id": 2, "name": "banana", "price": 6.99})
+    DATABASE.append({"id": 3, "name": "papaya", "price": 4.99})
+
+    # verify read_single stops at first match
+    sql_service.read_single({"id": 2})
+    assert sql_service.last_rows_scanned == 2
+
+    # verify read_single visits every record on miss
+    sql_service.read_single({"id": 4})
+    assert sql_service.last_rows_scanned == 3
+
+    # verify read_multiple visits every record
+    sql_service.read_multiple({"id": 1})
+    assert sql_service.last_rows_scanned == 3
+
+    # verify update stops at matching record
+    sql_service.update(Product(id=1, name="orange", price=5.99))
+    assert sql_service.last_rows_scanned == 1
+
+    # verify delete visits every record
+    sql_service.delete({"id": 3})
+    assert sql_service.last_rows_scanned == 3
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_explain():
+    """explain() method should return a full scan plan."""
+
+    # add a record in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+
+    # verify plans
+    assert sql_service.explain({"price": 4.99, "name": "orange"}) == (
+        "FULL SCAN of 1 records, filter: name, price"
+    )
+    assert sql_service.explain({}) == "FULL SCAN of 1 records, filter: none"
+
+    # remove record from database
+    DATABASE.pop()
+
+
+def test_create_many_invalid_records():
+    """create_many() method should raise TypeError if 'records' is
+    not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.create_many("str")  # type: ignore
+
+    # verify error message
+    assert "'records' should be a valid list." in str(exc_info.value)
+
+
+def test_create_many_invalid_record():
+    """create_many() method should raise TypeError if a record is
+    not a valid model object."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.create_many([{"id": 1}])  # type: ignore
+
+    # verify error message
+    assert "'record' should be a valid model." in str(exc_info.value)
+
+
+def test_create_many_duplicate_id():
+    """create_many() method should raise SQLException and insert nothing
+    if a record id is already present in database or repeated."""
+
+    # add a record in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+
+    # verify SQLException raised for id present in database
+    with pytest.raises(SQLException) as exc_info:
+        sql_service.create_many(
+            [
+                Product(id=2, name="apple", price=7.99),
+                Product(id=1, name="apple", price=7.99),
+            ]
+        )
+    assert "duplicate id: 1" in str(exc_info.value)
+
+    # verify SQLException raised for repeated id
+    with pytest.raises(SQLException) as exc_info:
+        sql_service.create_many(
+            [
+                Product(id=3, name="apple", price=7.99),
+                Product(id=3, name="mango", price=7.99),
+            ]
+        )
+    assert "duplicate id: 3" in str(exc_info.value)
+
+    # verify nothing inserted
+    assert DATABASE == [{"id": 1, "name": "orange", "price": 4.99}]
+
+    # remove record from database
+    DATABASE.pop()
+
+
+def test_create_many_insert_database():
+    """create_many() method should insert every record in database."""
+
+    # add products to database
+    result = sql_service.create_many(
+        [
+            Product(id=1, name="apple", price=7.99),
+            Product(id=2, name="mango", price=8.99),
+        ]
+    )
+
+    # verify result and database
+    assert result is None
+    assert DATABASE == [
+        {"id": 1, "name": "apple", "price": 7.99},
+        {"id": 2, "name": "mango", "price": 8.99},
+    ]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_create_new_invalid_arguments():
+    """create_new() method should raise TypeError for invalid
+    arguments."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.create_new("str")  # type: ignore
+    assert "'records' should be a valid list." in str(exc_info.value)
+
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.create_new([{"id": 1}])  # type: ignore
+    assert "'record' should be a valid model." in str(exc_info.value)
+
+
+def test_create_new_insert_database():
+    """create_new() method should insert every record without a duplicate
+    check scan."""
+
+    # add a record in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+
+    # add products to database
+    sql_service.create_new([Product(id=2, name="apple", price=7.99)])
+
+    # verify database and scanned records
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 4.99},
+        {"id": 2, "name": "apple", "price": 7.99},
+    ]
+    assert sql_service.last_rows_scanned == 0
+    assert sql_service.read_versioned(2)[1] is not None
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_update_many_invalid_records():
+    """update_many() method should raise TypeError if 'updated_records' is
+    not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.update_many("str")  # type: ignore
+
+    # verify error message
+    assert "'updated_records' should be a valid list." in str(exc_info.value)
+
+
+def test_update_many_invalid_record():
+    """update_many() method should raise TypeError if a record is
+    not a valid model object."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.update_many([{"id": 1}])  # type: ignore
+
+    # verify error message
+    assert "'updated_record' should be a valid model." in str(exc_info.value)
+
+
+def test_update_many_database():
+    """update_many() method should update every present record in
+    a single scan."""
+
+    # add records in database
+    DATABASE.extend(
+        [
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 2, "name": "banana", "price": 6.99},
+            {"id": 3, "name": "papaya", "price": 1.99},
+        ]
+    )
+
+    # update present and missing records
+    result = sql_service.update_many(
+        [
+            Product(id=2, name="banana", price=7.99),
+            Product(id=1, name="orange", price=5.99),
+            Product(id=9, name="apple", price=8.99),
+        ]
+    )
+
+    # verify result and database
+    assert result is None
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 5.99},
+        {"id": 2, "name": "banana", "price": 7.99},
+        {"id": 3, "name": "papaya", "price": 1.99},
+    ]
+    assert sql_service.last_rows_scanned == 3
+
+    # update present records only, scan stops after the last one
+    sql_service.update_many([Product(id=1, name="orange", price=6.99)])
+    assert DATABASE[0] == {"id": 1, "name": "orange", "price": 6.99}
+    assert sql_service.last_rows_scanned == 1
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_iter_chunks_chunk_size():
+    """iter_chunks() method should raise ValueError if 'chunk_size'
+    is not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        next(sql_service.iter_chunks(0))
+
+    # verify error message
+    assert "'chunk_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_iter_chunks():
+    """iter_chunks() method should stream every record as object 'T'
+    in chunks."""
+
+    # add records to database
+    DATABASE.extend(
+        [
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 2, "name": "banana", "price": 6.99},
+            {"id": 3, "name": "papaya", "price": 1.99},
+        ]
+    )
+
+    # verify chunks
+    assert list(sql_service.iter_chunks(2)) == [
+        [
+            Product(id=1, name="orange", price=4.99),
+            Product(id=2, name="banana", price=6.99),
+        ],
+        [Product(id=3, name="papaya", price=1.99)],
+    ]
+    assert sql_service.last_rows_scanned == 3
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_read_by_ids_invalid_data():
+    """read_by_ids() method should raise TypeError if 'ids'
+    is not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        sql_service.read_by_ids({"id": 1})  # type: ignore
+
+    # verify error message
+    assert "'ids' should be a valid list." in str(exc_info.value)
+
+
+def test_read_by_ids():
+    """read_by_ids() method should return object 'T' or None for every id
+    in a single scan."""
+
+    # add records to database
+    DATABASE.extend(
+        [
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 2, "name": "banana", "price": 6.99},
+            {"id": 3, "name": "papaya", "price": 1.99},
+        ]
+    )
+
+    # verify result in ids order
+    assert sql_service.read_by_ids([2, 9, 1, 2]) == [
+        Product(id=2, name="banana", price=6.99),
+        None,
+        Product(id=1, name="orange", price=4.99),
+        Product(id=2, name="banana", price=6.99),
+    ]
+    assert sql_service.last_rows_scanned == 3
+
+    # verify scan stops once every id is found
+    assert sql_service.read_by_ids([1, 2]) == [
+        Product(id=1, name="orange", price=4.99),
+        Product(id=2, name="banana", price=6.99),
+    ]
+    assert sql_service.last_rows_scanned == 2
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_change_feed():
+    """Every inserted, updated and deleted record should be appended to
+    'change_feed' with before and after images."""
+
+    # mysql service with change feed
+    feed = ChangeFeed()
+    service = MySQLService[Product](change_feed=feed)
+
+    # mutate database
+    service.create(Product(id=1, name="orange", price=4.99))
+    service.create_many(
+        [
+            Product(id=2, name="banana", price=6.99),
+            Product(id=3, name="banana", price=1.99),
+        ]
+    )
+    service.update(Product(id=1, name="orange", price=5.99))
+    service.update(Product(id=9, name="apple", price=8.99))
+    service.update_many([Product(id=2, name="banana", price=7.99)])
+    service.delete({"name": "banana"})
+
+    # verify changes
+    changes = [
+        (change.seq, change.operation, change.key, change.before, change.after)
+        for change in feed.read()
+    ]
+    assert changes == [
+        (1, "insert", 1, None, {"id": 1, "name": "orange", "price": 4.99}),
+        (2, "insert", 2, None, {"id": 2, "name": "banana", "price": 6.99}),
+        (3, "insert", 3, None, {"id": 3, "name": "banana", "price": 1.99}),
+        (
+            4,
+            "update",
+            1,
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 1, "name": "orange", "price": 5.99},
+        ),
+        (
+            5,
+            "update",
+            2,
+            {"id": 2, "name": "banana", "price": 6.99},
+            {"id": 2, "name": "banana", "price": 7.99},
+        ),
+        (6, "delete", 2, {"id": 2, "name": "banana", "price": 7.99}, None),
+        (7, "delete", 3, {"id": 3, "name": "banana", "price": 1.99}, None),
+    ]
+
+    # verify images are copies of stored records
+    feed.read()[0].after["price"] = 0.0
+    assert DATABASE == [{"id": 1, "name": "orange", "price": 5.99}]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_change_feed_concurrent():
+    """Changes of concurrent writers should hold the rows they wrote, in
+    the order they were written."""
+
+    feed = ChangeFeed()
+    service = MySQLService[Product](change_feed=feed)
+
+    def write(first: int) -> None:
+        for product_id in range(first, first + 50):
+            service.create(Product(id=product_id, name="orange", price=1.0))
+        service.create_many(
+            [
+                Product(id=product_id, name="banana", price=2.0)
+                for product_id in range(first + 50, first + 100)
+            ]
+        )
+        for product_id in range(first, first + 100, 2):
+            service.update(Product(id=product_id, name="papaya", price=3.0))
+
+    threads = [
+        threading.Thread(target=write, args=(i * 100 + 1,)) for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # verify every change holds the row of its key
+    changes = feed.read()
+    assert len(changes) == 4 * 150
+    assert all(change.after["id"] == change.key for change in changes)
+
+    # verify inserts in the order of the stored rows
+    inserts = [
+        change.key for change in changes if change.operation == "insert"
+    ]
+    assert inserts == [record["id"] for record in DATABASE]
+    assert all(
+        change.after["name"] == "papaya"
+        for change in changes
+        if change.operation == "update"
+    )
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_update_if_version():
+    """update_if_version() should only update records still at the
+    expected version, and return their new version."""
+
+    service = MySQLService[Product]()
+    service.create(Product(id=1, name="orange", price=4.99))
+
+    # verify versioned read
+    record, version = service.read_versioned(1)
+    assert record == Product(id=1, name="orange", price=4.99)
+    assert service.read_versioned(2) == (None, None)
+
+    # verify compare-and-set
+    new_version = service.update_if_version(
+        Product(id=1, name="orange", price=5.99), version
+    )
+    assert new_version != version
+    assert service.read_versioned(1) == (
+        Product(id=1, name="orange", price=5.99),
+        new_version,
+    )
+
+    # verify stale version rejected
+    with pytest.raises(VersionConflict) as exc_info:
+        service.update_if_version(
+            Product(id=1, name="orange", price=6.99), version
+        )
+    assert "version conflict on id 1" in str(exc_info.value)
+
+    # verify plain updates change the version
+    service.update(Product(id=1, name="orange", price=7.99))
+    with pytest.raises(VersionConflict):
+        service.update_if_version(
+            Product(id=1, name="orange", price=6.99), new_version
+        )
+
+    # verify deleted record rejected
+    _, version = service.read_versioned(1)
+    service.delete({"id": 1})
+    with pytest.raises(VersionConflict):
+        service.update_if_version(
+            Product(id=1, name="orange", price=6.99), version
+        )
+    assert DATABASE == []
+
+    # verify type checked
+    with pytest.raises(TypeError):
+        service.update_if_version({"id": 1}, 0)  # type: ignore
+
+
+def test_concurrent_writes():
+    """Concurrent updates, creates and deletes should only write the
+    records of their ids."""
+
+    service = MySQLService[Product]()
+    service.create_many(
+        [Product(id=i, name=f"item-{i}", price=1.0) for i in range(1, 201)]
+    )
+
+    def update() -> None:
+        for _ in range(5):
+            service.update_many(
+                [
+                    Product(id=i, name=f"item-{i}", price=2.0)
+                    for i in range(101, 201)
+                ]
+            )
+            for i in range(150, 201):
+                service.update(Product(id=i, name=f"item-{i}", price=3.0))
+
+    def delete() -> None:
+        for i in range(1, 101):
+            service.delete({"id": i})
+            service.create(Product(id=1000 + i, name="other", price=1.0))
+
+    threads = [
+        threading.Thread(target=update),
+        threading.Thread(target=delete),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # verify updated records kept their ids, deleted ones not resurrected
+    ids = [record["id"] for record in DATABASE]
+    assert sorted(ids) == list(range(101, 201)) + list(range(1001, 1101))
+    assert all(
+        record["name"] == f"item-{record['id']}"
+        for record in DATABASE
+        if record["id"] <= 200
+    )
+    assert {record["price"] for record in DATABASE if record["id"] > 1000} == {
+        1.0
+    }
+
+    # remove records from database
+    DATABASE.clear()
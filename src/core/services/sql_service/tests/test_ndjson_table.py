@@ -0,0 +1,175 @@
+"""Test Cases
+
+- export_ndjson() should write every record as a NDJSON line
+- export_ndjson() should write gzip compressed files
+- import_ndjson() should raise ValueError if 'chunk_size' is not positive
+- import_ndjson() should insert every record skipping blank lines
+- import_ndjson() should round trip an exported table
+- import_ndjson() should raise ValueError with the line number of
+  an invalid record
+- import_ndjson() should reject lines holding more than one value
+"""
+
+
+import gzip
+import json
+import pytest
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.ndjson_table import (
+    export_ndjson,
+    import_ndjson,
+)
+from features.product.models.product import Product
+
+
+# records of the table
+RECORDS = [
+    {"id": 1, "name": "orange", "price": 4.99},
+    {"id": 2, "name": 'ripe\n"banana"', "price": 6.99},
+    {"id": 3, "name": "papaya", "price": 1.99},
+]
+
+# product table
+sql_service = MySQLService[Product]()
+
+
+def test_export_ndjson(tmp_path):
+    """export_ndjson() should write every record as a NDJSON line."""
+
+    # add records to database
+    DATABASE.extend(RECORDS)
+
+    # export table in small chunks
+    path = tmp_path / "products.ndjson"
+    report = export_ndjson(sql_service, Product, str(path), chunk_size=2)
+
+    # verify file
+    lines = path.read_bytes().splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+
+    # verify report
+    assert report.rows == 3
+    assert report.bytes == path.stat().st_size
+    assert report.mb_per_second > 0
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_export_ndjson_gzip(tmp_path):
+    """export_ndjson() should write gzip compressed files."""
+
+    # add records to database
+    DATABASE.extend(RECORDS)
+
+    # export compressed table
+    path = tmp_path / "products.ndjson.gz"
+    export_ndjson(sql_service, Product, str(path))
+
+    # verify file
+    with gzip.open(path, "rt") as file:
+        assert [json.loads(line) for line in file] == RECORDS
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_import_ndjson_chunk_size(tmp_path):
+    """import_ndjson() should raise ValueError if 'chunk_size'
+    is not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        import_ndjson(sql_service, Product, str(tmp_path / "a"), 0)
+
+    # verify error message
+    assert "'chunk_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_import_ndjson(tmp_path):
+    """import_ndjson() should insert every record skipping blank lines."""
+
+    # write file with a blank line
+    path = tmp_path / "products.ndjson"
+    path.write_text(
+        json.dumps(RECORDS[0]) + "\n\n" + json.dumps(RECORDS[1]) + "\n"
+    )
+
+    # import file
+    report = import_ndjson(sql_service, Product, str(path), chunk_size=1)
+
+    # verify report and database
+    assert report.rows == 2
+    assert DATABASE == RECORDS[:2]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_import_ndjson_round_trip(tmp_path):
+    """import_ndjson() should round trip an exported table."""
+
+    # export table
+    DATABASE.extend(RECORDS)
+    path = tmp_path / "products.ndjson.gz"
+    export_ndjson(sql_service, Product, str(path), chunk_size=2)
+    DATABASE.clear()
+
+    # import table
+    report = import_ndjson(sql_service, Product, str(path), chunk_size=2)
+
+    # verify report and database
+    assert report.rows == 3
+    assert DATABASE == RECORDS
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_import_ndjson_invalid(tmp_path):
+    """import_ndjson() should raise ValueError with the line number of
+    an invalid record."""
+
+    # write file with an invalid record on line 3
+    path = tmp_path / "products.ndjson"
+    path.write_text(
+        json.dumps(RECORDS[0])
+        + "\n"
+        + json.dumps(RECORDS[1])
+        + "\n"
+        + json.dumps({"id": 0, "name": "papaya", "price": 1.99})
+        + "\n"
+    )
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        import_ndjson(sql_service, Product, str(path), chunk_size=2)
+
+    # verify error message
+    assert str(exc_info.value) == (
+        "line 3: Value error, 'id' must be a positive integer"
+    )
+
+    # verify first chunk inserted
+    assert DATABASE == RECORDS[:2]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_import_ndjson_multiple_values(tmp_path):
+    """import_ndjson() should reject lines holding more than one value."""
+
+    # write file with two records on one line
+    path = tmp_path / "products.ndjson"
+    path.write_text(json.dumps(RECORDS[0]) + "," + json.dumps(RECORDS[2]))
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        import_ndjson(sql_service, Product, str(path))
+
+    # verify error message
+    assert str(exc_info.value).startswith("line 1: ")
+
+    # verify nothing inserted
+    assert DATABASE == []
@@ -0,0 +1,135 @@
+"""Test Cases
+
+- retry_on_conflict() should raise ValueError if 'retries' is negative
+- retry_on_conflict() should retry conflicting operations with growing
+  backoff and raise the last conflict
+- update_with_retry() should apply the change to the latest record
+- update_with_retry() should return None for missing records
+- update_with_retry() should raise ValueError if the change alters the id
+- Concurrent update_with_retry() calls should not lose updates
+"""
+
+
+import threading
+import pytest
+from core.services.sql_service.in_memory_service import InMemoryService
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.optimistic import (
+    retry_on_conflict,
+    update_with_retry,
+)
+from core.services.sql_service.sql_exception import VersionConflict
+from features.product.models.product import Product
+
+
+def add_cent(product: Product) -> Product:
+    """Return product one cent more expensive."""
+
+    return product.model_copy(update={"price": round(product.price + 0.01, 2)})
+
+
+def test_retry_on_conflict_incorrect():
+    """retry_on_conflict() should raise ValueError if 'retries' is
+    negative."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        retry_on_conflict(lambda: None, retries=-1)
+
+    # verify error message
+    assert "'retries' must be a non negative integer" in str(exc_info.value)
+
+
+def test_retry_on_conflict():
+    """retry_on_conflict() should retry conflicting operations with
+    growing backoff and raise the last conflict."""
+
+    calls: list[int] = []
+    sleeps: list[float] = []
+
+    def operation() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise VersionConflict("conflict")
+        return "done"
+
+    # verify result after two conflicts
+    result = retry_on_conflict(operation, 5, 0.5, sleep=sleeps.append)
+    assert result == "done"
+    assert len(calls) == 3
+
+    # verify jittered backoff bounds
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5
+    assert 0 <= sleeps[1] <= 1.0
+
+    # verify last conflict raised
+    calls.clear()
+    with pytest.raises(VersionConflict):
+        retry_on_conflict(operation, 1, 0.5, sleep=sleeps.append)
+    assert len(calls) == 2
+
+
+def test_update_with_retry():
+    """update_with_retry() should apply the change to the latest record,
+    and return None for missing records."""
+
+    service = InMemoryService[Product]()
+    service.create(Product(id=1, name="orange", price=4.99))
+
+    # interleave a concurrent write with the first attempt
+    writes: list[int] = []
+
+    def change(product: Product) -> Product:
+        if not writes:
+            writes.append(1)
+            service.update(Product(id=1, name="orange", price=9.99))
+        return add_cent(product)
+
+    # verify change applied to the concurrent write
+    updated = update_with_retry(service, 1, change, backoff=0)
+    assert updated == Product(id=1, name="orange", price=10.0)
+    assert service.read_single({"id": 1}) == updated
+
+    # verify missing record
+    assert update_with_retry(service, 2, add_cent) is None
+
+
+def test_update_with_retry_id():
+    """update_with_retry() should raise ValueError if the change alters
+    the id."""
+
+    service = InMemoryService[Product]()
+    service.create(Product(id=1, name="orange", price=4.99))
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        update_with_retry(
+            service, 1, lambda product: product.model_copy(update={"id": 2})
+        )
+
+    # verify error message
+    assert "'change' should not change the record id" in str(exc_info.value)
+
+
+def test_no_lost_updates():
+    """Concurrent update_with_retry() calls should not lose updates."""
+
+    for service in [InMemoryService[Product](), MySQLService[Product]()]:
+        service.create(Product(id=1, name="orange", price=1.0))
+
+        def writer() -> None:
+            for _ in range(50):
+                update_with_retry(service, 1, add_cent, retries=1000)
+
+        threads = [threading.Thread(target=writer) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # verify every increment applied
+        assert service.read_single({"id": 1}).price == 3.0
+
+    # remove records from database
+    DATABASE.clear()
@@ -0,0 +1,230 @@
+"""Test Cases
+
+- ParallelScanner should raise ValueError for negative 'workers' or
+  'threshold'
+- accepts() should be True for tables of at least 'threshold' rows
+- scan() should return keys of the rows holding every queried value, in
+  scan order
+- scan() should return None for values that cannot be encoded
+- Columns should be encoded once and follow the writes of the table
+- Rows should be matched in a process pool across row ranges
+- Writes reported while the rows are read should be applied once they
+  are loaded
+- Writes should not wait for running matches
+"""
+
+
+import threading
+import pytest
+from core.services.sql_service import parallel_scan
+from core.services.sql_service.parallel_scan import ParallelScanner
+
+
+# (key, (id, name, price)) rows of the table
+ROWS = [
+    (1, (1, "orange", 4.99)),
+    (2, (2, "banana", 6.99)),
+    (3, (3, "papaya", 4.99)),
+    (4, (4, "orange", 6.99)),
+]
+
+
+class Items:
+    """Returns rows of the table and counts its calls."""
+
+    def __init__(self, rows: list) -> None:
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self) -> list:
+        self.calls += 1
+        return self.rows
+
+
+def counter(scanner: ParallelScanner, name: str) -> float:
+    """Return value of a counter of the default scanner."""
+
+    return scanner.metrics.counter_value(name, {"name": "default"})
+
+
+def test_parallel_scanner_incorrect():
+    """ParallelScanner should raise ValueError for negative 'workers' or
+    'threshold'."""
+
+    # verify ValueError raised
+    for options, message in [
+        ({"workers": -1}, "'workers' must not be negative"),
+        ({"threshold": -1}, "'threshold' must not be negative"),
+    ]:
+        with pytest.raises(ValueError) as exc_info:
+            ParallelScanner(**options)
+        assert message in str(exc_info.value)
+
+
+def test_accepts():
+    """accepts() should be True for tables of at least 'threshold'
+    rows."""
+
+    scanner = ParallelScanner(workers=0, threshold=10)
+
+    # verify threshold
+    assert not scanner.accepts(9)
+    assert scanner.accepts(10)
+    assert ParallelScanner().workers >= 1
+
+
+def test_scan():
+    """scan() should return keys of the rows holding every queried value,
+    in scan order."""
+
+    with ParallelScanner(workers=0) as scanner:
+        items = Items(ROWS)
+
+        # verify matching keys
+        assert scanner.scan(items, {2: 4.99}) == [1, 3]
+        assert scanner.scan(items, {1: "orange", 2: 6.99}) == [4]
+        assert scanner.scan(items, {1: "banana", 2: 4.99}) == []
+        assert scanner.scan(items, {}) == [1, 2, 3, 4]
+
+        # verify values missing from the table match nothing
+        assert scanner.scan(items, {1: "apple"}) == []
+
+
+def test_scan_unencodable():
+    """scan() should return None for values that cannot be encoded."""
+
+    with ParallelScanner(workers=0) as scanner:
+        items = Items([(1, (1, ["orange"])), (2, (2, ["banana"]))])
+
+        # verify unhashable query values and columns
+        assert scanner.scan(items, {0: [1]}) is None
+        assert scanner.scan(items, {1: ["orange"]}) is None
+        assert scanner.scan(items, {0: 2}) == [2]
+
+
+def test_writes():
+    """Columns should be encoded once and follow the writes of the
+    table."""
+
+    with ParallelScanner(workers=0) as scanner:
+        items = Items(list(ROWS))
+
+        # verify writes before the first scan ignored
+        scanner.write(9, (9, "melon", 4.99))
+        assert scanner.scan(items, {2: 4.99}) == [1, 3]
+        scanner.scan(items, {1: "orange"})
+        assert items.calls == 1
+        assert counter(scanner, "parallel_scan_columns_built_total") == 2
+
+        # verify updates, inserts and deletes applied in place
+        scanner.write(2, (2, "banana", 4.99))
+        scanner.write(5, (5, "apple", 4.99))
+        scanner.write(3, None)
+        scanner.write(3, None)
+        assert scanner.scan(items, {2: 4.99}) == [1, 2, 5]
+        assert scanner.scan(items, {1: "apple", 2: 4.99}) == [5]
+        assert scanner.scan(items, {}) == [1, 2, 4, 5]
+        assert items.calls == 1
+        assert counter(scanner, "parallel_scan_columns_built_total") == 2
+        assert counter(scanner, "parallel_scans_total") == 5
+
+        # verify segments grow past their capacity
+        for key in range(10, 3000):
+            scanner.write(key, (key, "kiwi", 1.0))
+        assert len(scanner.scan(items, {1: "kiwi"})) == 2990
+
+        # verify unhashable values stop the column scans
+        scanner.write(1, (1, ["orange"], 4.99))
+        assert scanner.scan(items, {1: "kiwi"}) is None
+        assert scanner.scan(items, {2: 4.99}) == [1, 2, 5]
+
+        # verify rows read again once mostly deleted
+        for key in range(10, 3000):
+            scanner.write(key, None)
+        assert scanner.scan(items, {1: "orange"}) == [1, 4]
+        assert items.calls == 2
+
+        # verify rows read again after clear()
+        items.rows = ROWS[:2]
+        scanner.clear()
+        assert scanner.scan(items, {2: 4.99}) == [1]
+        assert items.calls == 3
+
+
+def test_process_pool():
+    """Rows should be matched in a process pool across row ranges."""
+
+    rows = [(i, (i, f"name-{i % 7}", i % 5)) for i in range(1000)]
+    expected = [i for i in range(1000) if i % 7 == 3 and i % 5 == 2]
+
+    with ParallelScanner(workers=2) as scanner:
+        # verify pooled result matches a sequential scan
+        assert scanner.scan(Items(rows), {1: "name-3", 2: 2}) == expected
+        assert scanner.scan(Items(rows), {2: 4}) == list(range(4, 1000, 5))
+
+        # verify writes seen by the workers
+        scanner.write(1000, (1000, "name-3", 2))
+        scanner.write(3, None)
+        assert scanner.scan(Items(rows), {1: "name-3", 2: 2}) == (
+            [i for i in expected if i != 3] + [1000]
+        )
+
+    # verify closed scanner starts again
+    assert scanner.scan(Items(rows), {2: 0}) == list(range(0, 1000, 5))
+    scanner.close()
+
+
+def test_writes_while_loading():
+    """Writes reported while the rows are read should be applied once
+    they are loaded."""
+
+    with ParallelScanner(workers=0) as scanner:
+
+        def items() -> list:
+            # rows read before the writes, the first write read again
+            rows = list(ROWS)
+            scanner.write(1, (1, "orange", 4.99))
+            scanner.write(5, (5, "apple", 4.99))
+            scanner.write(2, None)
+            return rows
+
+        # verify writes applied
+        assert scanner.scan(items, {2: 4.99}) == [1, 3, 5]
+        assert scanner.scan(items, {}) == [1, 3, 4, 5]
+
+
+def test_writes_during_match(monkeypatch):
+    """Writes should not wait for running matches."""
+
+    started, release = threading.Event(), threading.Event()
+    match = parallel_scan._match
+
+    def blocked_match(*args):
+        started.set()
+        release.wait(timeout=2.0)
+        return match(*args)
+
+    monkeypatch.setattr(parallel_scan, "_match", blocked_match)
+
+    with ParallelScanner(workers=0) as scanner:
+        scanner.scan(Items(ROWS), {})
+        result: list = []
+        thread = threading.Thread(
+            target=lambda: result.append(scanner.scan(Items(ROWS), {2: 4.99}))
+        )
+        thread.start()
+        assert started.wait(timeout=2.0)
+
+        # verify write done while the match runs
+        writer = threading.Thread(
+            target=lambda: scanner.write(3, None), daemon=True
+        )
+        writer.start()
+        writer.join(timeout=1.0)
+        done = not writer.is_alive()
+        release.set()
+        thread.join()
+        assert done
+
+        # verify rows deleted during the match skipped
+        assert result == [[1]]
@@ -0,0 +1,135 @@
+"""Test Cases
+
+- QueryCompiler should raise ValueError if 'max_shapes' is not positive
+- compile() should match records with every queried key-value pair
+- compile() should match every record for queries without fields
+- compile() should reuse the getter of a cached key signature
+- compile() should evict the oldest shape once 'max_shapes' are cached
+- QueryCompiler should map fields with 'field_key' and 'getter'
+- compile_query() should share the dict records cache
+"""
+
+
+from operator import attrgetter
+import pytest
+from core.services.sql_service.query_compiler import (
+    DICT_QUERIES,
+    QueryCompiler,
+    compile_query,
+)
+from features.product.models.product import Product
+
+
+# records of the tests
+RECORDS = [
+    {"id": 1, "name": "orange", "price": 4.99},
+    {"id": 2, "name": "banana", "price": 6.99},
+    {"id": 3, "name": "papaya", "price": 4.99},
+]
+
+
+def test_query_compiler_max_shapes_incorrect():
+    """QueryCompiler should raise ValueError if 'max_shapes' is
+    not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        QueryCompiler(max_shapes=0)
+
+    # verify error message
+    assert "'max_shapes' must be a positive integer" in str(exc_info.value)
+
+
+def test_compile():
+    """compile() should match records with every queried key-value
+    pair."""
+
+    compiler = QueryCompiler()
+
+    # verify single and multiple field queries
+    query = compiler.compile({"price": 4.99})
+    assert [record["id"] for record in query.filter(RECORDS)] == [1, 3]
+    query = compiler.compile({"price": 4.99, "name": "papaya"})
+    assert [record["id"] for record in query.filter(RECORDS)] == [3]
+    assert query.matches(RECORDS[2]) and not query.matches(RECORDS[0])
+    assert list(compiler.compile({"name": "apple"}).filter(RECORDS)) == []
+
+    # verify unknown fields
+    with pytest.raises(KeyError):
+        compiler.compile({"color": "red"}).matches(RECORDS[0])
+
+
+def test_compile_empty_query():
+    """compile() should match every record for queries without fields."""
+
+    query = QueryCompiler().compile({})
+
+    # verify every record matched
+    assert list(query.filter(RECORDS)) == RECORDS
+
+
+def test_compile_cache():
+    """compile() should reuse the getter of a cached key signature."""
+
+    compiler = QueryCompiler()
+
+    # compile queries of two shapes
+    first = compiler.compile({"price": 4.99, "name": "orange"})
+    second = compiler.compile({"price": 6.99, "name": "banana"})
+    third = compiler.compile({"name": "banana", "price": 6.99})
+
+    # verify getter shared by the same key signature only
+    assert first.getter is second.getter
+    assert first.getter is not third.getter
+    assert second.values == (6.99, "banana")
+    assert second.matches(RECORDS[1]) and third.matches(RECORDS[1])
+
+    # verify cache statistics
+    assert (compiler.hits, compiler.misses, compiler.shapes()) == (1, 2, 2)
+
+
+def test_compile_eviction():
+    """compile() should evict the oldest shape once 'max_shapes' are
+    cached."""
+
+    compiler = QueryCompiler(max_shapes=2)
+    for query_data in [{"id": 1}, {"name": "orange"}, {"price": 4.99}]:
+        compiler.compile(query_data)
+
+    # verify oldest shape compiled again
+    compiler.compile({"id": 1})
+    assert (compiler.misses, compiler.shapes()) == (4, 2)
+
+    # verify clear
+    compiler.clear()
+    assert compiler.shapes() == 0
+
+
+def test_field_key_and_getter():
+    """QueryCompiler should map fields with 'field_key' and 'getter'."""
+
+    # tuple rows, fields by position
+    positions = {"id": 0, "name": 1, "price": 2}
+    rows = [tuple(record.values()) for record in RECORDS]
+    compiler = QueryCompiler(field_key=positions.__getitem__)
+
+    # verify tuple rows
+    query = compiler.compile({"price": 4.99})
+    assert [row[0] for row in query.filter(rows)] == [1, 3]
+    with pytest.raises(KeyError):
+        compiler.compile({"color": "red"})
+
+    # verify models
+    compiler = QueryCompiler(getter=attrgetter)
+    models = [Product(**record) for record in RECORDS]
+    query = compiler.compile({"name": "banana", "price": 6.99})
+    assert list(query.filter(models)) == [models[1]]
+
+
+def test_compile_query():
+    """compile_query() should share the dict records cache."""
+
+    # verify shared getter
+    first = compile_query({"name": "orange"})
+    assert first.getter is DICT_QUERIES.compile({"name": "banana"}).getter
+    assert first.matches(RECORDS[0])
@@ -0,0 +1,243 @@
+"""Test Cases
+
+- query_key() should not depend on the order of query keys
+- query_key() should return None for unhashable query values
+
+- SingleFlight.do() should run concurrent calls of a key once
+- SingleFlight.do() should share exceptions with every caller
+- SingleFlight.do() should not coalesce calls of different keys
+- SingleFlight.do() should not coalesce sequential calls
+- SingleFlight.do() should not join calls detached by forget()
+
+- AsyncSingleFlight.do() should run concurrent calls of a key once
+- AsyncSingleFlight.do() should not cancel the shared call if a
+  caller is cancelled
+"""
+
+
+import asyncio
+import threading
+import time
+import pytest
+from core.services.sql_service.single_flight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    query_key,
+)
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    """Wait until 'condition()' is true."""
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+
+def collapsed(single_flight) -> int:
+    """Return number of collapsed calls."""
+
+    return single_flight.metrics.counter_value(
+        "single_flight_collapsed_total", {"name": single_flight.name}
+    )
+
+
+def test_query_key():
+    """query_key() should not depend on the order of query keys."""
+
+    # verify keys
+    assert query_key("read", {"a": 1, "b": 2}) == query_key(
+        "read", {"b": 2, "a": 1}
+    )
+    assert query_key("read", {"a": 1}) != query_key("delete", {"a": 1})
+
+
+def test_query_key_unhashable():
+    """query_key() should return None for unhashable query values."""
+
+    # verify no key
+    assert query_key("read", {"a": [1]}) is None
+
+
+def run_threads(single_flight, key, function, count: int) -> list:
+    """Call single_flight.do() from 'count' threads, the backend call
+    is released once every other thread waits for it."""
+
+    results: list = [None] * count
+    release = threading.Event()
+
+    def backend():
+        release.wait()
+        return function()
+
+    def worker(index: int) -> None:
+        try:
+            results[index] = single_flight.do(key, backend)
+        except Exception as error:
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=worker, args=(i,)) for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # release backend once every follower joined
+    wait_for(lambda: collapsed(single_flight) == count - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def test_single_flight_coalesce():
+    """SingleFlight.do() should run concurrent calls of a key once."""
+
+    calls = []
+    single_flight = SingleFlight(name="products")
+
+    # run concurrent calls
+    results = run_threads(
+        single_flight, "key", lambda: calls.append(1) or "result", 10
+    )
+
+    # verify single backend call
+    assert calls == [1]
+    assert results == ["result"] * 10
+    assert single_flight.in_flight() == 0
+    assert (
+        single_flight.metrics.counter_value(
+            "single_flight_calls_total", {"name": "products"}
+        )
+        == 10
+    )
+
+
+def test_single_flight_error():
+    """SingleFlight.do() should share exceptions with every caller."""
+
+    def fail():
+        raise RuntimeError("backend down")
+
+    # run concurrent failing calls
+    results = run_threads(SingleFlight(), "key", fail, 5)
+
+    # verify every caller received the exception
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len({id(result) for result in results}) == 1
+
+
+def test_single_flight_keys():
+    """SingleFlight.do() should not coalesce calls of different keys."""
+
+    single_flight = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    # first key blocked in flight
+    thread = threading.Thread(
+        target=lambda: results.append(
+            single_flight.do("first", lambda: release.wait() and "first")
+        )
+    )
+    thread.start()
+    wait_for(lambda: single_flight.in_flight() == 1)
+
+    # verify second key runs its own call
+    assert single_flight.do("second", lambda: "second") == "second"
+    release.set()
+    thread.join()
+    assert results == ["first"]
+    assert collapsed(single_flight) == 0
+
+
+def test_single_flight_sequential():
+    """SingleFlight.do() should not coalesce sequential calls."""
+
+    calls = []
+    single_flight = SingleFlight()
+
+    # run sequential calls
+    for _ in range(3):
+        single_flight.do("key", lambda: calls.append(1))
+
+    # verify every call ran
+    assert calls == [1, 1, 1]
+    assert collapsed(single_flight) == 0
+
+
+def test_single_flight_forget():
+    """SingleFlight.do() should not join calls detached by forget()."""
+
+    single_flight = SingleFlight()
+    release = threading.Event()
+    results = []
+
+    # first call blocked in flight, then detached
+    thread = threading.Thread(
+        target=lambda: results.append(
+            single_flight.do("key", lambda: release.wait() and "first")
+        )
+    )
+    thread.start()
+    wait_for(lambda: single_flight.in_flight() == 1)
+    single_flight.forget()
+
+    # verify next call of the key runs its own call
+    assert single_flight.do("key", lambda: "second") == "second"
+    release.set()
+    thread.join()
+    assert results == ["first"]
+    assert collapsed(single_flight) == 0
+    assert single_flight.in_flight() == 0
+
+
+def test_async_single_flight_coalesce():
+    """AsyncSingleFlight.do() should run concurrent calls of a key once."""
+
+    calls = []
+    single_flight = AsyncSingleFlight(name="products")
+
+    async def backend():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(
+            *[single_flight.do("key", backend) for _ in range(10)]
+        )
+
+    # verify single backend call
+    assert asyncio.run(main()) == ["result"] * 10
+    assert calls == [1]
+    assert collapsed(single_flight) == 9
+    assert single_flight.in_flight() == 0
+
+
+def test_async_single_flight_cancel():
+    """AsyncSingleFlight.do() should not cancel the shared call if a
+    caller is cancelled."""
+
+    single_flight = AsyncSingleFlight()
+
+    async def backend():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        first = asyncio.ensure_future(single_flight.do("key", backend))
+        second = asyncio.ensure_future(single_flight.do("key", backend))
+        await asyncio.sleep(0)
+
+        # cancel first caller
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    # verify second caller received the result
+    assert asyncio.run(main()) == "result"
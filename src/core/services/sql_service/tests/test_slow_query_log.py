@@ -0,0 +1,224 @@
+"""Test Cases
+
+- fingerprint() should depend on operation and sorted keys only
+
+- record() should not log queries below thresholds
+- record() should log queries exceeding latency threshold with their plan
+- record() should log queries exceeding rows scanned threshold
+- record() should call explain only for slow queries
+- stats() should aggregate queries per fingerprint, most rows scanned first
+- dump() should return stats as dicts
+- reset() should remove all slow queries and stats
+
+- InstrumentedSQLService should record calls in the slow query log
+"""
+
+
+import logging
+from core.services.sql_service.instrumented_sql_service import (
+    InstrumentedSQLService,
+)
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.slow_query_log import SlowQueryLog, fingerprint
+from features.product.models.product import Product
+
+
+def test_fingerprint():
+    """fingerprint() should depend on operation and sorted keys only."""
+
+    # verify fingerprints
+    assert fingerprint("read_multiple", ["price", "name"]) == (
+        "read_multiple(name=?,price=?)"
+    )
+    assert fingerprint("read_single", {"id": 1}.keys()) == "read_single(id=?)"
+    assert fingerprint("delete", []) == "delete()"
+    assert fingerprint("create_many", [], batch=2) == "create_many(batch=2)"
+
+
+def test_record_fast_query(caplog):
+    """record() should not log queries below thresholds."""
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(latency_threshold=1.0)
+
+    # record fast query
+    with caplog.at_level(logging.WARNING):
+        slow = slow_query_log.record("read_single", {"id": 1}, 0.001, 10)
+
+    # verify nothing logged
+    assert slow is False
+    assert slow_query_log.entries() == []
+    assert caplog.records == []
+
+
+def test_record_slow_latency(caplog):
+    """record() should log queries exceeding latency threshold with
+    their plan."""
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(latency_threshold=0.5)
+
+    # record slow query
+    with caplog.at_level(logging.WARNING):
+        slow = slow_query_log.record(
+            "read_multiple",
+            {"name": "orange"},
+            0.75,
+            100,
+            lambda: "FULL SCAN",
+        )
+
+    # verify slow query kept
+    assert slow is True
+    entry = slow_query_log.entries()[0]
+    assert entry.fingerprint == "read_multiple(name=?)"
+    assert entry.query_data == {"name": "orange"}
+    assert entry.seconds == 0.75
+    assert entry.rows_scanned == 100
+    assert entry.plan == "FULL SCAN"
+
+    # verify slow query logged
+    assert "slow query read_multiple(name=?)" in caplog.text
+    assert "plan: FULL SCAN" in caplog.text
+
+
+def test_record_slow_rows_scanned():
+    """record() should log queries exceeding rows scanned threshold."""
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(
+        latency_threshold=None, rows_scanned_threshold=1000
+    )
+
+    # verify queries
+    assert slow_query_log.record("delete", {"id": 1}, 10.0, 1000) is False
+    assert slow_query_log.record("delete", {"id": 1}, 0.0, 1001) is True
+
+
+def test_record_explain_only_slow():
+    """record() should call explain only for slow queries."""
+
+    calls: list[int] = []
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(latency_threshold=0.5)
+
+    # record fast and slow queries
+    slow_query_log.record(
+        "read_single", {}, 0.1, None, lambda: calls.append(1)
+    )
+    slow_query_log.record(
+        "read_single", {}, 0.9, None, lambda: calls.append(2)
+    )
+
+    # verify explain calls
+    assert calls == [2]
+
+
+def test_stats():
+    """stats() should aggregate queries per fingerprint, most rows
+    scanned first."""
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(latency_threshold=0.5)
+
+    # record queries
+    slow_query_log.record("read_single", {"id": 1}, 0.25, 1)
+    slow_query_log.record("read_single", {"id": 2}, 0.75, 2)
+    slow_query_log.record("read_multiple", {"name": "apple"}, 0.25, 500)
+
+    # verify stats order
+    stats = slow_query_log.stats()
+    assert [item.fingerprint for item in stats] == [
+        "read_multiple(name=?)",
+        "read_single(id=?)",
+    ]
+
+    # verify aggregated stats
+    assert stats[1].calls == 2
+    assert stats[1].slow_calls == 1
+    assert stats[1].total_seconds == 1.0
+    assert stats[1].mean_seconds == 0.5
+    assert stats[1].max_seconds == 0.75
+    assert stats[1].rows_scanned == 3
+
+
+def test_dump():
+    """dump() should return stats as dicts."""
+
+    # create slow query log
+    slow_query_log = SlowQueryLog(latency_threshold=0.5)
+
+    # record slow query
+    slow_query_log.record("delete", {"price": 1.0}, 1.0, 5, lambda: "plan")
+
+    # verify dump
+    assert slow_query_log.dump() == [
+        {
+            "fingerprint": "delete(price=?)",
+            "calls": 1,
+            "slow_calls": 1,
+            "total_seconds": 1.0,
+            "mean_seconds": 1.0,
+            "max_seconds": 1.0,
+            "rows_scanned": 5,
+            "plan": "plan",
+        }
+    ]
+
+
+def test_reset():
+    """reset() should remove all slow queries and stats."""
+
+    # create slow query log with a slow query
+    slow_query_log = SlowQueryLog(latency_threshold=0.5)
+    slow_query_log.record("delete", {"id": 1}, 1.0)
+
+    # reset slow query log
+    slow_query_log.reset()
+
+    # verify nothing kept
+    assert slow_query_log.entries() == []
+    assert slow_query_log.stats() == []
+
+
+def test_instrumented_service_slow_query_log():
+    """InstrumentedSQLService should record calls in the slow query log."""
+
+    # create instrumented service logging every scan of 2+ records
+    slow_query_log = SlowQueryLog(
+        latency_threshold=None, rows_scanned_threshold=1
+    )
+    service = InstrumentedSQLService[Product](
+        MySQLService[Product](),
+        table="products",
+        slow_query_log=slow_query_log,
+    )
+
+    # add records in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+    DATABASE.append({"id": 2, "name": "banana", "price": 6.99})
+
+    # call operations
+    service.read_single({"id": 1})
+    service.read_multiple({"price": 4.99})
+    service.update(Product(id=2, name="banana", price=7.99))
+    service.update_many(
+        [
+            Product(id=1, name="orange", price=5.99),
+            Product(id=2, name="banana", price=8.99),
+        ]
+    )
+
+    # verify slow queries, bulk writes by batch size
+    entries = slow_query_log.entries()
+    assert [entry.fingerprint for entry in entries] == [
+        "read_multiple(price=?)",
+        "update(id=?)",
+        "update_many(batch=2)",
+    ]
+    assert entries[0].plan == "FULL SCAN of 2 records, filter: price"
+    assert entries[2].plan is None
+
+    # remove records from database
+    DATABASE.clear()
@@ -22,11 +22,33 @@
 - SQLService should have a delete() method
     -- with parameter query_data of type 'dict'
     -- with return type of 'None'
+
+- create_many() default implementation should call create()
+  for every record
+
+- create_new() default implementation should call create_many()
+
+- update_many() default implementation should call update()
+  for every record
+
+- read_by_ids() should raise TypeError if 'ids' is not a list
+- read_by_ids() default implementation should call read_single()
+  for every id
+
+- iter_chunks() should raise ValueError if 'chunk_size' is not positive
+- iter_chunks() default implementation should split read_multiple()
+  result in chunks
+
+- read_versioned() and update_if_version() default implementations
+  should raise SQLException
 """
 
 
 import inspect
+import pytest
 from abc import ABCMeta
+from unittest.mock import Mock
+from core.services.sql_service.sql_exception import SQLException
 from core.services.sql_service.sql_service import SQLService
 
 
@@ -160,3 +182,126 @@ def test_delete_method():
     # verify method return type
     signature = inspect.signature(delete_method)
     assert signature.return_annotation is None
+
+
+def test_create_many_default():
+    """create_many() default implementation should call create()
+    for every record."""
+
+    # sql service with mocked create method
+    sql_service = Mock(spec=SQLService)
+    sql_service.create_many = SQLService.create_many.__get__(sql_service)
+
+    # create records
+    sql_service.create_many(["first", "second"])
+
+    # verify create calls
+    assert sql_service.create.call_args_list == [
+        (("first",),),
+        (("second",),),
+    ]
+
+
+def test_create_new_default():
+    """create_new() default implementation should call create_many()."""
+
+    # sql service with mocked create_many method
+    sql_service = Mock(spec=SQLService)
+    sql_service.create_new = SQLService.create_new.__get__(sql_service)
+
+    # create records
+    sql_service.create_new(["first", "second"])
+
+    # verify create_many call
+    sql_service.create_many.assert_called_once_with(["first", "second"])
+
+
+def test_update_many_default():
+    """update_many() default implementation should call update()
+    for every record."""
+
+    # sql service with mocked update method
+    sql_service = Mock(spec=SQLService)
+    sql_service.update_many = SQLService.update_many.__get__(sql_service)
+
+    # update records
+    sql_service.update_many(["first", "second"])
+
+    # verify update calls
+    assert sql_service.update.call_args_list == [
+        (("first",),),
+        (("second",),),
+    ]
+
+
+def test_iter_chunks_chunk_size():
+    """iter_chunks() should raise ValueError if 'chunk_size'
+    is not positive."""
+
+    # sql service with default iter_chunks method
+    sql_service = Mock(spec=SQLService)
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        next(SQLService.iter_chunks(sql_service, 0))
+
+    # verify error message
+    assert "'chunk_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_iter_chunks_default():
+    """iter_chunks() default implementation should split read_multiple()
+    result in chunks."""
+
+    # sql service with mocked read_multiple method
+    sql_service = Mock(spec=SQLService)
+    sql_service.read_multiple.return_value = [1, 2, 3, 4, 5]
+
+    # verify chunks
+    assert list(SQLService.iter_chunks(sql_service, 2)) == [
+        [1, 2],
+        [3, 4],
+        [5],
+    ]
+    sql_service.read_multiple.assert_called_once_with({})
+
+
+def test_read_by_ids_incorrect():
+    """read_by_ids() should raise TypeError if 'ids' is not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        SQLService.read_by_ids(Mock(spec=SQLService), 1)  # type: ignore
+
+    # verify error message
+    assert "'ids' should be a valid list." in str(exc_info.value)
+
+
+def test_read_by_ids_default():
+    """read_by_ids() default implementation should call read_single()
+    for every id."""
+
+    # sql service with mocked read_single method
+    sql_service = Mock(spec=SQLService)
+    sql_service.read_single.side_effect = lambda query: query["id"] * 10
+
+    # verify results and calls
+    assert SQLService.read_by_ids(sql_service, [1, 2]) == [10, 20]
+    assert sql_service.read_single.call_args_list == [
+        (({"id": 1},),),
+        (({"id": 2},),),
+    ]
+
+
+def test_versions_not_supported():
+    """read_versioned() and update_if_version() default implementations
+    should raise SQLException."""
+
+    sql_service = Mock(spec=SQLService)
+
+    # verify SQLException raised
+    with pytest.raises(SQLException) as exc_info:
+        SQLService.read_versioned(sql_service, 1)
+    assert "row versions are not supported" in str(exc_info.value)
+    with pytest.raises(SQLException):
+        SQLService.update_if_version(sql_service, Mock(), 0)
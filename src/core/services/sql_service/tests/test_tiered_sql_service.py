@@ -0,0 +1,329 @@
+"""Test Cases
+
+- TieredSQLService should be of type SQLService
+- TieredSQLService should raise ValueError if 'max_hot_bytes' is not
+  positive, or for unsupported field types
+- Every operation should raise TypeError for invalid arguments
+- Least recently used rows should be evicted to the cold tier once the
+  hot tier exceeds its budget
+- Operations by id should promote cold rows and record the tier of
+  every lookup
+- Queries on other fields should read both tiers without promoting
+- create() should raise SQLException for ids of either tier
+- update() and delete() should write rows of either tier
+- update() should promote cold rows without counting reads
+- iter_chunks() should stream the rows of both tiers
+- iter_chunks() should yield every row once while reads promote and
+  evict rows
+- Cold rows should be kept in 'path' and its temporary file removed
+  by close()
+"""
+
+
+import os
+import pytest
+from pydantic import BaseModel
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+from core.services.sql_service.tiered_sql_service import (
+    TieredSQLService,
+    row_bytes,
+)
+from features.product.models.product import Product
+
+
+def make_product(product_id: int) -> Product:
+    """Return product of an id, prices repeat every 3 ids."""
+
+    return Product(
+        id=product_id, name=f"product-{product_id}", price=product_id % 3 + 1.0
+    )
+
+
+# budget of about 5 hot products
+BUDGET = 5 * row_bytes((20, "product-20", 3.0))
+
+
+def make_service(
+    change_feed: ChangeFeed | None = None,
+) -> TieredSQLService[Product]:
+    """Return service holding products 1 to 20, 5 of them hot."""
+
+    service = TieredSQLService[Product](
+        table="products", max_hot_bytes=BUDGET, change_feed=change_feed
+    )
+    service.create_many([make_product(i) for i in range(1, 21)])
+
+    return service
+
+
+def reads(service: TieredSQLService, tier: str) -> float:
+    """Return number of lookups by id served by a tier."""
+
+    return service.metrics.counter_value(
+        "tiered_reads_total", {"table": "products", "tier": tier}
+    )
+
+
+def test_tiered_service_type():
+    """TieredSQLService should be of type SQLService."""
+
+    # verify type
+    with TieredSQLService[Product]() as service:
+        assert isinstance(service, SQLService)
+
+
+def test_tiered_service_incorrect():
+    """TieredSQLService should raise ValueError if 'max_hot_bytes' is not
+    positive, or for unsupported field types."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        TieredSQLService[Product](max_hot_bytes=0)
+    assert "'max_hot_bytes' must be a positive integer" in str(exc_info.value)
+
+    class Tagged(BaseModel):
+        id: int
+        tags: list[str]
+
+    with TieredSQLService[Tagged]() as service:
+        with pytest.raises(ValueError) as exc_info:
+            service.create(Tagged(id=1, tags=[]))
+        assert "unsupported field type: tags" in str(exc_info.value)
+
+
+def test_invalid_arguments():
+    """Every operation should raise TypeError for invalid arguments."""
+
+    with TieredSQLService[Product]() as service:
+        # verify TypeError raised
+        for call, message in [
+            (lambda: service.create("str"), "'record' should be a valid"),
+            (lambda: service.create_many("str"), "'records' should be"),
+            (lambda: service.create_many([{}]), "'record' should be"),
+            (lambda: service.read_single("str"), "'query_data' should be"),
+            (lambda: service.read_multiple("str"), "'query_data' should"),
+            (lambda: service.read_by_ids("str"), "'ids' should be a valid"),
+            (lambda: service.update("str"), "'updated_record' should be"),
+            (lambda: service.update_many("str"), "'updated_records' should"),
+            (lambda: service.update_many([{}]), "'updated_record' should"),
+            (lambda: service.delete("str"), "'query_data' should be"),
+        ]:
+            with pytest.raises(TypeError) as exc_info:
+                call()
+            assert message in str(exc_info.value)
+
+
+def test_eviction():
+    """Least recently used rows should be evicted to the cold tier once
+    the hot tier exceeds its budget."""
+
+    with make_service() as service:
+        # verify tiers
+        assert service.hot_rows == 5
+        assert service.cold_rows == 15
+        assert service.hot_bytes <= BUDGET
+        assert (
+            service.metrics.counter_value(
+                "tiered_evictions_total", {"table": "products"}
+            )
+            == 15
+        )
+
+        # verify last created products are hot
+        service.read_by_ids([16, 17, 18, 19, 20])
+        assert reads(service, "hot") == 5
+        assert reads(service, "cold") == 0
+
+
+def test_promotion():
+    """Operations by id should promote cold rows and record the tier of
+    every lookup."""
+
+    with make_service() as service:
+        # verify cold read promotes the row, evicting the oldest hot row
+        assert service.read_single({"id": 1}) == make_product(1)
+        assert reads(service, "cold") == 1
+        assert service.read_multiple({"id": 1}) == [make_product(1)]
+        assert reads(service, "hot") == 1
+        assert service.read_single({"id": 16}) == make_product(16)
+        assert reads(service, "cold") == 2
+        assert (service.hot_rows, service.cold_rows) == (5, 15)
+
+        # verify misses
+        assert service.read_by_ids([99, "1"]) == [None, None]
+        assert reads(service, "miss") == 2
+
+        # verify hit rate and latency
+        assert service.hit_rate() == 1 / 3
+        histogram = service.metrics.histogram(
+            "tiered_read_latency_seconds",
+            {"table": "products", "tier": "cold"},
+        )
+        assert histogram is not None and histogram.count == 2
+        assert (
+            service.metrics.counter_value(
+                "tiered_promotions_total", {"table": "products"}
+            )
+            == 2
+        )
+
+
+def test_scans():
+    """Queries on other fields should read both tiers without
+    promoting."""
+
+    with make_service() as service:
+        # verify hot rows first, then cold rows in id order
+        expected = [make_product(i) for i in [17, 20, 2, 5, 8, 11, 14]]
+        assert service.read_multiple({"price": 3.0}) == expected
+        assert service.last_rows_scanned == 20
+        assert service.read_single({"price": 3.0}) == make_product(17)
+        assert service.read_single({"price": 2.0, "id": 4}) == make_product(4)
+        assert service.read_multiple({"name": "product-3"}) == [
+            make_product(3)
+        ]
+
+        # verify values SQLite would convert are compared in Python
+        assert service.read_multiple({"name": 3}) == []
+        assert service.read_multiple({"id": "3", "price": 1.0}) == []
+        assert service.read_multiple({"price": 3}) == expected
+        assert service.read_single({"price": [3.0]}) is None
+
+        # verify nothing promoted
+        assert (service.hot_rows, service.cold_rows) == (5, 15)
+        assert reads(service, "cold") == 0
+
+        # verify plan
+        assert service.explain({"price": 3.0}) == (
+            "TIERED SCAN of 5 hot and 15 cold records, filter: price"
+        )
+        assert service.explain({"id": 1}) == (
+            "ID LOOKUP of 5 hot and 15 cold records"
+        )
+
+
+def test_create_duplicate_id():
+    """create() should raise SQLException for ids of either tier."""
+
+    with make_service() as service:
+        # verify SQLException raised for hot and cold ids
+        for product_id in [20, 1]:
+            with pytest.raises(SQLException) as exc_info:
+                service.create(make_product(product_id))
+            assert f"duplicate id: {product_id}" in str(exc_info.value)
+
+        # verify nothing inserted
+        assert (service.hot_rows, service.cold_rows) == (5, 15)
+
+
+def test_writes():
+    """update() and delete() should write rows of either tier."""
+
+    feed = ChangeFeed()
+    with make_service(feed) as service:
+        # update hot and cold rows
+        hot = Product(id=20, name="updated", price=9.0)
+        cold = Product(id=1, name="updated", price=9.0)
+        service.update_many([hot, cold])
+        service.update(Product(id=99, name="missing", price=9.0))
+
+        # verify updates
+        assert service.read_multiple({"name": "updated"}) == [hot, cold]
+        assert feed.read()[-1].before == make_product(1).model_dump()
+        assert feed.read()[-1].after == cold.model_dump()
+
+        # delete hot and cold rows by query and by id
+        service.delete({"price": 1.0})
+        service.delete({"id": 2})
+        service.delete({"id": 20})
+
+        # verify deletes
+        remaining = [
+            product.id
+            for chunk in service.iter_chunks(100)
+            for product in chunk
+        ]
+        assert sorted(remaining) == [1, 4, 5, 7, 8, 10, 11, 13, 14, 16, 17, 19]
+        assert service.hot_rows + service.cold_rows == 12
+        deleted = [change.key for change in feed.read() if not change.after]
+        assert sorted(deleted) == [2, 3, 6, 9, 12, 15, 18, 20]
+
+
+def test_update_reads():
+    """update() should promote cold rows without counting reads."""
+
+    with make_service() as service:
+        service.update(Product(id=1, name="updated", price=9.0))
+        service.update(Product(id=20, name="updated", price=9.0))
+
+        # verify no reads recorded
+        for tier in ["hot", "cold", "miss"]:
+            assert reads(service, tier) == 0
+
+        # verify cold row promoted
+        assert (service.hot_rows, service.cold_rows) == (5, 15)
+        assert (
+            service.metrics.counter_value(
+                "tiered_promotions_total", {"table": "products"}
+            )
+            == 1
+        )
+        assert service.read_single({"id": 1}).name == "updated"
+        assert reads(service, "hot") == 1
+
+
+def test_iter_chunks():
+    """iter_chunks() should stream the rows of both tiers."""
+
+    with make_service() as service:
+        # verify ValueError raised
+        with pytest.raises(ValueError):
+            next(service.iter_chunks(0))
+
+        # verify chunks
+        chunks = list(service.iter_chunks(4))
+        assert [len(chunk) for chunk in chunks] == [4, 4, 4, 4, 4]
+        assert sorted(product.id for chunk in chunks for product in chunk) == (
+            list(range(1, 21))
+        )
+        assert service.last_rows_scanned == 20
+
+
+def test_iter_chunks_promotion():
+    """iter_chunks() should yield every row once while reads promote and
+    evict rows."""
+
+    with make_service() as service:
+        chunks = service.iter_chunks(1)
+        ids = [product.id for product in next(chunks)]
+
+        # promote cold rows, evicting hot rows not read yet
+        for product_id in [1, 2, 3]:
+            service.read_single({"id": product_id})
+        service.delete({"id": 4})
+
+        # verify every remaining row yielded once
+        ids += [product.id for chunk in chunks for product in chunk]
+        assert sorted(ids) == [i for i in range(1, 21) if i != 4]
+
+
+def test_path(tmp_path):
+    """Cold rows should be kept in 'path' and its temporary file removed
+    by close()."""
+
+    # verify temporary file removed
+    service = make_service()
+    assert os.path.exists(service.path)
+    service.close()
+    assert not os.path.exists(service.path)
+
+    # verify cold rows kept in path
+    path = str(tmp_path / "products.sqlite")
+    with TieredSQLService[Product](max_hot_bytes=BUDGET, path=path) as service:
+        service.create_many([make_product(i) for i in range(1, 21)])
+    with TieredSQLService[Product](path=path) as service:
+        assert service.read_single({"id": 1}) == make_product(1)
+        assert service.read_single({"id": 20}) is None
+    assert os.path.exists(path)
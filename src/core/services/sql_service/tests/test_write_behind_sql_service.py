@@ -0,0 +1,407 @@
+"""Test Cases
+
+- WriteBehindSQLService should be of type SQLService
+- WriteBehindSQLService should raise TypeError if 'sql_service' is
+  not of type SQLService
+- WriteBehindSQLService should raise ValueError if a threshold is
+  not positive
+- Writes should be buffered until flush()
+- Repeated writes of an id should be coalesced
+- create() and create_many() should raise SQLException for stored or
+  buffered ids
+- Reads should see buffered writes
+- update() of a missing record should stay invisible
+- delete() by other queries than id should flush first
+- Buffer should be flushed once 'max_pending' ids are buffered
+- Buffer should be flushed every 'flush_interval' seconds until closed
+- Writes of a failed flush should stay buffered
+- Writes rejected by the wrapped service should be dropped and logged,
+  the rest of their batch flushed
+- Versioned reads and updates should flush first
+"""
+
+
+import pytest
+from unittest.mock import Mock
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+from core.services.sql_service.tests.test_single_flight import wait_for
+from core.services.sql_service.write_behind_sql_service import (
+    WriteBehindSQLService,
+)
+from features.product.models.product import Product
+
+
+# records of the table
+RECORDS = [
+    {"id": 1, "name": "orange", "price": 4.99},
+    {"id": 2, "name": "banana", "price": 6.99},
+]
+
+
+def make_service(
+    sql_service: SQLService | None = None,
+    max_pending: int = 1000,
+    flush_interval: float | None = None,
+) -> WriteBehindSQLService:
+    """Return write-behind service for 'products' table."""
+
+    return WriteBehindSQLService[Product](
+        sql_service or MySQLService[Product](),
+        table="products",
+        max_pending=max_pending,
+        flush_interval=flush_interval,
+    )
+
+
+def flushes(service: WriteBehindSQLService, reason: str) -> int:
+    """Return number of flushes of 'products' table for 'reason'."""
+
+    return service.metrics.counter_value(
+        "write_behind_flushes_total", {"table": "products", "reason": reason}
+    )
+
+
+def test_write_behind_service_type():
+    """WriteBehindSQLService should be of type SQLService."""
+
+    # verify type
+    assert isinstance(make_service(), SQLService)
+
+
+def test_write_behind_service_incorrect():
+    """WriteBehindSQLService should raise TypeError if 'sql_service' is
+    not of type SQLService."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        WriteBehindSQLService("abcd", table="products")  # type: ignore
+
+    # verify error message
+    assert "'sql_service' should be of type 'SQLService'" in str(
+        exc_info.value
+    )
+
+
+def test_write_behind_thresholds_incorrect():
+    """WriteBehindSQLService should raise ValueError if a threshold is
+    not positive."""
+
+    # verify ValueError raised for max_pending
+    with pytest.raises(ValueError) as exc_info:
+        make_service(max_pending=0)
+    assert "'max_pending' must be a positive integer" in str(exc_info.value)
+
+    # verify ValueError raised for flush_interval
+    with pytest.raises(ValueError) as exc_info:
+        make_service(flush_interval=0)
+    assert "'flush_interval' must be a positive number" in str(exc_info.value)
+
+
+def test_buffered_writes():
+    """Writes should be buffered until flush()."""
+
+    # add records to database
+    DATABASE.extend(dict(record) for record in RECORDS)
+
+    service = make_service()
+    service.create(Product(id=3, name="papaya", price=1.99))
+    service.update(Product(id=1, name="orange", price=5.99))
+    service.delete({"id": 2})
+
+    # verify database untouched
+    assert DATABASE == RECORDS
+    assert service.pending() == 3
+
+    # verify flush applies every write
+    assert service.flush() == 3
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 5.99},
+        {"id": 3, "name": "papaya", "price": 1.99},
+    ]
+    assert service.pending() == 0
+    assert flushes(service, "manual") == 1
+
+    # verify empty flush
+    assert service.flush() == 0
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_coalesced_writes():
+    """Repeated writes of an id should be coalesced."""
+
+    # mock service without stored records
+    mock = Mock(spec=SQLService)
+    mock.read_by_ids.side_effect = lambda ids: [None] * len(ids)
+    service = make_service(mock)
+
+    # several price updates of the same id
+    for price in [1.99, 2.99, 3.99]:
+        service.update(Product(id=1, name="orange", price=price))
+
+    # created then updated, created then deleted
+    service.create(Product(id=2, name="banana", price=6.99))
+    service.update(Product(id=2, name="banana", price=7.99))
+    service.create(Product(id=3, name="papaya", price=1.99))
+    service.delete({"id": 3})
+
+    # verify single write per id
+    service.flush()
+    mock.update_many.assert_called_once_with(
+        [Product(id=1, name="orange", price=3.99)]
+    )
+    mock.create_many.assert_called_once_with(
+        [Product(id=2, name="banana", price=7.99)]
+    )
+    mock.delete.assert_not_called()
+
+    # verify metrics
+    labels = {"table": "products"}
+    assert (
+        service.metrics.counter_value("write_behind_writes_total", labels) == 7
+    )
+    assert (
+        service.metrics.counter_value("write_behind_coalesced_total", labels)
+        == 4
+    )
+    assert (
+        service.metrics.counter_value("write_behind_flushed_total", labels)
+        == 2
+    )
+
+
+def test_create_duplicate_id():
+    """create() and create_many() should raise SQLException for stored or
+    buffered ids."""
+
+    # add records to database
+    DATABASE.extend(dict(record) for record in RECORDS)
+
+    service = make_service()
+    service.create(Product(id=3, name="papaya", price=1.99))
+
+    # verify stored, buffered and repeated ids rejected
+    for records in [
+        [Product(id=1, name="apple", price=7.99)],
+        [Product(id=3, name="apple", price=7.99)],
+        [
+            Product(id=4, name="apple", price=7.99),
+            Product(id=4, name="apple", price=7.99),
+        ],
+    ]:
+        with pytest.raises(SQLException):
+            service.create_many(records)
+    with pytest.raises(SQLException) as exc_info:
+        service.create(Product(id=1, name="apple", price=7.99))
+    assert "duplicate id: 1" in str(exc_info.value)
+
+    # verify nothing buffered by rejected calls
+    assert service.pending() == 1
+
+    # verify deleted id can be created again
+    service.delete({"id": 1})
+    service.create(Product(id=1, name="apple", price=7.99))
+    service.flush()
+    assert {"id": 1, "name": "apple", "price": 7.99} in DATABASE
+    assert len(DATABASE) == 3
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_read_your_writes():
+    """Reads should see buffered writes."""
+
+    # add records to database
+    DATABASE.extend(dict(record) for record in RECORDS)
+
+    service = make_service()
+    orange = Product(id=1, name="orange", price=6.99)
+    papaya = Product(id=3, name="papaya", price=6.99)
+    service.update(orange)
+    service.create(papaya)
+    service.delete({"id": 2})
+
+    # verify reads by id
+    assert service.read_single({"id": 1}) == orange
+    assert service.read_single({"id": 2}) is None
+    assert service.read_by_ids([3, 2, 1, 3]) == [papaya, None, orange, papaya]
+
+    # verify reads by other queries
+    assert service.read_multiple({"price": 6.99}) == [orange, papaya]
+    assert service.read_multiple({"price": 4.99}) == []
+    assert service.read_single({"name": "papaya"}) == papaya
+
+    # verify database untouched
+    assert DATABASE == RECORDS
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_update_missing():
+    """update() of a missing record should stay invisible."""
+
+    service = make_service()
+    service.update(Product(id=1, name="orange", price=4.99))
+
+    # verify update not visible
+    assert service.read_single({"id": 1}) is None
+    assert service.read_multiple({"name": "orange"}) == []
+
+    # verify flush does not create the record
+    service.flush()
+    assert DATABASE == []
+
+
+def test_delete_query():
+    """delete() by other queries than id should flush first."""
+
+    # add records to database
+    DATABASE.extend(dict(record) for record in RECORDS)
+
+    service = make_service()
+    service.create(Product(id=3, name="banana", price=1.99))
+    service.delete({"name": "banana"})
+
+    # verify buffered and stored records deleted
+    assert DATABASE == RECORDS[:1]
+    assert flushes(service, "query") == 1
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_flush_size():
+    """Buffer should be flushed once 'max_pending' ids are buffered."""
+
+    service = make_service(max_pending=2)
+    service.create(Product(id=1, name="orange", price=4.99))
+    service.update(Product(id=1, name="orange", price=5.99))
+
+    # verify coalesced write not counted twice
+    assert DATABASE == []
+
+    # verify flush once two ids are buffered
+    service.create(Product(id=2, name="banana", price=6.99))
+    assert len(DATABASE) == 2
+    assert flushes(service, "size") == 1
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_flush_interval():
+    """Buffer should be flushed every 'flush_interval' seconds
+    until closed."""
+
+    with make_service(flush_interval=0.01) as service:
+        service.create(Product(id=1, name="orange", price=4.99))
+
+        # verify flushed by the flush thread
+        wait_for(lambda: len(DATABASE) == 1)
+        assert flushes(service, "interval") >= 1
+
+        service.create(Product(id=2, name="banana", price=6.99))
+
+    # verify flushed on close
+    assert len(DATABASE) == 2
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_flush_error():
+    """Writes of a failed flush should stay buffered."""
+
+    # mock service failing once on create_many()
+    mock = Mock(spec=SQLService)
+    mock.read_by_ids.side_effect = lambda ids: [None] * len(ids)
+    mock.create_many.side_effect = [OSError("down"), None]
+    service = make_service(mock)
+
+    orange = Product(id=1, name="orange", price=4.99)
+    service.create(orange)
+
+    # verify exception raised and write kept
+    with pytest.raises(OSError):
+        service.flush()
+    assert service.pending() == 1
+    assert service.read_single({"id": 1}) == orange
+    assert (
+        service.metrics.counter_value(
+            "write_behind_flush_errors_total", {"table": "products"}
+        )
+        == 1
+    )
+
+    # verify write retried
+    assert service.flush() == 1
+    assert mock.create_many.call_count == 2
+
+
+def test_flush_rejected(caplog):
+    """Writes rejected by the wrapped service should be dropped and logged,
+    the rest of their batch flushed."""
+
+    # add records in database
+    DATABASE.extend(dict(record) for record in RECORDS)
+
+    service = make_service(max_pending=3)
+    service.update(Product(id=2, name="banana", price=7.99))
+    service.create(Product(id=3, name="papaya", price=1.99))
+
+    # same id created directly in the wrapped service
+    DATABASE.append({"id": 3, "name": "melon", "price": 2.99})
+
+    # verify size flush sends the other writes and drops the rejected one
+    with caplog.at_level("WARNING", logger="sql.write_behind"):
+        service.create(Product(id=4, name="apple", price=3.99))
+    assert service.pending() == 0
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 4.99},
+        {"id": 2, "name": "banana", "price": 7.99},
+        {"id": 3, "name": "melon", "price": 2.99},
+        {"id": 4, "name": "apple", "price": 3.99},
+    ]
+    assert (
+        service.metrics.counter_value(
+            "write_behind_rejected_total", {"table": "products"}
+        )
+        == 1
+    )
+    assert "write of products id 3 rejected: duplicate id: 3" in caplog.text
+
+    # verify later flushes not failing
+    service.create(Product(id=5, name="mango", price=5.99))
+    assert service.flush() == 1
+    assert len(DATABASE) == 5
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_versioned_flush():
+    """Versioned reads and updates should flush first."""
+
+    service = make_service()
+    orange = Product(id=1, name="orange", price=4.99)
+    service.create(orange)
+
+    # verify buffered create is versioned
+    record, version = service.read_versioned(1)
+    assert record == orange
+    assert flushes(service, "version") == 1
+
+    # verify compare-and-set reaches the wrapped service
+    ripe = Product(id=1, name="orange", price=5.99)
+    service.update(ripe)
+    with pytest.raises(SQLException):
+        service.update_if_version(orange, version)
+    assert DATABASE == [ripe.model_dump()]
+
+    # remove records from database
+    DATABASE.clear()
@@ -0,0 +1,675 @@
+"""This file includes a SQLService keeping hot records in memory and cold
+records on disk.
+
+The hot tier holds rows (tuples of field values) in least recently used
+order within a memory budget of 'max_hot_bytes'. Once the budget is
+exceeded, least recently used rows are evicted to the cold tier, a SQLite
+table with one column per field and the id as primary key. A row lives
+in a single tier: operations by id (read by id, read_by_ids, update)
+promote a cold row back to the hot tier, while queries on other fields
+read cold rows in place so that a scan does not flush the hot tier.
+
+Queries on cold rows are pushed down to SQLite as 'field = ?' filters
+when SQLite compares the value like Python does (str values on str
+fields, numbers on number fields), other values are checked in Python.
+Fields must be int, float, str or bool.
+
+Recorded metrics (labels: table, tier):
+    tiered_reads_total: Lookups by id, tier is 'hot', 'cold' or 'miss'.
+    tiered_read_latency_seconds: Latency histogram of lookups by id.
+    tiered_promotions_total: Rows moved to the hot tier (label: table).
+    tiered_evictions_total: Rows moved to the cold tier (label: table).
+"""
+
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Hashable, Iterator
+from pydantic import BaseModel
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.change_feed import (
+    DELETE,
+    INSERT,
+    UPDATE,
+    ChangeFeed,
+)
+from core.services.sql_service.id_table import id_query
+from core.services.sql_service.query_compiler import (
+    CompiledQuery,
+    QueryCompiler,
+)
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import RowsScanned, SQLService
+
+
+# default memory budget of the hot tier
+MAX_HOT_BYTES = 64 * 1024 * 1024
+
+# estimated bytes of a hot tier entry besides its row
+_ENTRY_BYTES = 100
+
+# ids per SQLite lookup, under its limit of 999 parameters
+_MAX_PARAMETERS = 500
+
+# SQLite column types of supported field types
+_SQL_TYPES: dict[Any, str] = {
+    int: "INTEGER",
+    float: "REAL",
+    str: "TEXT",
+    bool: "INTEGER",
+}
+
+# hot, cold and missing lookups
+HOT, COLD, MISS = "hot", "cold", "miss"
+
+
+def row_bytes(row: tuple) -> int:
+    """Return estimated memory of a hot row."""
+
+    return _ENTRY_BYTES + sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+
+
+class TieredSQLService[T](SQLService):
+    """SQL service storing hot records in memory and cold ones in SQLite.
+
+    Every inserted, updated and deleted record is appended to
+    'change_feed' if provided. Queries other than by id return hot
+    records first, least recently used first, then cold records in id
+    order. Close the service to remove its SQLite file if 'path' was not
+    given.
+
+    Args:
+        table (str): Table name, used as metrics label.
+        max_hot_bytes (int): Memory budget of the hot tier.
+        path (str | None): SQLite file of the cold tier, a temporary file
+            if None.
+        metrics (MetricsRegistry | None): Registry of the tier metrics.
+        change_feed (ChangeFeed | None): Feed of the changes.
+    """
+
+    # number of records visited by the last operation of the thread
+    last_rows_scanned = RowsScanned()
+
+    def __init__(
+        self,
+        table: str = "default",
+        max_hot_bytes: int = MAX_HOT_BYTES,
+        path: str | None = None,
+        metrics: MetricsRegistry | None = None,
+        change_feed: ChangeFeed | None = None,
+    ) -> None:
+        # verify memory budget
+        if max_hot_bytes <= 0:
+            raise ValueError("'max_hot_bytes' must be a positive integer")
+
+        self.table: str = table
+        self.max_hot_bytes: int = max_hot_bytes
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+        self.change_feed: ChangeFeed | None = change_feed
+        # estimated memory of the hot tier
+        self.hot_bytes: int = 0
+
+        # create private instances
+        # hot rows by id, least recently used first
+        self.__hot: OrderedDict[Hashable, tuple] = OrderedDict()
+        # number of cold rows
+        self.__cold_count: int = 0
+        # fields of T in declaration order, set on first use
+        self.__fields: tuple[str, ...] = ()
+        self.__positions: dict[str, int] = {}
+        # positions of bool fields, stored as SQLite integers
+        self.__bools: tuple[int, ...] = ()
+        # str fields, SQLite converts numbers compared to them
+        self.__text: frozenset[str] = frozenset()
+        self.__queries = QueryCompiler(
+            field_key=lambda field: self.__positions[field]
+        )
+        self.__lock = threading.RLock()
+
+        # cold tier, the schema is created on first use
+        self.__temporary = path is None
+        if path is None:
+            descriptor, path = tempfile.mkstemp(suffix=".sqlite")
+            os.close(descriptor)
+        self.path: str = path
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        # spilled rows are a cache of the process, not durable data
+        self.__db.execute("PRAGMA journal_mode=OFF")
+        self.__db.execute("PRAGMA synchronous=OFF")
+
+    @property
+    def hot_rows(self) -> int:
+        """Number of rows in the hot tier."""
+
+        return len(self.__hot)
+
+    @property
+    def cold_rows(self) -> int:
+        """Number of rows in the cold tier."""
+
+        return self.__cold_count
+
+    def hit_rate(self) -> float:
+        """Return share of lookups by id of present records served by the
+        hot tier, 0.0 before the first lookup."""
+
+        labels = {"table": self.table}
+        hot = self.metrics.counter_value(
+            "tiered_reads_total", {**labels, "tier": HOT}
+        )
+        cold = self.metrics.counter_value(
+            "tiered_reads_total", {**labels, "tier": COLD}
+        )
+
+        return hot / (hot + cold) if hot + cold else 0.0
+
+    def close(self) -> None:
+        """Close the cold tier, its file is removed if temporary."""
+
+        with self.__lock:
+            self.__db.close()
+            if self.__temporary and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __enter__(self) -> "TieredSQLService[T]":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def create(self, record: T) -> None:
+        # verify record type
+        if not isinstance(record, BaseModel):
+            # raise type error
+            raise TypeError("'record' should be a valid model.")
+
+        self.create_many([record])
+
+    def create_many(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
+
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        rows = [self.__row(record) for record in records]
+        self.last_rows_scanned = len(records)
+
+        with self.__lock:
+            # verify no duplicate id, nothing is inserted otherwise
+            seen: set = set()
+            for record in records:
+                record_id: Any = record.id  # type: ignore
+                if record_id in seen or self.__present(record_id):
+                    # raise SQLException
+                    raise SQLException(f"duplicate id: {record_id}")
+                seen.add(record_id)
+
+            # new records are hot
+            for record, row in zip(records, rows):
+                self.__put(record.id, row)  # type: ignore
+                self.__capture(INSERT, record.id, None, row)  # type: ignore
+            self.__evict()
+
+    def read_single(self, query_data: dict) -> T | None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id is a single lookup
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            return self.__model(self.__get(record_id))
+
+        for row in self.__scan(query_data, limit=1):
+            return self.__model(row)
+
+        return None
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # query by id is a single lookup
+        record_id = id_query(query_data)
+        if record_id is not None:
+            self.last_rows_scanned = 1
+            row = self.__get(record_id)
+            return [] if row is None else [self.__model(row)]
+
+        return [self.__model(row) for row in self.__scan(query_data)]
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        # one lookup per id
+        self.last_rows_scanned = len(ids)
+
+        return [self.__model(self.__get(record_id)) for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        # verify chunk size
+        if chunk_size <= 0:
+            raise ValueError("'chunk_size' must be a positive integer")
+
+        self.__model_type()
+        self.last_rows_scanned = 0
+
+        # ids of both tiers at once, promotions and evictions between
+        # chunks move rows across tiers without skipping or repeating them
+        with self.__lock:
+            ids = list(self.__hot)
+            ids.extend(
+                row[0]
+                for row in self.__db.execute(
+                    'SELECT "id" FROM records ORDER BY "id"'
+                )
+            )
+
+        pending = iter(ids)
+        while batch := list(islice(pending, chunk_size)):
+            with self.__lock:
+                rows = self.__find_many(batch)
+            # rows deleted since are skipped
+            chunk = [row for row in rows if row is not None]
+            self.last_rows_scanned += len(chunk)
+            if chunk:
+                yield [self.__model(row) for row in chunk]
+
+    def update(self, updated_record: T) -> None:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        self.__update(updated_record)
+
+    def update_many(self, updated_records: list[T]) -> None:
+        # verify updated_records type
+        if not isinstance(updated_records, list):
+            # raise type error
+            raise TypeError("'updated_records' should be a valid list.")
+
+        # verify every updated_record type
+        for updated_record in updated_records:
+            if not isinstance(updated_record, BaseModel):
+                # raise type error
+                raise TypeError("'updated_record' should be a valid model.")
+
+        for updated_record in updated_records:
+            self.__update(updated_record)
+        self.last_rows_scanned = len(updated_records)
+
+    def delete(self, query_data: dict) -> None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        self.__model_type()
+
+        with self.__lock:
+            # query by id is a single lookup
+            record_id = id_query(query_data)
+            if record_id is not None:
+                self.last_rows_scanned = 1
+                row = self.__find(record_id)
+                rows = [] if row is None else [row]
+            else:
+                rows = list(self.__scan(query_data))
+
+            position = self.__positions["id"]
+            cold = []
+            for row in rows:
+                key = row[position]
+                hot = self.__hot.pop(key, None)
+                if hot is None:
+                    cold.append((key,))
+                else:
+                    self.hot_bytes -= row_bytes(hot)
+                self.__capture(DELETE, key, row, None)
+
+            if cold:
+                self.__db.executemany(
+                    'DELETE FROM records WHERE "id" = ?', cold
+                )
+                self.__db.commit()
+                self.__cold_count -= len(cold)
+
+    def explain(self, query_data: dict) -> str:
+        """Return plan of a query on the table.
+
+        Args:
+            query_data (dict): SQL query data in dict format.
+
+        Returns:
+            str: Query plan, queries by id only are lookups, other queries
+                scan the hot tier and filter the cold tier in SQLite.
+        """
+
+        sizes = f"{len(self.__hot)} hot and {self.__cold_count} cold records"
+
+        if isinstance(query_data, dict) and id_query(query_data) is not None:
+            return f"ID LOOKUP of {sizes}"
+
+        return (
+            f"TIERED SCAN of {sizes}, "
+            f"filter: {', '.join(sorted(query_data)) or 'none'}"
+        )
+
+    def __model_type(self) -> type[BaseModel]:
+        """Return type of T, create the cold tier schema on first use."""
+
+        # get type of T
+        model = self.__orig_class__.__args__[0]  # type: ignore
+
+        if not self.__fields:
+            with self.__lock:
+                self.__create_schema(model)
+
+        return model
+
+    def __create_schema(self, model: type[BaseModel]) -> None:
+        """Cache fields of T and create the SQLite table of its rows."""
+
+        if self.__fields:
+            return
+
+        columns = []
+        for field, info in model.model_fields.items():
+            # verify field type
+            if info.annotation not in _SQL_TYPES:
+                raise ValueError(f"unsupported field type: {field}")
+            columns.append(f'"{field}" {_SQL_TYPES[info.annotation]}')
+
+        self.__db.execute(
+            f"CREATE TABLE IF NOT EXISTS records "
+            f'({", ".join(columns)}, PRIMARY KEY ("id"))'
+        )
+        self.__cold_count = self.__db.execute(
+            "SELECT COUNT(*) FROM records"
+        ).fetchone()[0]
+
+        fields = tuple(model.model_fields)
+        self.__positions = {
+            field: position for position, field in enumerate(fields)
+        }
+        self.__bools = tuple(
+            position
+            for position, info in enumerate(model.model_fields.values())
+            if info.annotation is bool
+        )
+        self.__text = frozenset(
+            field
+            for field, info in model.model_fields.items()
+            if info.annotation is str
+        )
+        self.__fields = fields
+
+    def __row(self, record: BaseModel) -> tuple:
+        """Return field values of a record."""
+
+        self.__model_type()
+        values = record.__dict__
+
+        return tuple([values[field] for field in self.__fields])
+
+    def __model(self, row: tuple | None) -> Any:
+        """Create model of type T from a row, None for None."""
+
+        if row is None:
+            return None
+
+        return self.__model_type().model_validate(
+            obj=dict(zip(self.__fields, row)), strict=True
+        )
+
+    def __compile(self, query_data: dict) -> CompiledQuery:
+        """Compile a query on rows."""
+
+        self.__model_type()
+
+        return self.__queries.compile(query_data)
+
+    def __select(
+        self, where: list[str], parameters: list, limit: int | None = None
+    ) -> list[tuple]:
+        """Return cold rows matching SQL conditions, in id order."""
+
+        columns = ", ".join(f'"{field}"' for field in self.__fields)
+        sql = f"SELECT {columns} FROM records"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        sql += ' ORDER BY "id"'
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        rows = self.__db.execute(sql, parameters).fetchall()
+        if not self.__bools:
+            return rows
+
+        # restore bool fields
+        bools = self.__bools
+        return [
+            tuple(
+                bool(value) if position in bools else value
+                for position, value in enumerate(row)
+            )
+            for row in rows
+        ]
+
+    def __scan(
+        self, query_data: dict, limit: int | None = None
+    ) -> Iterator[tuple]:
+        """Iterate over rows matching a query, hot rows first."""
+
+        query = self.__compile(query_data)
+
+        # SQL filters of comparable values, every value is checked again
+        where, parameters = [], []
+        for field, value in query_data.items():
+            if self.__comparable(field, value):
+                where.append(f'"{field}" = ?')
+                parameters.append(value)
+
+        with self.__lock:
+            self.last_rows_scanned = len(self.__hot) + self.__cold_count
+            hot = list(query.filter(self.__hot.values()))
+            if limit is None or len(hot) < limit:
+                # SQLite can only stop early if it filters every field
+                exact = len(where) == len(query_data)
+                cold = self.__select(
+                    where,
+                    parameters,
+                    limit - len(hot) if limit is not None and exact else None,
+                )
+            else:
+                cold = []
+
+        found = 0
+        for row in hot + list(query.filter(cold)):
+            yield row
+            found += 1
+            if found == limit:
+                return
+
+    def __comparable(self, field: str, value: Any) -> bool:
+        """Return True if SQLite compares a field to a value like Python."""
+
+        if type(value) not in _SQL_TYPES:
+            return False
+
+        return (type(value) is str) == (field in self.__text)
+
+    def __present(self, record_id: Any) -> bool:
+        """Return True if an id is in a tier, with the lock held."""
+
+        if record_id in self.__hot:
+            return True
+
+        return self.__cold(record_id) is not None
+
+    def __cold(self, record_id: Any) -> tuple | None:
+        """Return cold row of an id, with the lock held."""
+
+        # other ids are never stored
+        if not self.__comparable("id", record_id):
+            return None
+        rows = self.__select(['"id" = ?'], [record_id])
+
+        return rows[0] if rows else None
+
+    def __find(self, record_id: Any) -> tuple | None:
+        """Return row of an id from any tier without promoting it."""
+
+        row = self.__hot.get(record_id)
+        if row is not None:
+            return row
+
+        return self.__cold(record_id)
+
+    def __find_many(self, ids: list) -> list[tuple | None]:
+        """Return rows of ids from any tier without promoting them, with
+        the lock held."""
+
+        rows = [self.__hot.get(record_id) for record_id in ids]
+        cold = [
+            record_id
+            for record_id, row in zip(ids, rows)
+            if row is None and self.__comparable("id", record_id)
+        ]
+
+        found = {}
+        pending = iter(cold)
+        while batch := list(islice(pending, _MAX_PARAMETERS)):
+            marks = ", ".join("?" * len(batch))
+            for row in self.__select([f'"id" IN ({marks})'], batch):
+                found[row[self.__positions["id"]]] = row
+
+        return [
+            row if row is not None else found.get(record_id)
+            for record_id, row in zip(ids, rows)
+        ]
+
+    def __get(self, record_id: Any) -> tuple | None:
+        """Return row of an id, promoting cold rows."""
+
+        self.__model_type()
+        start = time.perf_counter()
+
+        with self.__lock:
+            row = self.__hot.get(record_id)
+            if row is not None:
+                self.__hot.move_to_end(record_id)
+                tier = HOT
+            else:
+                row = self.__cold(record_id)
+                if row is None:
+                    tier = MISS
+                else:
+                    tier = COLD
+                    self.__promote(record_id, row)
+
+        labels = {"table": self.table, "tier": tier}
+        self.metrics.inc("tiered_reads_total", labels)
+        self.metrics.observe(
+            "tiered_read_latency_seconds", time.perf_counter() - start, labels
+        )
+
+        return row
+
+    def __promote(self, record_id: Any, row: tuple) -> None:
+        """Move a cold row to the hot tier, with the lock held."""
+
+        self.__db.execute('DELETE FROM records WHERE "id" = ?', (record_id,))
+        self.__db.commit()
+        self.__cold_count -= 1
+        self.__put(record_id, row)
+        self.metrics.inc("tiered_promotions_total", {"table": self.table})
+        self.__evict()
+
+    def __put(self, record_id: Any, row: tuple) -> None:
+        """Write a hot row as most recently used, with the lock held."""
+
+        before = self.__hot.pop(record_id, None)
+        if before is not None:
+            self.hot_bytes -= row_bytes(before)
+
+        self.__hot[record_id] = row
+        self.hot_bytes += row_bytes(row)
+
+    def __evict(self) -> None:
+        """Move least recently used rows to the cold tier until the hot
+        tier fits its budget, the last used row always stays hot."""
+
+        evicted = []
+        while self.hot_bytes > self.max_hot_bytes and len(self.__hot) > 1:
+            _, row = self.__hot.popitem(last=False)
+            self.hot_bytes -= row_bytes(row)
+            evicted.append(row)
+
+        if not evicted:
+            return
+
+        marks = ", ".join("?" * len(self.__fields))
+        self.__db.executemany(f"INSERT INTO records VALUES ({marks})", evicted)
+        self.__db.commit()
+        self.__cold_count += len(evicted)
+        self.metrics.inc(
+            "tiered_evictions_total", {"table": self.table}, len(evicted)
+        )
+
+    def __update(self, updated_record: BaseModel) -> None:
+        """Replace stored record of the same id, if any."""
+
+        record_id: Hashable = updated_record.id  # type: ignore
+        self.last_rows_scanned = 1
+        row = self.__row(updated_record)
+
+        with self.__lock:
+            # updated records become hot, without counting as reads
+            before = self.__find(record_id)
+            if before is not None:
+                if record_id not in self.__hot:
+                    self.__promote(record_id, before)
+                self.__put(record_id, row)
+                self.__capture(UPDATE, record_id, before, row)
+                self.__evict()
+
+    def __capture(
+        self,
+        operation: str,
+        record_id: Any,
+        before: tuple | None,
+        after: tuple | None,
+    ) -> None:
+        """Append a change to the change feed."""
+
+        if self.change_feed is None:
+            return
+
+        fields = self.__fields
+        self.change_feed.append(
+            operation,
+            record_id,
+            dict(zip(fields, before)) if before is not None else None,
+            dict(zip(fields, after)) if after is not None else None,
+        )
@@ -0,0 +1,558 @@
+"""This file includes a write-behind buffer around any SQLService.
+
+create() / update() / delete() by id are absorbed in an in-memory buffer
+holding the latest pending write of every id, reads are served from the
+buffer over the wrapped service (read-your-writes), and buffered writes
+are flushed to the wrapped service in batches once 'max_pending' ids are
+buffered or every 'flush_interval' seconds.
+
+Buffered writes are lost if the process stops before they are flushed,
+only use it where eventual persistence is acceptable.
+
+Recorded metrics (label: table):
+    write_behind_writes_total: Number of buffered writes.
+    write_behind_coalesced_total: Writes merged with a pending write of
+        the same id.
+    write_behind_flushes_total: Number of flushes, also labelled by
+        'reason' (size, interval, manual, query, version, close).
+    write_behind_flushed_total: Pending writes sent to the wrapped service.
+    write_behind_flush_errors_total: Flushes that raised an exception.
+    write_behind_rejected_total: Pending writes rejected by the wrapped
+        service and dropped.
+"""
+
+
+import logging
+import threading
+from typing import Any, Callable, Hashable, Iterator
+from pydantic import BaseModel
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.id_table import id_query
+from core.services.sql_service.query_compiler import MODEL_QUERIES
+from core.services.sql_service.sql_exception import SQLException
+from core.services.sql_service.sql_service import SQLService
+
+
+# pending write kinds, 'replace' deletes then creates a record
+CREATE, UPDATE, DELETE, REPLACE = "create", "update", "delete", "replace"
+
+# pending write: (kind, record), record is None for deletes
+_Pending = tuple[str, Any]
+
+# logger of rejected writes
+LOGGER = logging.getLogger("sql.write_behind")
+
+
+def _matches(record: BaseModel, query_data: dict) -> bool:
+    """Return True if every key-value pair of the query matches."""
+
+    return MODEL_QUERIES.compile(query_data).matches(record)
+
+
+class WriteBehindSQLService[T](SQLService):
+    """SQL service buffering writes of the wrapped service.
+
+    Deletes by other queries than id, and iter_chunks(), flush the buffer
+    first. A batch rejected with SQLException is sent again one record at
+    a time, records the wrapped service still rejects (e.g. an id created
+    directly in the wrapped service) are dropped and logged. Writes of a
+    flush failing with another exception stay buffered and are retried by
+    the next flush. Call close() to stop the flush thread and flush the
+    remaining writes.
+    """
+
+    def __init__(
+        self,
+        sql_service: SQLService[T],
+        table: str,
+        max_pending: int = 1000,
+        flush_interval: float | None = 1.0,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # validate sql_service
+        if not isinstance(sql_service, SQLService):
+            raise TypeError("'sql_service' should be of type 'SQLService'")
+
+        # verify thresholds
+        if max_pending <= 0:
+            raise ValueError("'max_pending' must be a positive integer")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("'flush_interval' must be a positive number")
+
+        # create private instances
+        self.__sql_service: SQLService = sql_service
+        self.__table: str = table
+        # latest pending write by id, in first write order
+        self.__pending: dict[Hashable, _Pending] = {}
+        # writes being sent by the running flush, still visible to reads
+        self.__flushing: dict[Hashable, _Pending] = {}
+        # guards pending and flushing writes
+        self.__lock = threading.RLock()
+        # one flush at a time
+        self.__flush_lock = threading.Lock()
+        # set once closed, wakes up the flush thread
+        self.__closed = threading.Event()
+        self.__thread: threading.Thread | None = None
+
+        # public instances
+        self.max_pending: int = max_pending
+        self.flush_interval: float | None = flush_interval
+        self.metrics: MetricsRegistry = metrics or MetricsRegistry()
+
+    def create(self, record: T) -> None:
+        # verify record type
+        if not isinstance(record, BaseModel):
+            # raise type error
+            raise TypeError("'record' should be a valid model.")
+
+        with self.__lock:
+            self.__verify_new([record.id])  # type: ignore
+            self.__create(record)
+
+        self.__after_write()
+
+    def create_many(self, records: list[T]) -> None:
+        # verify records type
+        if not isinstance(records, list):
+            # raise type error
+            raise TypeError("'records' should be a valid list.")
+
+        # verify every record type
+        for record in records:
+            if not isinstance(record, BaseModel):
+                # raise type error
+                raise TypeError("'record' should be a valid model.")
+
+        with self.__lock:
+            # verify no duplicate id, nothing is buffered otherwise
+            ids = [record.id for record in records]  # type: ignore
+            self.__verify_new(ids)
+            for record in records:
+                self.__create(record)
+
+        self.__after_write()
+
+    def read_single(self, query_data: dict) -> T | None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        pending = self.__snapshot()
+        if not pending:
+            return self.__sql_service.read_single(query_data)
+
+        # query by a buffered id
+        record_id = id_query(query_data)
+        if record_id is not None and record_id in pending:
+            return self.__resolve(pending, [record_id])[record_id]
+
+        records = self.read_multiple(query_data)
+        return records[0] if records else None
+
+    def read_multiple(self, query_data: dict) -> list[T]:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        pending = self.__snapshot()
+        stored = self.__sql_service.read_multiple(query_data)
+        if not pending:
+            return stored
+
+        # stored records, replaced by their pending write
+        result: list[T] = []
+        for record in stored:
+            record_id = record.id  # type: ignore
+            if record_id not in pending:
+                result.append(record)
+                continue
+
+            kind, buffered = pending[record_id]
+            if kind != DELETE and _matches(buffered, query_data):
+                result.append(buffered)
+
+        # buffered records now matching the query
+        seen = {record.id for record in stored}  # type: ignore
+        candidates = [
+            record_id
+            for record_id, (kind, buffered) in pending.items()
+            if record_id not in seen
+            and kind != DELETE
+            and _matches(buffered, query_data)
+        ]
+        resolved = self.__resolve(pending, candidates)
+        result.extend(
+            record
+            for record in (resolved[record_id] for record_id in candidates)
+            if record is not None
+        )
+
+        return result
+
+    def read_by_ids(self, ids: list) -> list[T | None]:
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        pending = self.__snapshot()
+        if not pending:
+            return self.__sql_service.read_by_ids(ids)
+
+        # buffered ids, then stored records of the other ids
+        records = self.__resolve(pending, list(dict.fromkeys(ids)))
+
+        return [records[record_id] for record_id in ids]
+
+    def iter_chunks(self, chunk_size: int = 10_000) -> Iterator[list[T]]:
+        self.flush("query")
+        return self.__sql_service.iter_chunks(chunk_size)
+
+    def update(self, updated_record: T) -> None:
+        # verify updated_record type
+        if not isinstance(updated_record, BaseModel):
+            # raise type error
+            raise TypeError("'updated_record' should be a valid model.")
+
+        record_id = updated_record.id  # type: ignore
+
+        with self.__lock:
+            kind, in_pending = self.__latest(record_id)
+
+            # deleted record, updates are no-ops
+            if kind == DELETE:
+                pass
+            # record created in this buffer
+            elif kind in (CREATE, REPLACE):
+                # created by the running flush, recreate it afterwards
+                self.__buffer(
+                    record_id,
+                    (kind if in_pending else REPLACE, updated_record),
+                )
+            else:
+                self.__buffer(record_id, (UPDATE, updated_record))
+
+        self.__after_write()
+
+    def read_versioned(self, record_id: Any) -> tuple[T | None, int | None]:
+        # versions are given by the wrapped service
+        self.flush("version")
+        return self.__sql_service.read_versioned(record_id)
+
+    def update_if_version(
+        self, updated_record: T, expected_version: int
+    ) -> int:
+        self.flush("version")
+        return self.__sql_service.update_if_version(
+            updated_record, expected_version
+        )
+
+    def delete(self, query_data: dict) -> None:
+        # verify record type
+        if not isinstance(query_data, dict):
+            # raise type error
+            raise TypeError("'query_data' should be a valid dict.")
+
+        # other queries may match any record
+        record_id = id_query(query_data)
+        if record_id is None:
+            self.flush("query")
+            return self.__sql_service.delete(query_data)
+
+        with self.__lock:
+            kind, in_pending = self.__latest(record_id)
+
+            # already deleted
+            if kind == DELETE:
+                pass
+            # created in this buffer and not flushing, forget it
+            elif kind == CREATE and record_id not in self.__flushing:
+                del self.__pending[record_id]
+                labels = {"table": self.__table}
+                self.metrics.inc("write_behind_writes_total", labels)
+                self.metrics.inc("write_behind_coalesced_total", labels)
+            else:
+                self.__buffer(record_id, (DELETE, None))
+
+        self.__after_write()
+
+    def pending(self) -> int:
+        """Return number of ids with a pending write."""
+
+        return len(self.__pending)
+
+    def flush(self, reason: str = "manual") -> int:
+        """Send pending writes to the wrapped service.
+
+        Deletes are sent first, then updates in a single update_many()
+        call, then creates in a single create_many() call. A batch
+        rejected with SQLException is sent one record at a time, rejected
+        records are dropped.
+
+        Args:
+            reason (str): 'reason' label of the flush metric.
+
+        Raises:
+            Exception: Raised by the wrapped service, other than
+                SQLException, unsent writes stay buffered.
+
+        Returns:
+            int: Number of pending writes sent.
+        """
+
+        labels = {"table": self.__table}
+
+        with self.__flush_lock:
+            with self.__lock:
+                if not self.__pending:
+                    return 0
+                self.__flushing, self.__pending = self.__pending, {}
+                flushing = self.__flushing
+
+            # ids whose write was sent or rejected
+            sent: set = set()
+
+            try:
+                # deletes and first half of replaces
+                for record_id, (kind, _) in flushing.items():
+                    if kind in (DELETE, REPLACE):
+                        self.__sql_service.delete({"id": record_id})
+                    if kind == DELETE:
+                        sent.add(record_id)
+
+                # updates in a single update_many() call
+                updated = [
+                    record
+                    for kind, record in flushing.values()
+                    if kind == UPDATE
+                ]
+                if updated:
+                    self.__send(
+                        self.__sql_service.update_many,
+                        self.__sql_service.update,
+                        updated,
+                        sent,
+                    )
+
+                # creates and second half of replaces
+                created = [
+                    record
+                    for kind, record in flushing.values()
+                    if kind in (CREATE, REPLACE)
+                ]
+                if created:
+                    self.__send(
+                        self.__sql_service.create_many,
+                        self.__sql_service.create,
+                        created,
+                        sent,
+                    )
+            except Exception:
+                self.metrics.inc("write_behind_flush_errors_total", labels)
+
+                # keep unsent writes not superseded since, retried by next
+                # flush
+                with self.__lock:
+                    self.__pending = {
+                        **{
+                            record_id: pending
+                            for record_id, pending in flushing.items()
+                            if record_id not in sent
+                            and record_id not in self.__pending
+                        },
+                        **self.__pending,
+                    }
+                    self.__flushing = {}
+                raise
+
+            with self.__lock:
+                self.__flushing = {}
+
+        self.metrics.inc(
+            "write_behind_flushes_total", {**labels, "reason": reason}
+        )
+        self.metrics.inc("write_behind_flushed_total", labels, len(flushing))
+
+        return len(flushing)
+
+    def close(self) -> None:
+        """Stop the flush thread and flush pending writes."""
+
+        self.__closed.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+        self.flush("close")
+
+    def __enter__(self) -> "WriteBehindSQLService[T]":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __send(
+        self,
+        many: Callable[[list], None],
+        single: Callable[[Any], None],
+        records: list,
+        sent: set,
+    ) -> None:
+        """Send records in a single call of 'many', one at a time with
+        'single' if the batch is rejected, and add their ids to 'sent'.
+        Records rejected on their own are dropped and logged."""
+
+        try:
+            many(records)
+        except SQLException:
+            # isolate the rejected records
+            for record in records:
+                try:
+                    single(record)
+                except SQLException as error:
+                    self.metrics.inc(
+                        "write_behind_rejected_total", {"table": self.__table}
+                    )
+                    LOGGER.warning(
+                        "write of %s id %s rejected: %s",
+                        self.__table,
+                        record.id,
+                        error,
+                    )
+                sent.add(record.id)
+            return
+
+        sent.update(record.id for record in records)
+
+    def __latest(self, record_id: Hashable) -> tuple[str | None, bool]:
+        """Return kind of the latest write of an id, and True if it is
+        pending rather than flushing."""
+
+        if record_id in self.__pending:
+            return self.__pending[record_id][0], True
+        if record_id in self.__flushing:
+            return self.__flushing[record_id][0], False
+
+        return None, False
+
+    def __verify_new(self, ids: list) -> None:
+        """Raise SQLException if an id is already stored or buffered."""
+
+        unknown: list = []
+        seen: set = set()
+
+        for record_id in ids:
+            kind, _ = self.__latest(record_id)
+            if record_id in seen or kind in (CREATE, REPLACE):
+                # raise SQLException
+                raise SQLException(f"duplicate id: {record_id}")
+            seen.add(record_id)
+
+            # stored records are checked in a single batch
+            if kind != DELETE:
+                unknown.append(record_id)
+
+        if unknown:
+            stored = self.__sql_service.read_by_ids(unknown)
+            for record_id, record in zip(unknown, stored):
+                if record is not None:
+                    # raise SQLException
+                    raise SQLException(f"duplicate id: {record_id}")
+
+    def __create(self, record: BaseModel) -> None:
+        """Buffer creation of a verified new record."""
+
+        record_id = record.id  # type: ignore
+        kind, _ = self.__latest(record_id)
+
+        # deleted in this buffer, a stored record may still be there
+        self.__buffer(
+            record_id, (REPLACE if kind == DELETE else CREATE, record)
+        )
+
+    def __buffer(self, record_id: Hashable, pending: _Pending) -> None:
+        """Set pending write of an id."""
+
+        labels = {"table": self.__table}
+        self.metrics.inc("write_behind_writes_total", labels)
+        if record_id in self.__pending:
+            self.metrics.inc("write_behind_coalesced_total", labels)
+
+        self.__pending[record_id] = pending
+
+    def __after_write(self) -> None:
+        """Flush on size threshold, start the flush thread if needed."""
+
+        if len(self.__pending) >= self.max_pending:
+            self.flush("size")
+
+        if (
+            self.flush_interval is not None
+            and self.__thread is None
+            and not self.__closed.is_set()
+        ):
+            with self.__lock:
+                if self.__thread is None:
+                    self.__thread = threading.Thread(
+                        target=self.__flush_periodically,
+                        name=f"write-behind-{self.__table}",
+                        daemon=True,
+                    )
+                    self.__thread.start()
+
+    def __flush_periodically(self) -> None:
+        """Flush every 'flush_interval' seconds until closed."""
+
+        while not self.__closed.wait(self.flush_interval):
+            try:
+                self.flush("interval")
+            except Exception:
+                # counted in metrics, writes are retried next interval
+                pass
+
+    def __snapshot(self) -> dict[Hashable, _Pending]:
+        """Return latest write of every buffered id."""
+
+        with self.__lock:
+            if not self.__flushing:
+                return dict(self.__pending)
+            return {**self.__flushing, **self.__pending}
+
+    def __resolve(
+        self,
+        pending: dict[Hashable, _Pending],
+        ids: list,
+    ) -> dict[Hashable, T | None]:
+        """Return record of every id, pending writes over stored records.
+
+        Pending updates only apply to stored records, so their id is also
+        read from the wrapped service, in a single batch.
+        """
+
+        stored_ids = [
+            record_id
+            for record_id in ids
+            if record_id not in pending or pending[record_id][0] == UPDATE
+        ]
+        stored = dict(
+            zip(stored_ids, self.__sql_service.read_by_ids(stored_ids))
+            if stored_ids
+            else ()
+        )
+
+        records: dict[Hashable, T | None] = {}
+        for record_id in ids:
+            if record_id not in pending:
+                records[record_id] = stored[record_id]
+                continue
+
+            kind, record = pending[record_id]
+            if kind == DELETE:
+                records[record_id] = None
+            elif kind == UPDATE and stored[record_id] is None:
+                records[record_id] = None
+            else:
+                records[record_id] = record
+
+        return records
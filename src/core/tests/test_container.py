@@ -0,0 +1,193 @@
+"""Test Cases
+
+- register() should raise TypeError if factory is not callable
+- register() should raise ValueError if scope is unknown
+- resolve() should raise LookupError for unknown services
+- resolve() should construct services on first use only
+- resolve() should pass the container to factories
+- resolve() should return one singleton across threads
+- resolve() should return one instance per thread for THREAD services
+- resolve() should raise RuntimeError for REQUEST services
+  outside of a request scope
+- resolve() should return one instance per request scope
+- register() should drop the constructed singleton it replaces
+- reset() should drop constructed singletons
+"""
+
+
+import threading
+import pytest
+from core.container import REQUEST, THREAD, Container
+
+
+def test_register_factory_incorrect():
+    """register() should raise TypeError if factory is not callable."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        Container().register("service", object())  # type: ignore
+
+    # verify error message
+    assert "'factory' should be callable." in str(exc_info.value)
+
+
+def test_register_scope_incorrect():
+    """register() should raise ValueError if scope is unknown."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        Container().register("service", lambda c: 1, scope="session")
+
+    # verify error message
+    assert "unknown scope: session" in str(exc_info.value)
+
+
+def test_resolve_unknown():
+    """resolve() should raise LookupError for unknown services."""
+
+    # verify LookupError raised
+    with pytest.raises(LookupError) as exc_info:
+        Container().resolve("service")
+
+    # verify error message
+    assert "unknown service: service" in str(exc_info.value)
+
+
+def test_resolve_lazy():
+    """resolve() should construct services on first use only."""
+
+    calls = []
+    container = Container()
+    container.register("service", lambda c: calls.append(1) or object())
+
+    # verify nothing constructed on register
+    assert calls == []
+    assert not container.is_resolved("service")
+
+    # verify constructed once
+    instance = container.resolve("service")
+    assert container.resolve("service") is instance
+    assert calls == [1]
+    assert container.is_resolved("service")
+
+
+def test_resolve_dependencies():
+    """resolve() should pass the container to factories."""
+
+    container = Container()
+    container.register("config", lambda c: {"table": "products"})
+    container.register("service", lambda c: c.resolve("config")["table"])
+
+    # verify dependency resolved
+    assert container.resolve("service") == "products"
+
+
+def test_resolve_singleton_threads():
+    """resolve() should return one singleton across threads."""
+
+    container = Container()
+    container.register("service", lambda c: object())
+    instances = []
+
+    # resolve from many threads
+    threads = [
+        threading.Thread(
+            target=lambda: instances.append(container.resolve("service"))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # verify single instance
+    assert len({id(instance) for instance in instances}) == 1
+
+
+def test_resolve_thread_scope():
+    """resolve() should return one instance per thread for
+    THREAD services."""
+
+    container = Container()
+    container.register("service", lambda c: object(), scope=THREAD)
+    instances = []
+
+    # resolve in another thread
+    thread = threading.Thread(
+        target=lambda: instances.append(container.resolve("service"))
+    )
+    thread.start()
+    thread.join()
+
+    # verify same instance in this thread, other instance in other thread
+    instance = container.resolve("service")
+    assert container.resolve("service") is instance
+    assert instances[0] is not instance
+
+
+def test_resolve_request_outside_scope():
+    """resolve() should raise RuntimeError for REQUEST services outside
+    of a request scope."""
+
+    container = Container()
+    container.register("service", lambda c: object(), scope=REQUEST)
+
+    # verify RuntimeError raised
+    with pytest.raises(RuntimeError) as exc_info:
+        container.resolve("service")
+
+    # verify error message
+    assert "'service' should be resolved in a request scope." in str(
+        exc_info.value
+    )
+
+
+def test_resolve_request_scope():
+    """resolve() should return one instance per request scope."""
+
+    container = Container()
+    container.register("service", lambda c: object(), scope=REQUEST)
+
+    # first request, nested scope shares instances
+    with container.request_scope():
+        first = container.resolve("service")
+        with container.request_scope():
+            assert container.resolve("service") is first
+
+    # second request
+    with container.request_scope():
+        second = container.resolve("service")
+
+    # verify instances
+    assert first is not second
+    assert not container.is_resolved("service")
+
+
+def test_register_replace():
+    """register() should drop the constructed singleton it replaces."""
+
+    container = Container()
+    container.register("service", lambda c: 1)
+    container.resolve("service")
+
+    # replace provider
+    container.register("service", lambda c: 2)
+
+    # verify new provider used
+    assert container.resolve("service") == 2
+
+
+def test_reset():
+    """reset() should drop constructed singletons."""
+
+    container = Container()
+    container.register("service", lambda c: object())
+    instance = container.resolve("service")
+
+    # reset container
+    container.reset()
+
+    # verify new instance
+    assert not container.is_resolved("service")
+    assert container.resolve("service") is not instance
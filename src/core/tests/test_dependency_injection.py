@@ -1,15 +1,44 @@
 """Test Cases
 
 - Verify imports
+- Services should be constructed on first access
+- Product changes should be appended to the product change feed
+- Product views should be maintained from product changes
+- Product ids should be allocated after the largest stored id
+- Importing dependency injection should stay within the time budget
 """
 
 
+import subprocess
+import sys
+from pathlib import Path
 from core.services.sql_service.sql_service import SQLService
 from core.services.sql_service.mysql_service import MySQLService
 from features.product.models.product import Product
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+from features.product.views.product_views import CATALOGUE_TOTALS
 from core import dependency_injection as di
 
 
+# budget of a cold 'import core.dependency_injection' in seconds
+IMPORT_TIME_BUDGET = 1.0
+
+# source root, current directory of the subprocess
+SRC = Path(__file__).resolve().parents[2]
+
+
+def run_python(code: str) -> str:
+    """Run code in a fresh interpreter and return its output."""
+
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=SRC,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+
+
 def test_imports():
     """Test imports."""
 
@@ -17,3 +46,88 @@ def test_imports():
     assert di.Product is Product
     assert di.SQLService is SQLService
     assert di.MySQLService is MySQLService
+
+
+def test_lazy_services():
+    """Services should be constructed on first access."""
+
+    # import in a fresh interpreter
+    output = run_python(
+        "from core import dependency_injection as di\n"
+        "print(di.container.is_resolved('product_crud_usecase'))\n"
+        "di.product_crud_usecase\n"
+        "print(di.container.is_resolved('product_crud_usecase'))\n"
+    )
+
+    # verify construction on first access
+    assert output.split() == ["False", "True"]
+
+    # verify singleton
+    assert isinstance(di.product_crud_usecase, ProductCrudUsecase)
+    assert di.product_crud_usecase is di.product_crud_usecase
+
+
+def test_product_change_feed():
+    """Product changes should be appended to the product change feed."""
+
+    feed = di.product_change_feed
+    last_seq = feed.last_seq()
+
+    # create and delete a product
+    di.product_crud_usecase.create_product(
+        {"id": 999, "name": "orange", "price": 4.99}
+    )
+    di.product_crud_usecase.delete_product({"id": 999})
+
+    # verify changes
+    changes = feed.read(last_seq)
+    assert [change.operation for change in changes] == ["insert", "delete"]
+    assert {change.key for change in changes} == {999}
+
+
+def test_product_views():
+    """Product views should be maintained from product changes."""
+
+    usecase = di.product_crud_usecase
+    before = usecase.get_view(CATALOGUE_TOTALS) or {"count": 0}
+
+    # create a product
+    usecase.create_product({"id": 998, "name": "orange", "price": 4.99})
+
+    # verify catalogue count
+    assert usecase.get_view(CATALOGUE_TOTALS)["count"] == before["count"] + 1
+
+    # delete the product
+    usecase.delete_product({"id": 998})
+
+
+def test_product_id_sequence():
+    """Product ids should be allocated after the largest stored id."""
+
+    # create a product without id
+    product = di.product_crud_usecase.create_product(
+        {"name": "orange", "price": 4.99}
+    )
+
+    # verify allocated id
+    assert product.id >= 1
+    assert di.product_crud_usecase.get_product({"id": product.id}) == product
+
+    # delete the product
+    di.product_crud_usecase.delete_product({"id": product.id})
+
+
+def test_import_time_budget():
+    """Importing dependency injection should stay within the time
+    budget."""
+
+    # time a cold import
+    output = run_python(
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import core.dependency_injection\n"
+        "print(time.perf_counter() - start)\n"
+    )
+
+    # verify budget
+    assert float(output) < IMPORT_TIME_BUDGET
@@ -0,0 +1,337 @@
+"""This file includes the streaming bulk loader of product catalogues.
+
+Catalogue files (CSV or NDJSON, optionally gzip compressed) are read in
+chunks, chunks are parsed and validated in a process pool and valid products
+are inserted in bulk. At most 'workers * 2' chunks are in flight, so memory
+stays flat regardless of the input file size.
+"""
+
+
+import csv
+import gzip
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Iterator
+from core.services.sql_service.sql_exception import SQLException
+from features.product.models.product_batch import (
+    ProductBatch,
+    RowError,
+    validate_products,
+)
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+
+
+# supported catalogue formats
+FORMATS = ("csv", "ndjson")
+
+
+@dataclass
+class LoadReport:
+    """Summary of a catalogue load."""
+
+    # rows read from the file
+    rows: int = 0
+    # products inserted in database
+    inserted: int = 0
+    # rows rejected by validation or database
+    rejected: int = 0
+    # errors of the first rejected rows, row numbers start at 1
+    errors: list[RowError] = field(default_factory=list)
+    # wall clock duration
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput of the load."""
+
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def detect_format(path: str) -> str:
+    """Return catalogue format from file extension.
+
+    Args:
+        path (str): Catalogue file path, '.gz' suffix is ignored.
+
+    Raises:
+        ValueError: If format cannot be detected.
+
+    Returns:
+        str: 'csv' or 'ndjson'.
+    """
+
+    # ignore compression suffix
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+
+    raise ValueError(f"unknown catalogue format: {path}")
+
+
+def _open_text(path: str) -> IO[str]:
+    """Open a text file, gzip compressed if path ends with '.gz'."""
+
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+
+    return open(path, encoding="utf-8", newline="")
+
+
+def _parse_ndjson_line(line: str):
+    """Parse a NDJSON line.
+
+    Malformed lines are returned as raw strings so that validation
+    rejects them as rows.
+    """
+
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.rstrip("\r\n")
+
+
+def _parse_chunk(header: list[str] | None, units: list) -> list:
+    """Parse raw units of a chunk into rows.
+
+    CSV rows whose number of values differs from the header are returned
+    as value lists, so that validation rejects them as rows.
+
+    Args:
+        header (list[str] | None): CSV header, None for NDJSON.
+        units (list): CSV value lists or NDJSON lines.
+
+    Returns:
+        list: Raw rows, dicts for well formed rows.
+    """
+
+    # csv rows
+    if header is not None:
+        return [
+            dict(zip(header, values)) if len(values) == len(header) else values
+            for values in units
+        ]
+
+    # ndjson lines
+    return [_parse_ndjson_line(line) for line in units]
+
+
+def _read_raw_chunks(
+    path: str,
+    chunk_size: int,
+    file_format: str | None,
+) -> Iterator[tuple[list[str] | None, list]]:
+    """Stream unparsed catalogue units in chunks.
+
+    CSV is split into value lists (quoted newlines need the csv reader),
+    NDJSON is split into lines, parsing is left to _parse_chunk().
+
+    Yields:
+        tuple[list[str] | None, list]: CSV header (None for NDJSON) and
+            raw units of a chunk.
+    """
+
+    # verify chunk size
+    if chunk_size <= 0:
+        raise ValueError("'chunk_size' must be a positive integer")
+
+    # resolve format
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"unknown catalogue format: {file_format}")
+
+    with _open_text(path) as file:
+        # units of the file
+        if file_format == "csv":
+            units: Iterator = csv.reader(file)
+            header: list[str] | None = next(units, [])
+        else:
+            units = (line for line in file if line.strip())
+            header = None
+
+        # split units in chunks
+        while chunk := list(islice(units, chunk_size)):
+            yield header, chunk
+
+
+def read_chunks(
+    path: str,
+    chunk_size: int = 10_000,
+    file_format: str | None = None,
+) -> Iterator[list]:
+    """Stream raw catalogue rows in chunks.
+
+    Args:
+        path (str): Catalogue file path.
+        chunk_size (int): Rows per chunk.
+        file_format (str | None): 'csv' or 'ndjson', detected from the
+            file extension if None.
+
+    Raises:
+        ValueError: If format is not supported or chunk_size is
+            not positive.
+
+    Yields:
+        list: Raw rows, dicts for well formed rows.
+    """
+
+    for header, units in _read_raw_chunks(path, chunk_size, file_format):
+        yield _parse_chunk(header, units)
+
+
+def _validate_chunk(header: list[str] | None, units: list) -> ProductBatch:
+    """Parse and validate a raw chunk, runs in pool processes."""
+
+    rows = _parse_chunk(header, units)
+    batch = validate_products(rows)
+
+    # report rows with missing or extra CSV values by their column count
+    if header is not None:
+        for row_error in batch.errors:
+            values = rows[row_error.index]
+            if isinstance(values, list):
+                row_error.errors = [
+                    {
+                        "type": "column_count",
+                        "msg": f"expected {len(header)} values, "
+                        f"got {len(values)}",
+                    }
+                ]
+
+    return batch
+
+
+def _insert(
+    usecase: ProductCrudUsecase,
+    batch: ProductBatch,
+    offset: int,
+    report: LoadReport,
+    max_errors: int,
+) -> None:
+    """Insert valid products of a validated chunk and update report."""
+
+    # rows rejected by validation
+    rejected = [
+        RowError(offset + error.index + 1, error.errors)
+        for error in batch.errors
+    ]
+
+    try:
+        # bulk insert
+        usecase.create_products(batch.products)
+        report.inserted += len(batch.products)
+    except SQLException:
+        # insert one by one to reject duplicates only
+        for index, product in zip(batch.indices, batch.products):
+            try:
+                usecase.create_products([product])
+                report.inserted += 1
+            except SQLException as error:
+                rejected.append(
+                    RowError(
+                        offset + index + 1,
+                        [{"type": "sql_error", "msg": str(error)}],
+                    )
+                )
+        rejected.sort(key=lambda row_error: row_error.index)
+
+    # update report
+    report.rejected += len(rejected)
+    report.errors.extend(rejected[: max(0, max_errors - len(report.errors))])
+
+
+def load_catalogue(
+    path: str,
+    usecase: ProductCrudUsecase,
+    chunk_size: int = 10_000,
+    workers: int | None = None,
+    file_format: str | None = None,
+    max_errors: int = 100,
+) -> LoadReport:
+    """Load a product catalogue file into database.
+
+    Args:
+        path (str): Catalogue file path.
+        usecase (ProductCrudUsecase): Usecase used to insert products.
+        chunk_size (int): Rows per chunk.
+        workers (int | None): Validation processes, os.cpu_count() if None,
+            0 to validate in the current process.
+        file_format (str | None): 'csv' or 'ndjson', detected from the
+            file extension if None.
+        max_errors (int): Maximum number of row errors kept in report.
+
+    Raises:
+        ValueError: If format is not supported.
+        OSError: If file cannot be read.
+
+    Returns:
+        LoadReport: Summary of the load.
+    """
+
+    report = LoadReport()
+    start = time.perf_counter()
+
+    # resolve workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    pool: Executor | None = (
+        ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    )
+
+    # chunks being validated, in file order
+    pending: deque[tuple[int, Future]] = deque()
+    max_pending = max(1, workers) * 2
+
+    try:
+        offset = 0
+        for header, units in _read_raw_chunks(path, chunk_size, file_format):
+            report.rows += len(units)
+
+            # validate in current process
+            if pool is None:
+                _insert(
+                    usecase,
+                    _validate_chunk(header, units),
+                    offset,
+                    report,
+                    max_errors,
+                )
+            # validate in process pool
+            else:
+                pending.append(
+                    (offset, pool.submit(_validate_chunk, header, units))
+                )
+
+                # bound chunks in flight
+                while len(pending) >= max_pending:
+                    chunk_offset, future = pending.popleft()
+                    _insert(
+                        usecase,
+                        future.result(),
+                        chunk_offset,
+                        report,
+                        max_errors,
+                    )
+
+            offset += len(units)
+
+        # insert remaining chunks
+        while pending:
+            chunk_offset, future = pending.popleft()
+            _insert(usecase, future.result(), chunk_offset, report, max_errors)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    report.seconds = time.perf_counter() - start
+
+    return report
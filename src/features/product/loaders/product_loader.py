@@ -0,0 +1,78 @@
+"""This file includes the asyncio batching loader of products.
+
+get_product() calls by id issued within the same event loop tick are
+dispatched as one ProductCrudUsecase.get_products_by_ids() call.
+"""
+
+
+import asyncio
+from core.services.metrics_service.metrics import MetricsRegistry
+from core.services.sql_service.batch_loader import BatchLoader
+from features.product.models.product import Product
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+
+
+class ProductLoader:
+    """Batching asyncio front of ProductCrudUsecase reads.
+
+    Usecase calls run in the default executor, so the event loop is not
+    blocked while the database is scanned.
+    """
+
+    def __init__(
+        self,
+        usecase: ProductCrudUsecase,
+        max_batch_size: int | None = 1000,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        # validate usecase
+        if not isinstance(usecase, ProductCrudUsecase):
+            raise TypeError("'usecase' should be of type 'ProductCrudUsecase'")
+
+        # create private instances
+        self.__usecase: ProductCrudUsecase = usecase
+
+        # public instances
+        self.loader: BatchLoader[int, Product | None] = BatchLoader(
+            self.__load_products,
+            max_batch_size=max_batch_size,
+            name="products",
+            metrics=metrics,
+        )
+
+    async def get_product(self, query_data: dict) -> Product | None:
+        """Get a single product, see ProductCrudUsecase.get_product().
+
+        Queries by id only are batched, other queries are sent to the
+        usecase as they are.
+        """
+
+        # batch queries by a hashable id
+        if isinstance(query_data, dict) and query_data.keys() == {"id"}:
+            try:
+                hash(query_data["id"])
+            except TypeError:
+                pass
+            else:
+                return await self.loader.load(query_data["id"])
+
+        return await asyncio.to_thread(self.__usecase.get_product, query_data)
+
+    async def get_products_by_ids(
+        self,
+        ids: list[int],
+    ) -> list[Product | None]:
+        """Get products by id, batched with concurrent get_product()
+        calls."""
+
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
+        return await self.loader.load_many(ids)
+
+    async def __load_products(self, ids: list[int]) -> list[Product | None]:
+        """Batch function of the loader."""
+
+        return await asyncio.to_thread(self.__usecase.get_products_by_ids, ids)
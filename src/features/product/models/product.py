@@ -1,6 +1,10 @@
 from pydantic import BaseModel, field_validator
 
 
+# minimum length of stripped 'name'
+NAME_MIN_LENGTH = 5
+
+
 class Product(BaseModel):
     # product id
     id: int
@@ -32,7 +36,7 @@ class Product(BaseModel):
         if value == "":
             raise ValueError("'name' cannot be empty")
         # else if value has less than 5 characters
-        elif len(value) < 5:
+        elif len(value) < NAME_MIN_LENGTH:
             raise ValueError("'name' should be atleat 5 characters long.")
 
         return value
@@ -0,0 +1,183 @@
+"""This file includes bulk validation of raw product records.
+
+The checks of the Product field validators are expressed as pydantic-core
+constraints (positive id and price) and a name check stripping like
+str.strip(), so a whole list of records is validated and turned into
+Product models in a single call. Rows rejected by the constraints are
+validated again with Product.model_validate(), so accepted values and error
+reports stay identical to the single record path.
+"""
+
+
+from dataclasses import dataclass, field
+from pydantic import ValidationError
+from pydantic_core import SchemaValidator, core_schema
+from features.product.models.product import NAME_MIN_LENGTH, Product
+
+
+def _strip_name(value: str) -> str:
+    """Strip 'name' like Product.validate_name(), whose errors are reported
+    by the single record path."""
+
+    # str_schema(strip_whitespace=True) strips fewer characters
+    value = value.strip()
+    if len(value) < NAME_MIN_LENGTH:
+        raise ValueError("'name' should be atleat 5 characters long.")
+
+    return value
+
+
+# validator of a list of records, creating Product models
+_BATCH_VALIDATOR = SchemaValidator(
+    core_schema.list_schema(
+        core_schema.model_schema(
+            Product,
+            core_schema.model_fields_schema(
+                {
+                    "id": core_schema.model_field(
+                        core_schema.int_schema(gt=0)
+                    ),
+                    "name": core_schema.model_field(
+                        core_schema.no_info_after_validator_function(
+                            _strip_name, core_schema.str_schema()
+                        )
+                    ),
+                    "price": core_schema.model_field(
+                        core_schema.float_schema(gt=0.0)
+                    ),
+                }
+            ),
+        )
+    )
+)
+
+
+@dataclass
+class RowError:
+    """Validation errors of a single input row.
+
+    'errors' are ValidationError.errors() of Product.model_validate(),
+    without urls and context.
+    """
+
+    index: int
+    errors: list[dict]
+
+
+@dataclass
+class ProductBatch:
+    """Result of a bulk validation."""
+
+    # valid products in input order
+    products: list[Product] = field(default_factory=list)
+    # input index of every valid product
+    indices: list[int] = field(default_factory=list)
+    # errors of invalid rows in input order
+    errors: list[RowError] = field(default_factory=list)
+
+
+def _validate_rows(rows: list) -> ProductBatch:
+    """Validate raw rows in bulk.
+
+    Args:
+        rows (list): Raw product rows.
+
+    Returns:
+        ProductBatch: Valid products and per row errors.
+    """
+
+    batch = ProductBatch()
+
+    try:
+        # every row passes the constraints
+        products = _BATCH_VALIDATOR.validate_python(rows)
+        rejected: set[int] = set()
+    except ValidationError as error:
+        # rows rejected by the constraints
+        rejected = {item["loc"][0] for item in error.errors()}
+        # validate remaining rows again in bulk
+        products = _BATCH_VALIDATOR.validate_python(
+            [row for i, row in enumerate(rows) if i not in rejected]
+        )
+
+    accepted = iter(products)
+
+    for i, row in enumerate(rows):
+        # row passed the constraints
+        if i not in rejected:
+            batch.products.append(next(accepted))
+            batch.indices.append(i)
+            continue
+
+        # report (or accept) row with the Product validators
+        try:
+            product = Product.model_validate(row)
+        except ValidationError as error:
+            batch.errors.append(
+                RowError(
+                    i, error.errors(include_url=False, include_context=False)
+                )
+            )
+        else:
+            batch.products.append(product)
+            batch.indices.append(i)
+
+    return batch
+
+
+def validate_products(records: list) -> ProductBatch:
+    """Validate a list of raw product records in a single call.
+
+    Args:
+        records (list): Raw product records, usually dicts.
+
+    Raises:
+        TypeError: If records is not a list.
+
+    Returns:
+        ProductBatch: Valid products and per row errors.
+    """
+
+    # verify records type
+    if not isinstance(records, list):
+        raise TypeError("'records' should be a valid list.")
+
+    return _validate_rows(records)
+
+
+def validate_product_columns(columns: dict) -> ProductBatch:
+    """Validate columnar raw product data in a single call.
+
+    Args:
+        columns (dict): {"id": [...], "name": [...], "price": [...]}.
+
+    Raises:
+        TypeError: If columns is not a dict.
+        ValueError: If a column is missing or columns differ in length.
+
+    Returns:
+        ProductBatch: Valid products and per row errors.
+    """
+
+    # verify columns type
+    if not isinstance(columns, dict):
+        raise TypeError("'columns' should be a valid dict.")
+
+    # verify columns
+    try:
+        ids = list(columns["id"])
+        names = list(columns["name"])
+        prices = list(columns["price"])
+    except KeyError as error:
+        raise ValueError(f"missing column: {error.args[0]}") from None
+
+    # verify columns length
+    if not len(ids) == len(names) == len(prices):
+        raise ValueError("columns should have the same length")
+
+    return _validate_rows(
+        [
+            {"id": id_, "name": name, "price": price}
+            for id_, name, price in zip(ids, names, prices)
+        ]
+    )
@@ -0,0 +1,16 @@
+"""This file includes the binary codec of Product records.
+
+Products are encoded in columnar batches (see record_codec): the id (i64)
+and price (f64) columns, then the u32 length column and the concatenated
+UTF-8 bytes of the names.
+"""
+
+
+from core.services.codec_service.record_codec import RecordCodec
+from features.product.models.product import Product
+
+
+# bump whenever Product fields change
+PRODUCT_SCHEMA_VERSION = 1
+
+PRODUCT_CODEC = RecordCodec(Product, schema_version=PRODUCT_SCHEMA_VERSION)
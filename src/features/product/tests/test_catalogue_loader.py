@@ -0,0 +1,302 @@
+"""Test Cases
+
+- detect_format() should detect csv and ndjson from file extension
+- detect_format() should raise ValueError for unknown extension
+
+- read_chunks() should raise ValueError if 'chunk_size' is not positive
+- read_chunks() should stream CSV rows in chunks
+- read_chunks() should stream NDJSON rows in chunks skipping blank lines
+- read_chunks() should read gzip compressed files
+- read_chunks() should yield malformed NDJSON lines as raw strings
+- read_chunks() should yield CSV rows with missing or extra values as
+  value lists
+
+- load_catalogue() should insert valid products and report rejected rows
+- load_catalogue() should reject duplicate ids and insert the rest
+- load_catalogue() should reject CSV rows with missing or extra values
+- load_catalogue() should validate chunks in a process pool
+- load_catalogue() should keep at most 'max_errors' row errors
+"""
+
+
+import gzip
+import json
+import pytest
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from features.product.loaders.catalogue_loader import (
+    detect_format,
+    load_catalogue,
+    read_chunks,
+)
+from features.product.models.product import Product
+from features.product.models.product_batch import RowError
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+
+
+def write_ndjson(path, rows: list) -> str:
+    """Write rows as NDJSON file and return its path."""
+
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    return str(path)
+
+
+def make_usecase() -> ProductCrudUsecase:
+    """Return usecase backed by the mock database."""
+
+    return ProductCrudUsecase(MySQLService[Product]())
+
+
+def test_detect_format():
+    """detect_format() should detect csv and ndjson from file extension."""
+
+    # verify formats
+    assert detect_format("catalogue.csv") == "csv"
+    assert detect_format("catalogue.CSV.gz") == "csv"
+    assert detect_format("catalogue.ndjson") == "ndjson"
+    assert detect_format("catalogue.jsonl.gz") == "ndjson"
+
+
+def test_detect_format_unknown():
+    """detect_format() should raise ValueError for unknown extension."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        detect_format("catalogue.xml")
+
+    # verify error message
+    assert "unknown catalogue format: catalogue.xml" in str(exc_info.value)
+
+
+def test_read_chunks_chunk_size(tmp_path):
+    """read_chunks() should raise ValueError if 'chunk_size'
+    is not positive."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        next(read_chunks(str(tmp_path / "a.csv"), chunk_size=0))
+
+    # verify error message
+    assert "'chunk_size' must be a positive integer" in str(exc_info.value)
+
+
+def test_read_chunks_csv(tmp_path):
+    """read_chunks() should stream CSV rows in chunks."""
+
+    # write csv file
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        "id,name,price\n1,orange,4.99\n2,banana,6.99\n3,papaya,1.99\n"
+    )
+
+    # verify chunks
+    assert list(read_chunks(str(path), chunk_size=2)) == [
+        [
+            {"id": "1", "name": "orange", "price": "4.99"},
+            {"id": "2", "name": "banana", "price": "6.99"},
+        ],
+        [{"id": "3", "name": "papaya", "price": "1.99"}],
+    ]
+
+
+def test_read_chunks_ndjson(tmp_path):
+    """read_chunks() should stream NDJSON rows in chunks skipping
+    blank lines."""
+
+    # write ndjson file with a blank line
+    path = tmp_path / "catalogue.ndjson"
+    path.write_text('{"id": 1}\n\n{"id": 2}\n{"id": 3}\n')
+
+    # verify chunks
+    assert list(read_chunks(str(path), chunk_size=2)) == [
+        [{"id": 1}, {"id": 2}],
+        [{"id": 3}],
+    ]
+
+
+def test_read_chunks_gzip(tmp_path):
+    """read_chunks() should read gzip compressed files."""
+
+    # write compressed ndjson file
+    path = tmp_path / "catalogue.ndjson.gz"
+    with gzip.open(path, "wt") as file:
+        file.write('{"id": 1}\n')
+
+    # verify chunks
+    assert list(read_chunks(str(path))) == [[{"id": 1}]]
+
+
+def test_read_chunks_malformed(tmp_path):
+    """read_chunks() should yield malformed NDJSON lines as raw strings."""
+
+    # write ndjson file with a malformed line
+    path = tmp_path / "catalogue.ndjson"
+    path.write_text('{"id": 1}\n{"id": \n')
+
+    # verify chunks
+    assert list(read_chunks(str(path))) == [[{"id": 1}, '{"id": ']]
+
+
+def test_read_chunks_column_count(tmp_path):
+    """read_chunks() should yield CSV rows with missing or extra values as
+    value lists."""
+
+    # write csv file with a missing and an extra value
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        "id,name,price\n1,orange,4.99\n2,banana\n3,papaya,1.99,x\n"
+    )
+
+    # verify chunks
+    assert list(read_chunks(str(path))) == [
+        [
+            {"id": "1", "name": "orange", "price": "4.99"},
+            ["2", "banana"],
+            ["3", "papaya", "1.99", "x"],
+        ]
+    ]
+
+
+def test_load_catalogue(tmp_path):
+    """load_catalogue() should insert valid products and report
+    rejected rows."""
+
+    # write csv file with an invalid row
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        "id,name,price\n1,orange,4.99\n2,kiwi,6.99\n3,papaya,1.99\n"
+    )
+
+    # load catalogue
+    report = load_catalogue(str(path), make_usecase(), workers=0)
+
+    # verify report
+    assert report.rows == 3
+    assert report.inserted == 2
+    assert report.rejected == 1
+    assert report.errors[0].index == 2
+    assert report.errors[0].errors[0]["msg"] == (
+        "Value error, 'name' should be atleat 5 characters long."
+    )
+    assert report.rows_per_second > 0
+
+    # verify database
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 4.99},
+        {"id": 3, "name": "papaya", "price": 1.99},
+    ]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_load_catalogue_duplicates(tmp_path):
+    """load_catalogue() should reject duplicate ids and insert the rest."""
+
+    # add a record in database
+    DATABASE.append({"id": 1, "name": "orange", "price": 4.99})
+
+    # write ndjson file with duplicate ids
+    path = write_ndjson(
+        tmp_path / "catalogue.ndjson",
+        [
+            {"id": 1, "name": "apple", "price": 1.0},
+            {"id": 2, "name": "banana", "price": 2.0},
+            {"id": 2, "name": "papaya", "price": 3.0},
+        ],
+    )
+
+    # load catalogue
+    report = load_catalogue(path, make_usecase(), workers=0)
+
+    # verify report
+    assert report.inserted == 1
+    assert report.rejected == 2
+    assert [row_error.index for row_error in report.errors] == [1, 3]
+    assert report.errors[0].errors[0]["msg"] == "duplicate id: 1"
+
+    # verify database
+    assert DATABASE == [
+        {"id": 1, "name": "orange", "price": 4.99},
+        {"id": 2, "name": "banana", "price": 2.0},
+    ]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_load_catalogue_column_count(tmp_path):
+    """load_catalogue() should reject CSV rows with missing or extra
+    values."""
+
+    # write csv file with a missing and an extra value
+    path = tmp_path / "catalogue.csv"
+    path.write_text(
+        "id,name,price\n1,orange,4.99\n2,banana\n3,papaya,1.99,x\n"
+    )
+
+    # load catalogue
+    report = load_catalogue(str(path), make_usecase(), workers=0)
+
+    # verify report
+    assert report.inserted == 1
+    assert report.rejected == 2
+    assert report.errors == [
+        RowError(
+            2,
+            [{"type": "column_count", "msg": "expected 3 values, got 2"}],
+        ),
+        RowError(
+            3,
+            [{"type": "column_count", "msg": "expected 3 values, got 4"}],
+        ),
+    ]
+
+    # verify database
+    assert DATABASE == [{"id": 1, "name": "orange", "price": 4.99}]
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_load_catalogue_process_pool(tmp_path):
+    """load_catalogue() should validate chunks in a process pool."""
+
+    # write ndjson file with 100 products
+    path = write_ndjson(
+        tmp_path / "catalogue.ndjson",
+        [
+            {"id": i, "name": f"product-{i}", "price": float(i)}
+            for i in range(1, 101)
+        ],
+    )
+
+    # load catalogue in small chunks
+    report = load_catalogue(path, make_usecase(), chunk_size=7, workers=2)
+
+    # verify report
+    assert report.rows == 100
+    assert report.inserted == 100
+    assert report.rejected == 0
+
+    # verify database order
+    assert [record["id"] for record in DATABASE] == list(range(1, 101))
+
+    # remove records from database
+    DATABASE.clear()
+
+
+def test_load_catalogue_max_errors(tmp_path):
+    """load_catalogue() should keep at most 'max_errors' row errors."""
+
+    # write ndjson file with invalid rows only
+    path = write_ndjson(tmp_path / "catalogue.ndjson", [{"id": 0}] * 5)
+
+    # load catalogue
+    report = load_catalogue(
+        path, make_usecase(), chunk_size=2, workers=0, max_errors=3
+    )
+
+    # verify report
+    assert report.rejected == 5
+    assert [row_error.index for row_error in report.errors] == [1, 2, 3]
@@ -0,0 +1,243 @@
+"""Test Cases
+
+- validate_products() should raise TypeError if 'records' is not a list
+- validate_products() should return valid products in input order
+- validate_products() should strip names like Product.model_validate()
+- validate_products() should accept and reject names with non-ASCII
+  whitespace like Product.model_validate()
+- validate_products() should report errors of invalid rows
+- validate_products() errors should match Product.model_validate() errors
+- validate_products() should coerce values like Product.model_validate()
+- validate_products() should accept rows accepted by Product.model_validate()
+  but rejected by the bulk constraints
+
+- validate_product_columns() should raise TypeError if 'columns'
+  is not a dict
+- validate_product_columns() should raise ValueError if a column
+  is missing
+- validate_product_columns() should raise ValueError if columns
+  differ in length
+- validate_product_columns() should validate columnar data
+"""
+
+
+import math
+import pytest
+from pydantic import ValidationError
+from features.product.models.product import Product
+from features.product.models.product_batch import (
+    validate_product_columns,
+    validate_products,
+)
+
+
+# raw records covering bulk and single record paths, valid and invalid rows
+RECORDS = [
+    {"id": 1, "name": "orange", "price": 4.99},
+    {"id": 0, "name": "orange", "price": 4.99},
+    {"id": 2, "name": "   ", "price": 4.99},
+    {"id": 3, "name": " kiwi ", "price": 4.99},
+    {"id": 4, "name": "banana", "price": 0},
+    {"id": -5, "name": "", "price": -1.5},
+    {"id": "6", "name": "papaya", "price": "7.5"},
+    {"id": 7, "name": "melon"},
+    {"id": 8.0, "name": "apple", "price": 1},
+    {"id": "x", "name": 1, "price": None},
+    "not a dict",
+    {"id": 9, "name": "  grapes  ", "price": 3, "extra": True},
+]
+
+
+def expected_errors(record) -> list[dict]:
+    """Return errors reported by Product.model_validate() for 'record'."""
+
+    try:
+        Product.model_validate(record)
+    except ValidationError as error:
+        return error.errors(include_url=False, include_context=False)
+
+    return []
+
+
+def test_validate_products_incorrect():
+    """validate_products() should raise TypeError if 'records'
+    is not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        validate_products({"id": 1})  # type: ignore
+
+    # verify error message
+    assert "'records' should be a valid list." in str(exc_info.value)
+
+
+def test_validate_products_valid():
+    """validate_products() should return valid products in input order."""
+
+    # validate records
+    batch = validate_products(
+        [
+            {"id": 1, "name": "orange", "price": 4.99},
+            {"id": 2, "name": "banana", "price": 6},
+        ]
+    )
+
+    # verify result
+    assert batch.products == [
+        Product(id=1, name="orange", price=4.99),
+        Product(id=2, name="banana", price=6.0),
+    ]
+    assert type(batch.products[1].price) is float
+    assert batch.indices == [0, 1]
+    assert batch.errors == []
+
+
+def test_validate_products_strip():
+    """validate_products() should strip names like
+    Product.model_validate()."""
+
+    # validate record
+    batch = validate_products([{"id": 1, "name": "  orange  ", "price": 1}])
+
+    # verify stripped name
+    assert batch.products[0].name == "orange"
+
+
+def test_validate_products_strip_parity():
+    """validate_products() should accept and reject names with non-ASCII
+    whitespace like Product.model_validate()."""
+
+    records = [
+        {"id": 1, "name": "\x1cabcd", "price": 1.0},
+        {"id": 2, "name": "\u3000orange\u2003", "price": 1.0},
+        {"id": 3, "name": "\x1f\x1e\x1d", "price": 1.0},
+    ]
+
+    # validate records
+    batch = validate_products(records)
+
+    # verify same rows rejected and same names stored
+    assert [error.index for error in batch.errors] == [0, 2]
+    for row_error in batch.errors:
+        assert row_error.errors == expected_errors(records[row_error.index])
+    assert batch.products == [Product.model_validate(records[1])]
+    assert batch.products[0].name == "orange"
+
+
+def test_validate_products_errors():
+    """validate_products() should report errors of invalid rows."""
+
+    # validate records
+    batch = validate_products(RECORDS)
+
+    # verify invalid rows
+    assert [error.index for error in batch.errors] == [1, 2, 3, 4, 5, 7, 9, 10]
+    assert batch.indices == [0, 6, 8, 11]
+
+    # verify messages of a row failing every validator
+    assert [error["msg"] for error in batch.errors[4].errors] == [
+        "Value error, 'id' must be a positive integer",
+        "Value error, 'name' cannot be empty",
+        "Value error, 'price' must be a positive number",
+    ]
+
+
+def test_validate_products_same_errors():
+    """validate_products() errors should match Product.model_validate()
+    errors."""
+
+    # validate records
+    batch = validate_products(RECORDS)
+
+    # verify every row error
+    for row_error in batch.errors:
+        assert row_error.errors == expected_errors(RECORDS[row_error.index])
+
+
+def test_validate_products_coercion():
+    """validate_products() should coerce values like
+    Product.model_validate()."""
+
+    # validate records
+    batch = validate_products(RECORDS)
+
+    # verify every valid row
+    for index, product in zip(batch.indices, batch.products):
+        expected = Product.model_validate(RECORDS[index])
+        assert product == expected
+        assert product.model_dump() == expected.model_dump()
+
+
+def test_validate_products_fallback_accept():
+    """validate_products() should accept rows accepted by
+    Product.model_validate() but rejected by the bulk constraints."""
+
+    # validate record with NaN price, not rejected by validate_price
+    batch = validate_products([{"id": 1, "name": "orange", "price": "nan"}])
+
+    # verify result
+    assert batch.errors == []
+    assert batch.indices == [0]
+    assert math.isnan(batch.products[0].price)
+
+
+def test_validate_columns_incorrect():
+    """validate_product_columns() should raise TypeError if 'columns'
+    is not a dict."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        validate_product_columns([])  # type: ignore
+
+    # verify error message
+    assert "'columns' should be a valid dict." in str(exc_info.value)
+
+
+def test_validate_columns_missing():
+    """validate_product_columns() should raise ValueError if a column
+    is missing."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        validate_product_columns({"id": [1], "name": ["orange"]})
+
+    # verify error message
+    assert "missing column: price" in str(exc_info.value)
+
+
+def test_validate_columns_length():
+    """validate_product_columns() should raise ValueError if columns
+    differ in length."""
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        validate_product_columns(
+            {"id": [1, 2], "name": ["orange"], "price": [1.0]}
+        )
+
+    # verify error message
+    assert "columns should have the same length" in str(exc_info.value)
+
+
+def test_validate_columns():
+    """validate_product_columns() should validate columnar data."""
+
+    # validate columns
+    batch = validate_product_columns(
+        {
+            "id": [1, 0, "3"],
+            "name": ["orange", "banana", " papaya "],
+            "price": [4.99, 6.99, "1.5"],
+        }
+    )
+
+    # verify result
+    assert batch.products == [
+        Product(id=1, name="orange", price=4.99),
+        Product(id=3, name="papaya", price=1.5),
+    ]
+    assert batch.indices == [0, 2]
+    assert batch.errors[0].index == 1
+    assert batch.errors[0].errors == expected_errors(
+        {"id": 0, "name": "banana", "price": 6.99}
+    )
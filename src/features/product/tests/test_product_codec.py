@@ -0,0 +1,107 @@
+"""Test Cases
+
+- PRODUCT_CODEC should round trip products
+- PRODUCT_CODEC should round trip database records
+- PRODUCT_CODEC should be smaller than JSON
+- PRODUCT_CODEC should read fields without decoding the batch
+
+- decode() should strip spaced names like Product.model_validate()
+- decode() should raise ValidationError for invalid products
+"""
+
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+from features.product.models.product import Product
+from features.product.models.product_codec import PRODUCT_CODEC
+
+
+# valid products
+PRODUCTS = [
+    Product(id=1, name="apple", price=10.50),
+    Product(id=5, name="orange", price=50.50),
+    Product(id=2**40, name="crème brûlée", price=0.1),
+]
+
+
+def test_round_trip():
+    """PRODUCT_CODEC should round trip products."""
+
+    # verify round trip
+    assert PRODUCT_CODEC.decode(PRODUCT_CODEC.encode(PRODUCTS)) == PRODUCTS
+
+
+def test_round_trip_records():
+    """PRODUCT_CODEC should round trip database records."""
+
+    # records as stored in database
+    records = [product.model_dump() for product in PRODUCTS]
+
+    # verify round trip
+    batch = PRODUCT_CODEC.view(PRODUCT_CODEC.encode(records))
+    assert batch.rows() == records
+
+
+def test_size():
+    """PRODUCT_CODEC should be smaller than JSON."""
+
+    # verify size
+    assert len(PRODUCT_CODEC.encode(PRODUCTS)) < len(
+        TypeAdapter(list[Product]).dump_json(PRODUCTS)
+    )
+
+
+def test_field_access():
+    """PRODUCT_CODEC should read fields without decoding the batch."""
+
+    # view encoded products
+    batch = PRODUCT_CODEC.view(PRODUCT_CODEC.encode(PRODUCTS))
+
+    # verify fields
+    assert batch.get(2, "id") == 2**40
+    assert batch.get(2, "name") == "crème brûlée"
+    assert batch.get(1, "price") == 50.50
+
+
+def test_decode_spaced_name():
+    """decode() should strip spaced names like Product.model_validate()."""
+
+    # encode record with spaced name
+    buffer = PRODUCT_CODEC.encode([{"id": 1, "name": "  apple\n", "price": 1}])
+
+    # verify non spaced name
+    assert PRODUCT_CODEC.decode(buffer)[0].name == "apple"
+
+
+@pytest.mark.parametrize(
+    "record, message",
+    [
+        ({"id": 0, "name": "apple", "price": 10.5}, "'id' must be a positive"),
+        (
+            {"id": -1, "name": "apple", "price": 10.5},
+            "'id' must be a positive",
+        ),
+        ({"id": 1, "name": "  ", "price": 10.5}, "'name' cannot be empty"),
+        ({"id": 1, "name": "abcd", "price": 10.5}, "atleat 5 characters"),
+        (
+            {"id": 1, "name": "apple", "price": 0.0},
+            "'price' must be a positive",
+        ),
+        (
+            {"id": 1, "name": "apple", "price": -1.5},
+            "'price' must be a positive",
+        ),
+    ],
+)
+def test_decode_invalid(record, message):
+    """decode() should raise ValidationError for invalid products."""
+
+    # encode invalid record
+    buffer = PRODUCT_CODEC.encode([record])
+
+    # verify ValidationError raised
+    with pytest.raises(ValidationError) as exc_info:
+        PRODUCT_CODEC.decode(buffer)
+
+    # verify error message
+    assert message in str(exc_info.value)
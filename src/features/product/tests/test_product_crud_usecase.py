@@ -4,6 +4,12 @@
     -- no object provided
     -- incorrect object provided
     -- correct object provided and private instance created
+- ProductCrudUsecase should raise TypeError if 'views' is not
+  of type ViewRegistry
+- ProductCrudUsecase should raise TypeError if 'ids' is not
+  of type IdSequence
+- ProductCrudUsecase should raise TypeError if 'cache' is not
+  of type TTLCache
 
 - ProductCrudUsecase has a create_product() method
     -- with parameter product_data of type 'dict'
@@ -35,6 +41,31 @@
   of 'sql_service' return None.
 - create_product() method should return correct Product.
 
+- create_product() method should allocate a missing id from the id
+  sequence and keep the sequence after supplied ids.
+- Concurrent create_product() calls should allocate ids from one block
+  per thread.
+- create_products() method should keep the id sequence after the ids
+  of the products.
+- reserve_product_ids() method should raise ValueError if the usecase
+  has no id sequence.
+- reserve_product_ids() method should reserve ids from the id sequence.
+
+- When create_products() method is called with incorrect products
+  it should raise TypeError.
+- When create_products() method is called with a list of products
+  it should call create_many() method of 'sql_service'.
+
+- When get_products_by_ids() method is called with incorrect ids
+  it should raise TypeError.
+- When get_products_by_ids() method is called with a list of ids
+  it should return the result of read_by_ids() method of 'sql_service'.
+
+- get_view() method should raise ValueError if no view is registered
+  with the name.
+- get_view() method should return aggregates of the view group
+  without calling 'sql_service'.
+
 - When get_product() method is called with incorrect query_data
   it should raise TypeError.
 - When get_product() method is called with correct query_data
@@ -74,13 +105,35 @@
   of 'sql_service' raises SQLException.
 - delete_product() method should return None if delete() method
   of 'sql_service' returns None.
+
+- get_product_versioned() and update_product_if_version() methods should
+  call read_versioned() and update_if_version() of 'sql_service'.
+- modify_product() method should retry the change on version conflicts.
+
+- get_product() method should serve copies of found and missing
+  products from 'cache', queries with unhashable values excepted.
+- Writes of the usecase should invalidate the cached results they
+  may change.
 """
 
 
 import inspect
+import sys
+import threading
 import pytest
 from unittest.mock import Mock
-from core.services.sql_service.sql_exception import SQLException
+from core.services.cache_service.ttl_cache import TTLCache
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.id_sequence import IdSequence
+from core.services.sql_service.materialized_view import (
+    MaterializedView,
+    ViewRegistry,
+    count,
+)
+from core.services.sql_service.sql_exception import (
+    SQLException,
+    VersionConflict,
+)
 from core.services.sql_service.sql_service import SQLService
 from features.product.models.product import Product
 from features.product.usecases.product_crud_usecase import ProductCrudUsecase
@@ -130,6 +183,42 @@ def test_sql_service_private_instance():
     assert hasattr(usecase, "_ProductCrudUsecase__sql_service")
 
 
+def test_views_incorrect():
+    """ProductCrudUsecase should raise TypeError if 'views' is not
+    of type ViewRegistry."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        ProductCrudUsecase(Mock(spec=SQLService), "abcd")  # type: ignore
+
+    # verify error message
+    assert "'views' should be of type 'ViewRegistry'" in str(exc_info.value)
+
+
+def test_cache_incorrect():
+    """ProductCrudUsecase should raise TypeError if 'cache' is not
+    of type TTLCache."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        ProductCrudUsecase(Mock(spec=SQLService), cache={})  # type: ignore
+
+    # verify error message
+    assert "'cache' should be of type 'TTLCache'" in str(exc_info.value)
+
+
+def test_ids_incorrect():
+    """ProductCrudUsecase should raise TypeError if 'ids' is not
+    of type IdSequence."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        ProductCrudUsecase(Mock(spec=SQLService), ids="abcd")  # type: ignore
+
+    # verify error message
+    assert "'ids' should be of type 'IdSequence'" in str(exc_info.value)
+
+
 def test_create_product_present():
     """ProductCrudUsecase has a create_product() method with parameters:
     product_data: dict
@@ -730,3 +819,371 @@ def test_delete_product_return_none():
 
     # verify result
     assert result is None
+
+
+def test_create_products_incorrect_data():
+    """When create_products() method is called with incorrect products
+    it should raise TypeError."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        product_crud_usecase.create_products("products")  # type: ignore
+
+    # verify error message
+    assert "'products' should be a valid list." in str(exc_info.value)
+
+
+def test_create_products_sql_service_create_many():
+    """When create_products() method is called with a list of products
+    it should call create_many() method of 'sql_service'."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # products to create
+    products = [Product(id=1, name="banana", price=5.99)]
+
+    # call create_products
+    product_crud_usecase.create_products(products)
+
+    # verify create_many method called once
+    mock.create_many.assert_called_once_with(products)
+
+
+def test_create_product_allocate_id():
+    """create_product() method should allocate a missing id from the id
+    sequence and keep the sequence after supplied ids."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    # create product crud usecase with id sequence
+    ids = IdSequence(start=10, block_size=1)
+    product_crud_usecase = ProductCrudUsecase(mock, ids=ids)
+
+    # verify allocated id
+    product = product_crud_usecase.create_product(
+        {"name": "banana", "price": 5.99}
+    )
+    assert product == Product(id=10, name="banana", price=5.99)
+    mock.create.assert_called_once_with(product)
+
+    # verify supplied id kept and sequence moved after it
+    product = product_crud_usecase.create_product(
+        {"id": 100, "name": "banana", "price": 5.99}
+    )
+    assert product.id == 100
+    assert ids.reserve(1) == range(101, 102)
+
+
+def test_create_product_concurrent_ids():
+    """Concurrent create_product() calls should allocate ids from one block
+    per thread."""
+
+    # create product crud usecase with id sequence
+    ids = IdSequence(block_size=1000)
+    product_crud_usecase = ProductCrudUsecase(Mock(spec=SQLService), ids=ids)
+    created: list[int] = []
+
+    def writer() -> None:
+        for _ in range(50):
+            product = product_crud_usecase.create_product(
+                {"name": "banana", "price": 5.99}
+            )
+            created.append(product.id)
+
+    # run interleaved writers
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=writer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # verify unique ids and a single block per thread
+    assert len(set(created)) == 100
+    assert max(created) <= 2000
+    assert (
+        ids.metrics.counter_value(
+            "id_sequence_blocks_total", {"name": "default"}
+        )
+        == 2
+    )
+
+
+def test_create_products_advance_ids():
+    """create_products() method should keep the id sequence after the ids
+    of the products."""
+
+    # create product crud usecase with id sequence
+    ids = IdSequence()
+    product_crud_usecase = ProductCrudUsecase(Mock(spec=SQLService), ids=ids)
+
+    # create products
+    product_crud_usecase.create_products(
+        [
+            Product(id=20, name="banana", price=5.99),
+            Product(id=30, name="orange", price=4.99),
+        ]
+    )
+
+    # verify sequence
+    assert ids.peek() == 31
+
+
+def test_reserve_product_ids_disabled():
+    """reserve_product_ids() method should raise ValueError if the usecase
+    has no id sequence."""
+
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(Mock(spec=SQLService))
+
+    # verify ValueError raised
+    with pytest.raises(ValueError) as exc_info:
+        product_crud_usecase.reserve_product_ids(10)
+
+    # verify error message
+    assert "product id allocation is not enabled" in str(exc_info.value)
+
+
+def test_reserve_product_ids():
+    """reserve_product_ids() method should reserve ids from the id
+    sequence."""
+
+    # create product crud usecase with id sequence
+    product_crud_usecase = ProductCrudUsecase(
+        Mock(spec=SQLService), ids=IdSequence(start=5)
+    )
+
+    # verify reserved ids
+    assert product_crud_usecase.reserve_product_ids(3) == range(5, 8)
+    assert product_crud_usecase.reserve_product_ids(1) == range(8, 9)
+
+
+def test_get_products_by_ids_incorrect_data():
+    """When get_products_by_ids() method is called with incorrect ids
+    it should raise TypeError."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        product_crud_usecase.get_products_by_ids(1)  # type: ignore
+
+    # verify error message
+    assert "'ids' should be a valid list." in str(exc_info.value)
+
+
+def test_get_products_by_ids_sql_service_read_by_ids():
+    """When get_products_by_ids() method is called with a list of ids
+    it should return the result of read_by_ids() method of 'sql_service'."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    product = Product(id=1, name="banana", price=5.99)
+    mock.read_by_ids.return_value = [product, None]
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # verify result
+    assert product_crud_usecase.get_products_by_ids([1, 2]) == [product, None]
+
+    # verify read_by_ids method called once
+    mock.read_by_ids.assert_called_once_with([1, 2])
+
+
+def test_get_view_unknown():
+    """get_view() method should raise ValueError if no view is registered
+    with the name."""
+
+    # create product crud usecase with and without views
+    mock = Mock(spec=SQLService)
+    views = ViewRegistry(mock, ChangeFeed())
+
+    for product_crud_usecase in [
+        ProductCrudUsecase(mock),
+        ProductCrudUsecase(mock, views),
+    ]:
+        # verify ValueError raised
+        with pytest.raises(ValueError) as exc_info:
+            product_crud_usecase.get_view("by_name")
+
+        # verify error message
+        assert "unknown view: by_name" in str(exc_info.value)
+
+
+def test_get_view():
+    """get_view() method should return aggregates of the view group
+    without calling 'sql_service'."""
+
+    # create mock sql service and views
+    mock = Mock(spec=SQLService)
+    mock.iter_chunks.return_value = iter([])
+    feed = ChangeFeed()
+    views = ViewRegistry(mock, feed)
+    views.register(MaterializedView("by_name", {"count": count()}, "name"))
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock, views)
+
+    # append changes
+    feed.append("insert", 1, None, {"id": 1, "name": "banana", "price": 5.99})
+    mock.reset_mock()
+
+    # verify result
+    assert product_crud_usecase.get_view("by_name", "banana") == {"count": 1}
+    assert product_crud_usecase.get_view("by_name", "orange") is None
+
+    # verify sql service not called
+    assert mock.mock_calls == []
+
+
+def test_versioned_product():
+    """get_product_versioned() and update_product_if_version() methods
+    should call read_versioned() and update_if_version() of
+    'sql_service'."""
+
+    # create mock sql service
+    mock = Mock(spec=SQLService)
+    product = Product(id=1, name="banana", price=4.99)
+    mock.read_versioned.return_value = (product, 3)
+    mock.update_if_version.return_value = 4
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # verify versioned read
+    assert product_crud_usecase.get_product_versioned(1) == (product, 3)
+    mock.read_versioned.assert_called_once_with(1)
+
+    # verify compare-and-set update
+    assert product_crud_usecase.update_product_if_version(product, 3) == 4
+    mock.update_if_version.assert_called_once_with(product, 3)
+
+    # verify TypeError raised
+    with pytest.raises(TypeError):
+        product_crud_usecase.update_product_if_version([], 3)  # type: ignore
+
+
+def test_modify_product():
+    """modify_product() method should retry the change on version
+    conflicts."""
+
+    # create mock sql service, first update conflicts
+    mock = Mock(spec=SQLService)
+    product = Product(id=1, name="banana", price=4.99)
+    mock.read_versioned.side_effect = [(product, 3), (product, 5)]
+    mock.update_if_version.side_effect = [VersionConflict("conflict"), 6]
+    # create product crud usecase
+    product_crud_usecase = ProductCrudUsecase(mock)
+
+    # verify change applied to the latest version
+    updated = product_crud_usecase.modify_product(
+        1, lambda p: p.model_copy(update={"price": 5.99})
+    )
+    assert updated == Product(id=1, name="banana", price=5.99)
+    assert mock.update_if_version.call_args_list[-1] == ((updated, 5),)
+
+
+def test_get_product_cached():
+    """get_product() method should serve copies of found and missing
+    products from 'cache', queries with unhashable values excepted."""
+
+    # create mock sql service, product 1 is found
+    mock = Mock(spec=SQLService)
+    product = Product(id=1, name="banana", price=4.99)
+    mock.read_single.side_effect = lambda query_data: (
+        product if query_data == {"id": 1} else None
+    )
+    # create product crud usecase
+    cache = TTLCache(name="products")
+    product_crud_usecase = ProductCrudUsecase(mock, cache=cache)
+
+    # verify found and missing products read once
+    for _ in range(3):
+        assert product_crud_usecase.get_product({"id": 1}) == product
+        assert product_crud_usecase.get_product({"id": 2}) is None
+    assert mock.read_single.call_count == 2
+    assert (
+        cache.metrics.counter_value(
+            "cache_requests_total",
+            {"name": "products", "result": "negative_hit"},
+        )
+        == 2
+    )
+
+    # verify unhashable queries not cached
+    product_crud_usecase.get_product({"id": [1]})
+    product_crud_usecase.get_product({"id": [1]})
+    assert mock.read_single.call_count == 4
+
+    # verify changes of a returned product not cached
+    product_crud_usecase.get_product({"id": 1}).price = 0.01  # type: ignore
+    assert product_crud_usecase.get_product({"id": 1}) == product
+    assert product.price == 4.99
+
+
+def test_cache_invalidation():
+    """Writes of the usecase should invalidate the cached results they
+    may change."""
+
+    # create mock sql service and cached product crud usecase
+    mock = Mock(spec=SQLService)
+    banana = Product(id=1, name="banana", price=4.99)
+    mock.read_single.return_value = None
+    product_crud_usecase = ProductCrudUsecase(mock, cache=TTLCache())
+
+    def reads(query_data: dict) -> int:
+        """Return number of reads of the sql service for a query."""
+
+        product_crud_usecase.get_product(query_data)
+        return mock.read_single.call_count
+
+    # verify created product invalidates missing results it matches
+    assert reads({"id": 1}) == 1
+    assert reads({"name": "apple"}) == 2
+    product_crud_usecase.create_product(banana.model_dump())
+    assert reads({"id": 1}) == 3
+    assert reads({"name": "apple"}) == 3
+    product_crud_usecase.create_products([])
+    mock.read_single.return_value = banana
+    product_crud_usecase.create_products(
+        [Product(id=2, name="apple", price=1.0)]
+    )
+    assert reads({"name": "apple"}) == 4
+
+    # verify updated product invalidates results of its id
+    assert reads({"price": 4.99}) == 5
+    product_crud_usecase.update_product(banana)
+    assert reads({"price": 4.99}) == 6
+    assert reads({"id": 1}) == 7
+    mock.update_if_version.return_value = 2
+    product_crud_usecase.update_product_if_version(banana, 1)
+    assert reads({"id": 1}) == 8
+    mock.read_versioned.return_value = (banana, 2)
+    product_crud_usecase.modify_product(1, lambda p: p)
+    assert reads({"id": 1}) == 9
+
+    # verify deleted product invalidates results it matches
+    product_crud_usecase.delete_product({"price": 1.0})
+    assert reads({"id": 1}) == 9
+    product_crud_usecase.delete_product({"name": "banana"})
+    assert reads({"id": 1}) == 10
+
+    # verify writes of other ids keep results of queries on an id
+    product_crud_usecase.update_product(Product(id=2, name="apple", price=1.0))
+    product_crud_usecase.delete_product({"id": 3})
+    assert reads({"id": 1}) == 10
+    product_crud_usecase.delete_product({"id": 1})
+    assert reads({"id": 1}) == 11
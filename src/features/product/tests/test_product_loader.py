@@ -0,0 +1,116 @@
+"""Test Cases
+
+- ProductLoader should raise TypeError if 'usecase' is not of type
+  ProductCrudUsecase
+- get_product() calls by id of the same tick should be served by one
+  get_products_by_ids() call
+- get_product() should send other queries to the usecase as they are
+- get_products_by_ids() should raise TypeError if 'ids' is not a list
+- get_products_by_ids() should be batched with get_product() calls
+"""
+
+
+import asyncio
+import pytest
+from unittest.mock import Mock
+from features.product.loaders.product_loader import ProductLoader
+from features.product.models.product import Product
+from features.product.usecases.product_crud_usecase import ProductCrudUsecase
+
+
+# products of the mocked usecase
+PRODUCTS = {
+    1: Product(id=1, name="orange", price=4.99),
+    2: Product(id=2, name="banana", price=6.99),
+}
+
+
+def make_usecase() -> Mock:
+    """Return mocked usecase serving PRODUCTS."""
+
+    usecase = Mock(spec=ProductCrudUsecase)
+    usecase.get_products_by_ids.side_effect = lambda ids: [
+        PRODUCTS.get(record_id) for record_id in ids
+    ]
+    usecase.get_product.return_value = PRODUCTS[2]
+
+    return usecase
+
+
+def test_product_loader_incorrect():
+    """ProductLoader should raise TypeError if 'usecase' is not of type
+    ProductCrudUsecase."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        ProductLoader("abcd")  # type: ignore
+
+    # verify error message
+    assert "'usecase' should be of type 'ProductCrudUsecase'" in str(
+        exc_info.value
+    )
+
+
+def test_get_product_batched():
+    """get_product() calls by id of the same tick should be served by one
+    get_products_by_ids() call."""
+
+    usecase = make_usecase()
+    loader = ProductLoader(usecase)
+
+    async def main():
+        return await asyncio.gather(
+            loader.get_product({"id": 1}),
+            loader.get_product({"id": 3}),
+            loader.get_product({"id": 1}),
+        )
+
+    # verify results and single usecase call
+    assert asyncio.run(main()) == [PRODUCTS[1], None, PRODUCTS[1]]
+    usecase.get_products_by_ids.assert_called_once_with([1, 3])
+    usecase.get_product.assert_not_called()
+
+
+def test_get_product_not_batched():
+    """get_product() should send other queries to the usecase
+    as they are."""
+
+    usecase = make_usecase()
+    loader = ProductLoader(usecase)
+
+    # verify queries sent to get_product()
+    for query_data in [{"name": "banana"}, {"id": [1]}, "abcd"]:
+        assert asyncio.run(loader.get_product(query_data)) == PRODUCTS[2]
+        usecase.get_product.assert_called_with(query_data)
+    usecase.get_products_by_ids.assert_not_called()
+
+
+def test_get_products_by_ids_incorrect():
+    """get_products_by_ids() should raise TypeError if 'ids' is
+    not a list."""
+
+    # verify TypeError raised
+    with pytest.raises(TypeError) as exc_info:
+        asyncio.run(ProductLoader(make_usecase()).get_products_by_ids(1))
+
+    # verify error message
+    assert "'ids' should be a valid list." in str(exc_info.value)
+
+
+def test_get_products_by_ids_batched():
+    """get_products_by_ids() should be batched with get_product()
+    calls."""
+
+    usecase = make_usecase()
+    loader = ProductLoader(usecase)
+
+    async def main():
+        return await asyncio.gather(
+            loader.get_products_by_ids([2, 1]),
+            loader.get_product({"id": 1}),
+        )
+
+    # verify results and single usecase call
+    assert asyncio.run(main()) == [[PRODUCTS[2], PRODUCTS[1]], PRODUCTS[1]]
+    usecase.get_products_by_ids.assert_called_once()
+    assert sorted(usecase.get_products_by_ids.call_args.args[0]) == [1, 2]
@@ -0,0 +1,63 @@
+"""Test Cases
+
+- price_bucket() should return lower bound of the price bucket
+- product_views() should maintain products per price bucket and
+  catalogue totals
+"""
+
+
+import pytest
+from core.services.sql_service.change_feed import ChangeFeed
+from core.services.sql_service.materialized_view import ViewRegistry
+from core.services.sql_service.mysql_service import DATABASE, MySQLService
+from features.product.models.product import Product
+from features.product.views.product_views import (
+    CATALOGUE_TOTALS,
+    PRODUCTS_PER_PRICE_BUCKET,
+    price_bucket,
+    product_views,
+)
+
+
+def test_price_bucket():
+    """price_bucket() should return lower bound of the price bucket."""
+
+    # verify buckets
+    assert price_bucket({"price": 0.99}) == 0
+    assert price_bucket({"price": 10.0}) == 10
+    assert price_bucket({"price": 19.99}) == 10
+
+
+def test_product_views():
+    """product_views() should maintain products per price bucket and
+    catalogue totals."""
+
+    feed = ChangeFeed()
+    service = MySQLService[Product](change_feed=feed)
+    registry = ViewRegistry(service, feed)
+    for view in product_views():
+        registry.register(view)
+
+    # add products
+    service.create_many(
+        [
+            Product(id=1, name="orange", price=4.5),
+            Product(id=2, name="banana", price=6.5),
+            Product(id=3, name="papaya", price=12.5),
+        ]
+    )
+    service.update(Product(id=2, name="banana", price=16.5))
+
+    # verify products per price bucket
+    buckets = registry.get(PRODUCTS_PER_PRICE_BUCKET)
+    assert buckets.rows() == {0: {"count": 1}, 10: {"count": 2}}
+
+    # verify catalogue totals
+    totals = registry.get(CATALOGUE_TOTALS).get()
+    assert totals is not None
+    assert totals["count"] == 3
+    assert totals["total_value"] == pytest.approx(33.5)
+    assert totals["average_price"] == pytest.approx(33.5 / 3)
+
+    # remove records from database
+    DATABASE.clear()
@@ -1,25 +1,72 @@
+from typing import Any, Callable, Hashable
 from pydantic import BaseModel
 from features.product.models.product import Product
+from core.services.cache_service.ttl_cache import TTLCache
+from core.services.sql_service.id_sequence import IdSequence
+from core.services.sql_service.materialized_view import ViewRegistry
+from core.services.sql_service.optimistic import RETRIES, update_with_retry
+from core.services.sql_service.query_compiler import MODEL_QUERIES
+from core.services.sql_service.single_flight import query_key
 from core.services.sql_service.sql_service import SQLService
 
 
+def _matches(query_data: dict, product: Product) -> bool:
+    """Return True if the product matches the query, or if the query has
+    fields products do not have."""
+
+    try:
+        return MODEL_QUERIES.compile(query_data).matches(product)
+    except AttributeError:
+        return True
+
+
 class ProductCrudUsecase:
-    """Product usecase for database CRUD operations."""
+    """Product usecase for database CRUD operations.
+
+    get_product() results are kept in 'cache' if provided, missing
+    products included. Writes of the usecase invalidate the cached results
+    they may change, writes by other means are only seen once the cached
+    results expire.
+    """
 
     # constant error message
     QUERY_DATA_INVALID_ERROR = "'query_data' should be a valid dict."
 
-    def __init__(self, sql_service: SQLService[Product]) -> None:
+    def __init__(
+        self,
+        sql_service: SQLService[Product],
+        views: ViewRegistry | None = None,
+        ids: IdSequence | None = None,
+        cache: TTLCache | None = None,
+    ) -> None:
         # validate sql_service
         if not isinstance(sql_service, SQLService):
             raise TypeError("'sql_service' should be of type 'SQLService'")
 
+        # validate views
+        if views is not None and not isinstance(views, ViewRegistry):
+            raise TypeError("'views' should be of type 'ViewRegistry'")
+
+        # validate ids
+        if ids is not None and not isinstance(ids, IdSequence):
+            raise TypeError("'ids' should be of type 'IdSequence'")
+
+        # validate cache
+        if cache is not None and not isinstance(cache, TTLCache):
+            raise TypeError("'cache' should be of type 'TTLCache'")
+
         # create private instances
         self.__sql_service: SQLService = sql_service
+        self.__views: ViewRegistry | None = views
+        self.__ids: IdSequence | None = ids
+        self.__cache: TTLCache | None = cache
 
     def create_product(self, product_data: dict) -> Product:
         """Create a new product and add it to database.
 
+        If the usecase has an id sequence, 'id' may be omitted and is
+        allocated from the sequence.
+
         Args:
             product_data (dict): Product data in dictionary format.
 
@@ -31,13 +78,78 @@ class ProductCrudUsecase:
             Product: Created product.
         """
 
+        # allocate missing id
+        allocated = (
+            self.__ids is not None
+            and isinstance(product_data, dict)
+            and "id" not in product_data
+        )
+        if allocated:
+            product_data = {
+                **product_data,
+                "id": self.__ids.next_id(),  # type: ignore
+            }
+
         # create product object
         product: Product = Product.model_validate(product_data)
         # create record in database
         self.__sql_service.create(product)
+        self.__invalidate_products([product])
+
+        # keep allocated ids clear of the caller supplied one
+        if self.__ids is not None and not allocated:
+            self.__ids.advance_past(product.id)
 
         return product
 
+    def reserve_product_ids(self, count: int) -> range:
+        """Reserve consecutive product ids, e.g. for a bulk insert with
+        create_products().
+
+        Args:
+            count (int): Number of ids.
+
+        Raises:
+            ValueError: If the usecase has no id sequence or count is
+                not positive.
+
+        Returns:
+            range: Reserved ids, not used by any other writer.
+        """
+
+        # verify id sequence
+        if self.__ids is None:
+            raise ValueError("product id allocation is not enabled")
+
+        return self.__ids.reserve(count)
+
+    def create_products(self, products: list[Product]) -> None:
+        """Add already validated products to database in bulk.
+        Nothing is added if any product id is a duplicate.
+
+        Args:
+            products (list[Product]): Validated products.
+
+        Raises:
+            TypeError: If products is not a list.
+            SQLException: If error with database.
+
+        Returns: None
+        """
+
+        # verify products type
+        if not isinstance(products, list):
+            # raise type error
+            raise TypeError("'products' should be a valid list.")
+
+        # create records in database
+        self.__sql_service.create_many(products)
+        self.__invalidate_products(products)
+
+        # keep allocated ids clear of the caller supplied ones
+        if self.__ids is not None and products:
+            self.__ids.advance_past_many(product.id for product in products)
+
     def get_product(self, query_data: dict) -> Product | None:
         """Get a single product from database matching the query.
 
@@ -57,8 +169,50 @@ class ProductCrudUsecase:
             # raise type error
             raise TypeError(self.QUERY_DATA_INVALID_ERROR)
 
+        # cached unless a query value is not hashable
+        key = None
+        if self.__cache is not None:
+            key = query_key("read_single", query_data)
+        if key is None:
+            # read & return from sql service
+            return self.__sql_service.read_single(query_data)
+
+        # refreshes may run after the caller changed its dict
+        query_data = dict(query_data)
+
+        # read from cache or sql service, queries on an id are indexed by
+        # the id
+        product = self.__cache.get_or_load(  # type: ignore
+            key,
+            lambda: self.__sql_service.read_single(query_data),
+            index=(query_data["id"],) if "id" in query_data else (),
+        )
+
+        # callers may change the product, the cached one is shared
+        return product.model_copy() if product is not None else None
+
+    def get_products_by_ids(self, ids: list[int]) -> list[Product | None]:
+        """Get products by id with a single database lookup.
+
+        Args:
+            ids (list[int]): Product ids, may repeat.
+
+        Raises:
+            TypeError: If ids is not a list.
+            SQLException: If error with database.
+
+        Returns:
+            list[Product | None]: Product of every id in 'ids' order,
+                None for missing ids.
+        """
+
+        # verify ids type
+        if not isinstance(ids, list):
+            # raise type error
+            raise TypeError("'ids' should be a valid list.")
+
         # read & return from sql service
-        return self.__sql_service.read_single(query_data)
+        return self.__sql_service.read_by_ids(ids)
 
     def get_products(self, query_data: dict) -> list[Product]:
         """Get all the products from database matching the query.
@@ -102,7 +256,97 @@ class ProductCrudUsecase:
             raise TypeError("'updated_product' should be a valid model.")
 
         # update & return from sql service
-        return self.__sql_service.update(updated_product)
+        result = self.__sql_service.update(updated_product)
+        self.__invalidate_products([updated_product])
+
+        return result
+
+    def get_product_versioned(
+        self, product_id: int
+    ) -> tuple[Product | None, int | None]:
+        """Get a product and its row version, to update it later with
+        update_product_if_version().
+
+        Args:
+            product_id (int): Product id.
+
+        Raises:
+            SQLException: If error with database or row versions are not
+                supported.
+
+        Returns:
+            tuple[Product | None, int | None]: Product and its version,
+                (None, None) if not found.
+        """
+
+        # read & return from sql service
+        return self.__sql_service.read_versioned(product_id)
+
+    def update_product_if_version(
+        self, updated_product: Product, expected_version: int
+    ) -> int:
+        """Update existing product in database only if it was not written
+        since it was read at 'expected_version'.
+
+        Args:
+            updated_product (Product): Updated product object.
+            expected_version (int): Version of the product when read.
+
+        Raises:
+            TypeError: If updated_product is not a valid model.
+            VersionConflict: If the product was written or deleted since.
+            SQLException: If error with database.
+
+        Returns:
+            int: New version of the product.
+        """
+
+        # verify updated_product type
+        if not isinstance(updated_product, BaseModel):
+            # raise type error
+            raise TypeError("'updated_product' should be a valid model.")
+
+        # update & return from sql service
+        version = self.__sql_service.update_if_version(
+            updated_product, expected_version
+        )
+        self.__invalidate_products([updated_product])
+
+        return version
+
+    def modify_product(
+        self,
+        product_id: int,
+        change: Callable[[Product], Product],
+        retries: int = RETRIES,
+    ) -> Product | None:
+        """Apply a change to a product without locking it, the change is
+        applied again to the latest product if a concurrent writer
+        updated it first.
+
+        Args:
+            product_id (int): Product id.
+            change (Callable[[Product], Product]): Returns the updated
+                product, e.g. 'lambda p: p.model_copy(update={...})'.
+            retries (int): Number of attempts after the first one.
+
+        Raises:
+            ValueError: If change returns a product with another id.
+            VersionConflict: If every attempt conflicts.
+            SQLException: If error with database.
+
+        Returns:
+            Product | None: Updated product, None if not found.
+        """
+
+        # update & return with retries
+        product = update_with_retry(
+            self.__sql_service, product_id, change, retries
+        )
+        if product is not None:
+            self.__invalidate_products([product])
+
+        return product
 
     def delete_product(self, query_data: dict) -> None:
         """Delete product(s) from database matching the query.
@@ -124,4 +368,70 @@ class ProductCrudUsecase:
             raise TypeError(self.QUERY_DATA_INVALID_ERROR)
 
         # delete & return from sql service
-        return self.__sql_service.delete(query_data)
+        result = self.__sql_service.delete(query_data)
+        self.__invalidate_query(query_data)
+
+        return result
+
+    def get_view(
+        self,
+        name: str,
+        group: Hashable = None,
+    ) -> dict[str, Any] | None:
+        """Get aggregates of a materialized view group, without reading
+        the database.
+
+        Args:
+            name (str): View name.
+            group (Hashable): Group key, None for views without groups.
+
+        Raises:
+            ValueError: If no view is registered with this name.
+
+        Returns:
+            dict[str, Any] | None: Aggregates by name, None if no product
+                is in the group.
+        """
+
+        # verify views
+        if self.__views is None:
+            raise ValueError(f"unknown view: {name}")
+
+        # read & return from view
+        return self.__views.get(name).get(group)
+
+    def __invalidate_products(self, products: list[Product]) -> None:
+        """Remove cached results of created or updated products: results
+        of the same ids and queries the products now match. Results of
+        queries on other ids are not checked."""
+
+        if self.__cache is None or not products:
+            return
+
+        ids = {product.id for product in products}
+
+        def changed(key: Hashable, cached: Product | None) -> bool:
+            if cached is not None and cached.id in ids:
+                return True
+            query_data = dict(key[1])  # type: ignore
+            return any(_matches(query_data, product) for product in products)
+
+        self.__cache.invalidate_indexed(ids, changed)
+
+    def __invalidate_query(self, query_data: dict) -> None:
+        """Remove cached products matching a delete query, results of
+        queries on other ids are not checked if the query has an id."""
+
+        if self.__cache is None:
+            return
+
+        def deleted(_: Hashable, cached: Product | None) -> bool:
+            return cached is not None and _matches(query_data, cached)
+
+        try:
+            ids = {query_data["id"]}
+        except (KeyError, TypeError):
+            # any cached product may be deleted
+            self.__cache.invalidate_where(deleted)
+        else:
+            self.__cache.invalidate_indexed(ids, deleted)
@@ -0,0 +1,46 @@
+"""This file includes the materialized views of products used by the
+dashboards."""
+
+
+from core.services.sql_service.materialized_view import (
+    MaterializedView,
+    avg_of,
+    count,
+    sum_of,
+)
+
+
+# width of a price bucket
+PRICE_BUCKET_SIZE = 10
+
+# products per price bucket, grouped by bucket lower bound
+PRODUCTS_PER_PRICE_BUCKET = "products_per_price_bucket"
+
+# count, total value and average price of the catalogue
+CATALOGUE_TOTALS = "catalogue_totals"
+
+
+def price_bucket(record: dict) -> int:
+    """Return lower bound of the price bucket of a product record."""
+
+    return int(record["price"] // PRICE_BUCKET_SIZE) * PRICE_BUCKET_SIZE
+
+
+def product_views() -> list[MaterializedView]:
+    """Return new instances of the product views."""
+
+    return [
+        MaterializedView(
+            PRODUCTS_PER_PRICE_BUCKET,
+            {"count": count()},
+            group_by=price_bucket,
+        ),
+        MaterializedView(
+            CATALOGUE_TOTALS,
+            {
+                "count": count(),
+                "total_value": sum_of("price"),
+                "average_price": avg_of("price"),
+            },
+        ),
+    ]
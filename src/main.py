@@ -1 +1,69 @@
-"""Python program entrypoint."""
+"""Python program entrypoint.
+
+Usage:
+    python main.py load catalogue.csv [--chunk-size 10000] [--workers 4]
+    python main.py load catalogue.ndjson.gz [--format ndjson]
+"""
+
+
+import argparse
+import sys
+
+from core import dependency_injection as di
+from features.product.loaders.catalogue_loader import FORMATS, load_catalogue
+
+
+def load(args: argparse.Namespace) -> int:
+    """Load a product catalogue file into database."""
+
+    report = load_catalogue(
+        args.path,
+        di.product_crud_usecase,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        file_format=args.format,
+    )
+
+    # print report
+    print(
+        f"rows: {report.rows}, inserted: {report.inserted}, "
+        f"rejected: {report.rejected}, seconds: {report.seconds:.3f}, "
+        f"rows/sec: {report.rows_per_second:.1f}"
+    )
+    for row_error in report.errors:
+        messages = "; ".join(error["msg"] for error in row_error.errors)
+        print(f"row {row_error.index}: {messages}", file=sys.stderr)
+
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse command line arguments and run the selected command.
+
+    Args:
+        argv (list[str] | None): Command line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+
+    parser = argparse.ArgumentParser(prog="python main.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # load command
+    load_parser = commands.add_parser(
+        "load", help="load a CSV or NDJSON product catalogue"
+    )
+    load_parser.add_argument("path")
+    load_parser.add_argument("--format", choices=FORMATS, default=None)
+    load_parser.add_argument("--chunk-size", type=int, default=10_000)
+    load_parser.add_argument("--workers", type=int, default=None)
+    load_parser.set_defaults(handler=load)
+
+    args = parser.parse_args(argv)
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""Integration Test Cases
+
+- load command should load a catalogue file into database
+- load command should print rejected rows
+"""
+
+from core.services.sql_service.mysql_service import DATABASE
+from main import main
+
+
+def test_load_command(tmp_path, capsys):
+    """Load command should load a catalogue file into database."""
+
+    # write csv catalogue
+    path = tmp_path / "catalogue.csv"
+    path.write_text("id,name,price\n1,apple,2.99\n2,orange,3.99\n")
+
+    # run load command
+    code = main(["load", str(path), "--workers", "0"])
+
+    # verify exit code and output
+    assert code == 0
+    assert "rows: 2, inserted: 2, rejected: 0" in capsys.readouterr().out
+
+    # verify database
+    assert DATABASE == [
+        {"id": 1, "name": "apple", "price": 2.99},
+        {"id": 2, "name": "orange", "price": 3.99},
+    ]
+
+    # remove products from database
+    DATABASE.clear()
+
+
+def test_load_command_rejected(tmp_path, capsys):
+    """Load command should print rejected rows."""
+
+    # write ndjson catalogue with an invalid row
+    path = tmp_path / "catalogue.ndjson"
+    path.write_text('{"id": -1, "name": "apple", "price": 2.99}\n')
+
+    # run load command
+    code = main(["load", str(path), "--workers", "0"])
+
+    # verify exit code and output
+    assert code == 0
+    output = capsys.readouterr()
+    assert "rows: 1, inserted: 0, rejected: 1" in output.out
+    assert "row 1: Value error, 'id' must be a positive integer" in output.err
+
+    # verify empty database
+    assert DATABASE == []